@@ -1,94 +1,144 @@
 #!/usr/bin/env python3
 """
 Build RELATED_TO relationships between entities based on co-occurrence in chunks
+
+Co-occurrence counts are computed as X^T X over the sparse chunk-entity
+incidence matrix (see knowledge_ingestion_agent/cooccurrence.py) and written
+back in batches, so memory and transaction size stay bounded on the full corpus.
+With --incremental only entities mentioned by chunks written since the last run
+are recomputed, with the parameters recorded by the last build.
 """
 
 import os
+import sys
+import json
+import time
 import logging
+import argparse
 from neo4j import GraphDatabase
 from datetime import datetime
 
+# Add the knowledge_ingestion_agent directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'knowledge_ingestion_agent'))
+
+from cooccurrence import CooccurrenceBuilder, WEIGHTINGS
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+STATE_FILE = os.path.join('data', 'cooccurrence_state.json')
+
+# Build parameters and their defaults; incremental runs reuse the recorded ones
+PARAMETERS = {'min_count': 2, 'weighting': 'count', 'top_k': None}
+
+
+def load_state(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_state(path: str, state: dict):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def resolve_parameters(state: dict, incremental: bool, **given) -> dict:
+    """
+    Parameters for this run: an incremental run on top of a recorded build
+    uses the build's, a full build the given ones (None takes the default)
+
+    Raises ValueError when an incremental run is given parameters that differ from the recorded build.
+    """
+    if not (incremental and state.get('last_run')):
+        return {name: default if given.get(name) is None else given[name] for name, default in PARAMETERS.items()}
+    recorded = {name: state.get(name, default) for name, default in PARAMETERS.items()}
+    conflicts = [f"{name}={value!r} (recorded {recorded[name]!r})" for name, value in given.items()
+                 if value is not None and value != recorded[name]]
+    if conflicts:
+        raise ValueError(f"Incremental run parameters differ from the recorded build: {', '.join(conflicts)}; "
+                         f"rebuild without --incremental to change them")
+    return recorded
 
-def build_entity_relationships(uri: str, user: str, password: str):
+
+def build_entity_relationships(uri: str, user: str, password: str, min_count: int = None,
+                               weighting: str = None, top_k: int = None,
+                               incremental: bool = False, batch_size: int = 5000,
+                               state_file: str = STATE_FILE):
     """Build RELATED_TO relationships between entities that co-occur in chunks"""
-    
+
+    state = load_state(state_file)
+    parameters = resolve_parameters(state, incremental, min_count=min_count, weighting=weighting, top_k=top_k)
     driver = GraphDatabase.driver(uri, auth=(user, password))
-    
+    builder = CooccurrenceBuilder(driver, batch_size=batch_size)
+
     try:
         with driver.session() as session:
-            # First, let's check how many chunks have entities
-            result = session.run("""
-                MATCH (c:Chunk)-[:CONTAINS_ENTITY]->(e:Entity)
-                RETURN COUNT(DISTINCT c) as chunks_with_entities,
-                       COUNT(DISTINCT e) as total_entities
-            """)
-            stats = result.single()
-            logger.info(f"Found {stats['chunks_with_entities']} chunks with {stats['total_entities']} entities")
-            
-            # Create RELATED_TO relationships based on co-occurrence
-            logger.info("Building entity relationships based on co-occurrence...")
-            
-            # This query creates relationships between entities that appear in the same chunk
-            # The strength is the number of chunks they co-occur in
-            result = session.run("""
-                MATCH (c:Chunk)-[:CONTAINS_ENTITY]->(e1:Entity)
-                MATCH (c)-[:CONTAINS_ENTITY]->(e2:Entity)
-                WHERE id(e1) < id(e2)  // Avoid duplicates and self-relationships
-                WITH e1, e2, COUNT(DISTINCT c) as cooccurrence_count
-                WHERE cooccurrence_count > 1  // Only create relationship if they co-occur in multiple chunks
-                MERGE (e1)-[r:RELATED_TO]-(e2)
-                SET r.strength = cooccurrence_count
-                RETURN COUNT(r) as relationships_created
-            """)
-            
-            rel_count = result.single()['relationships_created']
-            logger.info(f"Created {rel_count} RELATED_TO relationships")
-            
-            # Add some statistics about the relationships
-            result = session.run("""
-                MATCH ()-[r:RELATED_TO]->()
-                RETURN MIN(r.strength) as min_strength,
-                       MAX(r.strength) as max_strength,
-                       AVG(r.strength) as avg_strength,
-                       COUNT(r) as total_relationships
-            """)
-            
-            stats = result.single()
-            logger.info(f"Relationship statistics:")
-            logger.info(f"  Total relationships: {stats['total_relationships']}")
-            logger.info(f"  Min strength: {stats['min_strength']}")
-            logger.info(f"  Max strength: {stats['max_strength']}")
-            logger.info(f"  Avg strength: {stats['avg_strength']:.2f}")
-            
-            # Create index on Entity.id for better performance
-            logger.info("Creating index on Entity.id...")
-            session.run("CREATE INDEX entity_id IF NOT EXISTS FOR (e:Entity) ON (e.id)")
-            
+            started_at = session.run("RETURN timestamp() as now").single()["now"]
+
+        if incremental and state.get('last_run'):
+            logger.info(f"Updating co-occurrence edges for chunks written since "
+                        f"{datetime.fromtimestamp(state['last_run'] / 1000).isoformat()}...")
+            written = builder.update(state['last_run'], **parameters)
+        else:
+            if incremental:
+                logger.info("No previous run recorded, building the full co-occurrence graph")
+            written = builder.build(**parameters)
+        logger.info(f"Wrote {written} RELATED_TO relationships")
+
+        save_state(state_file, {'last_run': started_at, **parameters})
+
+        # Add some statistics about the relationships
+        stats = builder.statistics()
+        logger.info("Relationship statistics:")
+        logger.info(f"  Total relationships: {stats['total_relationships']}")
+        logger.info(f"  Min strength: {stats['min_strength']}")
+        logger.info(f"  Max strength: {stats['max_strength']}")
+        logger.info(f"  Avg strength: {(stats['avg_strength'] or 0):.2f}")
+
     finally:
         driver.close()
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Build entity co-occurrence (RELATED_TO) relationships')
+    parser.add_argument('--min-count', type=int, help='Minimum number of shared chunks (default 2)')
+    parser.add_argument('--weighting', choices=WEIGHTINGS,
+                        help='Edge weight: raw count (default), positive PMI, or IDF-weighted count')
+    parser.add_argument('--top-k', type=int, help='Keep only the k strongest partners per entity')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only recompute entities in chunks written since the last run, '
+                             'with the parameters of the recorded build')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Edges per write transaction')
+    parser.add_argument('--state-file', default=STATE_FILE, help='Where the last run time is recorded')
+    args = parser.parse_args()
+
     # Neo4j connection details
     neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
     neo4j_user = os.getenv("NEO4J_USER", "neo4j")
     neo4j_password = os.getenv("NEO4J_PASSWORD", "knowledge123")
-    
+
     logger.info("Starting entity relationship building process...")
-    start_time = datetime.now()
-    
-    build_entity_relationships(neo4j_uri, neo4j_user, neo4j_password)
-    
-    end_time = datetime.now()
-    duration = (end_time - start_time).total_seconds()
+    start_time = time.time()
+
+    try:
+        build_entity_relationships(neo4j_uri, neo4j_user, neo4j_password,
+                                   min_count=args.min_count, weighting=args.weighting, top_k=args.top_k,
+                                   incremental=args.incremental, batch_size=args.batch_size,
+                                   state_file=args.state_file)
+    except ValueError as e:
+        parser.error(str(e))
+
+    duration = time.time() - start_time
     logger.info(f"Entity relationship building completed in {duration:.2f} seconds")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Build RELATED_CHUNK relationships: each chunk's top-k related chunks
+
+Scores blend IDF-weighted shared entities with embedding similarity (see
+knowledge_ingestion_agent/related_chunks.py). graphrag_search follows these
+edges as a single indexed hop. With --incremental only chunks written since the
+last run, and the chunks they relate to, are recomputed, with the parameters
+recorded by the last build.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from neo4j import GraphDatabase
+from datetime import datetime
+
+# Add the knowledge_ingestion_agent directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'knowledge_ingestion_agent'))
+
+from related_chunks import RelatedChunkBuilder, DEFAULT_TOP_K, DEFAULT_ENTITY_WEIGHT
+from chunk_snapshot import DEFAULT_SNAPSHOT_DIR
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+STATE_FILE = os.path.join('data', 'related_chunks_state.json')
+
+# Build parameters and their defaults; incremental runs reuse the recorded ones
+PARAMETERS = {'top_k': DEFAULT_TOP_K, 'entity_weight': DEFAULT_ENTITY_WEIGHT}
+
+
+def load_state(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_state(path: str, state: dict):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def resolve_parameters(state: dict, incremental: bool, **given) -> dict:
+    """
+    Parameters for this run: an incremental run on top of a recorded build
+    uses the build's, a full build the given ones (None takes the default)
+
+    Raises ValueError when an incremental run is given parameters that differ from the recorded build.
+    """
+    if not (incremental and state.get('last_run')):
+        return {name: default if given.get(name) is None else given[name] for name, default in PARAMETERS.items()}
+    recorded = {name: state.get(name, default) for name, default in PARAMETERS.items()}
+    conflicts = [f"{name}={value!r} (recorded {recorded[name]!r})" for name, value in given.items()
+                 if value is not None and value != recorded[name]]
+    if conflicts:
+        raise ValueError(f"Incremental run parameters differ from the recorded build: {', '.join(conflicts)}; "
+                         f"rebuild without --incremental to change them")
+    return recorded
+
+
+def build_related_chunks(uri: str, user: str, password: str, top_k: int = None,
+                         entity_weight: float = None, incremental: bool = False,
+                         snapshot_dir: str = DEFAULT_SNAPSHOT_DIR, batch_size: int = 5000,
+                         state_file: str = STATE_FILE):
+    """Build RELATED_CHUNK relationships for every (or every changed) chunk"""
+
+    state = load_state(state_file)
+    parameters = resolve_parameters(state, incremental, top_k=top_k, entity_weight=entity_weight)
+    driver = GraphDatabase.driver(uri, auth=(user, password))
+    builder = RelatedChunkBuilder(driver, snapshot_dir=snapshot_dir, batch_size=batch_size)
+
+    try:
+        with driver.session() as session:
+            started_at = session.run("RETURN timestamp() as now").single()["now"]
+
+        if incremental and state.get('last_run'):
+            logger.info(f"Updating related chunks for chunks written since "
+                        f"{datetime.fromtimestamp(state['last_run'] / 1000).isoformat()}...")
+            written = builder.update(state['last_run'], **parameters)
+        else:
+            if incremental:
+                logger.info("No previous run recorded, building all related-chunk lists")
+            written = builder.build(**parameters)
+        logger.info(f"Wrote {written} RELATED_CHUNK relationships")
+
+        save_state(state_file, {'last_run': started_at, **parameters})
+
+        stats = builder.statistics()
+        logger.info("Relationship statistics:")
+        logger.info(f"  Total relationships: {stats['total_relationships']}")
+        logger.info(f"  Min score: {(stats['min_score'] or 0):.3f}")
+        logger.info(f"  Max score: {(stats['max_score'] or 0):.3f}")
+        logger.info(f"  Avg score: {(stats['avg_score'] or 0):.3f}")
+
+    finally:
+        driver.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build top-k RELATED_CHUNK relationships')
+    parser.add_argument('--top-k', type=int, help=f'Related chunks stored per chunk (default {DEFAULT_TOP_K})')
+    parser.add_argument('--entity-weight', type=float,
+                        help='Weight of IDF-weighted shared entities vs embedding similarity (0-1, '
+                             f'default {DEFAULT_ENTITY_WEIGHT})')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only recompute chunks written since the last run and their neighbours, '
+                             'with the parameters of the recorded build')
+    parser.add_argument('--snapshot-dir', default=DEFAULT_SNAPSHOT_DIR,
+                        help='Columnar chunk snapshot to read embeddings from (built if missing)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Edges per write transaction')
+    parser.add_argument('--state-file', default=STATE_FILE, help='Where the last run time is recorded')
+    args = parser.parse_args()
+
+    # Neo4j connection details
+    neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+    neo4j_user = os.getenv("NEO4J_USER", "neo4j")
+    neo4j_password = os.getenv("NEO4J_PASSWORD", "knowledge123")
+
+    logger.info("Starting related-chunk building process...")
+    start_time = time.time()
+
+    try:
+        build_related_chunks(neo4j_uri, neo4j_user, neo4j_password,
+                             top_k=args.top_k, entity_weight=args.entity_weight,
+                             incremental=args.incremental, snapshot_dir=args.snapshot_dir,
+                             batch_size=args.batch_size, state_file=args.state_file)
+    except ValueError as e:
+        parser.error(str(e))
+
+    duration = time.time() - start_time
+    logger.info(f"Related-chunk building completed in {duration:.2f} seconds")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,22 @@
 Enhanced API with improved reranking using chunk metadata
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any
 import logging
 from contextlib import asynccontextmanager
 from sentence_transformers import CrossEncoder
 from search_engine import KnowledgeSearchEngine, SearchResult
+from graph_snapshot import GraphSnapshotManager, DEFAULT_REFRESH_INTERVAL
+from schema_manager import SchemaManager
+from metrics import REGISTRY, CONTENT_TYPE, HTTP_SECONDS, search_request, stage
+from request_trace import RequestTrace, SLOW_REQUESTS
+from neo4j import GraphDatabase
 import os
 import sys
+import time
 sys.path.append('/app')
 
 logging.basicConfig(level=logging.INFO)
@@ -20,19 +27,45 @@ logger = logging.getLogger(__name__)
 search_engine = None
 cross_encoder = None
 text2cypher = None
+graph_snapshot = None
+schema_status = None
+
+def neo4j_driver():
+    return GraphDatabase.driver(
+        os.getenv("NEO4J_URI", "bolt://localhost:7687"),
+        auth=(os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "knowledge123"))
+    )
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize resources on startup"""
-    global search_engine, cross_encoder, text2cypher
+    global search_engine, cross_encoder, text2cypher, graph_snapshot, schema_status
     
     logger.info("Initializing enhanced API with improved reranking...")
     
+    # Apply constraints and indexes once per deployment and warm the hot ones (SCHEMA_STARTUP=0 skips)
+    if os.getenv("SCHEMA_STARTUP", "1") != "0":
+        driver = neo4j_driver()
+        try:
+            schema_status = SchemaManager(driver).startup(warm=os.getenv("SCHEMA_WARMUP", "1") != "0")
+        finally:
+            driver.close()
+    
+    # Load the in-memory graph snapshot used for graph expansion (GRAPH_SNAPSHOT=0 disables it)
+    if os.getenv("GRAPH_SNAPSHOT", "1") != "0":
+        logger.info("Loading in-memory graph snapshot...")
+        graph_snapshot = GraphSnapshotManager(
+            neo4j_driver(),
+            refresh_interval=float(os.getenv("GRAPH_SNAPSHOT_REFRESH_SECONDS", DEFAULT_REFRESH_INTERVAL))
+        )
+        graph_snapshot.start()
+    
     # Initialize search engine
     search_engine = KnowledgeSearchEngine(
         neo4j_uri=os.getenv("NEO4J_URI", "bolt://localhost:7687"),
         neo4j_user=os.getenv("NEO4J_USER", "neo4j"),
-        neo4j_password=os.getenv("NEO4J_PASSWORD", "knowledge123")
+        neo4j_password=os.getenv("NEO4J_PASSWORD", "knowledge123"),
+        graph_snapshot=graph_snapshot
     )
     
     # Initialize cross-encoder for reranking
@@ -54,9 +87,29 @@ async def lifespan(app: FastAPI):
     
     # Cleanup
     logger.info("Shutting down API...")
+    if graph_snapshot is not None:
+        graph_snapshot.stop()
+        graph_snapshot.driver.close()
 
 app = FastAPI(title="Knowledge Graph API with Enhanced Reranking", version="2.0", lifespan=lifespan)
 
+SEARCH_TYPES = {"vector", "graph", "full_text", "hybrid", "graphrag", "ppr", "text2cypher",
+                "mcp_cypher", "neo4j_mcp"}
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Latency of every request, labelled by route template to keep label values bounded"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_SECONDS.observe(time.perf_counter() - start, method=request.method,
+                             path=route.path if route is not None else "unmatched", status=status)
+
 def analyze_query_type(query: str) -> str:
     """Analyze query to determine type"""
     query_lower = query.lower()
@@ -195,6 +248,8 @@ class SearchRequest(BaseModel):
     top_k: int = 10
     weights: Optional[Dict[str, float]] = None
     use_reranking: bool = True
+    debug: bool = False      # return the span tree and the Cypher sent, with PROFILE db hits
+    profile: bool = False    # debug plus a sampled Python profile of the request
 
 class SearchResponse(BaseModel):
     query: str
@@ -202,6 +257,7 @@ class SearchResponse(BaseModel):
     results: List[Dict[str, Any]]
     total_results: int
     reranking_applied: bool
+    debug: Optional[Dict[str, Any]] = None
 
 class StatsResponse(BaseModel):
     documents: int
@@ -257,6 +313,19 @@ async def get_stats():
 @app.post("/search", response_model=SearchResponse)
 async def search(request: SearchRequest):
     """Perform search with enhanced reranking"""
+    search_type = request.search_type if request.search_type in SEARCH_TYPES else "invalid"
+    trace = RequestTrace("search", debug=request.debug, profile=request.profile)
+    try:
+        with trace, search_request(search_type):
+            response = await run_search(request)
+    finally:
+        SLOW_REQUESTS.add(trace, query=request.query, search_type=request.search_type)
+    if trace.debug:
+        response.debug = trace.to_dict()
+    return response
+
+async def run_search(request: SearchRequest) -> SearchResponse:
+    """Retrieve, rerank and serialise one search; stages are timed into /metrics"""
     try:
         # Get more candidates if reranking is enabled
         top_k = request.top_k * 2 if request.use_reranking else request.top_k
@@ -272,6 +341,8 @@ async def search(request: SearchRequest):
             results = search_engine.hybrid_search(request.query, top_k, request.weights)
         elif request.search_type == "graphrag":
             results = search_engine.graphrag_search(request.query, top_k)
+        elif request.search_type == "ppr":
+            results = search_engine.ppr_search(request.query, top_k)
         elif request.search_type == "text2cypher":
             # Use Text2CypherRetriever for natural language queries
             cypher_result = text2cypher.execute_natural_query(request.query)
@@ -329,41 +400,70 @@ async def search(request: SearchRequest):
         # Apply enhanced reranking if enabled
         if request.use_reranking and results:
             logger.info(f"Applying enhanced reranking to {len(results)} results")
-            results_dict = enhanced_rerank_results(request.query, results)
+            with stage('rerank'):
+                results_dict = enhanced_rerank_results(request.query, results)
             results_dict = results_dict[:request.top_k]  # Return requested number
             reranking_applied = True
         else:
-            # Convert to dict format without reranking
-            results_dict = []
-            for result in results[:request.top_k]:
-                results_dict.append({
-                    "chunk_id": result.chunk_id,
-                    "text": result.text,
-                    "score": result.score,
-                    "document_id": result.document_id,
-                    "page_num": result.page_num,
-                    "entities": result.entities,
-                    "search_type": result.search_type,
-                    "metadata": result.metadata
-                })
+            results_dict = None
             reranking_applied = False
         
-        return SearchResponse(
-            query=request.query,
-            search_type=request.search_type,
-            results=results_dict,
-            total_results=len(results_dict),
-            reranking_applied=reranking_applied
-        )
+        with stage('serialisation'):
+            if results_dict is None:
+                # Convert to dict format without reranking
+                results_dict = []
+                for result in results[:request.top_k]:
+                    results_dict.append({
+                        "chunk_id": result.chunk_id,
+                        "text": result.text,
+                        "score": result.score,
+                        "document_id": result.document_id,
+                        "page_num": result.page_num,
+                        "entities": result.entities,
+                        "search_type": result.search_type,
+                        "metadata": result.metadata
+                    })
+            
+            return SearchResponse(
+                query=request.query,
+                search_type=request.search_type,
+                results=results_dict,
+                total_results=len(results_dict),
+                reranking_applied=reranking_applied
+            )
         
     except Exception as e:
         logger.error(f"Search error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=str(e)) from e
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "enhanced_reranking": True}
+    return {
+        "status": "healthy",
+        "enhanced_reranking": True,
+        "graph_snapshot": graph_snapshot.info() if graph_snapshot is not None else {"loaded": False},
+        "schema": schema_status
+    }
+
+@app.get("/metrics")
+async def metrics():
+    """Search stage latencies, cache lookups, Neo4j pool waits and errors in the Prometheus text format"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/admin/slow-requests")
+async def slow_requests(limit: int = 20):
+    """Span trees of the slowest searches since startup (SLOW_REQUEST_BUFFER of them are kept)"""
+    return {"capacity": SLOW_REQUESTS.capacity, "requests": SLOW_REQUESTS.slowest(limit)}
+
+@app.get("/schema")
+async def schema_report(sizes: bool = False):
+    """State, usage and (optionally) entry counts of every declared index"""
+    driver = neo4j_driver()
+    try:
+        return SchemaManager(driver).report(sizes=sizes)
+    finally:
+        driver.close()
 
 # Text2Cypher endpoints
 class Text2CypherRequest(BaseModel):
@@ -55,45 +55,43 @@ class EnhancedMCPNeo4jClient(MCPNeo4jClient):
         return self._advanced_text_search(query)
     
     def _balance_query(self, query: str) -> str:
-        """Generate Cypher for balance-related queries"""
+        """Generate Cypher for balance-related queries (index seek on numeric Fact nodes)"""
         return """
-        MATCH (c:Chunk)-[:BELONGS_TO]->(d:Document)
-        WHERE c.text =~ '(?i).*(minimum|initial|opening).*balance.*' 
-           OR c.text =~ '(?i).*balance.*(requirement|minimum|maintain).*'
-           OR c.text =~ '(?i).*\$[0-9,]+.*balance.*'
-        WITH c, d, 
-             CASE 
-                WHEN c.text =~ '(?i).*minimum.*balance.*' THEN 2.0
-                WHEN c.text =~ '(?i).*balance.*requirement.*' THEN 1.5
+        MATCH (f:Fact)
+        WHERE f.kind IN ['balance', 'amount'] AND f.qualifier IN ['minimum', 'maximum']
+        MATCH (d:Document)-[:HAS_CHUNK]->(c:Chunk)-[:HAS_FACT]->(f)
+        WITH c, d,
+             max(CASE
+                WHEN f.kind = 'balance' AND f.qualifier = 'minimum' THEN 2.0
+                WHEN f.qualifier = 'minimum' THEN 1.5
                 ELSE 1.0
-             END as relevance_boost
+             END) as relevance_boost
         RETURN c.text as text, 
                d.filename as document, 
                c.page_num as page, 
-               c.chunk_id as chunk_id,
-               c.semantic_density * relevance_boost as score
+               c.id as chunk_id,
+               coalesce(c.semantic_density, 0.5) * relevance_boost as score
         ORDER BY score DESC
         LIMIT $limit
         """
     
     def _interest_rate_query(self, query: str) -> str:
-        """Generate Cypher for interest rate queries"""
+        """Generate Cypher for interest rate queries (index seek on numeric Fact nodes)"""
         return """
-        MATCH (c:Chunk)-[:BELONGS_TO]->(d:Document)
-        WHERE c.text =~ '(?i).*interest.*rate.*' 
-           OR c.text =~ '(?i).*[0-9]+(\.[0-9]+)?%.*'
-           OR c.text =~ '(?i).*(variable|fixed|floating).*rate.*'
+        MATCH (f:Fact)
+        WHERE f.kind = 'rate'
+        MATCH (d:Document)-[:HAS_CHUNK]->(c:Chunk)-[:HAS_FACT]->(f)
         WITH c, d,
-             CASE
-                WHEN c.text =~ '(?i).*current.*interest.*rate.*' THEN 2.0
-                WHEN c.text =~ '(?i).*[0-9]+(\.[0-9]+)?%.*per.*annum.*' THEN 1.8
+             max(CASE
+                WHEN toLower(f.context) CONTAINS 'interest' THEN 2.0
+                WHEN toLower(f.context) CONTAINS 'p.a.' OR toLower(f.context) CONTAINS 'per annum' THEN 1.8
                 ELSE 1.0
-             END as relevance_boost
+             END) as relevance_boost
         RETURN c.text as text, 
                d.filename as document, 
                c.page_num as page, 
-               c.chunk_id as chunk_id,
-               c.semantic_density * relevance_boost as score
+               c.id as chunk_id,
+               coalesce(c.semantic_density, 0.5) * relevance_boost as score
         ORDER BY score DESC
         LIMIT $limit
         """
@@ -114,7 +112,7 @@ class EnhancedMCPNeo4jClient(MCPNeo4jClient):
         """
     
     def _fee_query(self, query: str) -> str:
-        """Generate Cypher for fee-related queries"""
+        """Generate Cypher for fee-related queries (index seek on numeric Fact nodes)"""
         fee_type = "general"
         if "international" in query.lower():
             fee_type = "international"
@@ -123,23 +121,25 @@ class EnhancedMCPNeo4jClient(MCPNeo4jClient):
         elif "transaction" in query.lower():
             fee_type = "transaction"
         
+        # Only the fixed fee_type keyword is inlined; the user's text never reaches the query
+        context_filter = f"AND toLower(f.context) CONTAINS '{fee_type}'" if fee_type != "general" else ""
+        
         return f"""
-        MATCH (c:Chunk)-[:BELONGS_TO]->(d:Document)
-        WHERE c.text =~ '(?i).*(fee|charge|cost).*' 
-           {'AND c.text =~ "(?i).*international.*"' if fee_type == 'international' else ''}
-           {'AND c.text =~ "(?i).*account.*"' if fee_type == 'account' else ''}
-           {'AND c.text =~ "(?i).*transaction.*"' if fee_type == 'transaction' else ''}
+        MATCH (f:Fact)
+        WHERE f.kind = 'fee'
+        MATCH (d:Document)-[:HAS_CHUNK]->(c:Chunk)-[:HAS_FACT]->(f)
+        WHERE true {context_filter}
         WITH c, d,
-             CASE
-                WHEN c.text =~ '(?i).*\$[0-9]+.*' THEN 2.0
+             max(CASE
+                WHEN f.unit = 'currency' THEN 2.0
                 WHEN d.filename =~ '(?i).*fee.*' THEN 1.5
                 ELSE 1.0
-             END as relevance_boost
+             END) as relevance_boost
         RETURN c.text as text, 
                d.filename as document, 
                c.page_num as page, 
-               c.chunk_id as chunk_id,
-               c.semantic_density * relevance_boost as score
+               c.id as chunk_id,
+               coalesce(c.semantic_density, 0.5) * relevance_boost as score
         ORDER BY score DESC
         LIMIT $limit
         """
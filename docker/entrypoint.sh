@@ -8,9 +8,12 @@ echo "Waiting for Neo4j to be ready..."
 python /app/wait_for_neo4j.py
 
 if [ $? -eq 0 ]; then
-    echo "Neo4j is ready! Starting sequential ingestion for Docker..."
-    # Use the Docker-safe wrapper that processes files sequentially
-    python /app/docker_wrapper.py --inventory /data/inventories/mvp_inventory.json
+    echo "Neo4j is ready! Applying schema..."
+    python /app/schema_manager.py
+    echo "Starting sequential ingestion for Docker..."
+    # Use the Docker-safe wrapper that processes files sequentially,
+    # continuing from the checkpoint journal if a previous run died
+    python /app/docker_wrapper.py --inventory /data/inventories/mvp_inventory.json --resume
     echo "Ingestion complete. Container will exit."
     exit 0
 else
@@ -12,6 +12,30 @@ wait_for_neo4j() {
     echo "Neo4j is ready!"
 }
 
+# Offline seed from a neo4j-admin import bundle (export_neo4j.py --format admin-csv).
+# This must run before Neo4j starts and only targets a database that does not exist yet.
+OFFLINE_IMPORTED=false
+BUNDLE_DIR="${NEO4J_BOOTSTRAP_BUNDLE:-/data/backups/latest_import_bundle}"
+if [ "${NEO4J_BOOTSTRAP}" = "true" ] && [ -f "$BUNDLE_DIR/manifest.json" ]; then
+    DATABASE_NAME="${NEO4J_DATABASE:-neo4j}"
+    if [ ! -d "/data/databases/$DATABASE_NAME" ] || [ "${NEO4J_BOOTSTRAP_FORCE}" = "true" ]; then
+        echo "Seeding $DATABASE_NAME offline from bundle: $BUNDLE_DIR"
+        if python3 /scripts/bootstrap_neo4j.py --admin-import "$BUNDLE_DIR" --database "$DATABASE_NAME" \
+            ${NEO4J_BOOTSTRAP_FORCE:+--force}; then
+            OFFLINE_IMPORTED=true
+            # The importer ran as root; hand the store back to the neo4j user
+            if [ "$(id -u)" = "0" ]; then
+                chown -R neo4j:neo4j /data/databases /data/transactions 2>/dev/null || true
+            fi
+            echo "Offline import completed"
+        else
+            echo "Offline import failed, falling back to online bootstrap"
+        fi
+    else
+        echo "Database $DATABASE_NAME already exists. Skipping offline import."
+    fi
+fi
+
 # Start Neo4j in the background
 /startup/docker-entrypoint.sh neo4j &
 NEO4J_PID=$!
@@ -20,11 +44,22 @@ NEO4J_PID=$!
 wait_for_neo4j
 
 # Check if bootstrap is requested
-if [ "${NEO4J_BOOTSTRAP}" = "true" ]; then
+if [ "$OFFLINE_IMPORTED" = "true" ]; then
+    echo "Creating indexes for offline-imported database..."
+    python3 /scripts/bootstrap_neo4j.py --indexes-only || echo "Index creation failed"
+elif [ "${NEO4J_BOOTSTRAP}" = "true" ]; then
     echo "Bootstrap mode enabled"
     
     # Check if bootstrap file exists
-    BOOTSTRAP_FILE="${NEO4J_BOOTSTRAP_FILE:-/data/backups/latest_export.json}"
+    BOOTSTRAP_FILE="${NEO4J_BOOTSTRAP_FILE:-}"
+    if [ -z "$BOOTSTRAP_FILE" ]; then
+        for LATEST in latest_export.ndjson.zst latest_export.ndjson.gz latest_export.json; do
+            if [ -f "/data/backups/$LATEST" ]; then
+                BOOTSTRAP_FILE="/data/backups/$LATEST"
+                break
+            fi
+        done
+    fi
     
     if [ -f "$BOOTSTRAP_FILE" ]; then
         echo "Found bootstrap file: $BOOTSTRAP_FILE"
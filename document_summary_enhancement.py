@@ -3,6 +3,8 @@
 Design for document summary generation and graph integration
 """
 
+import os
+import sys
 import logging
 from typing import Dict, List, Optional, Tuple
 import json
@@ -11,6 +13,11 @@ from neo4j import GraphDatabase
 from sentence_transformers import SentenceTransformer
 import numpy as np
 
+# Add the knowledge_ingestion_agent directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'knowledge_ingestion_agent'))
+
+from schema_manager import SchemaManager
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -330,24 +337,7 @@ class DocumentSummaryGenerator:
     
     def _create_summary_indexes(self):
         """Create indexes for efficient summary-based search"""
-        with self.driver.session() as session:
-            # Full-text index on executive summaries
-            session.run("""
-                CREATE FULLTEXT INDEX summary_fulltext IF NOT EXISTS
-                FOR (s:Summary) ON EACH [s.executive_summary]
-            """)
-            
-            # Index on document types
-            session.run("""
-                CREATE INDEX summary_doc_type IF NOT EXISTS
-                FOR (s:Summary) ON (s.document_type)
-            """)
-            
-            # Index on complexity for filtering
-            session.run("""
-                CREATE INDEX summary_complexity IF NOT EXISTS
-                FOR (s:Summary) ON (s.complexity_score)
-            """)
+        SchemaManager(self.driver).apply(groups=['summary'])
 
 
 class SummaryEnhancedSearch:
@@ -3,6 +3,8 @@
 Design for hierarchical ontology enhancement to existing community detection
 """
 
+import os
+import sys
 import logging
 from typing import Dict, List, Set, Tuple, Optional
 from collections import defaultdict
@@ -12,6 +14,11 @@ import networkx as nx
 from community import community_louvain
 import json
 
+# Add the knowledge_ingestion_agent directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'knowledge_ingestion_agent'))
+
+from schema_manager import SchemaManager
+
 logger = logging.getLogger(__name__)
 
 class HierarchicalOntologyEnhancer:
@@ -175,10 +182,7 @@ class HierarchicalOntologyEnhancer:
         logger.info("Creating hierarchical search indexes...")
         
         # Index for domain-based search
-        session.run("""
-            CREATE INDEX entity_domain_search IF NOT EXISTS
-            FOR (e:Entity) ON (e.domain, e.subdomain)
-        """)
+        SchemaManager(self.driver).apply(groups=['ontology'])
         
         # Create search views for each domain
         for domain in self.domain_hierarchy.keys():
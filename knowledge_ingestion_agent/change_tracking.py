@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Change tracking for delta backups
+Writers stamp Document, Chunk, Entity and Fact nodes and the relationships they
+create with updated_at (server epoch milliseconds); community writes stamp
+Entity.community_updated_at. Every deleted Document, Chunk or Fact is recorded
+as a (:Tombstone {label, id, deleted_at}) node, and relationships deleted
+without their nodes as (:Tombstone {relationship, label, id, direction,
+deleted_at}): the relationships of that type on one node, or every one of the
+type when label is null. export_neo4j.py --delta reads stamps and tombstones
+to write only what changed since the previous backup.
+
+A relationship tombstone must be written before the relationships that
+replace the deleted ones, so a delta never deletes edges created after it.
+"""
+
+from typing import Dict, List, Optional
+
+TOMBSTONE_LABEL = "Tombstone"
+
+# Properties that identify a node across databases (internal ids do not survive a restore)
+KEY_PROPERTIES: Dict[str, List[str]] = {
+    "Document": ["id"],
+    "Chunk": ["id"],
+    "Entity": ["key"],
+    "Fact": ["id"],
+}
+
+# Stamps that mark a node as changed, per keyed label
+CHANGE_PROPERTIES: Dict[str, List[str]] = {
+    "Document": ["updated_at"],
+    "Chunk": ["updated_at"],
+    "Entity": ["updated_at", "community_updated_at"],
+    "Fact": ["updated_at"],
+}
+
+# Relationship types whose writers stamp updated_at (and which have an index on it)
+TRACKED_RELATIONSHIPS = ["HAS_CHUNK", "CONTAINS_ENTITY", "NEXT_CHUNK", "HAS_FACT",
+                         "RELATED_TO", "RELATED_CHUNK", "SIMILAR_TO"]
+
+# Properties that tell apart parallel relationships of a type between the same two nodes
+RELATIONSHIP_KEYS: Dict[str, List[str]] = {
+    "CONTAINS_ENTITY": ["start_char"],
+}
+
+
+def node_key(labels: List[str], properties: Dict) -> Dict:
+    """Identify a node by its first keyed label, or None when it has none"""
+    for label in labels:
+        keys = KEY_PROPERTIES.get(label)
+        if keys and all(properties.get(k) is not None for k in keys):
+            return {"label": label, "key": {k: properties[k] for k in keys}}
+    return None
+
+
+def tombstone_relationships(session, rel_type: str, label: Optional[str] = None,
+                            ids: Optional[List] = None, direction: str = "both") -> int:
+    """Record that the `rel_type` relationships of the nodes with these keys (all of them without a label) go
+
+    direction is 'out' when only the nodes' outgoing relationships are deleted.
+    """
+    if label is None:
+        session.run("CREATE (:Tombstone {relationship: $type, deleted_at: timestamp()})", type=rel_type).consume()
+        return 1
+    session.run("""
+        UNWIND $ids AS id
+        CREATE (:Tombstone {relationship: $type, label: $label, id: id, direction: $direction,
+                            deleted_at: timestamp()})
+    """, type=rel_type, label=label, ids=list(ids or []), direction=direction).consume()
+    return len(ids or [])
+
+
+def delete_document_contents(session, document_id: str, include_document: bool = False) -> Dict[str, int]:
+    """Delete a document's chunks and facts (and optionally the document), leaving tombstones"""
+    record = session.run("""
+        MATCH (d:Document {id: $doc_id})
+        OPTIONAL MATCH (d)-[:HAS_CHUNK]->(c:Chunk)
+        OPTIONAL MATCH (c)-[:HAS_FACT]->(f:Fact)
+        WITH d, collect(DISTINCT c) as chunks, collect(DISTINCT f) as facts
+        WITH d, chunks, facts,
+             [c IN chunks | {label: 'Chunk', id: c.id}] +
+             [f IN facts | {label: 'Fact', id: f.id}] +
+             CASE WHEN $include_document THEN [{label: 'Document', id: d.id}] ELSE [] END as deleted
+        FOREACH (t IN deleted |
+            CREATE (:Tombstone {label: t.label, id: t.id, deleted_at: timestamp()}))
+        FOREACH (n IN chunks + facts | DETACH DELETE n)
+        FOREACH (n IN CASE WHEN $include_document THEN [d] ELSE [] END | DETACH DELETE n)
+        RETURN size(chunks) as chunks_deleted, size(facts) as facts_deleted,
+               CASE WHEN $include_document THEN 1 ELSE 0 END as docs_deleted
+    """, doc_id=document_id, include_document=include_document).single()
+
+    if record is None:
+        return {"docs_deleted": 0, "chunks_deleted": 0, "facts_deleted": 0}
+    return dict(record)
+
+
+def prune_tombstones(session, before: int) -> int:
+    """Drop tombstones older than a full backup taken at `before` (epoch ms)"""
+    return session.run("""
+        MATCH (t:Tombstone)
+        WHERE t.deleted_at < $before
+        DETACH DELETE t
+        RETURN count(t) as pruned
+    """, before=before).single()["pruned"]
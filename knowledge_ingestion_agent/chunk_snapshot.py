@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Columnar Chunk Snapshot
+Stores chunk ids, document ids, page numbers, chunk types, semantic density
+and embeddings as flat binary columns that readers memory-map, so vector
+consumers (API, MCP servers, evaluation, ANN index builds) can load every
+embedding without pulling lists through Bolt or parsing a JSON export.
+
+Layout of a snapshot directory:
+    manifest.json           segments, column dtypes and embedding dimension
+    seg_<n>/embeddings.bin  float32 (rows, dimension)
+    seg_<n>/page_num.bin    int32
+    seg_<n>/semantic_density.bin  float32
+    seg_<n>/chunk_id.offsets.bin, chunk_id.data.bin   Arrow-style utf-8 strings
+    seg_<n>/document_id.codes.bin, chunk_type.codes.bin + dictionaries in segment.json
+
+The exporter writes one full segment; ingestion appends a segment per
+document. A later segment supersedes rows of the documents it lists, and an
+empty segment acts as a tombstone, so re-ingesting or deleting a document
+never rewrites earlier data. compact() folds everything back into one segment.
+
+Full rewrites (compact, build_snapshot) hold a compaction lock so only one
+runs at a time, and replace only the segments they read: segments appended
+meanwhile stay, after the new one, and still supersede it.
+"""
+
+import os
+import json
+import shutil
+import fcntl
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_DIR = os.getenv('CHUNK_SNAPSHOT_DIR', 'data/snapshots/chunks')
+DEFAULT_DIMENSION = 384
+
+NUMERIC_COLUMNS = {
+    'page_num': np.int32,
+    'semantic_density': np.float32,
+}
+DICTIONARY_COLUMNS = ('document_id', 'chunk_type')
+
+
+class SegmentWriter:
+    """Append rows to a new segment, streaming each column straight to disk"""
+
+    def __init__(self, directory: str, dimension: int = DEFAULT_DIMENSION):
+        self.directory = directory
+        self.dimension = dimension
+        self.count = 0
+        os.makedirs(directory, exist_ok=True)
+
+        self._files = {
+            'embeddings': open(os.path.join(directory, 'embeddings.bin'), 'wb'),
+            'chunk_id.offsets': open(os.path.join(directory, 'chunk_id.offsets.bin'), 'wb'),
+            'chunk_id.data': open(os.path.join(directory, 'chunk_id.data.bin'), 'wb'),
+        }
+        for name in NUMERIC_COLUMNS:
+            self._files[name] = open(os.path.join(directory, f'{name}.bin'), 'wb')
+        for name in DICTIONARY_COLUMNS:
+            self._files[f'{name}.codes'] = open(os.path.join(directory, f'{name}.codes.bin'), 'wb')
+
+        self._dictionaries: Dict[str, Dict[str, int]] = {name: {} for name in DICTIONARY_COLUMNS}
+        self._string_offset = 0
+        self._files['chunk_id.offsets'].write(np.zeros(1, dtype=np.int64).tobytes())
+
+    def _codes(self, name: str, values: Iterable[Optional[str]]) -> np.ndarray:
+        dictionary = self._dictionaries[name]
+        return np.fromiter((dictionary.setdefault(value or '', len(dictionary)) for value in values),
+                           dtype=np.int32)
+
+    def write_rows(self, rows: List[Dict[str, Any]]):
+        """Append rows with keys chunk_id, document_id, page_num, chunk_type, semantic_density, embedding"""
+        if not rows:
+            return
+
+        embeddings = np.zeros((len(rows), self.dimension), dtype=np.float32)
+        for i, row in enumerate(rows):
+            if row.get('embedding') is not None:
+                embeddings[i] = row['embedding']
+        self._files['embeddings'].write(embeddings.tobytes())
+
+        encoded = [str(row['chunk_id']).encode('utf-8') for row in rows]
+        lengths = np.fromiter((len(value) for value in encoded), dtype=np.int64, count=len(encoded))
+        offsets = self._string_offset + np.cumsum(lengths)
+        self._string_offset = int(offsets[-1])
+        self._files['chunk_id.offsets'].write(offsets.tobytes())
+        self._files['chunk_id.data'].write(b''.join(encoded))
+
+        for name, dtype in NUMERIC_COLUMNS.items():
+            column = np.array([row.get(name) or 0 for row in rows], dtype=dtype)
+            self._files[name].write(column.tobytes())
+
+        for name in DICTIONARY_COLUMNS:
+            self._files[f'{name}.codes'].write(self._codes(name, (row.get(name) for row in rows)).tobytes())
+
+        self.count += len(rows)
+
+    def close(self, documents: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Finish the segment and return its manifest entry"""
+        for f in self._files.values():
+            f.close()
+
+        dictionaries = {name: sorted(values, key=values.get) for name, values in self._dictionaries.items()}
+        with open(os.path.join(self.directory, 'segment.json'), 'w') as f:
+            json.dump({'count': self.count, 'dictionaries': dictionaries}, f)
+
+        return {
+            'name': os.path.basename(self.directory),
+            'count': self.count,
+            'documents': documents,  # None: rows for any document (full export)
+            'created': datetime.now().isoformat()
+        }
+
+
+class Segment:
+    """Memory-mapped view of one segment"""
+
+    def __init__(self, directory: str, dimension: int):
+        with open(os.path.join(directory, 'segment.json')) as f:
+            meta = json.load(f)
+
+        self.count = meta['count']
+        self.dictionaries = meta['dictionaries']
+        self.embeddings = self._map(directory, 'embeddings.bin', np.float32, (self.count, dimension))
+        self.columns = {name: self._map(directory, f'{name}.bin', dtype, (self.count,))
+                        for name, dtype in NUMERIC_COLUMNS.items()}
+        self.codes = {name: self._map(directory, f'{name}.codes.bin', np.int32, (self.count,))
+                      for name in DICTIONARY_COLUMNS}
+        self.chunk_id_offsets = self._map(directory, 'chunk_id.offsets.bin', np.int64, (self.count + 1,))
+        self.chunk_id_data = self._map(directory, 'chunk_id.data.bin', np.uint8, None)
+
+    @staticmethod
+    def _map(directory: str, name: str, dtype, shape) -> np.ndarray:
+        path = os.path.join(directory, name)
+        if os.path.getsize(path) == 0:
+            return np.zeros(shape if shape else (0,), dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=shape)
+
+    def chunk_ids(self, rows: np.ndarray) -> List[str]:
+        data = self.chunk_id_data
+        offsets = self.chunk_id_offsets
+        return [bytes(data[offsets[i]:offsets[i + 1]]).decode('utf-8') for i in rows]
+
+    def decoded(self, name: str, rows: np.ndarray) -> np.ndarray:
+        dictionary = np.asarray(self.dictionaries[name], dtype=object)
+        return dictionary[self.codes[name][rows]] if len(dictionary) else np.array([], dtype=object)
+
+
+class ChunkSnapshot:
+    """Live rows of a snapshot directory, with zero-copy embeddings for single-segment snapshots"""
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_DIR):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json')) as f:
+            self.manifest = json.load(f)
+
+        self.dimension = self.manifest['dimension']
+        self.version = self.manifest.get('graph_version')
+        self.segments = []
+        self.rows = []
+
+        # Walk newest first: a document listed by a newer segment hides older rows
+        superseded: set = set()
+        for entry in reversed(self.manifest['segments']):
+            segment = Segment(os.path.join(path, entry['name']), self.dimension)
+            live = np.arange(segment.count)
+            if superseded and segment.count:
+                document_ids = segment.decoded('document_id', live)
+                live = live[~np.isin(document_ids, list(superseded))]
+            self.segments.insert(0, segment)
+            self.rows.insert(0, live)
+            if entry.get('documents') is not None:
+                superseded.update(entry['documents'])
+
+        self._embeddings = None
+
+    def __len__(self) -> int:
+        return int(sum(len(rows) for rows in self.rows))
+
+    def _column(self, get) -> np.ndarray:
+        parts = [get(segment, rows) for segment, rows in zip(self.segments, self.rows)]
+        return np.concatenate(parts) if parts else np.array([])
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """(rows, dimension) float32; a memory map when nothing needs filtering"""
+        if self._embeddings is None:
+            if len(self.segments) == 1 and len(self.rows[0]) == self.segments[0].count:
+                self._embeddings = self.segments[0].embeddings
+            else:
+                self._embeddings = self._column(lambda segment, rows: segment.embeddings[rows]).reshape(-1, self.dimension)
+        return self._embeddings
+
+    @property
+    def chunk_ids(self) -> List[str]:
+        ids = []
+        for segment, rows in zip(self.segments, self.rows):
+            ids.extend(segment.chunk_ids(rows))
+        return ids
+
+    @property
+    def document_ids(self) -> np.ndarray:
+        return self._column(lambda segment, rows: segment.decoded('document_id', rows))
+
+    @property
+    def chunk_types(self) -> np.ndarray:
+        return self._column(lambda segment, rows: segment.decoded('chunk_type', rows))
+
+    @property
+    def page_num(self) -> np.ndarray:
+        return self._column(lambda segment, rows: segment.columns['page_num'][rows])
+
+    @property
+    def semantic_density(self) -> np.ndarray:
+        return self._column(lambda segment, rows: segment.columns['semantic_density'][rows])
+
+
+class ChunkSnapshotStore:
+    """Writes to a snapshot directory; manifest updates and full rewrites are serialised with file locks"""
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_DIR, dimension: int = DEFAULT_DIMENSION,
+                 max_segments: int = 256):
+        self.path = path
+        self.dimension = dimension
+        self.max_segments = max_segments
+        os.makedirs(path, exist_ok=True)
+
+    @contextmanager
+    def _locked(self, name: str = 'manifest.lock', wait: bool = True):
+        """Hold an exclusive file lock; yields False if `wait` is off and the lock is taken"""
+        with open(os.path.join(self.path, name), 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def compacting(self, wait: bool = True):
+        """Lock held by a full rewrite of the snapshot"""
+        return self._locked('compact.lock', wait)
+
+    def segment_names(self) -> List[str]:
+        with self._locked():
+            return [entry['name'] for entry in self._read_manifest()['segments']]
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.path, 'manifest.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'version': SNAPSHOT_VERSION, 'dimension': self.dimension, 'segments': [], 'next_segment': 0}
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        manifest['updated'] = datetime.now().isoformat()
+        temp_path = os.path.join(self.path, 'manifest.json.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, os.path.join(self.path, 'manifest.json'))
+
+    def _reserve_segment(self) -> str:
+        with self._locked():
+            manifest = self._read_manifest()
+            name = f"seg_{manifest.get('next_segment', 0):06d}"
+            manifest['next_segment'] = manifest.get('next_segment', 0) + 1
+            self._write_manifest(manifest)
+        return name
+
+    def new_segment(self) -> SegmentWriter:
+        """Start an unpublished segment; publish it with commit_segment()"""
+        return SegmentWriter(os.path.join(self.path, self._reserve_segment()), self.dimension)
+
+    def commit_segment(self, writer: SegmentWriter, documents: Optional[List[str]] = None,
+                       replaces: Optional[List[str]] = None):
+        """Publish a finished segment
+
+        With `replaces` (a full rewrite of those segments) the new segment takes
+        their place and segments committed since they were read are kept after it.
+        """
+        entry = writer.close(documents)
+        with self._locked():
+            manifest = self._read_manifest()
+            if replaces is None:
+                obsolete = []
+                manifest['segments'] = manifest['segments'] + [entry]
+            else:
+                replaced = set(replaces)
+                obsolete = [old for old in manifest['segments'] if old['name'] in replaced]
+                manifest['segments'] = [entry] + [old for old in manifest['segments'] if old['name'] not in replaced]
+            self._write_manifest(manifest)
+
+        # Readers that already mapped these files keep them alive until they unmap
+        for old in obsolete:
+            shutil.rmtree(os.path.join(self.path, old['name']), ignore_errors=True)
+
+        if replaces is None and len(manifest['segments']) > self.max_segments:
+            # Another writer already compacting will fold this segment in next time
+            self.compact(wait=False)
+
+    def append_document(self, document_id: str, rows: List[Dict[str, Any]]):
+        """Write a document's chunks, superseding any earlier rows for it"""
+        writer = self.new_segment()
+        writer.write_rows([{**row, 'document_id': document_id} for row in rows])
+        self.commit_segment(writer, documents=[document_id])
+
+    def remove_documents(self, document_ids: List[str]):
+        """Tombstone documents with an empty segment"""
+        self.commit_segment(self.new_segment(), documents=list(document_ids))
+
+    def compact(self, batch_size: int = 50000, wait: bool = True) -> bool:
+        """Rewrite the live rows of every segment into a single segment; False if skipped"""
+        with self.compacting(wait) as locked:
+            if not locked:
+                logger.info("Chunk snapshot compaction already running, skipping")
+                return False
+            self._compact(batch_size)
+        return True
+
+    def _compact(self, batch_size: int):
+        # The manifest is replaced atomically, so this reads one consistent set of segments
+        snapshot = ChunkSnapshot(self.path)
+        read = [entry['name'] for entry in snapshot.manifest['segments']]
+        writer = self.new_segment()
+
+        for segment, rows in zip(snapshot.segments, snapshot.rows):
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                document_ids = segment.decoded('document_id', batch)
+                chunk_types = segment.decoded('chunk_type', batch)
+                writer.write_rows([{
+                    'chunk_id': chunk_id,
+                    'document_id': document_ids[i],
+                    'chunk_type': chunk_types[i],
+                    'page_num': int(segment.columns['page_num'][row]),
+                    'semantic_density': float(segment.columns['semantic_density'][row]),
+                    'embedding': segment.embeddings[row]
+                } for i, (row, chunk_id) in enumerate(zip(batch, segment.chunk_ids(batch)))])
+
+        self.commit_segment(writer, documents=None, replaces=read)
+        logger.info(f"Compacted {len(read)} chunk snapshot segments to {writer.count} rows")
+
+
+def load_snapshot(path: str = DEFAULT_SNAPSHOT_DIR) -> Optional[ChunkSnapshot]:
+    """Open a snapshot if one exists at path"""
+    if not os.path.exists(os.path.join(path, 'manifest.json')):
+        return None
+    return ChunkSnapshot(path)
+
+
+CHUNK_SNAPSHOT_QUERY = """
+    MATCH (d:Document)-[:HAS_CHUNK]->(c:Chunk)
+    WHERE id(c) IN range($lo, $hi - 1)
+    RETURN c.id as chunk_id, d.id as document_id, c.page_num as page_num,
+           c.chunk_type as chunk_type, c.semantic_density as semantic_density,
+           c.embedding as embedding
+"""
+
+
+def build_snapshot(driver, path: str = DEFAULT_SNAPSHOT_DIR, page_size: int = 5000,
+                   dimension: int = DEFAULT_DIMENSION) -> int:
+    """Write a full snapshot from Neo4j, paging chunks by id window"""
+    store = ChunkSnapshotStore(path, dimension)
+    with store.compacting():
+        # Segments appended from here on may hold newer rows than this export reads
+        read = store.segment_names()
+        writer = store.new_segment()
+
+        with driver.session() as session:
+            max_id = session.run("MATCH (c:Chunk) RETURN max(id(c)) as max_id").single()["max_id"]
+            for lo in range(0, (max_id or -1) + 1, page_size):
+                writer.write_rows(session.run(CHUNK_SNAPSHOT_QUERY, lo=lo, hi=lo + page_size).data())
+
+        store.commit_segment(writer, documents=None, replaces=read)
+    logger.info(f"Wrote chunk snapshot with {writer.count} rows to {path}")
+    return writer.count
+
+
+def main():
+    """Build, compact or inspect a chunk snapshot"""
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Columnar chunk/embedding snapshot')
+    parser.add_argument('command', choices=['build', 'compact', 'info'])
+    parser.add_argument('--path', default=DEFAULT_SNAPSHOT_DIR, help='Snapshot directory')
+    parser.add_argument('--neo4j-uri', default=os.getenv('NEO4J_URI', 'bolt://localhost:7687'), help='Neo4j URI')
+    parser.add_argument('--neo4j-user', default=os.getenv('NEO4J_USER', 'neo4j'), help='Neo4j username')
+    parser.add_argument('--neo4j-password', default=os.getenv('NEO4J_PASSWORD', 'knowledge123'), help='Neo4j password')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.command == 'build':
+        from neo4j import GraphDatabase
+        driver = GraphDatabase.driver(args.neo4j_uri, auth=(args.neo4j_user, args.neo4j_password))
+        try:
+            build_snapshot(driver, args.path)
+        finally:
+            driver.close()
+    elif args.command == 'compact':
+        ChunkSnapshotStore(args.path).compact()
+    else:
+        start = time.time()
+        snapshot = load_snapshot(args.path)
+        if snapshot is None:
+            print(f"No snapshot at {args.path}")
+            return
+        embeddings = snapshot.embeddings
+        print(f"{len(snapshot)} chunks, {len(snapshot.segments)} segments, "
+              f"embeddings {embeddings.shape} loaded in {time.time() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,19 @@ Implements community detection, enrichment, and community-aware search
 
 import logging
 from typing import Dict, List, Set, Tuple, Optional
-from collections import defaultdict
 import numpy as np
 from neo4j import GraphDatabase
 import networkx as nx
 from community import community_louvain
 import json
 
+try:
+    from .community_engine import CommunityEngine, Partition, modularity
+    from .schema_manager import SchemaManager
+except ImportError:
+    from community_engine import CommunityEngine, Partition, modularity
+    from schema_manager import SchemaManager
+
 logger = logging.getLogger(__name__)
 
 
@@ -67,120 +73,21 @@ class CommunityDetector:
         logger.info(f"Built graph with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges")
         return G
     
-    def enrich_graph_with_communities(self, communities: Dict[str, int]):
+    def enrich_graph_with_communities(self, communities: Dict[str, int], resolution: float = 1.0):
         """Add community metadata to entities in Neo4j"""
         logger.info("Enriching graph with community metadata...")
         
-        with self.driver.session() as session:
-            # Calculate community statistics
-            community_stats = self._calculate_community_stats(communities)
-            
-            # Update entities with community info
-            batch_size = 1000
-            entity_items = list(communities.items())
-            
-            for i in range(0, len(entity_items), batch_size):
-                batch = entity_items[i:i + batch_size]
-                
-                session.run("""
-                    UNWIND $updates as update
-                    MATCH (e:Entity) 
-                    WHERE id(e) = update.entity_id
-                    SET e.community_id = update.community_id,
-                        e.community_size = update.community_size
-                """, updates=[
-                    {
-                        'entity_id': entity_id,
-                        'community_id': comm_id,
-                        'community_size': community_stats[comm_id]['size']
-                    }
-                    for entity_id, comm_id in batch
-                ])
-            
-            # Calculate and set node centrality within communities
-            self._calculate_community_centrality(session, communities)
-            
-            # Identify and mark bridge nodes
-            self._identify_bridge_nodes(session)
-            
-        logger.info("Community enrichment complete")
-    
-    def _calculate_community_stats(self, communities: Dict[str, int]) -> Dict[int, Dict]:
-        """Calculate statistics for each community"""
-        stats = defaultdict(lambda: {'size': 0, 'entities': []})
+        # Metrics are computed from edge arrays and written in bulk by the engine
+        engine = CommunityEngine(self.driver)
+        graph = engine.load_graph()
+        membership = np.array([communities[node_id] for node_id in graph.node_ids.tolist()], dtype=np.int64)
         
-        for entity_id, comm_id in communities.items():
-            stats[comm_id]['size'] += 1
-            stats[comm_id]['entities'].append(entity_id)
+        partition = Partition('louvain', resolution, membership, modularity(graph, membership))
+        metrics = engine.community_metrics(graph, membership)
+        engine.write_communities(graph, partition, metrics)
         
-        return dict(stats)
-    
-    def _calculate_community_centrality(self, session, communities: Dict[str, int]):
-        """Calculate centrality metrics within each community"""
-        logger.info("Calculating community centrality metrics...")
-        
-        # Group entities by community
-        communities_grouped = defaultdict(list)
-        for entity_id, comm_id in communities.items():
-            communities_grouped[comm_id].append(entity_id)
-        
-        for comm_id, entity_ids in communities_grouped.items():
-            # Build subgraph for this community
-            result = session.run("""
-                MATCH (e1:Entity)-[r:RELATED_TO]->(e2:Entity)
-                WHERE e1.community_id = $comm_id AND e2.community_id = $comm_id
-                RETURN id(e1) as source, id(e2) as target, r.strength as weight
-            """, comm_id=comm_id)
-            
-            # Build NetworkX subgraph
-            G_comm = nx.Graph()
-            for record in result:
-                G_comm.add_edge(
-                    record['source'],
-                    record['target'],
-                    weight=record['weight']
-                )
-            
-            if G_comm.number_of_nodes() > 0:
-                # Calculate centrality metrics
-                degree_centrality = nx.degree_centrality(G_comm)
-                betweenness_centrality = nx.betweenness_centrality(G_comm, weight='weight')
-                
-                # Update entities with centrality scores
-                updates = []
-                for node in G_comm.nodes():
-                    updates.append({
-                        'entity_id': node,
-                        'degree_centrality': degree_centrality.get(node, 0),
-                        'betweenness_centrality': betweenness_centrality.get(node, 0)
-                    })
-                
-                if updates:
-                    session.run("""
-                        UNWIND $updates as update
-                        MATCH (e:Entity)
-                        WHERE id(e) = update.entity_id
-                        SET e.community_degree_centrality = update.degree_centrality,
-                            e.community_betweenness_centrality = update.betweenness_centrality
-                    """, updates=updates)
-    
-    def _identify_bridge_nodes(self, session):
-        """Identify nodes that connect different communities"""
-        logger.info("Identifying bridge nodes...")
-        
-        # Find entities connected to multiple communities
-        result = session.run("""
-            MATCH (e:Entity)-[:RELATED_TO]-(neighbor:Entity)
-            WHERE e.community_id <> neighbor.community_id
-            WITH e, COUNT(DISTINCT neighbor.community_id) as connected_communities
-            WHERE connected_communities > 1
-            SET e.is_bridge_node = true,
-                e.connected_communities = connected_communities
-            RETURN COUNT(e) as bridge_count
-        """)
-        
-        bridge_count = result.single()['bridge_count']
-        logger.info(f"Identified {bridge_count} bridge nodes")
+        logger.info(f"Identified {int(metrics['is_bridge_node'].sum())} bridge nodes")
+        logger.info("Community enrichment complete")
     
     def calculate_community_coherence(self):
         """Calculate coherence scores for each community"""
@@ -215,12 +122,17 @@ class CommunityDetector:
 class CommunityAwareSearch:
     """Implement two-phase search using community structure"""
     
-    def __init__(self, uri: str, user: str, password: str):
+    def __init__(self, uri: str, user: str, password: str, graph_snapshot=None):
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        # Optional GraphSnapshotManager used to resolve entities and candidate chunks in memory
+        self.graph_snapshot = graph_snapshot
     
     def close(self):
         self.driver.close()
     
+    def _snapshot(self):
+        return self.graph_snapshot.get() if self.graph_snapshot is not None else None
+    
     def search(self, query_embedding: np.ndarray, query_entities: List[str], 
                top_k: int = 10, community_weight: float = 0.3) -> List[Dict]:
         """
@@ -253,6 +165,11 @@ class CommunityAwareSearch:
     
     def _identify_relevant_communities(self, query_entities: List[str]) -> Set[int]:
         """Identify communities relevant to the query"""
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            communities = snapshot.entity_communities[snapshot.lookup_entities(query_entities)]
+            return {int(c) for c in communities if c >= 0}
+        
         with self.driver.session() as session:
             result = session.run("""
                 MATCH (e:Entity)
@@ -265,12 +182,22 @@ class CommunityAwareSearch:
     def _search_within_communities(self, query_embedding: np.ndarray, 
                                   communities: Set[int], limit: int) -> List[Dict]:
         """Search for chunks within specific communities"""
+        snapshot = self._snapshot()
         with self.driver.session() as session:
             # Convert embedding to list for Cypher
             embedding_list = query_embedding.tolist()
             
-            result = session.run("""
-                MATCH (c:Chunk)-[:CONTAINS_ENTITY]->(e:Entity)
+            if snapshot is not None:
+                # Candidate chunks come from the snapshot; Cypher only expands from those chunks
+                members = np.flatnonzero(np.isin(snapshot.entity_communities, list(communities)))
+                candidates = np.flatnonzero(snapshot.chunk_scores(members) > 0)
+                start = "UNWIND $chunk_ids AS chunk_id MATCH (c:Chunk {id: chunk_id})-[:CONTAINS_ENTITY]->(e:Entity)"
+                chunk_ids = snapshot.chunk_ids[candidates].tolist()
+            else:
+                start = "MATCH (c:Chunk)-[:CONTAINS_ENTITY]->(e:Entity)"
+                chunk_ids = None
+            
+            result = session.run(start + """
                 WHERE e.community_id IN $communities
                 WITH c, COUNT(DISTINCT e.community_id) as community_coverage,
                      AVG(e.community_degree_centrality) as avg_centrality
@@ -288,7 +215,8 @@ class CommunityAwareSearch:
                        avg_centrality
                 ORDER BY cosine_similarity DESC
                 LIMIT $limit
-            """, communities=list(communities), query_embedding=embedding_list, limit=limit)
+            """, communities=list(communities), query_embedding=embedding_list, limit=limit,
+                chunk_ids=chunk_ids)
             
             return [dict(record) for record in result]
     
@@ -351,25 +279,7 @@ def create_community_search_index(uri: str, user: str, password: str):
     """Create indexes for efficient community-based search"""
     driver = GraphDatabase.driver(uri, auth=(user, password))
     
-    with driver.session() as session:
-        # Index for community-based queries
-        session.run("""
-            CREATE INDEX entity_community IF NOT EXISTS
-            FOR (e:Entity) ON (e.community_id)
-        """)
-        
-        # Index for bridge node queries
-        session.run("""
-            CREATE INDEX entity_bridge IF NOT EXISTS
-            FOR (e:Entity) ON (e.is_bridge_node)
-        """)
-        
-        # Composite index for community metrics
-        session.run("""
-            CREATE INDEX entity_centrality IF NOT EXISTS
-            FOR (e:Entity) ON (e.community_degree_centrality)
-        """)
-    
+    SchemaManager(driver).apply(groups=['community'])
     driver.close()
     logger.info("Created community search indexes")
 
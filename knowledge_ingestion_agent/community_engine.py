@@ -0,0 +1,363 @@
+"""
+Multi-resolution Community Detection Engine
+Pulls the RELATED_TO entity graph out of Neo4j once into compact edge arrays,
+runs Louvain (or Leiden, when leidenalg is installed) for several resolutions
+in parallel worker processes, computes per-community centrality, bridge and
+coherence metrics from the arrays, and writes every community property back
+in a few UNWIND batches.
+"""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import networkx as nx
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+try:
+    import igraph
+    import leidenalg
+except ImportError:
+    leidenalg = None
+
+ALGORITHMS = ('louvain', 'leiden')
+
+
+@dataclass
+class EntityGraph:
+    """Undirected weighted entity graph as edge arrays over node indices"""
+    node_ids: np.ndarray   # Neo4j id of each node index
+    src: np.ndarray
+    dst: np.ndarray
+    weight: np.ndarray
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.src)
+
+    def adjacency(self) -> sparse.csr_matrix:
+        """Symmetric CSR adjacency matrix"""
+        n = self.num_nodes
+        A = sparse.coo_matrix((self.weight, (self.src, self.dst)), shape=(n, n))
+        return (A + A.T).tocsr()
+
+    def to_networkx(self, nodes: Optional[np.ndarray] = None) -> nx.Graph:
+        """NetworkX graph over all nodes, or the subgraph induced by `nodes`"""
+        src, dst, weight = self.src, self.dst, self.weight
+        G = nx.Graph()
+        if nodes is not None:
+            inside = np.zeros(self.num_nodes, dtype=bool)
+            inside[nodes] = True
+            mask = inside[src] & inside[dst]
+            src, dst, weight = src[mask], dst[mask], weight[mask]
+            G.add_nodes_from(nodes.tolist())
+        else:
+            G.add_nodes_from(range(self.num_nodes))
+        G.add_weighted_edges_from(zip(src.tolist(), dst.tolist(), weight.tolist()))
+        return G
+
+
+@dataclass
+class Partition:
+    """Result of one detection run"""
+    algorithm: str
+    resolution: float
+    membership: np.ndarray          # community id per node index
+    modularity: float
+    levels: List[np.ndarray] = field(default_factory=list)  # coarse hierarchy, finest first
+
+    @property
+    def num_communities(self) -> int:
+        return int(self.membership.max()) + 1 if len(self.membership) else 0
+
+
+def modularity(graph: EntityGraph, membership: np.ndarray, resolution: float = 1.0) -> float:
+    """Weighted modularity of a partition, computed from the edge arrays"""
+    total = graph.weight.sum()
+    if total == 0:
+        return 0.0
+    k = int(membership.max()) + 1
+    internal = np.bincount(membership[graph.src], weights=graph.weight * (membership[graph.src] == membership[graph.dst]),
+                           minlength=k)
+    strength = np.bincount(graph.src, weights=graph.weight, minlength=graph.num_nodes) + \
+        np.bincount(graph.dst, weights=graph.weight, minlength=graph.num_nodes)
+    community_strength = np.bincount(membership, weights=strength, minlength=k)
+    return float((internal / total).sum() - resolution * ((community_strength / (2 * total)) ** 2).sum())
+
+
+def _edge_graph(sources: List[int], targets: List[int], weights: List[float]) -> EntityGraph:
+    """EntityGraph over the Neo4j ids appearing in the given edges"""
+    endpoints = np.array(sources + targets, dtype=np.int64)
+    node_ids, index = np.unique(endpoints, return_inverse=True)
+    return EntityGraph(node_ids=node_ids,
+                       src=index[:len(sources)].astype(np.int32),
+                       dst=index[len(sources):].astype(np.int32),
+                       weight=np.array(weights, dtype=np.float64))
+
+
+def _relabel(values: np.ndarray) -> np.ndarray:
+    """Dense community ids, largest community first"""
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    rank = np.empty(len(counts), dtype=np.int32)
+    rank[np.argsort(-counts, kind='stable')] = np.arange(len(counts), dtype=np.int32)
+    return rank[inverse]
+
+
+def _detect(graph: EntityGraph, algorithm: str, resolution: float, seed: int) -> Partition:
+    """Run one detection (in a worker process)"""
+    if algorithm == 'leiden':
+        g = igraph.Graph(n=graph.num_nodes, edges=np.stack([graph.src, graph.dst], axis=1).tolist())
+        result = leidenalg.find_partition(g, leidenalg.RBConfigurationVertexPartition,
+                                          weights=graph.weight.tolist(),
+                                          resolution_parameter=resolution, seed=seed)
+        membership = _relabel(np.array(result.membership))
+        levels = [membership]
+    else:
+        from community import community_louvain
+        dendrogram = community_louvain.generate_dendrogram(
+            graph.to_networkx(), resolution=resolution, random_state=seed)
+        levels = []
+        for level in range(len(dendrogram)):
+            assignment = community_louvain.partition_at_level(dendrogram, level)
+            levels.append(_relabel(np.array([assignment[i] for i in range(graph.num_nodes)])))
+        membership = levels[-1]
+
+    return Partition(algorithm, resolution, membership, modularity(graph, membership), levels)
+
+
+def _betweenness(subgraphs: List[tuple], samples: Optional[int], seed: int) -> Dict[int, float]:
+    """Betweenness within each (nodes, src, dst, weight) community subgraph (in a worker process)"""
+    values = {}
+    for nodes, src, dst, weight in subgraphs:
+        G = nx.Graph()
+        G.add_nodes_from(nodes.tolist())
+        G.add_weighted_edges_from(zip(src.tolist(), dst.tolist(), weight.tolist()))
+        k = samples if samples and samples < G.number_of_nodes() else None
+        values.update(nx.betweenness_centrality(G, k=k, weight='weight', seed=seed))
+    return values
+
+
+class CommunityEngine:
+    """Detect communities once for many resolutions and write their metrics in bulk"""
+
+    def __init__(self, driver, workers: int = 4, page_size: int = 50000, batch_size: int = 5000,
+                 exact_betweenness_max: int = 1000, betweenness_samples: int = 256, seed: int = 42):
+        self.driver = driver
+        self.workers = workers
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.exact_betweenness_max = exact_betweenness_max
+        self.betweenness_samples = betweenness_samples
+        self.seed = seed
+
+    def load_graph(self, min_strength: float = 2) -> EntityGraph:
+        """Page RELATED_TO edges out of Neo4j by relationship id window"""
+        sources, targets, weights = [], [], []
+        with self.driver.session() as session:
+            max_id = session.run("MATCH ()-[r:RELATED_TO]->() RETURN max(id(r)) as max_id").single()["max_id"]
+            for lo in range(0, (max_id or -1) + 1, self.page_size):
+                result = session.run("""
+                    MATCH (e1:Entity)-[r:RELATED_TO]->(e2:Entity)
+                    WHERE id(r) IN range($lo, $hi - 1) AND r.strength >= $min_strength
+                    RETURN id(e1) as source, id(e2) as target, r.strength as weight
+                """, lo=lo, hi=lo + self.page_size, min_strength=min_strength)
+                for record in result:
+                    sources.append(record["source"])
+                    targets.append(record["target"])
+                    weights.append(record["weight"])
+
+        graph = _edge_graph(sources, targets, weights)
+        logger.info(f"Loaded entity graph with {graph.num_nodes} nodes and {graph.num_edges} edges")
+        return graph
+
+    def load_subgraph(self, entity_ids: List[int], min_strength: float = 2) -> Tuple[EntityGraph, np.ndarray]:
+        """
+        RELATED_TO edges incident to the given entities, with the stored
+        community_id of every endpoint (-1 when unassigned)
+
+        The given entities have all their edges; their neighbours only the edges back to them.
+        """
+        edges, communities = {}, {}
+        with self.driver.session() as session:
+            for start in range(0, len(entity_ids), self.page_size):
+                result = session.run("""
+                    UNWIND $ids AS entity_id
+                    MATCH (e:Entity)-[r:RELATED_TO]-(:Entity)
+                    WHERE id(e) = entity_id AND r.strength >= $min_strength
+                    WITH r, startNode(r) as e1, endNode(r) as e2
+                    RETURN id(r) as rel, id(e1) as source, id(e2) as target, r.strength as weight,
+                           e1.community_id as source_community, e2.community_id as target_community
+                """, ids=list(entity_ids[start:start + self.page_size]), min_strength=min_strength)
+                for record in result:
+                    edges[record["rel"]] = (record["source"], record["target"], record["weight"])
+                    communities[record["source"]] = record["source_community"]
+                    communities[record["target"]] = record["target_community"]
+
+        sources, targets, weights = (list(values) for values in zip(*edges.values())) if edges else ([], [], [])
+        graph = _edge_graph(sources, targets, weights)
+        membership = np.array([-1 if communities[node_id] is None else communities[node_id]
+                               for node_id in graph.node_ids.tolist()], dtype=np.int64)
+        return graph, membership
+
+    def detect(self, graph: EntityGraph, resolutions: List[float], algorithm: str = 'louvain') -> Dict[float, Partition]:
+        """Run every resolution in parallel worker processes"""
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm '{algorithm}', expected one of {ALGORITHMS}")
+        if algorithm == 'leiden' and leidenalg is None:
+            logger.warning("leidenalg is not installed, falling back to Louvain")
+            algorithm = 'louvain'
+
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(resolutions))) as executor:
+            futures = {r: executor.submit(_detect, graph, algorithm, r, self.seed) for r in resolutions}
+            partitions = {r: future.result() for r, future in futures.items()}
+
+        for r, partition in sorted(partitions.items()):
+            logger.info(f"{algorithm} resolution {r}: {partition.num_communities} communities, "
+                        f"modularity {partition.modularity:.4f}, {len(partition.levels)} levels")
+        return partitions
+
+    def community_metrics(self, graph: EntityGraph, membership: np.ndarray,
+                          communities: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Per-node community metrics computed from the edge arrays
+
+        Args:
+            communities: Restrict centrality to these community ids (others get NaN)
+        """
+        n = graph.num_nodes
+        k = int(membership.max()) + 1 if n else 0
+        src, dst, weight = graph.src, graph.dst, graph.weight
+        internal = membership[src] == membership[dst]
+
+        size = np.bincount(membership, minlength=k)
+        internal_degree = np.bincount(src[internal], minlength=n) + np.bincount(dst[internal], minlength=n)
+        node_size = size[membership]
+        degree_centrality = np.where(node_size > 1, internal_degree / np.maximum(node_size - 1, 1), 0.0)
+
+        # Coherence is the mean internal edge strength; density counts both directions
+        internal_edges = np.bincount(membership[src[internal]], minlength=k)
+        internal_strength = np.bincount(membership[src[internal]], weights=weight[internal], minlength=k)
+        coherence = np.divide(internal_strength, internal_edges,
+                              out=np.zeros(k), where=internal_edges > 0)
+        density = np.divide(2.0 * internal_edges, size * (size - 1.0),
+                            out=np.zeros(k), where=size > 1)
+
+        # Bridges: nodes with neighbours in more than one other community
+        external = ~internal
+        pairs = np.concatenate([
+            np.stack([src[external], membership[dst[external]]], axis=1),
+            np.stack([dst[external], membership[src[external]]], axis=1)])
+        pairs = np.unique(pairs, axis=0) if len(pairs) else pairs.reshape(0, 2)
+        connected = np.bincount(pairs[:, 0], minlength=n) if len(pairs) else np.zeros(n, dtype=np.int64)
+
+        betweenness = self._community_betweenness(graph, membership, size, communities)
+
+        return {
+            'community_id': membership,
+            'community_size': node_size,
+            'degree_centrality': degree_centrality,
+            'betweenness_centrality': betweenness,
+            'coherence': coherence[membership],
+            'density': density[membership],
+            'connected_communities': connected,
+            'is_bridge_node': connected > 1,
+            'community_coherence_by_id': coherence,
+            'community_density_by_id': density,
+        }
+
+    def _community_betweenness(self, graph: EntityGraph, membership: np.ndarray, size: np.ndarray,
+                               communities: Optional[np.ndarray] = None) -> np.ndarray:
+        """Exact betweenness for small communities, sampled for large ones, in parallel"""
+        betweenness = np.full(graph.num_nodes, np.nan if communities is not None else 0.0)
+        targets = np.flatnonzero(size > 2) if communities is None else np.asarray(communities)
+        betweenness[np.isin(membership, targets) & (size[membership] <= 2)] = 0.0
+
+        # Slice nodes and internal edges per community once instead of filtering per community
+        order = np.argsort(membership, kind='stable')
+        bounds = np.r_[0, np.cumsum(size)]
+        internal = np.flatnonzero(membership[graph.src] == membership[graph.dst])
+        internal = internal[np.argsort(membership[graph.src[internal]], kind='stable')]
+        edge_bounds = np.searchsorted(membership[graph.src[internal]], np.arange(len(size) + 1))
+
+        def subgraph(c):
+            edges = internal[edge_bounds[c]:edge_bounds[c + 1]]
+            return (order[bounds[c]:bounds[c + 1]], graph.src[edges], graph.dst[edges], graph.weight[edges])
+
+        large = [c for c in targets if size[c] > self.exact_betweenness_max]
+        small = [c for c in targets if 2 < size[c] <= self.exact_betweenness_max]
+        sampled = len(large)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(_betweenness, [subgraph(c)], self.betweenness_samples, self.seed)
+                       for c in large]
+            # Small communities are grouped so each task carries roughly the same number of nodes
+            group, group_nodes = [], 0
+            for c in small:
+                group.append(subgraph(c))
+                group_nodes += size[c]
+                if group_nodes >= self.exact_betweenness_max:
+                    futures.append(executor.submit(_betweenness, group, None, self.seed))
+                    group, group_nodes = [], 0
+            if group:
+                futures.append(executor.submit(_betweenness, group, None, self.seed))
+
+            for future in futures:
+                for node, value in future.result().items():
+                    betweenness[node] = value
+
+        if sampled:
+            logger.info(f"Sampled betweenness ({self.betweenness_samples} pivots) for {sampled} communities "
+                        f"larger than {self.exact_betweenness_max}")
+        return betweenness
+
+    def write_communities(self, graph: EntityGraph, partition: Partition,
+                          metrics: Dict[str, np.ndarray], nodes: Optional[np.ndarray] = None) -> int:
+        """Write community properties for all (or the given) node indices in UNWIND batches
+
+        Partitions without a hierarchy (incremental updates) keep the stored levels.
+        """
+        nodes = np.arange(graph.num_nodes) if nodes is None else np.asarray(nodes)
+        levels = np.stack(partition.levels, axis=1) if partition.levels else None
+        rows = [{
+            'entity_id': int(graph.node_ids[i]),
+            'community_id': int(metrics['community_id'][i]),
+            'community_size': int(metrics['community_size'][i]),
+            'degree_centrality': float(metrics['degree_centrality'][i]),
+            'betweenness_centrality': float(metrics['betweenness_centrality'][i]),
+            'coherence': float(metrics['coherence'][i]),
+            'density': float(metrics['density'][i]),
+            'is_bridge_node': bool(metrics['is_bridge_node'][i]),
+            'connected_communities': int(metrics['connected_communities'][i]),
+            'levels': levels[i].tolist() if levels is not None else None
+        } for i in nodes]
+
+        with self.driver.session() as session:
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                session.execute_write(lambda tx: tx.run("""
+                    UNWIND $rows AS row
+                    MATCH (e:Entity) WHERE id(e) = row.entity_id
+                    SET e.community_id = row.community_id,
+                        e.community_size = row.community_size,
+                        e.community_degree_centrality = row.degree_centrality,
+                        e.community_betweenness_centrality = row.betweenness_centrality,
+                        e.community_coherence = row.coherence,
+                        e.community_density = row.density,
+                        e.is_bridge_node = row.is_bridge_node,
+                        e.connected_communities = row.connected_communities,
+                        e.community_levels = coalesce(row.levels, e.community_levels),
+                        e.community_resolution = $resolution,
+                        e.community_updated_at = timestamp()
+                """, rows=batch, resolution=partition.resolution).consume())
+
+        logger.info(f"Wrote community properties for {len(rows)} entities "
+                    f"in {(len(rows) + self.batch_size - 1) // self.batch_size} batches")
+        return len(rows)
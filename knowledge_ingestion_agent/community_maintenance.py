@@ -0,0 +1,314 @@
+"""
+Incremental Community Maintenance
+Keeps community assignments current between full detections. Entities added
+by an ingestion run are placed in the neighbouring community with the largest
+modularity gain (or a new singleton community), and centrality, bridge status
+and coherence are recomputed only for the communities and neighbours touched.
+Only those entities, the members of the affected communities and their
+neighbourhoods are loaded; graph-wide totals (edge weight, community strength)
+come from one aggregate query. A drift metric decides when a full re-detection
+is due.
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+try:
+    from .community_engine import CommunityEngine, EntityGraph, Partition
+except ImportError:
+    from community_engine import CommunityEngine, EntityGraph, Partition
+
+logger = logging.getLogger(__name__)
+
+COMMUNITY_STATE_FILE = os.path.join('data', 'community_state.json')
+DEFAULT_DRIFT_THRESHOLD = 0.1
+
+
+def load_community_state(path: str = COMMUNITY_STATE_FILE) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_community_state(state: Dict[str, Any], path: str = COMMUNITY_STATE_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def full_detection_state(graph: EntityGraph, partition: Partition, started_at: int) -> Dict[str, Any]:
+    """State recorded after a full detection; the baseline for drift"""
+    return {
+        'last_full_run': started_at,
+        'last_run': started_at,
+        'algorithm': partition.algorithm,
+        'resolution': partition.resolution,
+        'baseline_modularity': partition.modularity,
+        'baseline_nodes': graph.num_nodes,
+        'incremental_nodes': 0,
+        'full_detection_due': False
+    }
+
+
+def assign_by_modularity_gain(graph: EntityGraph, membership: np.ndarray, nodes: np.ndarray,
+                              resolution: float = 1.0, passes: int = 2,
+                              total_weight: Optional[float] = None,
+                              community_strength: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Place each unassigned node (membership -1) in the community with the best modularity gain
+
+    The gain of moving isolated node i into community C is
+        k_i,C / m - resolution * k_i * Sigma_C / (2 m^2)
+    where k_i,C is the edge weight from i into C and Sigma_C the community's total
+    strength. Nodes with no positive gain start their own community. Nodes are
+    visited strongest first, and later passes let them follow neighbours that
+    were placed after them.
+
+    On a subgraph, pass the whole graph's `total_weight` and the stored
+    `community_strength` per community id (unplaced nodes excluded); the nodes
+    to place must have all their edges in the subgraph.
+    """
+    membership = membership.copy()
+    A = graph.adjacency()
+    strength = np.asarray(A.sum(axis=1)).ravel()
+    m = strength.sum() / 2 if total_weight is None else total_weight
+    if m == 0:
+        return membership
+
+    # Every unplaced node starts in (and may fall back to) its own singleton community
+    first_id = int(membership.max()) + 1 if len(membership) else 0
+    if community_strength is not None:
+        first_id = max(first_id, len(community_strength))
+    unplaced = nodes[membership[nodes] < 0]
+    own = first_id + np.arange(len(unplaced))
+    membership[unplaced] = own
+    own = dict(zip(unplaced.tolist(), own.tolist()))
+
+    k = first_id + len(unplaced)
+    if community_strength is None:
+        sigma = np.bincount(membership[membership >= 0], weights=strength[membership >= 0], minlength=k)
+    else:
+        sigma = np.zeros(k)
+        sigma[:len(community_strength)] = community_strength
+        sigma[first_id:] += strength[unplaced]
+    order = unplaced[np.argsort(-strength[unplaced], kind='stable')]
+
+    for _ in range(passes):
+        moved = 0
+        for node in order:
+            current = membership[node]
+            sigma[current] -= strength[node]
+
+            row = slice(A.indptr[node], A.indptr[node + 1])
+            neighbours, weights = A.indices[row], A.data[row]
+            not_self = neighbours != node
+            communities = membership[neighbours[not_self]]
+            links = np.bincount(communities, weights=weights[not_self], minlength=k)
+            candidates = np.unique(communities)
+
+            best, best_gain = current, 0.0
+            if len(candidates):
+                gains = links[candidates] / m - resolution * strength[node] * sigma[candidates] / (2 * m * m)
+                top = int(np.argmax(gains))
+                if gains[top] > 0:
+                    best, best_gain = int(candidates[top]), gains[top]
+
+            if best_gain <= 0:
+                best = own[int(node)]
+            if best != current:
+                moved += 1
+            membership[node] = best
+            sigma[best] += strength[node]
+        if moved == 0:
+            break
+
+    return membership
+
+
+def modularity_after_placement(graph: EntityGraph, membership: np.ndarray, new_nodes: np.ndarray,
+                               totals: Dict[str, Any], resolution: float = 1.0) -> float:
+    """
+    Whole-graph modularity once `new_nodes` are placed, from the stored totals
+
+    Only the new nodes' edges and strengths change, and they have all their edges in `graph`.
+    """
+    total = totals['total_weight']
+    if total == 0:
+        return 0.0
+    is_new = np.zeros(graph.num_nodes, dtype=bool)
+    is_new[new_nodes] = True
+    joined = (is_new[graph.src] | is_new[graph.dst]) & (membership[graph.src] == membership[graph.dst])
+    internal = totals['internal_weight'] + graph.weight[joined].sum()
+
+    strength = np.bincount(graph.src, weights=graph.weight, minlength=graph.num_nodes) + \
+        np.bincount(graph.dst, weights=graph.weight, minlength=graph.num_nodes)
+    stored = totals['community_strength']
+    sigma = np.zeros(max(len(stored), int(membership.max()) + 1))
+    sigma[:len(stored)] = stored
+    np.add.at(sigma, membership[new_nodes], strength[new_nodes])
+    return float(internal / total - resolution * ((sigma / (2 * total)) ** 2).sum())
+
+
+class CommunityMaintainer:
+    """Apply the entities and edges of an ingestion run to the stored communities"""
+
+    def __init__(self, engine: CommunityEngine, state_file: str = COMMUNITY_STATE_FILE,
+                 drift_threshold: float = DEFAULT_DRIFT_THRESHOLD):
+        self.engine = engine
+        self.driver = engine.driver
+        self.state_file = state_file
+        self.drift_threshold = drift_threshold
+
+    def changed_entities(self, since: int, min_strength: float = 2) -> List[int]:
+        """Neo4j ids of related entities written at or after `since` (epoch ms), or without a community"""
+        with self.driver.session() as session:
+            return session.run("""
+                MATCH (e:Entity)
+                WHERE (e.updated_at >= $since OR e.community_id IS NULL)
+                  AND EXISTS { MATCH (e)-[r:RELATED_TO]-(:Entity) WHERE r.strength >= $min_strength }
+                RETURN id(e) as entity_id
+            """, since=since, min_strength=min_strength).value()
+
+    def community_members(self, communities: np.ndarray) -> List[int]:
+        """Neo4j ids of the entities stored in the given communities"""
+        with self.driver.session() as session:
+            return session.run("""
+                MATCH (e:Entity)
+                WHERE e.community_id IN $communities
+                RETURN id(e) as entity_id
+            """, communities=[int(c) for c in communities]).value()
+
+    def graph_totals(self, min_strength: float = 2) -> Dict[str, Any]:
+        """Total and intra-community edge weight, strength per stored community and node count"""
+        with self.driver.session() as session:
+            weights = session.run("""
+                MATCH (a:Entity)-[r:RELATED_TO]->(b:Entity)
+                WHERE r.strength >= $min_strength
+                RETURN coalesce(sum(r.strength), 0.0) as total,
+                       coalesce(sum(CASE WHEN a.community_id = b.community_id THEN r.strength ELSE 0.0 END), 0.0)
+                           as internal
+            """, min_strength=min_strength).single()
+            communities = session.run("""
+                MATCH (e:Entity)-[r:RELATED_TO]-(:Entity)
+                WHERE r.strength >= $min_strength
+                RETURN e.community_id as community_id, sum(r.strength) as strength, count(DISTINCT e) as nodes
+            """, min_strength=min_strength).data()
+
+        assigned = [row for row in communities if row['community_id'] is not None]
+        strength = np.zeros(max((row['community_id'] for row in assigned), default=-1) + 1)
+        for row in assigned:
+            strength[row['community_id']] = row['strength']
+        return {
+            'total_weight': float(weights['total']),
+            'internal_weight': float(weights['internal']),
+            'community_strength': strength,
+            'num_nodes': sum(row['nodes'] for row in communities)
+        }
+
+    def drift(self, state: Dict[str, Any], current: float, num_nodes: int) -> Dict[str, float]:
+        """Share of nodes placed incrementally and relative modularity loss since the full run"""
+        baseline = state.get('baseline_modularity') or current
+        incremental_share = state.get('incremental_nodes', 0) / max(num_nodes, 1)
+        modularity_loss = max(0.0, (baseline - current) / baseline) if baseline > 0 else 0.0
+        return {
+            'modularity': current,
+            'incremental_share': incremental_share,
+            'modularity_loss': modularity_loss,
+            'drift': max(incremental_share, modularity_loss)
+        }
+
+    def update(self, since: Optional[int] = None, started_at: Optional[int] = None,
+               min_strength: float = 2) -> Dict[str, Any]:
+        """
+        Assign new entities and refresh the affected communities
+
+        Returns a summary including 'full_detection_due' when drift crosses the threshold
+        """
+        state = load_community_state(self.state_file)
+        if not state:
+            return {'status': 'no_baseline', 'full_detection_due': True}
+
+        since = since if since is not None else state['last_run']
+        resolution = state.get('resolution', 1.0)
+
+        changed = self.changed_entities(since, min_strength)
+        if not changed:
+            logger.info("No entities changed since the last community update")
+            return {'status': 'up_to_date', 'full_detection_due': state.get('full_detection_due', False)}
+
+        # The changed entities with all their edges are enough to place the new ones
+        totals = self.graph_totals(min_strength)
+        graph, membership = self.engine.load_subgraph(changed, min_strength)
+        seeds = np.flatnonzero(np.isin(graph.node_ids, changed))
+        new_nodes = seeds[membership[seeds] < 0]
+        membership = assign_by_modularity_gain(graph, membership, new_nodes, resolution,
+                                               total_weight=totals['total_weight'],
+                                               community_strength=totals['community_strength'])
+        current = modularity_after_placement(graph, membership, new_nodes, totals, resolution)
+
+        # Communities whose members or edges changed, and every neighbour whose bridge status may change
+        affected = np.unique(membership[seeds])
+        is_seed = np.zeros(graph.num_nodes, dtype=bool)
+        is_seed[seeds] = True
+        neighbours = graph.node_ids[np.setdiff1d(
+            np.union1d(graph.dst[is_seed[graph.src]], graph.src[is_seed[graph.dst]]), seeds)]
+        placed = dict(zip(graph.node_ids[new_nodes].tolist(), membership[new_nodes].tolist()))
+
+        # Reload the affected communities and the neighbours with all their edges, then apply the placements
+        entity_ids = np.union1d(np.union1d(self.community_members(affected), graph.node_ids[seeds]), neighbours)
+        graph, membership = self.engine.load_subgraph(entity_ids.tolist(), min_strength)
+        membership[np.searchsorted(graph.node_ids, list(placed))] = list(placed.values())
+
+        metrics = self.engine.community_metrics(graph, membership, communities=affected)
+        in_affected = np.flatnonzero(np.isin(membership, affected))
+        partition = Partition(state.get('algorithm', 'louvain'), resolution, membership, current)
+        self.engine.write_communities(graph, partition, metrics, nodes=in_affected)
+        self._write_bridge_status(graph, metrics,
+                                  np.setdiff1d(np.flatnonzero(np.isin(graph.node_ids, neighbours)), in_affected))
+
+        state['incremental_nodes'] = state.get('incremental_nodes', 0) + len(new_nodes)
+        drift = self.drift(state, current, totals['num_nodes'])
+        state['last_run'] = started_at if started_at is not None else since
+        state['full_detection_due'] = drift['drift'] >= self.drift_threshold
+        state['last_drift'] = drift
+        save_community_state(state, self.state_file)
+
+        summary = {
+            'status': 'updated',
+            'new_entities': int(len(new_nodes)),
+            'touched_entities': int(len(seeds) - len(new_nodes)),
+            'affected_communities': int(len(affected)),
+            'entities_rewritten': int(len(in_affected)),
+            'entities_loaded': int(graph.num_nodes),
+            **drift,
+            'full_detection_due': state['full_detection_due']
+        }
+        logger.info(f"Incremental community update: {summary}")
+        if summary['full_detection_due']:
+            logger.warning(f"Community drift {drift['drift']:.3f} >= {self.drift_threshold}; full re-detection due")
+        return summary
+
+    def _write_bridge_status(self, graph: EntityGraph, metrics: Dict[str, np.ndarray], nodes: np.ndarray):
+        """Refresh bridge flags of neighbours outside the affected communities"""
+        rows = [{
+            'entity_id': int(graph.node_ids[i]),
+            'is_bridge_node': bool(metrics['is_bridge_node'][i]),
+            'connected_communities': int(metrics['connected_communities'][i])
+        } for i in nodes]
+        with self.driver.session() as session:
+            for start in range(0, len(rows), self.engine.batch_size):
+                batch = rows[start:start + self.engine.batch_size]
+                session.execute_write(lambda tx: tx.run("""
+                    UNWIND $rows AS row
+                    MATCH (e:Entity) WHERE id(e) = row.entity_id
+                    SET e.is_bridge_node = row.is_bridge_node,
+                        e.connected_communities = row.connected_communities,
+                        e.community_updated_at = timestamp()
+                """, rows=batch).consume())
@@ -0,0 +1,233 @@
+"""
+Entity Co-occurrence Graph
+Builds RELATED_TO edges from the chunk-entity incidence matrix with sparse
+matrix algebra instead of a Cypher self-join: the CONTAINS_ENTITY pairs are
+paged out of Neo4j into a binary CSR matrix X (chunks x entities), and the
+co-occurrence counts are X^T X. Counts can be PMI- or IDF-weighted and pruned
+to the top-k partners per entity before being written back in UNWIND batches.
+"""
+
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+try:
+    from .change_tracking import tombstone_relationships
+except ImportError:
+    from change_tracking import tombstone_relationships
+
+logger = logging.getLogger(__name__)
+
+WEIGHTINGS = ('count', 'pmi', 'idf')
+
+
+def incidence_matrix(chunk_ids: np.ndarray, entity_ids: np.ndarray) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """Binary chunks x entities CSR matrix and the Neo4j id of each entity column"""
+    chunks, chunk_index = np.unique(chunk_ids, return_inverse=True)
+    entities, entity_index = np.unique(entity_ids, return_inverse=True)
+    X = sparse.csr_matrix(
+        (np.ones(len(chunk_index), dtype=np.float32), (chunk_index, entity_index)),
+        shape=(len(chunks), len(entities)))
+    # A chunk that mentions an entity several times still counts once
+    X.data[:] = 1.0
+    return X, entities
+
+
+def cooccurrence_edges(X: sparse.csr_matrix, rows: Optional[np.ndarray] = None,
+                       min_count: int = 2, weighting: str = 'count',
+                       top_k: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Co-occurrence edges from an incidence matrix
+
+    Args:
+        X: Binary chunks x entities matrix
+        rows: Entity columns to compute edges for (default: all)
+        min_count: Minimum number of shared chunks
+        weighting: 'count', 'pmi' (positive PMI) or 'idf' (count * idf_a * idf_b)
+        top_k: Keep only each entity's k strongest partners
+
+    Returns:
+        Arrays 'a', 'b' (column indices, a < b), 'count' and 'weight'
+    """
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"Unknown weighting '{weighting}', expected one of {WEIGHTINGS}")
+
+    X = X.tocsc()
+    n_chunks = X.shape[0]
+    df = np.asarray(X.sum(axis=0)).ravel()
+
+    left = X if rows is None else X[:, rows]
+    row_ids = np.arange(X.shape[1]) if rows is None else np.asarray(rows)
+    C = (left.T @ X).tocoo()
+
+    a = row_ids[C.row]
+    b = C.col
+    count = C.data
+    keep = (a != b) & (count >= min_count)
+    a, b, count = a[keep], b[keep], count[keep]
+
+    if weighting == 'pmi':
+        weight = np.log(count * n_chunks / (df[a] * df[b]))
+    elif weighting == 'idf':
+        idf = np.log(n_chunks / df)
+        weight = count * idf[a] * idf[b]
+    else:
+        weight = count.astype(np.float64)
+
+    if weighting == 'pmi':
+        positive = weight > 0
+        a, b, count, weight = a[positive], b[positive], count[positive], weight[positive]
+
+    if top_k:
+        # Rows are grouped by a; keep the k heaviest partners within each group
+        order = np.lexsort((-weight, a))
+        a, b, count, weight = a[order], b[order], count[order], weight[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(a)) + 1]
+        rank = np.arange(len(a)) - np.repeat(starts, np.diff(np.r_[starts, len(a)]))
+        top = rank < top_k
+        a, b, count, weight = a[top], b[top], count[top], weight[top]
+
+    # Each surviving pair once, low column first; a pair kept from either side survives
+    low, high = np.minimum(a, b), np.maximum(a, b)
+    pairs, first = np.unique(np.stack([low, high], axis=1), axis=0, return_index=True)
+    return {
+        'a': pairs[:, 0] if len(pairs) else np.array([], dtype=np.int64),
+        'b': pairs[:, 1] if len(pairs) else np.array([], dtype=np.int64),
+        'count': count[first].astype(np.int64),
+        'weight': weight[first].astype(np.float64)
+    }
+
+
+class CooccurrenceBuilder:
+    """Build or incrementally update RELATED_TO co-occurrence edges"""
+
+    def __init__(self, driver, page_size: int = 50000, batch_size: int = 5000):
+        self.driver = driver
+        self.page_size = page_size
+        self.batch_size = batch_size
+
+    def load_incidence(self) -> Tuple[sparse.csr_matrix, np.ndarray]:
+        """Page CONTAINS_ENTITY pairs out by chunk id window"""
+        chunk_ids, entity_ids = [], []
+        with self.driver.session() as session:
+            max_id = session.run("MATCH (c:Chunk) RETURN max(id(c)) as max_id").single()["max_id"]
+            for lo in range(0, (max_id or -1) + 1, self.page_size):
+                result = session.run("""
+                    MATCH (c:Chunk)-[:CONTAINS_ENTITY]->(e:Entity)
+                    WHERE id(c) IN range($lo, $hi - 1)
+                    RETURN id(c) as chunk, id(e) as entity
+                """, lo=lo, hi=lo + self.page_size)
+                for record in result:
+                    chunk_ids.append(record["chunk"])
+                    entity_ids.append(record["entity"])
+
+        X, entities = incidence_matrix(np.array(chunk_ids, dtype=np.int64), np.array(entity_ids, dtype=np.int64))
+        logger.info(f"Loaded incidence matrix: {X.shape[0]} chunks x {X.shape[1]} entities, {X.nnz} links")
+        return X, entities
+
+    def changed_entities(self, since: int) -> np.ndarray:
+        """Neo4j ids of entities in chunks written at or after `since` (epoch ms)"""
+        with self.driver.session() as session:
+            result = session.run("""
+                MATCH (c:Chunk)-[:CONTAINS_ENTITY]->(e:Entity)
+                WHERE c.updated_at >= $since
+                RETURN DISTINCT id(e) as entity
+            """, since=since)
+            return np.array([record["entity"] for record in result], dtype=np.int64)
+
+    def _edge_rows(self, edges: Dict[str, np.ndarray], entities: np.ndarray) -> List[Dict[str, Any]]:
+        return [{'a': int(a), 'b': int(b), 'count': int(c), 'weight': float(w)}
+                for a, b, c, w in zip(entities[edges['a']], entities[edges['b']], edges['count'], edges['weight'])]
+
+    def _delete_batched(self, query: str, **params) -> int:
+        """Repeat a LIMIT-ed delete until nothing is left"""
+        total = 0
+        with self.driver.session() as session:
+            while True:
+                deleted = session.execute_write(
+                    lambda tx: tx.run(query, limit=self.batch_size, **params).single()["deleted"])
+                total += deleted
+                if deleted == 0:
+                    return total
+
+    def write_edges(self, rows: List[Dict[str, Any]]) -> int:
+        """Create edges in UNWIND batches, matching endpoints by id seek"""
+        query = """
+            UNWIND $rows AS row
+            MATCH (a:Entity) WHERE id(a) = row.a
+            MATCH (b:Entity) WHERE id(b) = row.b
+            CREATE (a)-[:RELATED_TO {strength: row.count, weight: row.weight, updated_at: timestamp()}]->(b)
+        """
+        with self.driver.session() as session:
+            for i in range(0, len(rows), self.batch_size):
+                batch = rows[i:i + self.batch_size]
+                session.execute_write(lambda tx: tx.run(query, rows=batch).consume())
+                if (i // self.batch_size) % 20 == 0:
+                    logger.info(f"Wrote {i + len(batch)}/{len(rows)} RELATED_TO edges")
+        return len(rows)
+
+    def build(self, min_count: int = 2, weighting: str = 'count', top_k: Optional[int] = None) -> int:
+        """Replace every RELATED_TO edge with a fresh co-occurrence graph"""
+        X, entities = self.load_incidence()
+        edges = cooccurrence_edges(X, min_count=min_count, weighting=weighting, top_k=top_k)
+        logger.info(f"Computed {len(edges['a'])} co-occurrence edges")
+
+        with self.driver.session() as session:
+            tombstone_relationships(session, 'RELATED_TO')
+        deleted = self._delete_batched("""
+            MATCH ()-[r:RELATED_TO]->()
+            WITH r LIMIT $limit
+            DELETE r
+            RETURN count(*) as deleted
+        """)
+        logger.info(f"Removed {deleted} existing RELATED_TO edges")
+
+        return self.write_edges(self._edge_rows(edges, entities))
+
+    def update(self, since: int, min_count: int = 2, weighting: str = 'count',
+               top_k: Optional[int] = None) -> int:
+        """
+        Recompute the edges of entities mentioned by chunks written since `since`
+
+        Counts and weights for those entities are exact; top-k pruning only
+        considers the changed entities' side, and entities that only lost
+        mentions keep their old edges, so run build() periodically.
+        """
+        changed = self.changed_entities(since)
+        if len(changed) == 0:
+            logger.info("No chunks changed; co-occurrence graph is up to date")
+            return 0
+
+        X, entities = self.load_incidence()
+        rows = np.flatnonzero(np.isin(entities, changed))
+        edges = cooccurrence_edges(X, rows=rows, min_count=min_count, weighting=weighting, top_k=top_k)
+        edge_rows = self._edge_rows(edges, entities)
+        logger.info(f"Recomputed {len(edge_rows)} edges for {len(rows)} changed entities")
+
+        # Replace every edge touching a changed entity
+        with self.driver.session() as session:
+            keys = session.run("MATCH (e:Entity) WHERE id(e) IN $ids RETURN e.key as key",
+                               ids=[int(e) for e in entities[rows]]).value()
+            tombstone_relationships(session, 'RELATED_TO', 'Entity', keys)
+        self._delete_batched("""
+            MATCH (e:Entity)-[r:RELATED_TO]-(:Entity)
+            WHERE id(e) IN $changed
+            WITH DISTINCT r LIMIT $limit
+            DELETE r
+            RETURN count(*) as deleted
+        """, changed=[int(e) for e in entities[rows]])
+
+        return self.write_edges(edge_rows)
+
+    def statistics(self) -> Dict[str, Any]:
+        """Strength distribution of the RELATED_TO edges"""
+        with self.driver.session() as session:
+            return session.run("""
+                MATCH ()-[r:RELATED_TO]->()
+                RETURN count(r) as total_relationships,
+                       min(r.strength) as min_strength,
+                       max(r.strength) as max_strength,
+                       avg(r.strength) as avg_strength
+            """).single().data()
@@ -9,6 +9,8 @@ import sys
 import json
 import logging
 from knowledge_ingestion_agent import KnowledgeIngestionAgent
+from ingestion_journal import DEFAULT_JOURNAL_DIR
+from ingestion_profiler import IngestionReport, DEFAULT_REPORT
 
 # Set up logging
 logging.basicConfig(
@@ -17,8 +19,8 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def process_inventory_sequential(agent, inventory_file):
-    """Process inventory sequentially for Docker compatibility"""
+def process_inventory_sequential(agent, inventory_file, resume=False, profile_report=DEFAULT_REPORT):
+    """Process inventory sequentially for Docker compatibility, resuming from the journal if asked"""
     logger.info(f"Processing inventory sequentially: {inventory_file}")
     
     # Load inventory
@@ -30,10 +32,21 @@ def process_inventory_sequential(agent, inventory_file):
     
     # Process each file sequentially
     processed = 0
+    skipped = 0
     errors = 0
+    report = IngestionReport()
+    agent.import_legacy_logs()
+    
+    done = agent.journal.validated() if resume and agent.journal else set()
+    if done:
+        logger.info(f"Resuming: {len(done)} documents already validated")
     
     for i, file_info in enumerate(inventory['files']):
         try:
+            if file_info.get('filename', '').replace('.pdf', '') in done:
+                skipped += 1
+                continue
+            
             local_path = file_info['local_path']
             
             # Map Docker paths to actual paths
@@ -51,7 +64,7 @@ def process_inventory_sequential(agent, inventory_file):
             logger.info(f"Processing [{i+1}/{total_files}]: {file_info['filename']}")
             
             # Process the single PDF
-            agent.process_single_pdf(local_path, file_info)
+            report.add(agent.process_single_pdf(local_path, file_info, resume=resume))
             processed += 1
             
             logger.info(f"Successfully processed: {file_info['filename']}")
@@ -62,7 +75,11 @@ def process_inventory_sequential(agent, inventory_file):
             logger.error(traceback.format_exc())
             errors += 1
     
-    logger.info(f"Processing complete: {processed} successful, {errors} errors")
+    logger.info(f"Processing complete: {processed} successful, {skipped} already done, {errors} errors")
+    
+    if profile_report:
+        report.log_summary()
+        report.write(profile_report)
 
 def main():
     import argparse
@@ -72,6 +89,10 @@ def main():
     parser.add_argument('--neo4j-uri', default='bolt://neo4j:7687', help='Neo4j URI')
     parser.add_argument('--neo4j-user', default='neo4j', help='Neo4j username')
     parser.add_argument('--neo4j-password', default='knowledge123', help='Neo4j password')
+    parser.add_argument('--journal-dir', default=DEFAULT_JOURNAL_DIR, help='Checkpoint journal directory')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip validated documents and continue the rest from their last completed stage')
+    parser.add_argument('--profile-report', default=DEFAULT_REPORT, help='Per-stage, per-document cost report')
     
     args = parser.parse_args()
     
@@ -79,17 +100,20 @@ def main():
     neo4j_uri = os.getenv('NEO4J_URI', args.neo4j_uri)
     neo4j_user = os.getenv('NEO4J_USER', args.neo4j_user)
     neo4j_password = os.getenv('NEO4J_PASSWORD', args.neo4j_password)
+    journal_dir = os.getenv('INGESTION_JOURNAL_DIR', args.journal_dir)
+    profile_report = os.getenv('INGESTION_PROFILE_REPORT', args.profile_report)
     
     # Create agent with single worker
     agent = KnowledgeIngestionAgent(
         neo4j_uri=neo4j_uri,
         neo4j_user=neo4j_user,
         neo4j_password=neo4j_password,
-        num_workers=1  # Single worker for Docker
+        num_workers=1,  # Single worker for Docker
+        journal_dir=journal_dir
     )
     
     # Process inventory sequentially
-    process_inventory_sequential(agent, args.inventory)
+    process_inventory_sequential(agent, args.inventory, resume=args.resume, profile_report=profile_report)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
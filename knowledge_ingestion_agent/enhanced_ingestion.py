@@ -17,6 +17,15 @@ from neo4j import GraphDatabase
 import spacy
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+try:
+    from .entity_keys import entity_key
+    from .schema_manager import SchemaManager
+    from .keyword_linker import KeywordLinker
+except ImportError:
+    from entity_keys import entity_key
+    from schema_manager import SchemaManager
+    from keyword_linker import KeywordLinker
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -46,6 +55,10 @@ class EnhancedKnowledgeIngestion:
         self.neo4j_uri = neo4j_uri
         self.neo4j_user = neo4j_user
         self.neo4j_password = neo4j_password
+        self.schema_ready = False
+        
+        # Keyword -> chunk index for SIMILAR_TO linking, loaded from the graph on first use
+        self.keyword_linker = KeywordLinker()
         
         # Initialize models
         logger.info("Loading enhanced models...")
@@ -301,6 +314,10 @@ class EnhancedKnowledgeIngestion:
                                      auth=(self.neo4j_user, self.neo4j_password))
         
         try:
+            if not self.schema_ready:
+                SchemaManager(driver).apply()
+                self.schema_ready = True
+            
             with driver.session() as session:
                 # Store document
                 session.run("""
@@ -310,7 +327,8 @@ class EnhancedKnowledgeIngestion:
                         d.keywords = $keywords,
                         d.chunk_count = $chunk_count,
                         d.has_definitions = $has_definitions,
-                        d.has_examples = $has_examples
+                        d.has_examples = $has_examples,
+                        d.updated_at = timestamp()
                 """, 
                     id=knowledge_data['document']['id'],
                     title=knowledge_data['document']['title'],
@@ -334,7 +352,8 @@ class EnhancedKnowledgeIngestion:
                             c.semantic_density = $semantic_density,
                             c.has_definitions = $has_definitions,
                             c.has_examples = $has_examples,
-                            c.word_count = $word_count
+                            c.word_count = $word_count,
+                            c.updated_at = timestamp()
                     """,
                         id=chunk.id,
                         text=chunk.text,
@@ -353,35 +372,38 @@ class EnhancedKnowledgeIngestion:
                     session.run("""
                         MATCH (d:Document {id: $doc_id})
                         MATCH (c:Chunk {id: $chunk_id})
-                        MERGE (d)-[:HAS_CHUNK]->(c)
+                        MERGE (d)-[r:HAS_CHUNK]->(c)
+                        ON CREATE SET r.updated_at = timestamp()
                     """, doc_id=knowledge_data['document']['id'], chunk_id=chunk.id)
                     
                     # Store entities
                     for entity in chunk.entities:
                         session.run("""
-                            MERGE (e:Entity {text: $text, type: $type})
+                            MERGE (e:Entity {key: $key})
+                            ON CREATE SET e.text = $text, e.type = $type
+                            SET e.updated_at = timestamp()
                             WITH e
                             MATCH (c:Chunk {id: $chunk_id})
-                            MERGE (c)-[:CONTAINS_ENTITY]->(e)
-                        """, text=entity['text'].lower(), type=entity['type'], chunk_id=chunk.id)
+                            MERGE (c)-[r:CONTAINS_ENTITY]->(e)
+                            ON CREATE SET r.updated_at = timestamp()
+                        """, key=entity_key(entity['text'], entity['type']), text=entity['text'],
+                            type=entity['type'], chunk_id=chunk.id)
                 
                 # Create chunk relationships
                 for rel in knowledge_data['relationships']:
                     session.run("""
                         MATCH (c1:Chunk {id: $from})
                         MATCH (c2:Chunk {id: $to})
-                        MERGE (c1)-[:NEXT_CHUNK]->(c2)
+                        MERGE (c1)-[r:NEXT_CHUNK]->(c2)
+                        ON CREATE SET r.updated_at = timestamp()
                     """, **rel)
                 
-                # Create similarity relationships for chunks with high keyword overlap
-                session.run("""
-                    MATCH (c1:Chunk), (c2:Chunk)
-                    WHERE c1.id < c2.id
-                    AND size([k IN c1.keywords WHERE k IN c2.keywords]) >= 3
-                    MERGE (c1)-[:SIMILAR_TO]->(c2)
-                """)
+                # Link chunks with high keyword overlap, looking up partners in the keyword index
+                similar = self.keyword_linker.link(
+                    session, {chunk.id: chunk.keywords for chunk in knowledge_data['chunks']})
                 
-                logger.info(f"Stored enhanced document with {len(knowledge_data['chunks'])} chunks")
+                logger.info(f"Stored enhanced document with {len(knowledge_data['chunks'])} chunks "
+                            f"and {similar} SIMILAR_TO links")
                 
         finally:
             driver.close()
\ No newline at end of file
@@ -12,6 +12,11 @@ import spacy
 import re
 from collections import defaultdict
 
+try:
+    from .entity_keys import PRODUCT_ALIASES
+except ImportError:
+    from entity_keys import PRODUCT_ALIASES
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -61,19 +66,7 @@ class QueryPreprocessor:
         }
         
         # Financial product names and abbreviations
-        self.product_map = {
-            'fx': 'foreign exchange',
-            'fxo': 'foreign exchange option',
-            'irs': 'interest rate swap',
-            'fca': 'foreign currency account',
-            'td': 'term deposit',
-            'wibtd': 'wib term deposit',
-            'dci': 'dual currency investment',
-            'bcf': 'bonus forward contract',
-            'pfc': 'participating forward contract',
-            'rfc': 'range forward contract',
-            'tfc': 'target forward contract'
-        }
+        self.product_map = dict(PRODUCT_ALIASES)
     
     def analyze_query(self, query: str) -> QueryIntent:
         """Analyze query to understand intent"""
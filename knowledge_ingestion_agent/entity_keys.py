@@ -0,0 +1,53 @@
+"""
+Canonical Entity Keys
+Entities are merged on a single `key` property, "<TYPE>|<normalised text>",
+backed by a uniqueness constraint. The constraint turns every MERGE into an
+index seek and stops parallel writers from racing into duplicate nodes, and
+normalisation makes "Term Deposit", "term deposits" and "TD" one entity.
+"""
+
+import re
+import unicodedata
+from typing import Dict
+
+try:
+    from .numeric_facts import canonical_product
+except ImportError:
+    from numeric_facts import canonical_product
+
+# Financial product abbreviations and the names they stand for
+PRODUCT_ALIASES: Dict[str, str] = {
+    'fx': 'foreign exchange',
+    'fxo': 'foreign exchange option',
+    'irs': 'interest rate swap',
+    'fca': 'foreign currency account',
+    'td': 'term deposit',
+    'wibtd': 'wib term deposit',
+    'dci': 'dual currency investment',
+    'bcf': 'bonus forward contract',
+    'pfc': 'participating forward contract',
+    'rfc': 'range forward contract',
+    'tfc': 'target forward contract'
+}
+
+_EDGE_PUNCTUATION = re.compile(r"^[\s\"'`“”‘’.,;:!?()\[\]{}]+|[\s\"'`“”‘’.,;:!?()\[\]{}]+$")
+
+
+def normalize_entity_text(text: str, entity_type: str = '') -> str:
+    """
+    Canonical form of an entity's text
+
+    NFKC-folds and lowercases, collapses whitespace, trims edge punctuation,
+    expands product abbreviations and singularises product names.
+    """
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    text = _EDGE_PUNCTUATION.sub('', ' '.join(text.split()))
+    text = PRODUCT_ALIASES.get(text, text)
+    if entity_type == 'PRODUCT':
+        text = canonical_product(text)
+    return text
+
+
+def entity_key(text: str, entity_type: str) -> str:
+    """Unique key of an entity: type plus normalised text"""
+    return f"{entity_type}|{normalize_entity_text(text, entity_type)}"
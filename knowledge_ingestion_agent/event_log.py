@@ -0,0 +1,168 @@
+"""
+Ingestion Event Log
+Append-only SQLite log of validation results, ingestion errors and their
+resolutions. Every event is one INSERT, so the cost per document is constant
+and no history is dropped. WAL mode lets parallel ingestion workers append
+while others read, and the (kind, document_id) and (kind, status) indexes keep
+per-document and unresolved-error queries off a full scan.
+
+Resolutions are events too: an error is unresolved until a later 'resolution'
+event exists for its document.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVENT_LOG = os.path.join('data', 'ingestion_events.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,            -- validation, error, resolution
+    document_id TEXT,
+    status TEXT,                   -- validation status, error type or resolution
+    timestamp TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_kind_document ON events (kind, document_id, id);
+CREATE INDEX IF NOT EXISTS events_kind_status ON events (kind, status, id);
+"""
+
+# An error with no resolution recorded for its document after it
+UNRESOLVED = """
+    kind = 'error' AND NOT EXISTS (
+        SELECT 1 FROM events r
+        WHERE r.kind = 'resolution' AND r.document_id = events.document_id AND r.id > events.id
+    )
+"""
+
+
+class IngestionEventLog:
+    """Append and query ingestion events; safe to use from several processes"""
+
+    def __init__(self, path: str = DEFAULT_EVENT_LOG, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call: connections must not cross worker processes
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def append(self, kind: str, document_id: Optional[str], status: Optional[str],
+               payload: Dict[str, Any], timestamp: Optional[str] = None) -> int:
+        """Record one event and return its id"""
+        timestamp = timestamp or payload.get('timestamp') or datetime.now().isoformat()
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO events (kind, document_id, status, timestamp, payload) VALUES (?, ?, ?, ?, ?)",
+                    (kind, document_id, status, timestamp, json.dumps(payload, default=str)))
+                return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def _select(self, where: str, params: tuple = (), limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        query = f"SELECT id, kind, document_id, status, timestamp, payload FROM events WHERE {where} ORDER BY id"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        conn = self._connect()
+        try:
+            return [{'event_id': row['id'], 'kind': row['kind'], **json.loads(row['payload'])}
+                    for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+    def events(self, kind: Optional[str] = None, document_id: Optional[str] = None,
+               status: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Events matching every given filter, oldest first"""
+        clauses, params = [], []
+        for column, value in (('kind', kind), ('document_id', document_id), ('status', status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return self._select(' AND '.join(clauses) or '1 = 1', tuple(params), limit)
+
+    def unresolved_errors(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self._select(UNRESOLVED, limit=limit)
+
+    def unresolved_error_counts(self) -> Dict[str, int]:
+        """Unresolved errors per error type"""
+        conn = self._connect()
+        try:
+            return {row['status']: row['count'] for row in conn.execute(
+                f"SELECT status, count(*) as count FROM events WHERE {UNRESOLVED} GROUP BY status")}
+        finally:
+            conn.close()
+
+    def status_counts(self, kind: str) -> Dict[str, int]:
+        """Events of a kind per status"""
+        conn = self._connect()
+        try:
+            return {row['status']: row['count'] for row in conn.execute(
+                "SELECT status, count(*) as count FROM events WHERE kind = ? GROUP BY status", (kind,))}
+        finally:
+            conn.close()
+
+    def import_json(self, path: str, kind: str) -> int:
+        """Append the entries of a legacy JSON array log, once
+
+        The file is claimed by renaming it before it is read, so when several
+        processes try at once only one imports it; the others, like every later
+        call, find it gone and import nothing. Its entries go in one transaction
+        and the file ends up renamed to `<path>.imported`.
+        """
+        claimed = f"{path}.importing.{os.getpid()}"
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return 0
+
+        try:
+            with open(claimed) as f:
+                entries = json.load(f)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Not importing {path}: {e}")
+            os.replace(claimed, path)
+            return 0
+
+        rows = []
+        for entry in entries:
+            status = entry.get('error_type') if kind == 'error' else entry.get('status')
+            rows.append((kind, entry.get('document_id'), status, entry))
+            if kind == 'error' and entry.get('resolved'):
+                rows.append(('resolution', entry.get('document_id'), entry.get('resolution'),
+                             {'document_id': entry.get('document_id'), 'resolution': entry.get('resolution'),
+                              'timestamp': entry.get('resolved_timestamp')}))
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO events (kind, document_id, status, timestamp, payload) VALUES (?, ?, ?, ?, ?)",
+                    [(event_kind, document_id, status,
+                      payload.get('timestamp') or datetime.now().isoformat(), json.dumps(payload, default=str))
+                     for event_kind, document_id, status, payload in rows])
+        except sqlite3.Error:
+            # Nothing was committed: put the file back for the next attempt
+            os.replace(claimed, path)
+            raise
+        finally:
+            conn.close()
+
+        os.replace(claimed, path + '.imported')
+        logger.info(f"Imported {len(entries)} {kind} entries from {path}")
+        return len(entries)
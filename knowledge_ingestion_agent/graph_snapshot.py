@@ -0,0 +1,364 @@
+"""
+In-memory Graph Snapshot
+A read-only copy of the Chunk-Entity bipartite graph held as CSR arrays, so
+query-time graph expansion (shared-entity neighbours, entity-to-chunk lookups,
+community filters) is a sparse matrix-vector product instead of a Cypher
+traversal through high-degree entities such as "rate" or "account".
+
+GraphSnapshotManager loads the snapshot at API/MCP startup and reloads it in
+the background whenever graph_version() changes.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_INTERVAL = 60.0
+DEFAULT_PPR_RESTART = 0.25
+DEFAULT_PPR_ITERATIONS = 10
+
+# Each query is answered from the count store or a single index seek
+GRAPH_VERSION_QUERIES = {
+    'chunks': "MATCH (c:Chunk) RETURN count(c) as value",
+    'entities': "MATCH (e:Entity) RETURN count(e) as value",
+    'mentions': "MATCH ()-[r:CONTAINS_ENTITY]->() RETURN count(r) as value",
+    'chunk_updated_at': """
+        MATCH (c:Chunk) WHERE c.updated_at IS NOT NULL
+        RETURN c.updated_at as value ORDER BY c.updated_at DESC LIMIT 1
+    """,
+    'entity_updated_at': """
+        MATCH (e:Entity) WHERE e.updated_at IS NOT NULL
+        RETURN e.updated_at as value ORDER BY e.updated_at DESC LIMIT 1
+    """,
+    'community_updated_at': """
+        MATCH (e:Entity) WHERE e.community_updated_at IS NOT NULL
+        RETURN e.community_updated_at as value ORDER BY e.community_updated_at DESC LIMIT 1
+    """,
+    'deleted_at': """
+        MATCH (t:Tombstone) WHERE t.deleted_at IS NOT NULL
+        RETURN t.deleted_at as value ORDER BY t.deleted_at DESC LIMIT 1
+    """,
+}
+
+
+def graph_version(session) -> Tuple:
+    """Cheap fingerprint of the graph that changes whenever chunks, entities or communities are written"""
+    version = []
+    for query in GRAPH_VERSION_QUERIES.values():
+        record = session.run(query).single()
+        version.append(record["value"] if record else None)
+    return tuple(version)
+
+
+class GraphSnapshot:
+    """Chunk->entity and entity->chunk CSR adjacency with per-entity degree, IDF and community id"""
+
+    def __init__(self, chunk_ids: List[str], chunk_documents: List[str], chunk_pages: List[int],
+                 entity_texts: List[str], entity_types: List[str], entity_communities: np.ndarray,
+                 chunk_index: np.ndarray, entity_index: np.ndarray,
+                 documents: Dict[str, str], version: Tuple = ()):
+        self.chunk_ids = np.asarray(chunk_ids, dtype=object)
+        self.chunk_documents = np.asarray(chunk_documents, dtype=object)
+        self.document_ids, self.chunk_document_index = np.unique(
+            np.asarray(chunk_documents, dtype=str), return_inverse=True)
+        self.chunk_pages = np.asarray(chunk_pages, dtype=np.int32)
+        self.entity_texts = np.asarray(entity_texts, dtype=object)
+        self.entity_types = np.asarray(entity_types, dtype=object)
+        self.entity_communities = np.asarray(entity_communities, dtype=np.int64)
+        self.documents = documents
+        self.version = version
+        self.loaded_at = time.time()
+
+        X = sparse.csr_matrix(
+            (np.ones(len(chunk_index), dtype=np.float32), (chunk_index, entity_index)),
+            shape=(len(chunk_ids), len(entity_texts)))
+        X.sum_duplicates()
+        X.data[:] = 1.0
+        self.chunk_entities = X
+        self.entity_chunks = X.T.tocsr()
+
+        self.chunk_degree = np.diff(X.indptr)
+        self.entity_degree = np.diff(self.entity_chunks.indptr)
+        self.idf = np.log((1 + self.num_chunks) / (1 + self.entity_degree)) + 1.0
+
+        self.chunk_index = {chunk_id: i for i, chunk_id in enumerate(chunk_ids)}
+        self._entity_lower = np.array([(text or '').lower() for text in entity_texts], dtype=str)
+        exact: Dict[str, List[int]] = {}
+        for i, text in enumerate(self._entity_lower):
+            exact.setdefault(text, []).append(i)
+        self._entity_exact = {text: np.array(ids) for text, ids in exact.items()}
+
+    @property
+    def num_chunks(self) -> int:
+        return len(self.chunk_ids)
+
+    @property
+    def num_entities(self) -> int:
+        return len(self.entity_texts)
+
+    def match_entities(self, text: str, community_id: Optional[int] = None) -> np.ndarray:
+        """Entities whose lowercased text contains `text`"""
+        text = text.lower()
+        matched = np.flatnonzero(np.char.find(self._entity_lower, text) >= 0) if text else np.array([], dtype=np.int64)
+        if community_id is not None:
+            matched = matched[self.entity_communities[matched] == community_id]
+        return matched
+
+    def lookup_entities(self, texts: List[str]) -> np.ndarray:
+        """Entities whose text equals one of `texts` (case-insensitive)"""
+        found = [self._entity_exact[t.lower()] for t in texts if t.lower() in self._entity_exact]
+        return np.unique(np.concatenate(found)) if found else np.array([], dtype=np.int64)
+
+    def entities_of(self, chunk: int) -> np.ndarray:
+        X = self.chunk_entities
+        return X.indices[X.indptr[chunk]:X.indptr[chunk + 1]]
+
+    def chunks_of(self, entity: int) -> np.ndarray:
+        E = self.entity_chunks
+        return E.indices[E.indptr[entity]:E.indptr[entity + 1]]
+
+    def chunk_entity_dicts(self, chunk: int) -> List[Dict[str, str]]:
+        entities = self.entities_of(chunk)
+        return [{'text': text, 'type': etype}
+                for text, etype in zip(self.entity_texts[entities], self.entity_types[entities])]
+
+    def chunk_scores(self, entities: np.ndarray, weighting: str = 'count') -> np.ndarray:
+        """Per chunk: number (or IDF-weighted sum) of the given entities it contains"""
+        # Only the entity->chunk rows of the given entities are touched
+        rows = self.entity_chunks[np.asarray(entities, dtype=np.int64)]
+        weights = self.idf[entities] if weighting == 'idf' else np.ones(len(entities))
+        return np.bincount(rows.indices, weights=np.repeat(weights, np.diff(rows.indptr)),
+                           minlength=self.num_chunks)
+
+    def shared_entity_scores(self, chunk: int, weighting: str = 'count') -> np.ndarray:
+        """Per chunk: entities shared with `chunk` (count or IDF-weighted)"""
+        scores = self.chunk_scores(self.entities_of(chunk), weighting)
+        scores[chunk] = 0
+        return scores
+
+    def top_chunks(self, scores: np.ndarray, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices and scores of the highest non-zero scores, best first"""
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > limit:
+            hits = hits[np.argpartition(-scores[hits], limit - 1)[:limit]]
+        hits = hits[np.argsort(-scores[hits], kind='stable')]
+        return hits, scores[hits]
+
+    def neighbours(self, chunk: int, limit: int = 3, weighting: str = 'count') -> Tuple[np.ndarray, np.ndarray]:
+        """Chunks sharing the most entities with `chunk`"""
+        return self.top_chunks(self.shared_entity_scores(chunk, weighting), limit)
+
+    def personalized_pagerank(self, entity_seeds: Optional[np.ndarray] = None,
+                              chunk_seeds: Optional[np.ndarray] = None,
+                              restart: float = DEFAULT_PPR_RESTART,
+                              iterations: int = DEFAULT_PPR_ITERATIONS,
+                              tol: float = 1e-4) -> Tuple[np.ndarray, int]:
+        """
+        Personalised PageRank over the bipartite Chunk-Entity graph
+
+        A walker alternates chunk -> entity -> chunk, following a uniformly
+        chosen edge, and jumps back to the seed distribution with probability
+        `restart` at every step. Each iteration is one sparse product in each
+        direction. The degree division means a hub entity such as "rate" spreads
+        its mass over thousands of chunks, so it adds little to any one of them.
+
+        Args:
+            entity_seeds: Restart weight per entity (length num_entities) or None
+            chunk_seeds: Restart weight per chunk (length num_chunks) or None
+
+        Returns:
+            Stationary mass per chunk and the number of iterations run
+        """
+        # float32 throughout: the matrices are float32 and ranking does not need more precision
+        seed_e = np.zeros(self.num_entities, dtype=np.float32) if entity_seeds is None \
+            else np.asarray(entity_seeds, dtype=np.float32)
+        seed_c = np.zeros(self.num_chunks, dtype=np.float32) if chunk_seeds is None \
+            else np.asarray(chunk_seeds, dtype=np.float32)
+        total = seed_e.sum() + seed_c.sum()
+        if total <= 0:
+            return np.zeros(self.num_chunks, dtype=np.float32), 0
+        seed_e, seed_c = seed_e / total, seed_c / total
+
+        inv_chunk_degree = (1.0 / np.maximum(self.chunk_degree, 1)).astype(np.float32)
+        inv_entity_degree = (1.0 / np.maximum(self.entity_degree, 1)).astype(np.float32)
+        p_e, p_c = seed_e.copy(), seed_c.copy()
+        iteration = 0
+        for iteration in range(1, iterations + 1):
+            next_e = (1 - restart) * (self.entity_chunks @ (p_c * inv_chunk_degree)) + restart * seed_e
+            next_c = (1 - restart) * (self.chunk_entities @ (p_e * inv_entity_degree)) + restart * seed_c
+            # Mass that reached isolated nodes returns to the seeds
+            leaked = np.float32(1.0 - next_e.sum() - next_c.sum())
+            next_e += leaked * seed_e
+            next_c += leaked * seed_c
+            delta = np.abs(next_e - p_e).sum() + np.abs(next_c - p_c).sum()
+            p_e, p_c = next_e, next_c
+            if delta < tol:
+                break
+        return p_c, iteration
+
+    def entity_document_counts(self, entities: np.ndarray, limit: int) -> List[Dict[str, Any]]:
+        """Chunk count and first pages per (entity, document) pair, most chunks first"""
+        rows = self.entity_chunks[np.asarray(entities, dtype=np.int64)]
+        owner = np.repeat(np.asarray(entities, dtype=np.int64), np.diff(rows.indptr))
+        chunks = rows.indices
+        num_documents = max(len(self.document_ids), 1)
+        keys = owner * num_documents + self.chunk_document_index[chunks]
+        pairs, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+
+        results = []
+        for pair in np.argsort(-counts, kind='stable')[:limit]:
+            entity, document = divmod(int(pairs[pair]), num_documents)
+            document_id = str(self.document_ids[document])
+            results.append({
+                'entity': entity,
+                'document_id': document_id,
+                'filename': self.documents.get(document_id),
+                'chunk_count': int(counts[pair]),
+                'pages': np.unique(self.chunk_pages[chunks[inverse == pair]])[:5].tolist()
+            })
+        return results
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'chunks': self.num_chunks,
+            'entities': self.num_entities,
+            'mentions': int(self.chunk_entities.nnz),
+            'documents': len(self.documents),
+            'loaded_at': self.loaded_at,
+            'version': list(self.version)
+        }
+
+
+def _paged(session, query: str, max_query: str, page_size: int):
+    """Yield records of `query` for consecutive internal id windows"""
+    max_id = session.run(max_query).single()["max_id"]
+    for lo in range(0, (max_id if max_id is not None else -1) + 1, page_size):
+        yield from session.run(query, lo=lo, hi=lo + page_size)
+
+
+def load_graph_snapshot(driver, page_size: int = 50000) -> GraphSnapshot:
+    """Read chunks, entities and CONTAINS_ENTITY pairs out of Neo4j by id window"""
+    start = time.time()
+    with driver.session() as session:
+        version = graph_version(session)
+
+        documents = {record["id"]: record["filename"] for record in session.run(
+            "MATCH (d:Document) RETURN d.id as id, d.filename as filename")}
+
+        chunk_node_ids, chunk_ids, chunk_documents, chunk_pages = [], [], [], []
+        for record in _paged(session, """
+                MATCH (d:Document)-[:HAS_CHUNK]->(c:Chunk)
+                WHERE id(c) IN range($lo, $hi - 1)
+                RETURN id(c) as node_id, c.id as chunk_id, d.id as document_id, c.page_num as page_num
+            """, "MATCH (c:Chunk) RETURN max(id(c)) as max_id", page_size):
+            chunk_node_ids.append(record["node_id"])
+            chunk_ids.append(record["chunk_id"])
+            chunk_documents.append(record["document_id"])
+            chunk_pages.append(record["page_num"] or 0)
+
+        entity_node_ids, entity_texts, entity_types, entity_communities = [], [], [], []
+        for record in _paged(session, """
+                MATCH (e:Entity)
+                WHERE id(e) IN range($lo, $hi - 1)
+                RETURN id(e) as node_id, e.text as text, e.type as type, e.community_id as community_id
+            """, "MATCH (e:Entity) RETURN max(id(e)) as max_id", page_size):
+            entity_node_ids.append(record["node_id"])
+            entity_texts.append(record["text"])
+            entity_types.append(record["type"])
+            entity_communities.append(-1 if record["community_id"] is None else record["community_id"])
+
+        pair_chunks, pair_entities = [], []
+        for record in _paged(session, """
+                MATCH (c:Chunk)-[:CONTAINS_ENTITY]->(e:Entity)
+                WHERE id(c) IN range($lo, $hi - 1)
+                RETURN id(c) as chunk, id(e) as entity
+            """, "MATCH (c:Chunk) RETURN max(id(c)) as max_id", page_size):
+            pair_chunks.append(record["chunk"])
+            pair_entities.append(record["entity"])
+
+    # Map internal ids to row/column positions; drop pairs whose chunk has no document
+    chunk_node_ids = np.asarray(chunk_node_ids, dtype=np.int64)
+    entity_node_ids = np.asarray(entity_node_ids, dtype=np.int64)
+    chunk_order = np.argsort(chunk_node_ids)
+    entity_order = np.argsort(entity_node_ids)
+    pair_chunks = np.asarray(pair_chunks, dtype=np.int64)
+    pair_entities = np.asarray(pair_entities, dtype=np.int64)
+
+    chunk_pos = np.searchsorted(chunk_node_ids[chunk_order], pair_chunks)
+    entity_pos = np.searchsorted(entity_node_ids[entity_order], pair_entities)
+    chunk_pos = np.minimum(chunk_pos, max(len(chunk_order) - 1, 0))
+    entity_pos = np.minimum(entity_pos, max(len(entity_order) - 1, 0))
+    known = np.zeros(len(pair_chunks), dtype=bool)
+    if len(chunk_order) and len(entity_order):
+        known = ((chunk_node_ids[chunk_order][chunk_pos] == pair_chunks) &
+                 (entity_node_ids[entity_order][entity_pos] == pair_entities))
+
+    snapshot = GraphSnapshot(
+        chunk_ids, chunk_documents, chunk_pages,
+        entity_texts, entity_types, np.asarray(entity_communities, dtype=np.int64),
+        chunk_order[chunk_pos[known]] if len(chunk_order) else np.array([], dtype=np.int64),
+        entity_order[entity_pos[known]] if len(entity_order) else np.array([], dtype=np.int64),
+        documents, version)
+    logger.info(f"Loaded graph snapshot: {snapshot.num_chunks} chunks, {snapshot.num_entities} entities, "
+                f"{snapshot.chunk_entities.nnz} mentions in {time.time() - start:.1f}s")
+    return snapshot
+
+
+class GraphSnapshotManager:
+    """Hold the current GraphSnapshot and reload it when the graph version changes"""
+
+    def __init__(self, driver, refresh_interval: float = DEFAULT_REFRESH_INTERVAL, page_size: int = 50000):
+        self.driver = driver
+        self.refresh_interval = refresh_interval
+        self.page_size = page_size
+        self._snapshot: Optional[GraphSnapshot] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self) -> Optional[GraphSnapshot]:
+        """Current snapshot, or None when it could not be loaded (callers fall back to Cypher)"""
+        return self._snapshot
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if the graph version changed; returns True when a new snapshot was installed"""
+        with self._lock:
+            try:
+                if not force and self._snapshot is not None:
+                    with self.driver.session() as session:
+                        if graph_version(session) == self._snapshot.version:
+                            return False
+                self._snapshot = load_graph_snapshot(self.driver, self.page_size)
+                return True
+            except Exception as e:
+                logger.error(f"Graph snapshot refresh failed: {e}")
+                return False
+
+    def start(self):
+        """Load synchronously, then poll for version changes in a daemon thread"""
+        self.refresh(force=True)
+        if self.refresh_interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._poll, name='graph-snapshot-refresh', daemon=True)
+            self._thread.start()
+
+    def _poll(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def info(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'loaded': False}
+        return {'loaded': True, 'refresh_interval': self.refresh_interval, **snapshot.info()}
@@ -0,0 +1,217 @@
+"""
+Ingestion Checkpoint Journal
+Durable per-document state for `process_inventory`, so a crashed or restarted
+run resumes each document from its last completed stage instead of redoing
+extraction, NLP and embedding for the whole inventory.
+
+States: pending -> extracting -> extracted -> embedded -> written -> validated,
+or failed. Transitions are single SQLite transactions (WAL mode, safe from
+worker processes); `stage` keeps the last completed stage, including for
+failed documents. Extracted pages and embedded chunks are spooled to disk
+(written to a temporary file, then renamed) before the stage is recorded, so
+a recorded stage always has its artefact.
+"""
+
+import os
+import shutil
+import pickle
+import sqlite3
+import logging
+import argparse
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_DIR = os.path.join('data', 'ingestion_journal')
+
+# Completed stages, in order
+STAGES = ['extracted', 'embedded', 'written', 'validated']
+STATES = ['pending', 'extracting'] + STAGES + ['failed']
+
+# Artefact each completed stage resumes from
+STAGE_ARTEFACTS = {'extracted': 'pages', 'embedded': 'chunks', 'written': 'chunks'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    path TEXT,
+    state TEXT NOT NULL,
+    stage TEXT,                    -- last completed stage
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_state ON documents (state);
+"""
+
+
+class IngestionJournal:
+    """Per-document ingestion state and spooled artefacts; safe to use from several processes"""
+
+    def __init__(self, journal_dir: str = DEFAULT_JOURNAL_DIR, timeout: float = 30.0):
+        self.journal_dir = journal_dir
+        self.path = os.path.join(journal_dir, 'journal.db')
+        self.spool_dir = os.path.join(journal_dir, 'spool')
+        self.timeout = timeout
+        os.makedirs(self.spool_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call: connections must not cross worker processes
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM documents WHERE document_id = ?", (document_id,)).fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
+    def begin(self, document_id: str, path: str, resume: bool = False) -> Optional[str]:
+        """
+        Start (or restart) a document and return the stage to resume from
+
+        Without `resume` the document starts again from pending and its spool
+        is cleared. With it, the last completed stage is kept if its artefact
+        is still on disk; otherwise the document falls back to the previous
+        stage that has one.
+        """
+        if not resume:
+            self._clear_spool(document_id)
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT stage FROM documents WHERE document_id = ?", (document_id,)).fetchone()
+            stage = row['stage'] if row and resume else None
+            while stage in STAGE_ARTEFACTS and not self._has_artefact(document_id, STAGE_ARTEFACTS[stage]):
+                index = STAGES.index(stage)
+                stage = STAGES[index - 1] if index else None
+            state = stage or 'pending'
+            conn.execute("""
+                INSERT INTO documents (document_id, path, state, stage, attempts, error, updated_at)
+                VALUES (?, ?, ?, ?, 1, NULL, ?)
+                ON CONFLICT(document_id) DO UPDATE SET
+                    path = excluded.path, state = excluded.state, stage = excluded.stage,
+                    attempts = attempts + 1, error = NULL, updated_at = excluded.updated_at
+            """, (document_id, path, state, stage, datetime.now().isoformat()))
+            conn.execute("COMMIT")
+            return stage
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def mark(self, document_id: str, state: str, error: Optional[str] = None):
+        """Atomically move a document to `state`; completed stages may not move backwards"""
+        if state not in STATES:
+            raise ValueError(f"Unknown ingestion state: {state}")
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT stage FROM documents WHERE document_id = ?", (document_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Document {document_id} has not been started in the journal")
+            stage = row['stage']
+            if state in STAGES:
+                if stage and STAGES.index(state) < STAGES.index(stage):
+                    raise ValueError(f"Document {document_id} is already {stage}, cannot record {state}")
+                stage = state
+            conn.execute("UPDATE documents SET state = ?, stage = ?, error = ?, updated_at = ? WHERE document_id = ?",
+                         (state, stage, error, datetime.now().isoformat(), document_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        if state == 'validated':
+            self._clear_spool(document_id)
+
+    def validated(self, document_ids: Optional[Iterable[str]] = None) -> Set[str]:
+        """Documents already ingested and validated (optionally restricted to `document_ids`)"""
+        conn = self._connect()
+        try:
+            done = {row['document_id'] for row in conn.execute(
+                "SELECT document_id FROM documents WHERE state = 'validated'")}
+        finally:
+            conn.close()
+        return done if document_ids is None else done & set(document_ids)
+
+    def documents(self, state: Optional[str] = None) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            query = "SELECT * FROM documents" + (" WHERE state = ?" if state else "") + " ORDER BY updated_at"
+            return [dict(row) for row in conn.execute(query, (state,) if state else ())]
+        finally:
+            conn.close()
+
+    def state_counts(self) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            return {row['state']: row['count'] for row in conn.execute(
+                "SELECT state, count(*) as count FROM documents GROUP BY state")}
+        finally:
+            conn.close()
+
+    # Spooled artefacts
+
+    def _artefact_path(self, document_id: str, name: str) -> str:
+        return os.path.join(self.spool_dir, document_id, f"{name}.pkl")
+
+    def _has_artefact(self, document_id: str, name: str) -> bool:
+        return os.path.exists(self._artefact_path(document_id, name))
+
+    def save(self, document_id: str, name: str, artefact: Any):
+        """Spool an artefact; the rename makes a half-written file impossible to load"""
+        path = self._artefact_path(document_id, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(artefact, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def load(self, document_id: str, name: str) -> Optional[Any]:
+        """A spooled artefact, or None if it is missing or cannot be unpickled"""
+        try:
+            with open(self._artefact_path(document_id, name), 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load spooled {name} for {document_id}: {e}")
+            return None
+
+    def _clear_spool(self, document_id: str):
+        shutil.rmtree(os.path.join(self.spool_dir, document_id), ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the ingestion checkpoint journal')
+    parser.add_argument('--journal-dir', default=DEFAULT_JOURNAL_DIR, help='Journal directory')
+    parser.add_argument('--state', choices=STATES, help='List the documents in this state')
+    args = parser.parse_args()
+
+    journal = IngestionJournal(args.journal_dir)
+    counts = journal.state_counts()
+    for state in STATES:
+        print(f"{state:<12} {counts.get(state, 0)}")
+    if args.state:
+        print()
+        for document in journal.documents(args.state):
+            print(f"{document['document_id']}  stage={document['stage']}  attempts={document['attempts']}"
+                  + (f"  error={document['error']}" if document['error'] else ""))
+
+
+if __name__ == "__main__":
+    main()
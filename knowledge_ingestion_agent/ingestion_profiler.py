@@ -0,0 +1,288 @@
+"""
+Ingestion Profiler
+Wall time, CPU time, peak RSS and item counts per stage per document, so a
+slow ingestion run shows whether PDF parsing, spaCy, embeddings, dedup or the
+Neo4j writes dominate, and which documents are pathological.
+
+`process_single_pdf` runs each document inside a `DocumentProfile`; code inside
+it times itself with `profile_stage(name)` (a no-op outside a profile).
+Stages nest, and each stage's wall and CPU time exclude its nested stages, so
+the stages of a document add up to its total. CPU time is the whole process's
+plus that of child processes reaped during the stage (the OCR pool is shut down
+at the end of each OCR stage), so a stage using several threads (embeddings) or
+processes (OCR) can show more CPU than wall time.
+Peak RSS is measured for top-level stages only: resetting the kernel's
+high-water mark per chunk would cost more than the stages it measures.
+
+Profiles come back in the worker's result and `IngestionReport` aggregates them
+into ingestion_profile.json next to ingestion_stats.json: every document's
+stages, per-stage totals and throughput, and the most expensive documents.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPORT = 'ingestion_profile.json'
+
+_profile: ContextVar[Optional['DocumentProfile']] = ContextVar('ingestion_profile', default=None)
+
+
+def _peak_rss_kb() -> Optional[int]:
+    """High-water mark of resident memory since the last reset (VmHWM), in KB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _cpu_time() -> float:
+    """CPU seconds of this process and of its reaped children"""
+    if resource is None:
+        return time.process_time()
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def _reset_peak_rss():
+    """Restart VmHWM from the current RSS (Linux); elsewhere peaks are process-lifetime"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+class StageFrame:
+    """One entry into a stage; callers set `items` to what the stage processed"""
+    __slots__ = ('name', 'items', 'wall', 'cpu', 'child_wall', 'child_cpu', 'peak_kb')
+
+    def __init__(self, name: str, items: int = 0):
+        self.name = name
+        self.items = items
+        self.wall = time.perf_counter()
+        self.cpu = _cpu_time()
+        self.child_wall = 0.0
+        self.child_cpu = 0.0
+        self.peak_kb = None
+
+
+class DocumentProfile:
+    """Per-stage costs of ingesting one document"""
+
+    def __init__(self, document_id: str):
+        self.document_id = document_id
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.root = StageFrame('document')
+        self.wall = self.cpu = 0.0
+        self.peak_kb = None
+        self._stack: List[StageFrame] = []
+        self._token = None
+
+    def __enter__(self) -> 'DocumentProfile':
+        _reset_peak_rss()
+        self.root = StageFrame('document')
+        self._stack = [self.root]
+        self._token = _profile.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _profile.reset(self._token)
+        self.wall = time.perf_counter() - self.root.wall
+        self.cpu = _cpu_time() - self.root.cpu
+        self.peak_kb = max(filter(None, (_peak_rss_kb(), self.root.peak_kb)), default=None)
+        return False
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0):
+        parent = self._stack[-1]
+        top_level = parent is self.root
+        if top_level:
+            # Keep the document's peak before restarting the high-water mark for this stage
+            parent.peak_kb = max(filter(None, (_peak_rss_kb(), parent.peak_kb)), default=None)
+            _reset_peak_rss()
+        frame = StageFrame(name, items)
+        self._stack.append(frame)
+        try:
+            yield frame
+        finally:
+            self._stack.pop()
+            wall = time.perf_counter() - frame.wall
+            cpu = _cpu_time() - frame.cpu
+            parent.child_wall += wall
+            parent.child_cpu += cpu
+
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0, 'items': 0}
+            stats['wall_s'] += wall - frame.child_wall
+            stats['cpu_s'] += cpu - frame.child_cpu
+            stats['calls'] += 1
+            stats['items'] += frame.items
+            if top_level:
+                peak = _peak_rss_kb()
+                if peak is not None:
+                    stats['peak_rss_mb'] = max(stats.get('peak_rss_mb', 0.0), round(peak / 1024, 1))
+                    parent.peak_kb = max(parent.peak_kb or 0, peak)
+
+    def to_dict(self) -> Dict[str, Any]:
+        stages = {name: {**stats, 'wall_s': round(stats['wall_s'], 4), 'cpu_s': round(stats['cpu_s'], 4)}
+                  for name, stats in self.stages.items()}
+        return {
+            'document_id': self.document_id,
+            'wall_s': round(self.wall, 4),
+            'cpu_s': round(self.cpu, 4),
+            'unattributed_s': round(self.wall - self.root.child_wall, 4),
+            'peak_rss_mb': round(self.peak_kb / 1024, 1) if self.peak_kb else None,
+            'pid': os.getpid(),
+            'stages': stages
+        }
+
+
+@contextmanager
+def profile_stage(name: str, items: int = 0):
+    """Time a stage of the document being profiled; yields a frame whose `items` may be updated"""
+    profile = _profile.get()
+    if profile is None:
+        yield StageFrame(name, items)
+        return
+    with profile.stage(name, items) as frame:
+        yield frame
+
+
+class IngestionReport:
+    """Document profiles of one run, aggregated into stage totals and the most expensive documents"""
+
+    def __init__(self):
+        self.documents: List[Dict[str, Any]] = []
+        self.started = datetime.now().isoformat()
+
+    def add(self, result: Dict[str, Any]):
+        """Add the profile of a process_single_pdf result (skipped documents are left out)"""
+        profile = result.get('profile')
+        if profile and result.get('status') != 'skipped':
+            self.documents.append({**profile, 'status': result.get('status')})
+
+    def stage_totals(self) -> Dict[str, Dict[str, Any]]:
+        """Per stage: time, share of all document time, throughput per worker and CPU/wall ratio"""
+        total_wall = sum(document['wall_s'] for document in self.documents) or 1.0
+        totals: Dict[str, Dict[str, Any]] = {}
+        for document in self.documents:
+            for name, stats in document['stages'].items():
+                stage = totals.setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0, 'items': 0,
+                                                 'documents': 0, 'peak_rss_mb': None})
+                stage['wall_s'] += stats['wall_s']
+                stage['cpu_s'] += stats['cpu_s']
+                stage['calls'] += stats['calls']
+                stage['items'] += stats['items']
+                stage['documents'] += 1
+                if stats.get('peak_rss_mb') is not None:
+                    stage['peak_rss_mb'] = max(stage['peak_rss_mb'] or 0.0, stats['peak_rss_mb'])
+
+        for stage in totals.values():
+            wall = stage['wall_s']
+            stage['share'] = round(wall / total_wall, 4)
+            stage['items_per_s'] = round(stage['items'] / wall, 2) if wall > 0 else None
+            stage['cpu_ratio'] = round(stage['cpu_s'] / wall, 2) if wall > 0 else None
+            stage['wall_s'] = round(wall, 3)
+            stage['cpu_s'] = round(stage['cpu_s'], 3)
+        return dict(sorted(totals.items(), key=lambda item: item[1]['wall_s'], reverse=True))
+
+    def most_expensive(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Documents by wall time, with their costliest stage"""
+        ranked = sorted(self.documents, key=lambda document: document['wall_s'], reverse=True)
+        return [{
+            'document_id': document['document_id'],
+            'status': document['status'],
+            'wall_s': document['wall_s'],
+            'cpu_s': document['cpu_s'],
+            'peak_rss_mb': document['peak_rss_mb'],
+            'top_stage': max(document['stages'].items(), key=lambda item: item[1]['wall_s'])[0]
+            if document['stages'] else None
+        } for document in ranked[:limit]]
+
+    def summary(self, limit: int = 20) -> Dict[str, Any]:
+        wall = sum(document['wall_s'] for document in self.documents)
+        return {
+            'started': self.started,
+            'generated_at': datetime.now().isoformat(),
+            'documents': len(self.documents),
+            'document_wall_s': round(wall, 3),
+            'documents_per_s': round(len(self.documents) / wall, 4) if wall > 0 else None,
+            'stages': self.stage_totals(),
+            'most_expensive': self.most_expensive(limit)
+        }
+
+    def write(self, path: str = DEFAULT_REPORT, limit: int = 20):
+        """The summary plus every document's profile, as JSON"""
+        with open(path, 'w') as f:
+            json.dump({**self.summary(limit), 'profiles': self.documents}, f, indent=2)
+        logger.info(f"Ingestion profile of {len(self.documents)} documents written to {path}")
+
+    def log_summary(self, limit: int = 5):
+        for name, stage in self.stage_totals().items():
+            logger.info(f"Stage {name}: {stage['wall_s']:.1f}s ({stage['share']:.0%}), "
+                        f"{stage['items_per_s']} items/s per worker")
+        for document in self.most_expensive(limit):
+            logger.info(f"Expensive: {document['document_id']} {document['wall_s']:.1f}s "
+                        f"(mostly {document['top_stage']})")
+
+
+def _print_stages(stages: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None):
+    print(f"{'stage':<16}{'wall s':>10}{'share':>8}{'cpu/wall':>10}{'items/s':>12}{'peak MB':>10}"
+          + (f"{'vs base':>10}" if baseline else ""))
+    for name, stage in stages.items():
+        line = (f"{name:<16}{stage['wall_s']:>10.2f}{stage['share']:>8.1%}{stage['cpu_ratio'] or 0:>10.2f}"
+                f"{stage['items_per_s'] or 0:>12.1f}{stage['peak_rss_mb'] or 0:>10.0f}")
+        if baseline:
+            before = baseline.get(name, {}).get('items_per_s')
+            line += f"{(stage['items_per_s'] or 0) / before - 1:>+10.0%}" if before else f"{'new':>10}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarise an ingestion profile report')
+    parser.add_argument('report', nargs='?', default=DEFAULT_REPORT, help='ingestion_profile.json')
+    parser.add_argument('--baseline', help='Earlier report to compare per-stage throughput against')
+    parser.add_argument('--top', type=int, default=10, help='Most expensive documents to list')
+    args = parser.parse_args()
+
+    with open(args.report) as f:
+        report = json.load(f)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['stages']
+
+    print(f"{report['documents']} documents, {report['document_wall_s']}s of document time, "
+          f"{report['documents_per_s']} documents/s per worker\n")
+    _print_stages(report['stages'], baseline)
+    print("\nMost expensive documents:")
+    for document in report['most_expensive'][:args.top]:
+        print(f"  {document['wall_s']:>8.2f}s  {document['peak_rss_mb'] or 0:>6.0f} MB  "
+              f"{document['top_stage'] or '-':<14} {document['document_id']} ({document['status']})")
+
+
+if __name__ == "__main__":
+    main()
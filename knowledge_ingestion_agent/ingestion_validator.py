@@ -10,15 +10,31 @@ from datetime import datetime
 from typing import Dict, Any, List, Optional
 from neo4j import GraphDatabase
 
+try:
+    from .change_tracking import delete_document_contents
+    from .event_log import IngestionEventLog, DEFAULT_EVENT_LOG
+except ImportError:
+    from change_tracking import delete_document_contents
+    from event_log import IngestionEventLog, DEFAULT_EVENT_LOG
+
 logger = logging.getLogger(__name__)
 
+# JSON logs written before the event log existed, and the event kind of their entries
+LEGACY_LOGS = (("data/ingestion_validation.json", "validation"),
+               ("data/ingestion_errors.json", "error"))
+
 class IngestionValidator:
     """Validates document ingestion completeness and handles errors"""
     
-    def __init__(self, neo4j_driver):
+    def __init__(self, neo4j_driver, event_log_path: str = DEFAULT_EVENT_LOG):
         self.driver = neo4j_driver
-        self.error_log_path = "data/ingestion_errors.json"
-        self.validation_log_path = "data/ingestion_validation.json"
+        self.event_log = IngestionEventLog(event_log_path)
+    
+    @staticmethod
+    def import_legacy_logs(event_log_path: str = DEFAULT_EVENT_LOG) -> int:
+        """Fold the legacy JSON logs into the event log; run once, before ingestion workers start"""
+        event_log = IngestionEventLog(event_log_path)
+        return sum(event_log.import_json(path, kind) for path, kind in LEGACY_LOGS)
         
     def validate_document_completeness(self, document_id: str, pages_content: List[Dict], 
                                      chunks_created: List[Any]) -> Dict[str, Any]:
@@ -95,24 +111,8 @@ class IngestionValidator:
     def log_validation_result(self, validation_result: Dict[str, Any]):
         """Log validation results for monitoring"""
         try:
-            # Load existing validations
-            try:
-                with open(self.validation_log_path, 'r') as f:
-                    validations = json.load(f)
-            except FileNotFoundError:
-                validations = []
-            
-            # Add new validation
-            validations.append(validation_result)
-            
-            # Keep last 1000 validations
-            if len(validations) > 1000:
-                validations = validations[-1000:]
-            
-            # Save
-            with open(self.validation_log_path, 'w') as f:
-                json.dump(validations, f, indent=2)
-                
+            self.event_log.append('validation', validation_result['document_id'],
+                                  validation_result['status'], validation_result)
         except Exception as e:
             logger.error(f"Failed to log validation result: {e}")
     
@@ -130,20 +130,7 @@ class IngestionValidator:
         }
         
         try:
-            # Load existing errors
-            try:
-                with open(self.error_log_path, 'r') as f:
-                    errors = json.load(f)
-            except FileNotFoundError:
-                errors = []
-            
-            # Add new error
-            errors.append(error_entry)
-            
-            # Save
-            with open(self.error_log_path, 'w') as f:
-                json.dump(errors, f, indent=2)
-                
+            self.event_log.append('error', document_id, error_entry['error_type'], error_entry)
             logger.error(f"Logged ingestion error for {document_id}: {error}")
             
         except Exception as e:
@@ -153,16 +140,8 @@ class IngestionValidator:
         """Remove an incompletely ingested document from the graph"""
         try:
             with self.driver.session() as session:
-                # Delete the document and all its relationships
-                result = session.run("""
-                    MATCH (d:Document {id: $doc_id})
-                    OPTIONAL MATCH (d)-[:HAS_CHUNK]->(c:Chunk)
-                    OPTIONAL MATCH (c)-[:CONTAINS_ENTITY]->(e:Entity)
-                    DETACH DELETE d, c
-                    RETURN count(d) as docs_deleted, count(c) as chunks_deleted
-                """, doc_id=document_id)
-                
-                record = result.single()
+                # Delete the document and all its relationships, leaving tombstones
+                record = delete_document_contents(session, document_id, include_document=True)
                 logger.info(f"Rolled back {document_id}: {record['docs_deleted']} docs, {record['chunks_deleted']} chunks deleted")
                 return True
                 
@@ -172,28 +151,20 @@ class IngestionValidator:
     
     def get_unresolved_errors(self) -> List[Dict[str, Any]]:
         """Get list of unresolved ingestion errors"""
-        try:
-            with open(self.error_log_path, 'r') as f:
-                errors = json.load(f)
-            return [e for e in errors if not e.get('resolved', False)]
-        except FileNotFoundError:
-            return []
+        return self.event_log.unresolved_errors()
+    
+    def get_document_history(self, document_id: str) -> List[Dict[str, Any]]:
+        """Every validation, error and resolution recorded for a document"""
+        return self.event_log.events(document_id=document_id)
     
     def mark_error_resolved(self, document_id: str, resolution: str):
         """Mark an error as resolved"""
         try:
-            with open(self.error_log_path, 'r') as f:
-                errors = json.load(f)
-            
-            for error in errors:
-                if error['document_id'] == document_id and not error.get('resolved'):
-                    error['resolved'] = True
-                    error['resolution'] = resolution
-                    error['resolved_timestamp'] = datetime.now().isoformat()
-            
-            with open(self.error_log_path, 'w') as f:
-                json.dump(errors, f, indent=2)
-                
+            self.event_log.append('resolution', document_id, resolution, {
+                'document_id': document_id,
+                'resolution': resolution,
+                'resolved_timestamp': datetime.now().isoformat()
+            })
         except Exception as e:
             logger.error(f"Failed to mark error resolved: {e}")
     
@@ -201,19 +172,11 @@ class IngestionValidator:
         """Generate a report of documents needing recovery"""
         unresolved_errors = self.get_unresolved_errors()
         
-        # Group by error type
-        error_groups = {}
-        for error in unresolved_errors:
-            error_type = error['error_type']
-            if error_type not in error_groups:
-                error_groups[error_type] = []
-            error_groups[error_type].append(error)
-        
         # Create recovery inventory
         recovery_inventory = {
             'generated_date': datetime.now().isoformat(),
             'total_errors': len(unresolved_errors),
-            'error_summary': {error_type: len(errors) for error_type, errors in error_groups.items()},
+            'error_summary': self.event_log.unresolved_error_counts(),
             'documents_to_recover': []
         }
         
@@ -0,0 +1,137 @@
+"""
+Keyword Overlap Linker
+Maintains an in-process inverted index from keyword to chunk ids so each new
+document's SIMILAR_TO edges (chunks sharing at least `min_overlap` keywords)
+are found by looking up only the postings of its own keywords, instead of
+comparing every pair of chunks in the corpus after every document.
+
+Keywords carried by more than `max_postings` chunks are still counted in the
+overlap but are not used to generate candidates, so a pair is only missed when
+all the keywords it shares are that common.
+"""
+
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, List, Iterable, Optional, Set, Tuple
+
+try:
+    from .change_tracking import TOMBSTONE_LABEL
+except ImportError:
+    from change_tracking import TOMBSTONE_LABEL
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_OVERLAP = 3
+DEFAULT_MAX_POSTINGS = 1000
+
+
+class KeywordLinker:
+    """Inverted keyword index over chunks and the SIMILAR_TO edges derived from it"""
+
+    def __init__(self, min_overlap: int = DEFAULT_MIN_OVERLAP,
+                 max_postings: Optional[int] = DEFAULT_MAX_POSTINGS, batch_size: int = 5000):
+        self.min_overlap = min_overlap
+        self.max_postings = max_postings
+        self.batch_size = batch_size
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        self.chunk_keywords: Dict[str, frozenset] = {}
+        self.loaded = False
+
+    def load(self, session, page_size: int = 50000):
+        """Index the keywords of every chunk already in the graph (once per process)"""
+        max_id = session.run("MATCH (c:Chunk) RETURN max(id(c)) as max_id").single()["max_id"]
+        for lo in range(0, (max_id or 0) + 1, page_size):
+            result = session.run("""
+                MATCH (c:Chunk)
+                WHERE id(c) IN range($lo, $hi - 1) AND c.keywords IS NOT NULL
+                RETURN c.id as chunk_id, c.keywords as keywords
+            """, lo=lo, hi=lo + page_size)
+            for record in result:
+                self._index(record["chunk_id"], record["keywords"])
+        self.loaded = True
+        logger.info(f"Keyword index: {len(self.chunk_keywords)} chunks, {len(self.postings)} keywords")
+
+    def _index(self, chunk_id: str, keywords: Iterable[str]):
+        self.remove(chunk_id)
+        keywords = frozenset(keywords or [])
+        self.chunk_keywords[chunk_id] = keywords
+        for keyword in keywords:
+            self.postings[keyword].add(chunk_id)
+
+    def remove(self, chunk_id: str):
+        """Drop a chunk from the index"""
+        for keyword in self.chunk_keywords.pop(chunk_id, ()):
+            postings = self.postings[keyword]
+            postings.discard(chunk_id)
+            if not postings:
+                del self.postings[keyword]
+
+    def _partners(self, chunk_id: str, keywords: frozenset) -> List[Tuple[str, int]]:
+        """Chunks sharing at least min_overlap keywords with `keywords`"""
+        common = {k for k in keywords
+                  if self.max_postings is not None and len(self.postings.get(k, ())) > self.max_postings}
+        counts = Counter()
+        for keyword in keywords - common:
+            counts.update(self.postings.get(keyword, ()))
+        counts.pop(chunk_id, None)
+
+        # Candidates found through rare keywords may reach the threshold with common ones
+        needed = max(self.min_overlap - len(common), 1)
+        partners = []
+        for other, rare_overlap in counts.items():
+            if rare_overlap < needed:
+                continue
+            overlap = rare_overlap + len(common & self.chunk_keywords[other])
+            if overlap >= self.min_overlap:
+                partners.append((other, overlap))
+        return partners
+
+    def add(self, chunks: Dict[str, List[str]]) -> List[Dict]:
+        """
+        Index new (or re-ingested) chunks and return their SIMILAR_TO edges
+
+        Args:
+            chunks: Keywords per chunk id
+
+        Returns:
+            Rows with 'source' < 'target', 'overlap' and Jaccard 'score'
+        """
+        for chunk_id, keywords in chunks.items():
+            self._index(chunk_id, keywords)
+
+        edges = {}
+        for chunk_id in chunks:
+            keywords = self.chunk_keywords[chunk_id]
+            for other, overlap in self._partners(chunk_id, keywords):
+                pair = (chunk_id, other) if chunk_id < other else (other, chunk_id)
+                union = len(keywords | self.chunk_keywords[other])
+                edges[pair] = {'source': pair[0], 'target': pair[1], 'overlap': overlap,
+                               'score': overlap / union}
+        return list(edges.values())
+
+    def write(self, session, edges: List[Dict]) -> int:
+        """MERGE SIMILAR_TO edges in UNWIND batches through the Chunk id index"""
+        for i in range(0, len(edges), self.batch_size):
+            session.run("""
+                UNWIND $rows AS row
+                MATCH (a:Chunk {id: row.source})
+                MATCH (b:Chunk {id: row.target})
+                MERGE (a)-[r:SIMILAR_TO]->(b)
+                SET r.overlap = row.overlap, r.score = row.score, r.updated_at = timestamp()
+            """, rows=edges[i:i + self.batch_size]).consume()
+        return len(edges)
+
+    def link(self, session, chunks: Dict[str, List[str]]) -> int:
+        """Replace the SIMILAR_TO edges of the given chunks using the keyword index"""
+        if not self.loaded:
+            self.load(session)
+        # Tombstone only the chunks that had edges, before the new edges are stamped
+        session.run(f"""
+            UNWIND $chunk_ids AS chunk_id
+            MATCH (c:Chunk {{id: chunk_id}})-[r:SIMILAR_TO]-()
+            WITH c, collect(r) as edges
+            FOREACH (r IN edges | DELETE r)
+            CREATE (:{TOMBSTONE_LABEL} {{relationship: 'SIMILAR_TO', label: 'Chunk', id: c.id,
+                                         direction: 'both', deleted_at: timestamp()}})
+        """, chunk_ids=list(chunks)).consume()
+        return self.write(session, self.add(chunks))
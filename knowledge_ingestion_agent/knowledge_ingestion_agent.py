@@ -20,9 +20,29 @@ from sentence_transformers import SentenceTransformer
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import re
-from collections import defaultdict
 import time
 
+try:
+    from .page_ocr import PageOCR, page_needs_ocr
+    from .layout_analysis import LayoutAnalyzer
+    from .numeric_facts import FactExtractor, write_facts
+    from .chunk_snapshot import ChunkSnapshotStore, DEFAULT_SNAPSHOT_DIR
+    from .change_tracking import delete_document_contents
+    from .entity_keys import entity_key
+    from .schema_manager import SchemaManager
+    from .ingestion_journal import IngestionJournal, DEFAULT_JOURNAL_DIR
+    from .ingestion_profiler import DocumentProfile, IngestionReport, profile_stage, DEFAULT_REPORT
+except ImportError:
+    from page_ocr import PageOCR, page_needs_ocr
+    from layout_analysis import LayoutAnalyzer
+    from numeric_facts import FactExtractor, write_facts
+    from chunk_snapshot import ChunkSnapshotStore, DEFAULT_SNAPSHOT_DIR
+    from change_tracking import delete_document_contents
+    from entity_keys import entity_key
+    from schema_manager import SchemaManager
+    from ingestion_journal import IngestionJournal, DEFAULT_JOURNAL_DIR
+    from ingestion_profiler import DocumentProfile, IngestionReport, profile_stage, DEFAULT_REPORT
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -127,7 +147,10 @@ class KnowledgeIngestionAgent:
                  chunk_overlap: int = 100,
                  batch_size: int = 32,
                  num_workers: int = 4,
-                 exclusion_config_path: str = None):
+                 exclusion_config_path: str = None,
+                 ocr_workers: Optional[int] = None,
+                 snapshot_dir: Optional[str] = DEFAULT_SNAPSHOT_DIR,
+                 journal_dir: Optional[str] = DEFAULT_JOURNAL_DIR):
         """Initialize the ingestion agent"""
         
         self.neo4j_uri = neo4j_uri
@@ -152,12 +175,31 @@ class KnowledgeIngestionAgent:
         self.tfidf_vectorizer = TfidfVectorizer(max_features=1000)
         self.entity_vectors = None
         
+        # Page-level OCR for scanned pages
+        self.page_ocr = PageOCR(max_workers=ocr_workers)
+        
+        # Single-pass layout and table analysis
+        self.layout_analyzer = LayoutAnalyzer()
+        
+        # Numeric facts (amounts, rates, fees) for index-backed lookups
+        self.fact_extractor = FactExtractor()
+        
+        # Columnar chunk/embedding snapshot, appended per document (None disables)
+        self.chunk_snapshot = ChunkSnapshotStore(snapshot_dir) if snapshot_dir else None
+        
+        # Per-document checkpoints and spooled artefacts for resuming (None disables)
+        self.journal = IngestionJournal(journal_dir) if journal_dir else None
+        
+        # Constraints and indexes are applied once per agent, not per document
+        self.schema_ready = False
+        
         # Statistics
         self.stats = {
             'documents_processed': 0,
             'chunks_created': 0,
             'entities_extracted': 0,
             'duplicates_removed': 0,
+            'facts_extracted': 0,
             'processing_time': 0
         }
     
@@ -216,44 +258,42 @@ class KnowledgeIngestionAgent:
         return False, ""
     
     def extract_pdf_content(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Extract content from PDF using PyMuPDF with OCR fallback"""
+        """Extract content from PDF using PyMuPDF with page-level OCR fallback"""
         logger.info(f"Extracting content from {pdf_path}")
         
         pages_content = []
         
         try:
             pdf_document = fitz.open(pdf_path)
-            total_text_length = 0
+            ocr_page_nums = []
             
             for page_num, page in enumerate(pdf_document):
-                # Extract text blocks with position information
-                blocks = page.get_text("blocks")
+                # Parse the page once for text, blocks and tables
+                layout = self.layout_analyzer.analyse_page(page, page_num + 1)
+                page_text = layout.text
                 
-                # Detect tables based on block positions
-                table_blocks = self._detect_tables(blocks)
-                
-                # Extract full page text
-                page_text = page.get_text()
+                # Scanned pages have an image but no text layer
+                if page_needs_ocr(page, page_text, self.page_ocr.min_chars):
+                    ocr_page_nums.append(page_num + 1)
                 
                 pages_content.append({
                     'page_num': page_num + 1,
                     'text': page_text,
-                    'blocks': blocks,
-                    'has_table': len(table_blocks) > 0,
-                    'table_blocks': table_blocks,
+                    'blocks': layout.blocks,
+                    'has_table': len(layout.tables) > 0,
+                    'table_blocks': layout.table_blocks,
+                    'tables': layout.tables,
+                    'num_columns': layout.num_columns,
                     'char_count': len(page_text)
                 })
-                
-                total_text_length += len(page_text.strip())
             
             pdf_document.close()
             
-            # Check if PDF has no extractable text (likely scanned)
-            if total_text_length < 100:  # Less than 100 chars total
-                logger.info(f"PDF appears to be scanned or has minimal text. Attempting OCR...")
-                ocr_content = self._extract_pdf_with_ocr(pdf_path)
-                if ocr_content:
-                    pages_content = ocr_content
+            # OCR only the pages without a text layer
+            if ocr_page_nums:
+                logger.info(f"{len(ocr_page_nums)} of {len(pages_content)} pages appear to be scanned. Attempting OCR...")
+                with profile_stage('ocr', items=len(ocr_page_nums)):
+                    self._apply_page_ocr(pdf_path, pages_content, ocr_page_nums)
             
         except Exception as e:
             logger.error(f"Error extracting PDF content: {e}")
@@ -261,67 +301,23 @@ class KnowledgeIngestionAgent:
         
         return pages_content
     
-    def _extract_pdf_with_ocr(self, pdf_path: str) -> List[Dict[str, Any]]:
-        """Extract text from PDF using OCR"""
-        try:
-            import pytesseract
-            from pdf2image import convert_from_path
-            from PIL import Image
-            
-            logger.info("Performing OCR on PDF pages...")
-            pages_content = []
-            
-            # Convert PDF to images
-            images = convert_from_path(pdf_path, dpi=300)
-            
-            for page_num, image in enumerate(images):
-                # Perform OCR on the image
-                ocr_text = pytesseract.image_to_string(image, lang='eng')
-                
-                # Clean up the text
-                ocr_text = ocr_text.strip()
-                
-                if ocr_text:
-                    logger.info(f"OCR extracted {len(ocr_text)} characters from page {page_num + 1}")
-                    pages_content.append({
-                        'page_num': page_num + 1,
-                        'text': ocr_text,
-                        'blocks': [],  # No block info from OCR
-                        'has_table': False,
-                        'table_blocks': [],
-                        'char_count': len(ocr_text),
-                        'ocr_extracted': True
-                    })
-                else:
-                    logger.warning(f"No text extracted from page {page_num + 1}")
-            
-            return pages_content if pages_content else None
-            
-        except ImportError as e:
-            logger.error(f"OCR dependencies not installed: {e}")
-            logger.info("Install with: pip install pytesseract pdf2image")
-            return None
-        except Exception as e:
-            logger.error(f"OCR extraction failed: {e}")
-            return None
-    
-    def _detect_tables(self, blocks: List) -> List[Dict]:
-        """Simple table detection based on block positioning"""
-        table_blocks = []
-        
-        # Group blocks by vertical position
-        y_groups = defaultdict(list)
-        for block in blocks:
-            if len(block) >= 5:  # Ensure block has position data
-                y_pos = int(block[1] / 10) * 10  # Round to nearest 10
-                y_groups[y_pos].append(block)
-        
-        # Detect potential table rows (multiple blocks at same y position)
-        for y_pos, row_blocks in y_groups.items():
-            if len(row_blocks) >= 3:  # At least 3 columns
-                table_blocks.extend(row_blocks)
-        
-        return table_blocks
+    def _apply_page_ocr(self, pdf_path: str, pages_content: List[Dict[str, Any]], 
+                        page_nums: List[int]):
+        """Replace the text of scanned pages with OCR output"""
+        ocr_texts = self.page_ocr.ocr_pages(pdf_path, page_nums)
+        
+        for page_data in pages_content:
+            ocr_text = ocr_texts.get(page_data['page_num'])
+            if ocr_text:
+                page_data.update({
+                    'text': ocr_text,
+                    'blocks': [],  # No block info from OCR
+                    'has_table': False,
+                    'table_blocks': [],
+                    'tables': [],
+                    'char_count': len(ocr_text),
+                    'ocr_extracted': True
+                })
     
     def create_chunks(self, pages_content: List[Dict], document_id: str) -> List[ProcessedChunk]:
         """Create smart chunks from page content"""
@@ -335,7 +331,8 @@ class KnowledgeIngestionAgent:
             text = page_data['text']
             
             # Split into sentences for smart chunking
-            doc = self.nlp(text)
+            with profile_stage('sentence_split', items=1):
+                doc = self.nlp(text)
             sentences = [sent.text for sent in doc.sents]
             
             current_chunk = []
@@ -362,10 +359,12 @@ class KnowledgeIngestionAgent:
                     )
                     
                     # Extract entities
-                    entities = self.extract_entities(chunk_text)
+                    with profile_stage('entities', items=1):
+                        entities = self.extract_entities(chunk_text)
                     
                     # Extract keywords
-                    keywords = self.extract_keywords(chunk_text)
+                    with profile_stage('keywords', items=1):
+                        keywords = self.extract_keywords(chunk_text)
                     
                     # Calculate enhanced fields
                     semantic_density = self.calculate_semantic_density(chunk_text)
@@ -420,8 +419,10 @@ class KnowledgeIngestionAgent:
                     has_table=page_data['has_table']
                 )
                 
-                entities = self.extract_entities(chunk_text)
-                keywords = self.extract_keywords(chunk_text)
+                with profile_stage('entities', items=1):
+                    entities = self.extract_entities(chunk_text)
+                with profile_stage('keywords', items=1):
+                    keywords = self.extract_keywords(chunk_text)
                 
                 # Calculate enhanced fields
                 semantic_density = self.calculate_semantic_density(chunk_text)
@@ -707,17 +708,17 @@ class KnowledgeIngestionAgent:
         validator = IngestionValidator(driver) if use_validator else None
         
         try:
+            # Entity MERGEs below seek through the key constraint
+            if not self.schema_ready:
+                with profile_stage('schema'):
+                    self.ensure_schema(driver)
+            
             with driver.session() as session:
                 # Create or update document node
                 doc_id = document_metadata.get('document_id')
                 
-                # First, delete any existing document and its relationships
-                session.run("""
-                    MATCH (d:Document {id: $doc_id})
-                    OPTIONAL MATCH (d)-[:HAS_CHUNK]->(c:Chunk)
-                    OPTIONAL MATCH (c)-[:CONTAINS_ENTITY]->(e:Entity)
-                    DETACH DELETE c
-                """, doc_id=doc_id)
+                # First, delete any existing chunks and facts, leaving tombstones for delta backups
+                delete_document_contents(session, doc_id)
                 
                 # Now create the document node
                 session.run("""
@@ -726,7 +727,8 @@ class KnowledgeIngestionAgent:
                         d.path = $path,
                         d.total_pages = $total_pages,
                         d.processed_date = $processed_date,
-                        d.category = $category
+                        d.category = $category,
+                        d.updated_at = timestamp()
                 """, 
                 doc_id=doc_id,
                 filename=document_metadata.get('filename'),
@@ -753,7 +755,8 @@ class KnowledgeIngestionAgent:
                                 has_definitions: $has_definitions,
                                 has_examples: $has_examples,
                                 chunk_type: $chunk_type,
-                                keywords: $keywords
+                                keywords: $keywords,
+                                updated_at: timestamp()
                             })
                         """,
                         chunk_id=chunk.metadata.chunk_id,
@@ -772,45 +775,52 @@ class KnowledgeIngestionAgent:
                         session.run("""
                             MATCH (d:Document {id: $doc_id})
                             MATCH (c:Chunk {id: $chunk_id})
-                            CREATE (d)-[:HAS_CHUNK]->(c)
+                            CREATE (d)-[:HAS_CHUNK {updated_at: timestamp()}]->(c)
                         """,
                         doc_id=doc_id,
                         chunk_id=chunk.metadata.chunk_id)
                         
-                        # Create entity nodes and relationships
-                        for entity in chunk.entities:
-                            # Create or merge entity
-                            session.run("""
-                                MERGE (e:Entity {
-                                    text: $text,
-                                    type: $type
-                                })
-                                ON CREATE SET 
-                                    e.first_seen = $date,
-                                    e.occurrences = 1
-                                ON MATCH SET
-                                    e.occurrences = e.occurrences + 1
-                            """,
-                            text=entity.text,
-                            type=entity.entity_type,
-                            date=datetime.now().isoformat())
-                            
-                            # Create chunk-entity relationship
-                            session.run("""
-                                MATCH (c:Chunk {id: $chunk_id})
-                                MATCH (e:Entity {text: $text, type: $type})
-                                CREATE (c)-[:CONTAINS_ENTITY {
-                                    confidence: $confidence,
-                                    start_char: $start_char,
-                                    end_char: $end_char
-                                }]->(e)
-                            """,
-                            chunk_id=chunk.metadata.chunk_id,
-                            text=entity.text,
-                            type=entity.entity_type,
-                            confidence=entity.confidence,
-                            start_char=entity.start_char,
-                            end_char=entity.end_char)
+                        # Merge entities on their canonical key and link them to the chunk
+                        session.run("""
+                            UNWIND $entities AS entity
+                            MERGE (e:Entity {key: entity.key})
+                            ON CREATE SET 
+                                e.text = entity.text,
+                                e.type = entity.type,
+                                e.first_seen = $date,
+                                e.occurrences = 1
+                            ON MATCH SET
+                                e.occurrences = e.occurrences + 1
+                            SET e.updated_at = timestamp()
+                            WITH e, entity
+                            MATCH (c:Chunk {id: $chunk_id})
+                            CREATE (c)-[:CONTAINS_ENTITY {
+                                confidence: entity.confidence,
+                                start_char: entity.start_char,
+                                end_char: entity.end_char,
+                                updated_at: timestamp()
+                            }]->(e)
+                        """,
+                        entities=[{
+                            'key': entity_key(entity.text, entity.entity_type),
+                            'text': entity.text,
+                            'type': entity.entity_type,
+                            'confidence': entity.confidence,
+                            'start_char': entity.start_char,
+                            'end_char': entity.end_char
+                        } for entity in chunk.entities],
+                        chunk_id=chunk.metadata.chunk_id,
+                        date=datetime.now().isoformat())
+                
+                # Normalise amounts and percentages into indexed Fact nodes
+                facts = []
+                with profile_stage('facts', items=len(chunks)):
+                    for chunk in chunks:
+                        facts.extend(self.fact_extractor.extract_facts(
+                            chunk.metadata.chunk_id, doc_id, chunk.text,
+                            [(e.text, e.entity_type, e.start_char, e.end_char) for e in chunk.entities]
+                        ))
+                self.stats['facts_extracted'] += write_facts(session, facts)
                 
                 # Create chunk sequence relationships
                 for i in range(len(chunks) - 1):
@@ -818,17 +828,11 @@ class KnowledgeIngestionAgent:
                         session.run("""
                             MATCH (c1:Chunk {id: $chunk1_id})
                             MATCH (c2:Chunk {id: $chunk2_id})
-                            CREATE (c1)-[:NEXT_CHUNK]->(c2)
+                            CREATE (c1)-[:NEXT_CHUNK {updated_at: timestamp()}]->(c2)
                         """,
                         chunk1_id=chunks[i].metadata.chunk_id,
                         chunk2_id=chunks[i + 1].metadata.chunk_id)
                 
-                # Create indexes for optimization
-                session.run("CREATE INDEX IF NOT EXISTS FOR (c:Chunk) ON (c.id)")
-                session.run("CREATE INDEX IF NOT EXISTS FOR (e:Entity) ON (e.text)")
-                session.run("CREATE INDEX IF NOT EXISTS FOR (e:Entity) ON (e.type)")
-                session.run("CREATE INDEX IF NOT EXISTS FOR (d:Document) ON (d.id)")
-                
                 # Update document chunk count
                 session.run("""
                     MATCH (d:Document {id: $doc_id})
@@ -837,37 +841,68 @@ class KnowledgeIngestionAgent:
                     SET d.chunk_count = chunk_count
                 """, doc_id=doc_id)
                 
-                # Create vector index for similarity search
-                session.run("""
-                    CREATE VECTOR INDEX `chunk-embeddings` IF NOT EXISTS
-                    FOR (c:Chunk) ON (c.embedding)
-                    OPTIONS {indexConfig: {
-                        `vector.dimensions`: 384,
-                        `vector.similarity_function`: 'cosine'
-                    }}
-                """)
-                
                 logger.info("Graph construction completed")
+                self._checkpoint(doc_id, 'written')
                 
                 # Validate the ingestion completeness if validator available
                 if validator:
-                    validation_result = validator.validate_document_completeness(
-                        doc_id, 
-                        [], # We don't have pages_content here, but chunks have the info
-                        chunks
-                    )
-                    
-                    validator.log_validation_result(validation_result)
+                    with profile_stage('validation', items=len(chunks)):
+                        validation_result = validator.validate_document_completeness(
+                            doc_id, 
+                            [], # We don't have pages_content here, but chunks have the info
+                            chunks
+                        )
+                        
+                        validator.log_validation_result(validation_result)
                     
                     # If validation fails, rollback
                     if validation_result['status'] in ['incomplete', 'critical']:
                         logger.error(f"Validation failed for {doc_id}: {validation_result['issues']}")
                         validator.rollback_incomplete_document(doc_id)
+                        if self.chunk_snapshot:
+                            self.chunk_snapshot.remove_documents([doc_id])
                         raise ValueError(f"Document {doc_id} failed validation and was rolled back")
                 
+                if self.chunk_snapshot:
+                    with profile_stage('snapshot', items=len(chunks)):
+                        self._append_snapshot(doc_id, chunks)
+                
         finally:
             driver.close()
     
+    def _checkpoint(self, document_id: str, state: str, error: Optional[str] = None):
+        """Record a document's ingestion state in the journal, if there is one"""
+        if self.journal:
+            self.journal.mark(document_id, state, error)
+    
+    def ensure_schema(self, driver=None):
+        """Apply every declared constraint and index (idempotent) before the first write"""
+        from neo4j import GraphDatabase
+        
+        own_driver = driver is None
+        if own_driver:
+            driver = GraphDatabase.driver(self.neo4j_uri, auth=(self.neo4j_user, self.neo4j_password))
+        try:
+            SchemaManager(driver).apply()
+            self.schema_ready = True
+        finally:
+            if own_driver:
+                driver.close()
+    
+    def _append_snapshot(self, doc_id: str, chunks: List[ProcessedChunk]):
+        """Append the document's chunks to the columnar snapshot"""
+        try:
+            self.chunk_snapshot.append_document(doc_id, [{
+                'chunk_id': chunk.metadata.chunk_id,
+                'page_num': chunk.metadata.page_num,
+                'chunk_type': chunk.chunk_type,
+                'semantic_density': chunk.semantic_density,
+                'embedding': chunk.embedding
+            } for chunk in chunks])
+        except Exception as e:
+            # The graph is the source of truth; a rebuild repairs the snapshot
+            logger.warning(f"Could not update chunk snapshot for {doc_id}: {e}")
+    
     def optimize_graph(self):
         """Optimize graph for search performance"""
         logger.info("Optimizing graph...")
@@ -878,53 +913,40 @@ class KnowledgeIngestionAgent:
                                     auth=(self.neo4j_user, self.neo4j_password))
         
         try:
-            with driver.session() as session:
-                # Create vector index for embeddings
-                session.run("""
-                    CALL db.index.vector.createNodeIndex(
-                        'chunk-embeddings',
-                        'Chunk',
-                        'embedding',
-                        384,
-                        'cosine'
-                    )
-                """)
-                
-                # Create full-text search indexes
-                session.run("""
-                    CALL db.index.fulltext.createNodeIndex(
-                        'chunk-text',
-                        ['Chunk'],
-                        ['text']
-                    )
-                """)
-                
-                session.run("""
-                    CALL db.index.fulltext.createNodeIndex(
-                        'entity-text',
-                        ['Entity'],
-                        ['text']
-                    )
-                """)
-                
-                # Analyze and optimize entity relationships
-                session.run("""
-                    MATCH (e1:Entity)-[:APPEARS_WITH]->(e2:Entity)
-                    WITH e1, e2, count(*) as cooccurrence
-                    WHERE cooccurrence > 5
-                    MERGE (e1)-[r:RELATED_TO]->(e2)
-                    SET r.strength = cooccurrence
-                """)
-                
-                logger.info("Graph optimization completed")
+            # Vector and full-text indexes, then warm the hot ones for the first searches
+            schema = SchemaManager(driver)
+            schema.apply()
+            schema.warm_up()
+            
+            # RELATED_TO edges are left to build_entity_relationships.py, whose
+            # --incremental runs reuse the parameters recorded in its state file
+            logger.info("Graph optimization completed; run build_entity_relationships.py "
+                        "--incremental to update RELATED_TO edges for the new documents")
                 
         except Exception as e:
             logger.warning(f"Some optimizations may have failed: {e}")
         finally:
             driver.close()
     
-    def process_inventory(self, inventory_file: str, s3_bucket: Optional[str] = None):
-        """Process all PDFs in an inventory file"""
+    def import_legacy_logs(self):
+        """Fold the pre-event-log JSON validation and error logs into the event log"""
+        try:
+            from .ingestion_validator import IngestionValidator
+        except ImportError:
+            from ingestion_validator import IngestionValidator
+        imported = IngestionValidator.import_legacy_logs()
+        if imported:
+            logger.info(f"Imported {imported} legacy validation and error log entries")
+    
+    def process_inventory(self, inventory_file: str, s3_bucket: Optional[str] = None,
+                          resume: bool = False, profile_report: Optional[str] = DEFAULT_REPORT):
+        """
+        Process all PDFs in an inventory file
+        
+        With `resume`, documents the journal records as validated are skipped
+        and the rest continue from their last completed stage. Per-stage costs
+        of every document are written to `profile_report` (None skips it).
+        """
         logger.info(f"Processing inventory: {inventory_file}")
         
         start_time = time.time()
@@ -936,11 +958,25 @@ class KnowledgeIngestionAgent:
         total_files = len(inventory['files'])
         logger.info(f"Found {total_files} files to process")
         
+        # Once, before the workers fork, so none of them creates schema mid-ingestion
+        self.ensure_schema()
+        self.import_legacy_logs()
+        
+        done = set()
+        if resume and self.journal:
+            done = self.journal.validated()
+            logger.info(f"Resuming: {len(done)} documents already validated")
+        
+        report = IngestionReport()
+        
         # Process files with progress tracking
         with ProcessPoolExecutor(max_workers=self.num_workers) as executor:
             futures = []
             
             for file_info in inventory['files']:
+                if file_info.get('filename', '').replace('.pdf', '') in done:
+                    continue
+                
                 # Determine file path
                 if s3_bucket:
                     # Download from S3 if needed
@@ -952,7 +988,7 @@ class KnowledgeIngestionAgent:
                         local_path = os.path.join('knowledge_discovery_agent', local_path)
                 
                 if os.path.exists(local_path):
-                    future = executor.submit(self.process_single_pdf, local_path, file_info)
+                    future = executor.submit(self.process_single_pdf, local_path, file_info, resume)
                     futures.append(future)
                 else:
                     logger.warning(f"File not found: {local_path}")
@@ -962,6 +998,7 @@ class KnowledgeIngestionAgent:
             for future in as_completed(futures):
                 try:
                     result = future.result()
+                    report.add(result)
                     completed += 1
                     logger.info(f"Progress: {completed}/{len(futures)} files processed")
                 except Exception as e:
@@ -975,9 +1012,23 @@ class KnowledgeIngestionAgent:
         # Save statistics
         with open('ingestion_stats.json', 'w') as f:
             json.dump(self.stats, f, indent=2)
+        
+        if profile_report:
+            report.log_summary()
+            report.write(profile_report)
+    
+    def process_single_pdf(self, pdf_path: str, metadata: Dict[str, Any],
+                           resume: bool = False) -> Dict[str, Any]:
+        """Process a single PDF file; the result carries its per-stage 'profile'"""
+        with DocumentProfile(metadata.get('filename', '').replace('.pdf', '')) as profile:
+            result = self._process_single_pdf(pdf_path, metadata, resume)
+        result['profile'] = profile.to_dict()
+        return result
     
-    def process_single_pdf(self, pdf_path: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
-        """Process a single PDF file"""
+    def _process_single_pdf(self, pdf_path: str, metadata: Dict[str, Any],
+                            resume: bool = False) -> Dict[str, Any]:
+        """Process a single PDF file, resuming from its journalled stage if `resume`"""
+        stage = None
         try:
             filename = metadata.get('filename', '')
             document_id = filename.replace('.pdf', '')
@@ -992,30 +1043,76 @@ class KnowledgeIngestionAgent:
                     'reason': reason
                 }
             
-            # Extract content
-            pages_content = self.extract_pdf_content(pdf_path)
+            if self.journal:
+                stage = self.journal.begin(document_id, pdf_path, resume=resume)
+                if stage == 'validated':
+                    logger.info(f"Skipping {filename}: already ingested and validated")
+                    return {
+                        'status': 'skipped',
+                        'document_id': document_id,
+                        'reason': 'already validated'
+                    }
+                if stage:
+                    logger.info(f"Resuming {filename} after stage '{stage}'")
+            
+            pages_content = chunks = None
+            if stage == 'extracted':
+                pages_content = self.journal.load(document_id, 'pages')
+            elif stage in ('embedded', 'written'):
+                spooled = self.journal.load(document_id, 'chunks')
+                if spooled:
+                    chunks, total_pages = spooled['chunks'], spooled['total_pages']
+            
+            if pages_content is None and chunks is None:
+                if stage:
+                    logger.warning(f"Spooled artefacts for {filename} are unreadable, starting again")
+                    stage = self.journal.begin(document_id, pdf_path)
+                
+                # Extract content
+                self._checkpoint(document_id, 'extracting')
+                with profile_stage('pdf_parse') as parsed:
+                    pages_content = self.extract_pdf_content(pdf_path)
+                    parsed.items = len(pages_content)
+                if self.journal:
+                    with profile_stage('spool'):
+                        self.journal.save(document_id, 'pages', pages_content)
+                self._checkpoint(document_id, 'extracted')
+            
+            if chunks is None:
+                total_pages = len(pages_content)
+                
+                # Create chunks
+                with profile_stage('chunking') as chunked:
+                    chunks = self.create_chunks(pages_content, document_id)
+                    chunked.items = len(chunks)
+                
+                # Generate embeddings
+                with profile_stage('embedding', items=len(chunks)):
+                    chunks = self.generate_embeddings(chunks)
+                
+                # Deduplicate
+                with profile_stage('dedup', items=len(chunks)):
+                    chunks = self.deduplicate_content(chunks)
+                
+                if self.journal:
+                    with profile_stage('spool'):
+                        self.journal.save(document_id, 'chunks', {'chunks': chunks, 'total_pages': total_pages})
+                self._checkpoint(document_id, 'embedded')
             
             # Create metadata
             document_metadata = {
                 'document_id': document_id,
                 'filename': metadata.get('filename'),
                 'path': pdf_path,
-                'total_pages': len(pages_content),
+                'total_pages': total_pages,
                 'category': metadata.get('category', 'misc'),
                 'source_url': metadata.get('url') or metadata.get('original_url', '')
             }
             
-            # Create chunks
-            chunks = self.create_chunks(pages_content, document_id)
-            
-            # Generate embeddings
-            chunks = self.generate_embeddings(chunks)
-            
-            # Deduplicate
-            chunks = self.deduplicate_content(chunks)
-            
-            # Build graph
-            self.build_graph(chunks, document_metadata)
+            # Build graph (replaces any partial write from an interrupted attempt)
+            with profile_stage('neo4j_write', items=len(chunks)):
+                self.build_graph(chunks, document_metadata)
+            self._checkpoint(document_id, 'validated')
             
             self.stats['documents_processed'] += 1
             
@@ -1028,23 +1125,27 @@ class KnowledgeIngestionAgent:
             
         except Exception as e:
             logger.error(f"Error processing {pdf_path}: {e}")
+            if stage != 'validated' and self.journal and self.journal.get(document_id):
+                self._checkpoint(document_id, 'failed', error=str(e))
             
             # Log error for recovery
             from neo4j import GraphDatabase
-            from .ingestion_validator import IngestionValidator
+            try:
+                from .ingestion_validator import IngestionValidator
+            except ImportError:
+                from ingestion_validator import IngestionValidator
             
             driver = GraphDatabase.driver(self.neo4j_uri, 
                                         auth=(self.neo4j_user, self.neo4j_password))
-            validator = IngestionValidator(driver) if use_validator else None
-            
-            validator.log_ingestion_error(
-                document_id=metadata.get('filename', ''),
-                error=e,
-                metadata=metadata,
-                recovery_action='reingest'
-            )
-            
-            driver.close()
+            try:
+                IngestionValidator(driver).log_ingestion_error(
+                    document_id=metadata.get('filename', ''),
+                    error=e,
+                    metadata=metadata,
+                    recovery_action='reingest'
+                )
+            finally:
+                driver.close()
             
             return {
                 'status': 'error',
@@ -1070,6 +1171,14 @@ def main():
     parser.add_argument('--workers', type=int, default=4, help='Number of parallel workers')
     parser.add_argument('--s3-bucket', help='S3 bucket for PDF retrieval')
     parser.add_argument('--optimize', action='store_true', help='Optimize graph after ingestion')
+    parser.add_argument('--ocr-workers', type=int, help='Number of parallel OCR workers (default: CPU count)')
+    parser.add_argument('--snapshot-dir', default=DEFAULT_SNAPSHOT_DIR, help='Columnar chunk snapshot directory')
+    parser.add_argument('--no-snapshot', action='store_true', help='Do not update the chunk snapshot')
+    parser.add_argument('--journal-dir', default=DEFAULT_JOURNAL_DIR, help='Checkpoint journal directory')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip validated documents and continue the rest from their last completed stage')
+    parser.add_argument('--profile-report', default=DEFAULT_REPORT,
+                        help='Per-stage, per-document cost report (ingestion_profiler.py summarises it)')
     
     args = parser.parse_args()
     
@@ -1078,11 +1187,15 @@ def main():
         neo4j_uri=args.neo4j_uri,
         neo4j_user=args.neo4j_user,
         neo4j_password=args.neo4j_password,
-        num_workers=args.workers
+        num_workers=args.workers,
+        ocr_workers=args.ocr_workers,
+        snapshot_dir=None if args.no_snapshot else args.snapshot_dir,
+        journal_dir=args.journal_dir
     )
     
     # Process inventory
-    agent.process_inventory(args.inventory, args.s3_bucket)
+    agent.process_inventory(args.inventory, args.s3_bucket, resume=args.resume,
+                            profile_report=args.profile_report)
     
     # Optimize if requested
     if args.optimize:
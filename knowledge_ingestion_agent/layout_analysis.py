@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Vectorised Layout and Table Analysis
+Parses each page once with PyMuPDF's dict output, loads span geometry into
+NumPy arrays and detects rows, columns and tables with array operations.
+Tables are emitted per page as {'page', 'bbox', 'data'}, the shape
+utils/financial_table_extractor.py takes (not yet wired into ingestion)
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Text only: skip decoding embedded images, which dict output includes by default
+TEXT_FLAGS = fitz.TEXTFLAGS_TEXT
+
+
+@dataclass
+class PageLayout:
+    """Layout analysis result for a single page"""
+    text: str
+    blocks: List[Tuple]  # same shape as page.get_text("blocks")
+    table_blocks: List[Tuple]
+    tables: List[Dict[str, Any]] = field(default_factory=list)
+    num_columns: int = 1
+
+
+def _line_text(line: Dict[str, Any]) -> str:
+    """Join a line's spans the way page.get_text() does"""
+    text = ''.join(span['text'] for span in line['spans'])
+    return text if text.endswith('\n') else text + '\n'
+
+
+def _split_runs(sorted_values: np.ndarray, gap: float) -> np.ndarray:
+    """Label runs in a sorted 1-D array, starting a new run wherever the step exceeds gap"""
+    if len(sorted_values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    breaks = np.diff(sorted_values) > gap
+    return np.concatenate(([0], np.cumsum(breaks)))
+
+
+class LayoutAnalyzer:
+    """Detect page columns, text rows and tables from span geometry"""
+
+    def __init__(self,
+                 min_table_rows: int = 2,
+                 min_table_cols: int = 3,
+                 row_tolerance: float = 0.5,
+                 cell_gap: float = 1.5,
+                 row_gap: float = 2.5,
+                 min_column_width: float = 0.15):
+        self.min_table_rows = min_table_rows
+        self.min_table_cols = min_table_cols
+        self.row_tolerance = row_tolerance      # fraction of median span height
+        self.cell_gap = cell_gap                # horizontal gap, in median span heights, that separates cells
+        self.row_gap = row_gap                  # vertical gap, in median row pitches, that ends a table
+        self.min_column_width = min_column_width  # fraction of page width
+
+    def analyse_page(self, page: fitz.Page, page_num: int) -> PageLayout:
+        """Parse a page once and return its text, blocks, tables and column count"""
+        page_dict = page.get_text("dict", flags=TEXT_FLAGS)
+
+        blocks = []
+        text_parts = []
+        span_boxes = []
+        span_texts = []
+
+        for block in page_dict['blocks']:
+            if block.get('type') != 0:
+                continue
+
+            block_text = ''.join(_line_text(line) for line in block['lines'] if line['spans'])
+            blocks.append((*block['bbox'], block_text, len(blocks), 0))
+            text_parts.append(block_text)
+
+            for line in block['lines']:
+                for span in line['spans']:
+                    if span['text'].strip():
+                        span_boxes.append(span['bbox'])
+                        span_texts.append(span['text'].strip())
+
+        boxes = np.asarray(span_boxes, dtype=np.float64).reshape(-1, 4)
+        block_boxes = np.asarray([b[:4] for b in blocks], dtype=np.float64).reshape(-1, 4)
+
+        tables = self.detect_tables(boxes, span_texts, page_num)
+        table_blocks = self._blocks_in_tables(blocks, block_boxes, tables)
+
+        return PageLayout(
+            text=''.join(text_parts),
+            blocks=blocks,
+            table_blocks=table_blocks,
+            tables=tables,
+            num_columns=self.count_columns(block_boxes, page.rect.width)
+        )
+
+    def count_columns(self, block_boxes: np.ndarray, page_width: float) -> int:
+        """Count text columns from gutters in the horizontal coverage of text blocks"""
+        if len(block_boxes) == 0 or page_width <= 0:
+            return 1
+
+        width = int(np.ceil(page_width)) + 1
+        x0 = np.clip(block_boxes[:, 0].astype(np.int64), 0, width - 1)
+        x1 = np.clip(np.ceil(block_boxes[:, 2]).astype(np.int64), 0, width - 1)
+
+        # Difference array + cumsum gives per-point coverage without a Python loop
+        delta = np.zeros(width + 1, dtype=np.int64)
+        np.add.at(delta, x0, 1)
+        np.add.at(delta, x1, -1)
+        covered = np.cumsum(delta[:width]) > 0
+
+        # Lengths of covered segments
+        edges = np.diff(np.concatenate(([0], covered.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        widths = ends - starts
+
+        columns = int(np.count_nonzero(widths >= self.min_column_width * page_width))
+        return max(columns, 1)
+
+    def detect_tables(self, boxes: np.ndarray, texts: List[str], page_num: int) -> List[Dict[str, Any]]:
+        """Group spans into rows and cells and return table grids"""
+        if len(boxes) < self.min_table_rows * self.min_table_cols:
+            return []
+
+        heights = boxes[:, 3] - boxes[:, 1]
+        unit = float(np.median(heights)) or 1.0
+
+        # Rows: cluster span vertical centres
+        y_centre = (boxes[:, 1] + boxes[:, 3]) / 2
+        order = np.argsort(y_centre, kind='stable')
+        row_of = np.empty(len(boxes), dtype=np.int64)
+        row_of[order] = _split_runs(y_centre[order], self.row_tolerance * unit)
+
+        # Cells: within a row, a new cell starts after a horizontal gap
+        order = np.lexsort((boxes[:, 0], row_of))
+        rows_sorted = row_of[order]
+        gaps = boxes[order[1:], 0] - boxes[order[:-1], 2]
+        new_cell = np.concatenate(([True], (rows_sorted[1:] != rows_sorted[:-1]) | (gaps > self.cell_gap * unit)))
+        cells_per_row = np.bincount(rows_sorted[new_cell], minlength=row_of.max() + 1)
+
+        # Tables: consecutive multi-cell rows without a large vertical gap
+        row_top = np.full(len(cells_per_row), np.inf)
+        np.minimum.at(row_top, row_of, boxes[:, 1])
+
+        is_table_row = cells_per_row >= self.min_table_cols
+        row_ids = np.flatnonzero(is_table_row)
+        if len(row_ids) < self.min_table_rows:
+            return []
+
+        pitch = np.diff(row_top[row_ids])
+        max_pitch = self.row_gap * (float(np.median(pitch)) if len(pitch) else unit)
+        contiguous = pitch <= max_pitch
+        run_of = np.concatenate(([0], np.cumsum(~contiguous)))
+
+        tables = []
+        for run in np.unique(run_of):
+            table_rows = row_ids[run_of == run]
+            if len(table_rows) < self.min_table_rows:
+                continue
+            tables.append(self._build_grid(boxes, texts, row_of, table_rows, page_num))
+
+        return tables
+
+    def _build_grid(self, boxes: np.ndarray, texts: List[str], row_of: np.ndarray,
+                    table_rows: np.ndarray, page_num: int) -> Dict[str, Any]:
+        """Assign a table's spans to a row x column grid"""
+        span_ids = np.flatnonzero(np.isin(row_of, table_rows))
+        table_boxes = boxes[span_ids]
+
+        # Columns: gutters in the horizontal coverage of the table's spans
+        left = float(table_boxes[:, 0].min())
+        width = int(np.ceil(table_boxes[:, 2].max() - left)) + 1
+        delta = np.zeros(width + 1, dtype=np.int64)
+        np.add.at(delta, np.floor(table_boxes[:, 0] - left).astype(np.int64), 1)
+        np.add.at(delta, np.ceil(table_boxes[:, 2] - left).astype(np.int64), -1)
+        covered = np.cumsum(delta[:width]) > 0
+        edges = np.diff(np.concatenate(([0], covered.astype(np.int8))))
+        column_starts = np.flatnonzero(edges == 1) + left
+
+        x_centre = (table_boxes[:, 0] + table_boxes[:, 2]) / 2
+        col_of = np.searchsorted(column_starts, x_centre, side='right') - 1
+        grid_row_of = np.searchsorted(table_rows, row_of[span_ids])
+
+        data = [[''] * len(column_starts) for _ in range(len(table_rows))]
+        for i in np.lexsort((table_boxes[:, 0], col_of, grid_row_of)):
+            r, c = grid_row_of[i], col_of[i]
+            data[r][c] = f"{data[r][c]} {texts[span_ids[i]]}" if data[r][c] else texts[span_ids[i]]
+
+        return {
+            'page': page_num,
+            'bbox': [float(table_boxes[:, 0].min()), float(table_boxes[:, 1].min()),
+                     float(table_boxes[:, 2].max()), float(table_boxes[:, 3].max())],
+            'data': data
+        }
+
+    def _blocks_in_tables(self, blocks: List[Tuple], block_boxes: np.ndarray,
+                          tables: List[Dict[str, Any]]) -> List[Tuple]:
+        """Return the text blocks whose centre falls inside a table"""
+        if not tables or len(blocks) == 0:
+            return []
+
+        table_boxes = np.asarray([t['bbox'] for t in tables], dtype=np.float64)
+        cx = ((block_boxes[:, 0] + block_boxes[:, 2]) / 2)[:, None]
+        cy = ((block_boxes[:, 1] + block_boxes[:, 3]) / 2)[:, None]
+        inside = ((cx >= table_boxes[:, 0]) & (cx <= table_boxes[:, 2]) &
+                  (cy >= table_boxes[:, 1]) & (cy <= table_boxes[:, 3])).any(axis=1)
+        return [block for block, hit in zip(blocks, inside) if hit]
@@ -0,0 +1,289 @@
+"""
+Search Metrics
+In-process counters, gauges and latency histograms exported in the Prometheus
+text format, shared by the API and the MCP servers. Standard library only:
+an observation is a bisect and a few additions under one lock, cheap enough to
+leave on for every request.
+
+Search latency is broken down per search type and stage (query_entities,
+embedding, retrieval, hydration, rerank, serialisation). `search_request()`
+sets the search type for the current request (a context variable, so it
+follows async tasks) and `stage()` times one step of it, which is also a span
+of the request's trace when one is active (see request_trace).
+"""
+
+import time
+import bisect
+import threading
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .request_trace import span, traced_session
+except ImportError:
+    from request_trace import span, traced_session
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers a cached snapshot lookup up to a slow cross-encoder pass
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic count per label set"""
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> float:
+        """Add to the value and return the new value"""
+        key = self._key(labels)
+        with self._lock:
+            value = self.values[key] = self.values.get(key, 0.0) + amount
+        return value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self.values.items())
+        return super().render() + [f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+                                   for key, value in values]
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down"""
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1.0, **labels) -> float:
+        return self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self.values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket (non-cumulative) counts with a final +Inf slot, sum
+        self.values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(counts), total) for key, (counts, total) in self.values.items())
+        lines = super().render()
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics, created once and rendered together"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+SEARCH_SECONDS = REGISTRY.histogram(
+    'search_request_seconds', 'End-to-end search latency', ['search_type'])
+SEARCH_STAGE_SECONDS = REGISTRY.histogram(
+    'search_stage_seconds', 'Search latency per stage', ['search_type', 'stage'])
+HTTP_SECONDS = REGISTRY.histogram(
+    'http_request_seconds', 'HTTP request latency including response encoding', ['method', 'path', 'status'])
+CACHE_LOOKUPS = REGISTRY.counter(
+    'cache_lookups_total', 'Cache lookups by cache and result (hit or miss)', ['cache', 'result'])
+ERRORS = REGISTRY.counter(
+    'errors_total', 'Errors by component and exception type', ['component', 'error'])
+NEO4J_SESSIONS_IN_USE = REGISTRY.gauge(
+    'neo4j_sessions_in_use', 'Open Neo4j sessions on the shared driver')
+NEO4J_POOL_WAITS = REGISTRY.counter(
+    'neo4j_pool_waits_total', 'Sessions opened while every pooled connection was in use')
+
+_search_type: ContextVar[str] = ContextVar('search_type', default='none')
+
+
+@contextmanager
+def search_request(search_type: str):
+    """Time a whole search and label the stages timed inside it with its type; errors count by root cause"""
+    token = _search_type.set(search_type)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        cause = e.__cause__ or e
+        # neo4j_session has already counted a Neo4j error raised inside it
+        if not _is_recorded(e):
+            record_error('neo4j' if _is_neo4j_error(cause) else 'search', cause)
+        raise
+    finally:
+        SEARCH_SECONDS.observe(time.perf_counter() - start, search_type=search_type)
+        _search_type.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """Time one stage of the current search"""
+    start = time.perf_counter()
+    try:
+        with span(name):
+            yield
+    finally:
+        SEARCH_STAGE_SECONDS.observe(time.perf_counter() - start, search_type=_search_type.get(), stage=name)
+
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def record_error(component: str, error: BaseException):
+    """Count an error once, however many instrumented scopes it propagates through"""
+    if _is_recorded(error):
+        return
+    ERRORS.inc(component=component, error=type(error).__name__)
+    try:
+        error._metrics_recorded = True
+    except AttributeError:
+        pass
+
+
+def _is_recorded(error: BaseException) -> bool:
+    return any(getattr(e, '_metrics_recorded', False) for e in (error, error.__cause__) if e is not None)
+
+
+def _is_neo4j_error(error: BaseException) -> bool:
+    return type(error).__module__.startswith('neo4j')
+
+
+@contextmanager
+def neo4j_session(driver, max_pool_size: int = 100, **kwargs):
+    """
+    A session on a shared driver, counted against its connection pool
+
+    A session opened while `max_pool_size` (the driver's
+    max_connection_pool_size) others are in use has to wait for a connection,
+    and is counted in neo4j_pool_waits_total. Inside a debug trace the session
+    records its Cypher statements and their PROFILE plans.
+    """
+    if NEO4J_SESSIONS_IN_USE.inc() > max_pool_size:
+        NEO4J_POOL_WAITS.inc()
+    try:
+        with traced_session(driver, **kwargs) as session:
+            yield session
+    except Exception as e:
+        if _is_neo4j_error(e):
+            record_error('neo4j', e)
+        raise
+    finally:
+        NEO4J_SESSIONS_IN_USE.dec()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int, host: str = '0.0.0.0') -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics from a daemon thread (for processes without an HTTP API, e.g. MCP over stdio)"""
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.warning(f"Metrics endpoint not started on port {port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
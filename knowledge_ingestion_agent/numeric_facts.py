@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Numeric Fact Store
+Normalises AMOUNT and PERCENTAGE entities into typed (:Fact) nodes
+(value, unit, currency, product, qualifier, source chunk) backed by range
+indexes, so minimum balance, fee and rate questions become index seeks
+instead of scans over chunk text
+"""
+
+import re
+import logging
+from dataclasses import dataclass, asdict
+from typing import List, Dict, Optional, Tuple, Iterable
+
+try:
+    from .schema_manager import SchemaManager
+except ImportError:
+    from schema_manager import SchemaManager
+
+logger = logging.getLogger(__name__)
+
+# Characters of surrounding text inspected for qualifiers, kinds and currencies
+CONTEXT_BEFORE = 80
+CONTEXT_AFTER = 40
+
+SCALE_MULTIPLIERS = {
+    'k': 1e3, 'thousand': 1e3,
+    'm': 1e6, 'million': 1e6,
+    'b': 1e9, 'billion': 1e9,
+}
+
+NUMBER_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*(million|billion|thousand|k|m|b)?\b', re.IGNORECASE)
+CURRENCY_PATTERN = re.compile(r'\b(AUD|USD|NZD|EUR|GBP|JPY|CAD|SGD|HKD|CNY)\b')
+SENTENCE_BREAK = re.compile(r'[.;:!?]\s+(?=[A-Z])|\n\s*\n')
+
+QUALIFIER_PATTERNS = {
+    'minimum': re.compile(r'\b(?:minimum|min\.?|at least|no less than)\b', re.IGNORECASE),
+    'maximum': re.compile(r'\b(?:maximum|max\.?|up to|no more than|not exceed(?:ing)?)\b', re.IGNORECASE),
+}
+
+KIND_PATTERNS = {
+    'fee': re.compile(r'\b(?:fees?|charges?|commissions?|costs?)\b', re.IGNORECASE),
+    'balance': re.compile(r'\b(?:balances?|deposits?|investments?|opening|principal)\b', re.IGNORECASE),
+    'rate': re.compile(r'\b(?:rates?|interest|p\.a\.|per annum|yield)\b', re.IGNORECASE),
+}
+
+
+@dataclass
+class NumericFact:
+    """A normalised numeric statement found in a chunk"""
+    id: str
+    chunk_id: str
+    document_id: str
+    kind: str  # amount, balance, fee, rate
+    value: float  # currency amounts in whole units, percentages as written
+    unit: str  # currency, percent
+    currency: Optional[str]
+    product: Optional[str]
+    qualifier: Optional[str]  # minimum, maximum
+    text: str
+    context: str
+
+
+# Words ending in "s" that are already singular (or only used in the plural) in product names
+SINGULAR_WORDS = frozenset({
+    'bonus', 'plus', 'status', 'business', 'express', 'access', 'class', 'basis', 'analysis',
+    'series', 'news', 'savings', 'always', 'gas', 'bias', 'campus', 'surplus', 'stimulus',
+})
+PLURAL_ES = ('sses', 'shes', 'ches', 'xes', 'zes')
+
+
+def singularise(word: str) -> str:
+    """English plural to singular for the nouns found in product names"""
+    if len(word) <= 3 or word in SINGULAR_WORDS or not word.isalpha() or not word.endswith('s'):
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith(PLURAL_ES):
+        return word[:-2]
+    if word.endswith(('ss', 'us', 'is')):
+        return word
+    return word[:-1]
+
+
+def canonical_product(text: str) -> str:
+    """Lowercase, collapse whitespace and singularise the last word of a product name"""
+    words = text.lower().split()
+    if words:
+        words[-1] = singularise(words[-1])
+    return ' '.join(words)
+
+
+def parse_value(text: str) -> Optional[float]:
+    """Parse '$1,000', '$2.5 million' or '3.25%' into a float in base units"""
+    match = NUMBER_PATTERN.search(text)
+    if not match:
+        return None
+
+    try:
+        value = float(match.group(1).replace(',', ''))
+    except ValueError:
+        return None
+
+    scale = match.group(2)
+    if scale and '%' not in text:
+        value *= SCALE_MULTIPLIERS[scale.lower()]
+    return value
+
+
+def _nearest_label(patterns: Dict[str, re.Pattern], text: str, start: int, end: int) -> Optional[str]:
+    """Return the label whose pattern matches closest to text[start:end] within its sentence"""
+    window_start = max(0, start - CONTEXT_BEFORE)
+    window_end = min(len(text), end + CONTEXT_AFTER)
+
+    # Labels in a neighbouring sentence describe a different value
+    for match in SENTENCE_BREAK.finditer(text, window_start, window_end):
+        if match.end() <= start:
+            window_start = match.end()
+        elif match.start() >= end:
+            window_end = match.start()
+            break
+
+    best_label, best_distance = None, None
+    for label, pattern in patterns.items():
+        for match in pattern.finditer(text, window_start, window_end):
+            if match.end() <= start:
+                distance = start - match.end()
+            elif match.start() >= end:
+                distance = match.start() - end
+            else:
+                distance = 0
+            if best_distance is None or distance < best_distance:
+                best_label, best_distance = label, distance
+    return best_label
+
+
+class FactExtractor:
+    """Turn AMOUNT and PERCENTAGE entity spans into NumericFacts"""
+
+    def __init__(self, default_currency: str = 'AUD'):
+        self.default_currency = default_currency
+
+    def extract_facts(self, chunk_id: str, document_id: str, text: str,
+                      entities: Iterable[Tuple[str, str, Optional[int], Optional[int]]]) -> List[NumericFact]:
+        """Extract facts from (text, type, start_char, end_char) entity spans of a chunk"""
+        spans = []
+        for entity_text, entity_type, start, end in entities:
+            if start is None or end is None:
+                # Entities stored without offsets: locate the first occurrence
+                start = text.lower().find(entity_text.lower())
+                if start < 0:
+                    continue
+                end = start + len(entity_text)
+            spans.append((entity_text, entity_type, start, end))
+
+        products = [(start, end, canonical_product(entity_text))
+                    for entity_text, entity_type, start, end in spans if entity_type == 'PRODUCT']
+
+        facts = []
+        seen = set()
+        for entity_text, entity_type, start, end in spans:
+            if entity_type not in ('AMOUNT', 'PERCENTAGE') or (start, end) in seen:
+                continue
+            seen.add((start, end))
+
+            value = parse_value(entity_text)
+            if value is None:
+                continue
+
+            is_percent = entity_type == 'PERCENTAGE'
+            kind = _nearest_label(KIND_PATTERNS, text, start, end)
+            if is_percent:
+                kind = 'fee' if kind == 'fee' else 'rate'
+            elif kind not in ('fee', 'balance'):
+                kind = 'amount'
+
+            currency = None
+            if not is_percent:
+                currency_match = CURRENCY_PATTERN.search(text, max(0, start - 10), min(len(text), end + 10))
+                currency = currency_match.group(1) if currency_match else self.default_currency
+
+            facts.append(NumericFact(
+                id=f"{chunk_id}_f{len(facts)}",
+                chunk_id=chunk_id,
+                document_id=document_id,
+                kind=kind,
+                value=value,
+                unit='percent' if is_percent else 'currency',
+                currency=currency,
+                product=self._nearest_product(products, start, end),
+                qualifier=_nearest_label(QUALIFIER_PATTERNS, text, start, end),
+                text=entity_text,
+                context=text[max(0, start - CONTEXT_BEFORE):end + CONTEXT_AFTER].strip()
+            ))
+
+        return facts
+
+    def _nearest_product(self, products: List[Tuple[int, int, str]], start: int, end: int) -> Optional[str]:
+        """Pick the product mention closest to the value"""
+        if not products:
+            return None
+        return min(products, key=lambda p: min(abs(p[0] - end), abs(start - p[1])))[2]
+
+
+def write_facts(session, facts: List[NumericFact], batch_size: int = 500) -> int:
+    """Write facts and link them to their source chunks in UNWIND batches"""
+    rows = [asdict(fact) for fact in facts]
+    for i in range(0, len(rows), batch_size):
+        session.run("""
+            UNWIND $facts AS fact
+            MATCH (c:Chunk {id: fact.chunk_id})
+            MERGE (f:Fact {id: fact.id})
+            SET f += fact, f.updated_at = timestamp()
+            MERGE (c)-[r:HAS_FACT]->(f)
+            ON CREATE SET r.updated_at = timestamp()
+        """, facts=rows[i:i + batch_size])
+    return len(rows)
+
+
+def delete_document_facts(session, document_id: str):
+    """Remove all facts belonging to a document"""
+    session.run("""
+        MATCH (f:Fact {document_id: $doc_id})
+        DETACH DELETE f
+    """, doc_id=document_id)
+
+
+def backfill_facts(driver, batch_size: int = 500) -> int:
+    """Build facts for chunks already in the graph from their stored entity spans"""
+    extractor = FactExtractor()
+    total = 0
+    SchemaManager(driver).apply(groups=['facts'])
+
+    with driver.session() as session:
+        records = session.run("""
+            MATCH (d:Document)-[:HAS_CHUNK]->(c:Chunk)-[r:CONTAINS_ENTITY]->(e:Entity)
+            WHERE e.type IN ['AMOUNT', 'PERCENTAGE', 'PRODUCT']
+            WITH d, c, collect([e.text, e.type, r.start_char, r.end_char]) as entities
+            WHERE any(x IN entities WHERE x[1] IN ['AMOUNT', 'PERCENTAGE'])
+            RETURN d.id as doc_id, c.id as chunk_id, c.text as text, entities
+        """).data()
+
+        pending = []
+        for record in records:
+            pending.extend(extractor.extract_facts(
+                record['chunk_id'], record['doc_id'], record['text'] or '',
+                [tuple(entity) for entity in record['entities']]
+            ))
+            if len(pending) >= batch_size:
+                total += write_facts(session, pending, batch_size)
+                pending = []
+
+        if pending:
+            total += write_facts(session, pending, batch_size)
+
+    logger.info(f"Backfilled {total} numeric facts")
+    return total
+
+
+def main():
+    """Backfill numeric facts for an existing graph"""
+    import os
+    import argparse
+    from neo4j import GraphDatabase
+
+    parser = argparse.ArgumentParser(description='Build numeric Fact nodes from existing chunks')
+    parser.add_argument('--neo4j-uri', default=os.getenv('NEO4J_URI', 'bolt://localhost:7687'), help='Neo4j URI')
+    parser.add_argument('--neo4j-user', default=os.getenv('NEO4J_USER', 'neo4j'), help='Neo4j username')
+    parser.add_argument('--neo4j-password', default=os.getenv('NEO4J_PASSWORD', 'knowledge123'), help='Neo4j password')
+    parser.add_argument('--batch-size', type=int, default=500, help='Facts per write transaction')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    driver = GraphDatabase.driver(args.neo4j_uri, auth=(args.neo4j_user, args.neo4j_password))
+    try:
+        backfill_facts(driver, args.batch_size)
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Page-level OCR for scanned PDF pages
+Only pages without a usable text layer are rasterised, one page at a time
+per worker, OCR'd with Tesseract across a process pool and cached on disk
+by page-image hash so re-ingesting a document never repeats the work
+"""
+
+import os
+import hashlib
+import logging
+import importlib.util
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+# Documents opened by the current worker process, keyed by path
+_worker_documents: Dict[str, fitz.Document] = {}
+
+
+def page_needs_ocr(page: fitz.Page, page_text: str, min_chars: int = 20) -> bool:
+    """Check whether a page has no usable text layer but does carry an image"""
+    if len(page_text.strip()) >= min_chars:
+        return False
+    # Pages with neither text nor images are blank, not scanned
+    return bool(page.get_images(full=False))
+
+
+def _open_document(pdf_path: str) -> fitz.Document:
+    """Open a document once per worker process and reuse the handle"""
+    doc = _worker_documents.get(pdf_path)
+    if doc is None:
+        doc = fitz.open(pdf_path)
+        _worker_documents[pdf_path] = doc
+    return doc
+
+
+def _close_documents():
+    """Close any documents held by the current process"""
+    for doc in _worker_documents.values():
+        doc.close()
+    _worker_documents.clear()
+
+
+def _ocr_page(pdf_path: str, page_num: int, dpi: int, lang: str,
+              cache_dir: Optional[str]) -> Tuple[int, str, bool]:
+    """Rasterise and OCR a single page (1-based), returning (page_num, text, cache_hit)"""
+    import pytesseract
+    from PIL import Image
+
+    doc = _open_document(pdf_path)
+    page = doc[page_num - 1]
+
+    # Grayscale keeps the raster to one byte per pixel
+    pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+
+    digest = hashlib.sha256()
+    digest.update(f"{pixmap.width}x{pixmap.height}:{dpi}:{lang}".encode())
+    digest.update(pixmap.samples)
+    image_hash = digest.hexdigest()
+
+    cache_path = os.path.join(cache_dir, f"{image_hash}.txt") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return page_num, f.read(), True
+
+    image = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+    pixmap = None  # Release the raster before Tesseract allocates its own buffers
+    text = pytesseract.image_to_string(image, lang=lang).strip()
+    image.close()
+
+    if cache_path:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, cache_path)
+
+    return page_num, text, False
+
+
+class PageOCR:
+    """OCR only the pages that need it, in parallel and with a result cache"""
+
+    def __init__(self,
+                 dpi: int = 300,
+                 lang: str = 'eng',
+                 max_workers: Optional[int] = None,
+                 cache_dir: Optional[str] = None,
+                 min_chars: int = 20):
+        self.dpi = dpi
+        self.lang = lang
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_dir = cache_dir if cache_dir is not None else os.getenv('OCR_CACHE_DIR', 'data/ocr_cache')
+        self.min_chars = min_chars
+
+        self.stats = {
+            'pages_ocr': 0,
+            'cache_hits': 0,
+            'failures': 0
+        }
+
+    def is_available(self) -> bool:
+        """Check that the OCR dependencies are importable"""
+        missing = [module for module in ('pytesseract', 'PIL') if importlib.util.find_spec(module) is None]
+        if missing:
+            logger.error(f"OCR dependencies not installed: {', '.join(missing)}")
+            logger.info("Install with: pip install pytesseract Pillow")
+            return False
+        return True
+
+    def ocr_pages(self, pdf_path: str, page_numbers: List[int]) -> Dict[int, str]:
+        """OCR the given 1-based page numbers and return {page_num: text}"""
+        if not page_numbers or not self.is_available():
+            return {}
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        logger.info(f"Performing OCR on {len(page_numbers)} page(s) of {pdf_path}")
+        results = {}
+
+        if self.max_workers == 1 or len(page_numbers) == 1:
+            try:
+                for page_num in page_numbers:
+                    self._collect(results, page_num, lambda: _ocr_page(
+                        pdf_path, page_num, self.dpi, self.lang, self.cache_dir))
+            finally:
+                _close_documents()
+            return results
+
+        workers = min(self.max_workers, len(page_numbers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_ocr_page, pdf_path, page_num, self.dpi, self.lang, self.cache_dir): page_num
+                for page_num in page_numbers
+            }
+            for future in as_completed(futures):
+                self._collect(results, futures[future], future.result)
+
+        return results
+
+    def _collect(self, results: Dict[int, str], page_num: int, get_result):
+        """Record one page result, logging rather than raising on failure"""
+        try:
+            _, text, cache_hit = get_result()
+        except Exception as e:
+            self.stats['failures'] += 1
+            logger.error(f"OCR failed for page {page_num}: {e}")
+            return
+
+        if cache_hit:
+            self.stats['cache_hits'] += 1
+        else:
+            self.stats['pages_ocr'] += 1
+
+        if text:
+            logger.info(f"OCR extracted {len(text)} characters from page {page_num}"
+                        f"{' (cached)' if cache_hit else ''}")
+            results[page_num] = text
+        else:
+            logger.warning(f"No text extracted from page {page_num}")
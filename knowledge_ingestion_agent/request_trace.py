@@ -0,0 +1,320 @@
+"""
+Request Tracing
+Per-request span trees for the search API and MCP servers. Every metrics
+`stage()` inside a `RequestTrace` becomes a span, so a trace costs a few small
+objects per stage and is kept for every search: the slowest requests are held
+in a rolling buffer (`SLOW_REQUESTS`) for the admin endpoint.
+
+Opt-in per request:
+- debug: Neo4j sessions opened through `traced_session()` record every Cypher
+  statement with its duration and rows and run it under PROFILE, so db hits and
+  the operator plan come back with the trace.
+- profile: debug plus a sampled Python profile (stacks of the request's thread
+  every few milliseconds, aggregated by function).
+"""
+
+import os
+import sys
+import time
+import heapq
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+DEFAULT_SLOW_REQUESTS = 50
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+_trace: ContextVar[Optional['RequestTrace']] = ContextVar('request_trace', default=None)
+_span: ContextVar[Optional['Span']] = ContextVar('request_span', default=None)
+
+
+class Span:
+    """A timed step of a request, with nested steps"""
+    __slots__ = ('name', 'start', 'end', 'children', 'attributes')
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.children: List['Span'] = []
+        self.attributes = attributes
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        end = self.end if self.end is not None else time.perf_counter()
+        span = {
+            'name': self.name,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round((end - self.start) * 1000, 3)
+        }
+        if self.attributes:
+            span.update(self.attributes)
+        if self.children:
+            span['children'] = [child.to_dict(origin) for child in self.children]
+        return span
+
+
+class RequestTrace:
+    """Span tree (and, when asked, Cypher statements and Python samples) of one request"""
+
+    def __init__(self, name: str, debug: bool = False, profile: bool = False,
+                 sample_interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.name = name
+        self.debug = debug or profile
+        self.profile = profile
+        self.sample_interval = sample_interval
+        self.root = Span(name)
+        self.cypher: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.sampler: Optional[StackSampler] = None
+        self.timestamp = datetime.now().isoformat()
+        self._tokens = None
+
+    @property
+    def duration(self) -> float:
+        end = self.root.end if self.root.end is not None else time.perf_counter()
+        return end - self.root.start
+
+    def __enter__(self) -> 'RequestTrace':
+        self.root.start = time.perf_counter()
+        self._tokens = (_trace.set(self), _span.set(self.root))
+        if self.profile:
+            self.sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            self.sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.root.end = time.perf_counter()
+        if self.sampler is not None:
+            self.sampler.stop()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _trace.reset(self._tokens[0])
+        _span.reset(self._tokens[1])
+        return False
+
+    def add_cypher(self, entry: Dict[str, Any]):
+        span = _span.get()
+        entry['span'] = span.name if span is not None else None
+        entry['start_ms'] = round((entry.pop('started') - self.root.start) * 1000, 3)
+        self.cypher.append(entry)
+
+    def to_dict(self) -> Dict[str, Any]:
+        trace = {
+            'name': self.name,
+            'timestamp': self.timestamp,
+            'duration_ms': round(self.duration * 1000, 3),
+            'spans': self.root.to_dict(self.root.start)
+        }
+        if self.error:
+            trace['error'] = self.error
+        if self.debug:
+            trace['cypher'] = self.cypher
+            trace['db_hits'] = sum(entry.get('db_hits', 0) for entry in self.cypher)
+        if self.sampler is not None:
+            trace['python_profile'] = self.sampler.summary()
+        return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """A child span of the current one; a no-op outside a trace"""
+    parent = _span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, attributes or None)
+    parent.children.append(child)
+    token = _span.set(child)
+    try:
+        yield child
+    finally:
+        child.end = time.perf_counter()
+        _span.reset(token)
+
+
+def _summarise_parameter(value: Any) -> Any:
+    """Keep parameters readable: long lists (embeddings) and strings are abbreviated"""
+    if isinstance(value, (list, tuple)) and len(value) > 10:
+        return f"<list of {len(value)}>"
+    if isinstance(value, str) and len(value) > 200:
+        return value[:200] + '...'
+    return value
+
+
+def _flatten_plan(plan: Dict[str, Any], depth: int = 0, operators: Optional[List] = None) -> List[Dict[str, Any]]:
+    operators = [] if operators is None else operators
+    operators.append({
+        'operator': plan.get('operatorType'),
+        'depth': depth,
+        'db_hits': plan.get('dbHits', 0),
+        'rows': plan.get('rows', 0),
+        'details': plan.get('args', {}).get('Details')
+    })
+    for child in plan.get('children', []):
+        _flatten_plan(child, depth + 1, operators)
+    return operators
+
+
+class _BufferedResult:
+    """Records already fetched by a traced run; supports what the search code uses of neo4j.Result"""
+
+    def __init__(self, records: List, summary, keys):
+        self._records = records
+        self._summary = summary
+        self._keys = keys
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def single(self, strict: bool = False):
+        if strict and len(self._records) != 1:
+            raise ValueError(f"Expected exactly one record, got {len(self._records)}")
+        return self._records[0] if self._records else None
+
+    def data(self, *keys) -> List[Dict[str, Any]]:
+        return [record.data(*keys) for record in self._records]
+
+    def keys(self):
+        return self._keys
+
+    def consume(self):
+        return self._summary
+
+
+class TracedSession:
+    """A neo4j session whose run() records each statement, its timing and its PROFILE plan"""
+
+    def __init__(self, session, trace: RequestTrace):
+        self._session = session
+        self._trace = trace
+
+    def run(self, query, parameters: Optional[Dict[str, Any]] = None, **kwargs):
+        text = query if isinstance(query, str) else getattr(query, 'text', str(query))
+        profiled = isinstance(query, str) and not text.lstrip().upper().startswith(('PROFILE', 'EXPLAIN'))
+        started = time.perf_counter()
+        result = self._session.run(f"PROFILE {query}" if profiled else query, parameters, **kwargs)
+        records = list(result)
+        summary = result.consume()
+        keys = result.keys()
+
+        entry = {
+            'statement': ' '.join(text.split()),
+            'parameters': {key: _summarise_parameter(value)
+                           for key, value in {**(parameters or {}), **kwargs}.items()},
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+            'rows': len(records),
+            'started': started
+        }
+        plan = getattr(summary, 'profile', None)
+        if plan:
+            operators = _flatten_plan(plan)
+            entry['db_hits'] = sum(operator['db_hits'] for operator in operators)
+            entry['operators'] = operators
+        self._trace.add_cypher(entry)
+        return _BufferedResult(records, summary, keys)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+@contextmanager
+def traced_session(driver, **kwargs):
+    """driver.session(), recording its Cypher when the current request is traced with debug"""
+    with driver.session(**kwargs) as session:
+        trace = _trace.get()
+        yield TracedSession(session, trace) if trace is not None and trace.debug else session
+
+
+class StackSampler:
+    """Samples one thread's Python stack on an interval from a background thread"""
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = 0
+        self.leaf = Counter()
+        self.inclusive = Counter()
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        own_file = __file__
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename != own_file:
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if not stack:
+                continue
+            self.samples += 1
+            self.leaf[stack[0]] += 1
+            for function in set(stack):
+                self.inclusive[function] += 1
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def summary(self, limit: int = 20) -> Dict[str, Any]:
+        """Top functions by own and inclusive samples, and the top collapsed (flamegraph) stacks"""
+        def top(counter):
+            return [{'function': function, 'samples': count,
+                     'share': round(count / self.samples, 3) if self.samples else 0.0}
+                    for function, count in counter.most_common(limit)]
+        return {
+            'interval_ms': self.interval * 1000,
+            'samples': self.samples,
+            'self': top(self.leaf),
+            'inclusive': top(self.inclusive),
+            'stacks': [{'stack': stack, 'samples': count} for stack, count in self.stacks.most_common(limit)]
+        }
+
+
+class SlowRequestLog:
+    """The `capacity` slowest traced requests seen by this process"""
+
+    def __init__(self, capacity: int = DEFAULT_SLOW_REQUESTS):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._heap: List = []
+        self._seq = 0
+
+    def add(self, trace: RequestTrace, **info):
+        duration = trace.duration
+        with self._lock:
+            if self.capacity <= 0 or (len(self._heap) >= self.capacity and duration <= self._heap[0][0]):
+                return
+        entry = {'duration_ms': round(duration * 1000, 3), 'timestamp': trace.timestamp, **info,
+                 'trace': trace.to_dict()}
+        with self._lock:
+            self._seq += 1
+            heapq.heappush(self._heap, (duration, self._seq, entry))
+            if len(self._heap) > self.capacity:
+                heapq.heappop(self._heap)
+
+    def slowest(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = sorted(self._heap, key=lambda item: item[0], reverse=True)
+        return [entry for _, _, entry in entries[:limit]]
+
+    def clear(self):
+        with self._lock:
+            self._heap = []
+
+
+SLOW_REQUESTS = SlowRequestLog(int(os.getenv('SLOW_REQUEST_BUFFER', DEFAULT_SLOW_REQUESTS)))
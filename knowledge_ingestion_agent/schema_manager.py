@@ -0,0 +1,318 @@
+"""
+Schema and Index Manager
+Declares every constraint, range, fulltext and vector index the system uses and
+applies them idempotently once per deployment (API startup, ingestion start,
+bootstrap), instead of per document or per feature script. After applying it
+waits for population, can pre-warm the page cache by scanning the hot indexes,
+and reports each declared index's state, usage and size.
+
+    python schema_manager.py --warm --report
+"""
+
+import time
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+
+from neo4j.exceptions import Neo4jError
+
+try:
+    from .change_tracking import TRACKED_RELATIONSHIPS
+except ImportError:
+    from change_tracking import TRACKED_RELATIONSHIPS
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIMENSIONS = 384
+VECTOR_INDEX = 'chunk-embeddings'
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """One declared constraint or index"""
+    name: str
+    kind: str                      # 'constraint', 'range', 'fulltext' or 'vector'
+    label: str
+    properties: Tuple[str, ...]
+    group: str
+    hot: bool = False              # scanned by warm_up()
+    relationship: bool = False     # label is a relationship type
+
+    @property
+    def pattern(self) -> str:
+        return f"()-[n:`{self.label}`]-()" if self.relationship else f"(n:`{self.label}`)"
+
+    @property
+    def statement(self) -> str:
+        props = ', '.join(f'n.{p}' for p in self.properties)
+        target = f"`{self.name}` IF NOT EXISTS FOR {self.pattern}"
+        if self.kind == 'constraint':
+            return f"CREATE CONSTRAINT {target} REQUIRE {props} IS UNIQUE"
+        if self.kind == 'fulltext':
+            return f"CREATE FULLTEXT INDEX {target} ON EACH [{props}]"
+        if self.kind == 'vector':
+            return (f"CREATE VECTOR INDEX {target} ON ({props}) "
+                    f"OPTIONS {{indexConfig: {{`vector.dimensions`: {EMBEDDING_DIMENSIONS}, "
+                    f"`vector.similarity_function`: 'cosine'}}}}")
+        return f"CREATE INDEX {target} ON ({props})"
+
+    @property
+    def index_type(self) -> str:
+        """Type reported by SHOW INDEXES for the index backing this spec"""
+        return {'constraint': 'RANGE', 'range': 'RANGE', 'fulltext': 'FULLTEXT', 'vector': 'VECTOR'}[self.kind]
+
+
+# Every constraint and index, grouped by the feature that reads it
+SCHEMA: List[IndexSpec] = [
+    # Core lookups by business key
+    IndexSpec('document_id', 'range', 'Document', ('id',), 'core', hot=True),
+    IndexSpec('chunk_id', 'range', 'Chunk', ('id',), 'core', hot=True),
+    IndexSpec('entity_key', 'constraint', 'Entity', ('key',), 'core', hot=True),
+    IndexSpec('entity_text', 'range', 'Entity', ('text',), 'core', hot=True),
+    IndexSpec('entity_type', 'range', 'Entity', ('type',), 'core'),
+    IndexSpec(VECTOR_INDEX, 'vector', 'Chunk', ('embedding',), 'core', hot=True),
+
+    # Numeric facts
+    IndexSpec('fact_id', 'constraint', 'Fact', ('id',), 'facts'),
+    IndexSpec('fact_kind_qualifier', 'range', 'Fact', ('kind', 'qualifier'), 'facts', hot=True),
+    IndexSpec('fact_value', 'range', 'Fact', ('value',), 'facts'),
+    IndexSpec('fact_product', 'range', 'Fact', ('product',), 'facts'),
+    IndexSpec('fact_document', 'range', 'Fact', ('document_id',), 'facts'),
+
+    # Change tracking for delta backups and incremental rebuilds
+    IndexSpec('document_updated_at', 'range', 'Document', ('updated_at',), 'change_tracking'),
+    IndexSpec('chunk_updated_at', 'range', 'Chunk', ('updated_at',), 'change_tracking'),
+    IndexSpec('entity_updated_at', 'range', 'Entity', ('updated_at',), 'change_tracking'),
+    IndexSpec('fact_updated_at', 'range', 'Fact', ('updated_at',), 'change_tracking'),
+    IndexSpec('tombstone_deleted_at', 'range', 'Tombstone', ('deleted_at',), 'change_tracking'),
+    # Community writes are versioned separately so they do not show up as entity changes
+    IndexSpec('entity_community_updated_at', 'range', 'Entity', ('community_updated_at',), 'change_tracking'),
+    *[IndexSpec(f'{rel_type.lower()}_updated_at', 'range', rel_type, ('updated_at',), 'change_tracking',
+                relationship=True)
+      for rel_type in TRACKED_RELATIONSHIPS],
+
+    # Community search
+    IndexSpec('entity_community', 'range', 'Entity', ('community_id',), 'community', hot=True),
+    IndexSpec('entity_bridge', 'range', 'Entity', ('is_bridge_node',), 'community'),
+    IndexSpec('entity_centrality', 'range', 'Entity', ('community_degree_centrality',), 'community'),
+
+    # Enhanced chunk and document metadata
+    IndexSpec('chunk_keywords', 'range', 'Chunk', ('keywords',), 'enhanced'),
+    IndexSpec('chunk_type', 'range', 'Chunk', ('chunk_type',), 'enhanced'),
+    IndexSpec('chunk_density', 'range', 'Chunk', ('semantic_density',), 'enhanced'),
+    IndexSpec('doc_title', 'range', 'Document', ('title',), 'enhanced'),
+    IndexSpec('doc_keywords', 'range', 'Document', ('keywords',), 'enhanced'),
+
+    # Full-text search
+    IndexSpec('chunk-text', 'fulltext', 'Chunk', ('text',), 'fulltext'),
+    IndexSpec('entity-text', 'fulltext', 'Entity', ('text',), 'fulltext'),
+
+    # Document summaries, synthetic Q&A and the domain ontology
+    IndexSpec('summary_fulltext', 'fulltext', 'Summary', ('executive_summary',), 'summary'),
+    IndexSpec('summary_doc_type', 'range', 'Summary', ('document_type',), 'summary'),
+    IndexSpec('summary_complexity', 'range', 'Summary', ('complexity_score',), 'summary'),
+    IndexSpec('qa_questions_fulltext', 'fulltext', 'QAPair', ('question', 'answer'), 'qa'),
+    IndexSpec('qa_question_type', 'range', 'QAPair', ('question_type',), 'qa'),
+    IndexSpec('qa_confidence', 'range', 'QAPair', ('confidence_score',), 'qa'),
+    IndexSpec('entity_domain_search', 'range', 'Entity', ('domain', 'subdomain'), 'ontology'),
+]
+
+
+def schema_specs(groups: Optional[Iterable[str]] = None) -> List[IndexSpec]:
+    """Declared specs, optionally only those of the given groups"""
+    if groups is None:
+        return list(SCHEMA)
+    groups = set(groups)
+    return [spec for spec in SCHEMA if spec.group in groups]
+
+
+class SchemaManager:
+    """Apply, warm and report on the declared schema"""
+
+    def __init__(self, driver, timeout: int = 300):
+        self.driver = driver
+        self.timeout = timeout
+
+    def apply(self, groups: Optional[Iterable[str]] = None, wait: bool = True) -> Dict[str, Any]:
+        """
+        Create every missing constraint and index (IF NOT EXISTS, so re-runs are no-ops)
+
+        A statement that conflicts with an existing schema rule (say, an older
+        index on the same property) is logged and skipped rather than failing
+        startup.
+        """
+        applied, failed = [], {}
+        with self.driver.session() as session:
+            for spec in schema_specs(groups):
+                try:
+                    session.run(spec.statement).consume()
+                    applied.append(spec.name)
+                except Neo4jError as e:
+                    logger.warning(f"Could not create {spec.kind} {spec.name}: {e.message}")
+                    failed[spec.name] = e.message
+        if wait:
+            self.await_population()
+        return {'applied': applied, 'failed': failed}
+
+    def await_population(self):
+        """Block until every index has finished populating (or the timeout)"""
+        start = time.time()
+        with self.driver.session() as session:
+            session.run("CALL db.awaitIndexes($timeout)", timeout=self.timeout).consume()
+        logger.info(f"Indexes online after {time.time() - start:.1f}s")
+
+    def _scan(self, session, spec: IndexSpec) -> int:
+        """Count entries through the index; also pulls its pages into the page cache"""
+        # A fulltext index holds a node with any of its properties, the others need all
+        joiner = ' OR ' if spec.kind == 'fulltext' else ' AND '
+        predicate = joiner.join(f"n.`{p}` IS NOT NULL" for p in spec.properties)
+        return session.run(f"MATCH {spec.pattern} WHERE {predicate} RETURN count(n) as entries"
+                           ).single()["entries"]
+
+    def _warm_vector(self, session, spec: IndexSpec, probes: int) -> int:
+        """Run a few k-NN queries so the upper layers of the HNSW graph are cached"""
+        seeds = session.run(f"""
+            MATCH (n:`{spec.label}`) WHERE n.`{spec.properties[0]}` IS NOT NULL
+            RETURN n.`{spec.properties[0]}` as vector
+            LIMIT $probes
+        """, probes=probes).values()
+        for (vector,) in seeds:
+            session.run("CALL db.index.vector.queryNodes($name, 100, $vector) YIELD node RETURN count(node)",
+                        name=spec.name, vector=vector).consume()
+        return len(seeds)
+
+    def warm_up(self, groups: Optional[Iterable[str]] = None, vector_probes: int = 20) -> Dict[str, float]:
+        """Scan the hot indexes once so the first requests do not pay for cold pages"""
+        timings = {}
+        with self.driver.session() as session:
+            for spec in schema_specs(groups):
+                if not spec.hot:
+                    continue
+                start = time.time()
+                try:
+                    if spec.kind == 'vector':
+                        self._warm_vector(session, spec, vector_probes)
+                    else:
+                        self._scan(session, spec)
+                except Neo4jError as e:
+                    logger.warning(f"Could not warm {spec.name}: {e.message}")
+                    continue
+                timings[spec.name] = time.time() - start
+        logger.info(f"Warmed {len(timings)} indexes in {sum(timings.values()):.1f}s")
+        return timings
+
+    def report(self, groups: Optional[Iterable[str]] = None, sizes: bool = True) -> Dict[str, Any]:
+        """
+        State of each declared index and the indexes nobody declared
+
+        Indexes are matched on type, label and properties rather than name, so
+        older auto-named indexes on a declared schema count as present.
+        """
+        with self.driver.session() as session:
+            existing = session.run("""
+                SHOW INDEXES
+                YIELD name, type, entityType, labelsOrTypes, properties, state,
+                      populationPercent, readCount, lastRead
+                WHERE type <> 'LOOKUP'
+                RETURN name, type, entityType, labelsOrTypes, properties, state,
+                       populationPercent, readCount, lastRead
+            """).data()
+            by_schema = {(i['type'], i['entityType'], i['labelsOrTypes'][0], tuple(i['properties'])): i
+                         for i in existing}
+
+            indexes, matched = [], set()
+            for spec in schema_specs(groups):
+                entity_type = 'RELATIONSHIP' if spec.relationship else 'NODE'
+                index = by_schema.get((spec.index_type, entity_type, spec.label, spec.properties))
+                entry = {
+                    'name': spec.name,
+                    'kind': spec.kind,
+                    'group': spec.group,
+                    'label': spec.label,
+                    'properties': list(spec.properties),
+                    'present': index is not None,
+                    'index_name': index['name'] if index else None,
+                    'state': index['state'] if index else 'MISSING',
+                    'population_percent': index['populationPercent'] if index else None,
+                    'read_count': index['readCount'] if index else None,
+                    'last_read': str(index['lastRead']) if index and index['lastRead'] else None,
+                    'entries': None
+                }
+                if index is not None:
+                    matched.add(index['name'])
+                    if sizes and entry['state'] == 'ONLINE':
+                        entry['entries'] = self._scan(session, spec)
+                indexes.append(entry)
+
+        # Only meaningful against the full schema
+        undeclared = [i['name'] for i in existing if i['name'] not in matched] if groups is None else []
+        return {
+            'indexes': indexes,
+            'missing': [i['name'] for i in indexes if not i['present']],
+            'not_online': [i['name'] for i in indexes if i['present'] and i['state'] != 'ONLINE'],
+            'unused': [i['name'] for i in indexes if i['present'] and not i['read_count']],
+            'undeclared': undeclared
+        }
+
+    def startup(self, warm: bool = True) -> Dict[str, Any]:
+        """Apply the full schema, wait for it and optionally warm the hot indexes"""
+        start = time.time()
+        result = self.apply()
+        if warm:
+            result['warmed'] = self.warm_up()
+        result['seconds'] = time.time() - start
+        logger.info(f"Schema ready in {result['seconds']:.1f}s "
+                    f"({len(result['applied'])} applied, {len(result['failed'])} skipped)")
+        return result
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"{'Index':<30} {'Kind':<10} {'State':<10} {'Entries':>10} {'Reads':>10}")
+    for index in report['indexes']:
+        entries = '' if index['entries'] is None else index['entries']
+        reads = '' if index['read_count'] is None else index['read_count']
+        print(f"{index['name']:<30} {index['kind']:<10} {index['state']:<10} {entries:>10} {reads:>10}")
+    for key in ('missing', 'not_online', 'unused', 'undeclared'):
+        if report[key]:
+            print(f"{key.replace('_', ' ').capitalize()}: {', '.join(report[key])}")
+
+
+def main():
+    """Apply the schema and report index health"""
+    import os
+    import json
+    import argparse
+    from neo4j import GraphDatabase
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Apply, warm and report on the Neo4j schema')
+    parser.add_argument('--neo4j-uri', default=os.getenv('NEO4J_URI', 'bolt://localhost:7687'), help='Neo4j URI')
+    parser.add_argument('--neo4j-user', default=os.getenv('NEO4J_USER', 'neo4j'), help='Neo4j username')
+    parser.add_argument('--neo4j-password', default=os.getenv('NEO4J_PASSWORD', 'knowledge123'), help='Neo4j password')
+    parser.add_argument('--groups', nargs='+', help='Only these schema groups (default: all)')
+    parser.add_argument('--no-apply', action='store_true', help='Do not create anything')
+    parser.add_argument('--warm', action='store_true', help='Pre-warm the hot indexes')
+    parser.add_argument('--report', action='store_true', help='Print index health and size')
+    parser.add_argument('--json', help='Write the report as JSON')
+    args = parser.parse_args()
+
+    driver = GraphDatabase.driver(args.neo4j_uri, auth=(args.neo4j_user, args.neo4j_password))
+    manager = SchemaManager(driver)
+    try:
+        if not args.no_apply:
+            manager.apply(args.groups)
+        if args.warm:
+            manager.warm_up(args.groups)
+        if args.report or args.json:
+            report = manager.report(args.groups)
+            print_report(report)
+            if args.json:
+                with open(args.json, 'w') as f:
+                    json.dump(report, f, indent=2)
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
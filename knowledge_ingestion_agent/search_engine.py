@@ -11,9 +11,19 @@ from neo4j import GraphDatabase
 import spacy
 import re
 
+try:
+    from .metrics import stage, cache_lookup
+    from .request_trace import traced_session
+except ImportError:
+    from metrics import stage, cache_lookup
+    from request_trace import traced_session
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Neighbour sources for graphrag_search, in fall-through order
+GRAPHRAG_EXPANSIONS = ('related', 'snapshot', 'cypher')
+
 @dataclass
 class SearchResult:
     chunk_id: str
@@ -26,10 +36,13 @@ class SearchResult:
     metadata: Dict[str, Any]
 
 class KnowledgeSearchEngine:
-    def __init__(self, neo4j_uri: str, neo4j_user: str, neo4j_password: str):
+    def __init__(self, neo4j_uri: str, neo4j_user: str, neo4j_password: str,
+                 graph_snapshot=None):
         self.neo4j_uri = neo4j_uri
         self.neo4j_user = neo4j_user
         self.neo4j_password = neo4j_password
+        # Optional GraphSnapshotManager; graph expansion falls back to Cypher without it
+        self.graph_snapshot = graph_snapshot
         
         # Load models
         logger.info("Loading search models...")
@@ -70,7 +83,8 @@ class KnowledgeSearchEngine:
         logger.info(f"Performing vector search for: {query}")
         
         # Generate query embedding
-        query_embedding = self.embedder.encode(query, normalize_embeddings=True)
+        with stage('embedding'):
+            query_embedding = self.embedder.encode(query, normalize_embeddings=True)
         
         driver = GraphDatabase.driver(self.neo4j_uri,
                                     auth=(self.neo4j_user, self.neo4j_password))
@@ -78,25 +92,26 @@ class KnowledgeSearchEngine:
         results = []
         
         try:
-            with driver.session() as session:
-                # Vector similarity search
-                result = session.run("""
-                    CALL db.index.vector.queryNodes(
-                        'chunk-embeddings',
-                        $k,
-                        $embedding
-                    ) YIELD node, score
-                    MATCH (node)<-[:HAS_CHUNK]-(d:Document)
-                    RETURN node.id as chunk_id,
-                           node.text as text,
-                           node.page_num as page_num,
-                           d.id as document_id,
-                           d.filename as filename,
-                           score
-                    ORDER BY score DESC
-                """, k=top_k * 2, embedding=query_embedding.tolist())  # Get more results for better ranking
+            with traced_session(driver) as session:
+                with stage('retrieval'):
+                    # Vector similarity search
+                    records = list(session.run("""
+                        CALL db.index.vector.queryNodes(
+                            'chunk-embeddings',
+                            $k,
+                            $embedding
+                        ) YIELD node, score
+                        MATCH (node)<-[:HAS_CHUNK]-(d:Document)
+                        RETURN node.id as chunk_id,
+                               node.text as text,
+                               node.page_num as page_num,
+                               d.id as document_id,
+                               d.filename as filename,
+                               score
+                        ORDER BY score DESC
+                    """, k=top_k * 2, embedding=query_embedding.tolist()))  # Get more results for better ranking
                 
-                for record in result:
+                for record in records:
                     entities = self._get_chunk_entities(session, record['chunk_id'])
                     
                     search_result = SearchResult(
@@ -121,18 +136,23 @@ class KnowledgeSearchEngine:
         logger.info(f"Performing graph search for: {query}")
         
         # Extract entities from query
-        query_entities = self._extract_query_entities(query)
+        with stage('query_entities'):
+            query_entities = self._extract_query_entities(query)
         
         if not query_entities:
             return []
         
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            return self._graph_search_snapshot(snapshot, query_entities, top_k)
+        
         driver = GraphDatabase.driver(self.neo4j_uri,
                                     auth=(self.neo4j_user, self.neo4j_password))
         
         results = []
         
         try:
-            with driver.session() as session:
+            with traced_session(driver) as session, stage('retrieval'):
                 # Fixed query with proper aggregation
                 for entity in query_entities:
                     result = session.run("""
@@ -190,6 +210,48 @@ class KnowledgeSearchEngine:
         
         return unique_results
     
+    def _graph_search_snapshot(self, snapshot, query_entities: List[str], top_k: int) -> List[SearchResult]:
+        """graph_search scoring (matched entities + 0.1 per chunk entity) on the in-memory snapshot"""
+        best = {}
+        with stage('retrieval'):
+            for entity in query_entities:
+                matched = snapshot.match_entities(entity)
+                if len(matched) == 0:
+                    continue
+                counts = snapshot.chunk_scores(matched)
+                scores = np.where(counts > 0, counts + 0.1 * snapshot.chunk_degree, 0.0)
+                for chunk, score in zip(*snapshot.top_chunks(scores, top_k)):
+                    best[chunk] = max(best.get(chunk, 0.0), float(score))
+            
+            ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        if not ranked:
+            return []
+        
+        driver = GraphDatabase.driver(self.neo4j_uri,
+                                    auth=(self.neo4j_user, self.neo4j_password))
+        try:
+            with traced_session(driver) as session:
+                details = self._fetch_chunks(session, [snapshot.chunk_ids[chunk] for chunk, _ in ranked])
+        finally:
+            driver.close()
+        
+        results = []
+        for chunk, score in ranked:
+            record = details.get(snapshot.chunk_ids[chunk])
+            if record is None:
+                continue  # Deleted since the snapshot was loaded
+            results.append(SearchResult(
+                chunk_id=record['chunk_id'],
+                text=record['text'],
+                score=score,
+                document_id=record['document_id'],
+                page_num=record['page_num'],
+                entities=snapshot.chunk_entity_dicts(chunk),
+                search_type='graph',
+                metadata={'filename': record['filename']}
+            ))
+        return results
+    
     def full_text_search(self, query: str, top_k: int = 10) -> List[SearchResult]:
         """Full-text search with enhanced keyword matching"""
         logger.info(f"Performing full-text search for: {query}")
@@ -200,7 +262,7 @@ class KnowledgeSearchEngine:
         results = []
         
         try:
-            with driver.session() as session:
+            with traced_session(driver) as session, stage('retrieval'):
                 # Enhanced full-text search with fuzzy matching
                 result = session.run("""
                     MATCH (c:Chunk)<-[:HAS_CHUNK]-(d:Document)
@@ -342,8 +404,17 @@ class KnowledgeSearchEngine:
         
         return final_results
     
-    def graphrag_search(self, query: str, top_k: int = 10) -> List[SearchResult]:
-        """GraphRAG search combining graph traversal with embeddings"""
+    def graphrag_search(self, query: str, top_k: int = 10, expansion: str = 'related') -> List[SearchResult]:
+        """
+        GraphRAG search combining graph traversal with embeddings
+        
+        expansion picks the first neighbour source tried for each vector hit:
+        'related' (materialised RELATED_CHUNK lists), 'snapshot' (shared-entity
+        counts from the in-memory snapshot) or 'cypher' (live traversal). Chunks
+        the chosen source does not cover fall through to the next one.
+        """
+        if expansion not in GRAPHRAG_EXPANSIONS:
+            raise ValueError(f"Unknown expansion {expansion!r}, expected one of {GRAPHRAG_EXPANSIONS}")
         logger.info(f"Performing GraphRAG search for: {query}")
         
         # Get initial vector results
@@ -355,28 +426,44 @@ class KnowledgeSearchEngine:
         driver = GraphDatabase.driver(self.neo4j_uri,
                                     auth=(self.neo4j_user, self.neo4j_password))
         
+        snapshot = self._snapshot() if expansion != 'cypher' else None
         enhanced_results = []
         
         try:
-            with driver.session() as session:
+            with traced_session(driver) as session:
+                # Materialised RELATED_CHUNK lists (build_related_chunks.py) are one indexed hop
+                related = {}
+                if expansion == 'related':
+                    related = self._related_chunks(session, [r.chunk_id for r in vector_results], limit=3)
+                
                 for result in vector_results:
-                    # Traverse graph from high-scoring chunks
-                    neighbors = session.run("""
-                        MATCH (c:Chunk {id: $chunk_id})
-                        MATCH (c)-[:CONTAINS_ENTITY]->(e:Entity)
-                        MATCH (other:Chunk)-[:CONTAINS_ENTITY]->(e)
-                        WHERE other.id <> c.id
-                        WITH other, count(DISTINCT e) as shared_entities
-                        MATCH (other)<-[:HAS_CHUNK]-(d:Document)
-                        RETURN other.id as chunk_id,
-                               other.text as text,
-                               other.page_num as page_num,
-                               d.id as document_id,
-                               d.filename as filename,
-                               shared_entities
-                        ORDER BY shared_entities DESC
-                        LIMIT 3
-                    """, chunk_id=result.chunk_id)
+                    if related.get(result.chunk_id):
+                        neighbors = related[result.chunk_id]
+                    elif snapshot is not None and result.chunk_id in snapshot.chunk_index:
+                        # Shared-entity counts from the in-memory snapshot
+                        with stage('retrieval'):
+                            neighbour_ids, _ = snapshot.neighbours(snapshot.chunk_index[result.chunk_id], limit=3)
+                        details = self._fetch_chunks(session, snapshot.chunk_ids[neighbour_ids].tolist())
+                        neighbors = [details[c] for c in snapshot.chunk_ids[neighbour_ids] if c in details]
+                    else:
+                        # Traverse graph from high-scoring chunks
+                        with stage('retrieval'):
+                            neighbors = list(session.run("""
+                                MATCH (c:Chunk {id: $chunk_id})
+                                MATCH (c)-[:CONTAINS_ENTITY]->(e:Entity)
+                                MATCH (other:Chunk)-[:CONTAINS_ENTITY]->(e)
+                                WHERE other.id <> c.id
+                                WITH other, count(DISTINCT e) as shared_entities
+                                MATCH (other)<-[:HAS_CHUNK]-(d:Document)
+                                RETURN other.id as chunk_id,
+                                       other.text as text,
+                                       other.page_num as page_num,
+                                       d.id as document_id,
+                                       d.filename as filename,
+                                       shared_entities
+                                ORDER BY shared_entities DESC
+                                LIMIT 3
+                            """, chunk_id=result.chunk_id))
                     
                     # Add original result
                     enhanced_results.append(result)
@@ -413,12 +500,123 @@ class KnowledgeSearchEngine:
         
         return unique_results
     
+    def ppr_search(self, query: str, top_k: int = 10, vector_seeds: int = 5,
+                   vector_weight: float = 0.5, restart: float = 0.25,
+                   iterations: int = 10) -> List[SearchResult]:
+        """
+        Personalised PageRank over the in-memory Chunk-Entity graph
+        
+        The walk restarts at the entities detected in the query and (optionally)
+        the top vector hits, and chunks are ranked by stationary mass. Multi-hop
+        neighbours are reached through shared entities without per-request Cypher.
+        """
+        logger.info(f"Performing PPR search for: {query}")
+        
+        snapshot = self._snapshot()
+        if snapshot is None:
+            logger.warning("No graph snapshot loaded, falling back to GraphRAG search")
+            return self.graphrag_search(query, top_k)
+        
+        # Entity seeds: each query term's mass is split over its matches, weighted by IDF
+        with stage('query_entities'):
+            query_entities = self._extract_query_entities(query)
+        entity_seeds = np.zeros(snapshot.num_entities, dtype=np.float32)
+        for entity in query_entities:
+            matched = snapshot.match_entities(entity)
+            if len(matched):
+                entity_seeds[matched] += snapshot.idf[matched] / snapshot.idf[matched].sum()
+        
+        # Chunk seeds: top vector hits weighted by similarity
+        chunk_seeds = np.zeros(snapshot.num_chunks, dtype=np.float32)
+        vector_results = self.vector_search(query, vector_seeds) if vector_seeds else []
+        for result in vector_results:
+            chunk = snapshot.chunk_index.get(result.chunk_id)
+            if chunk is not None:
+                chunk_seeds[chunk] += max(result.score, 0.0)
+        
+        if entity_seeds.sum() > 0 and chunk_seeds.sum() > 0:
+            entity_seeds *= (1 - vector_weight) / entity_seeds.sum()
+            chunk_seeds *= vector_weight / chunk_seeds.sum()
+        
+        with stage('retrieval'):
+            mass, _ = snapshot.personalized_pagerank(entity_seeds, chunk_seeds, restart=restart,
+                                                     iterations=iterations)
+            ranked, scores = snapshot.top_chunks(mass, top_k)
+        if len(ranked) == 0:
+            return []
+        
+        driver = GraphDatabase.driver(self.neo4j_uri,
+                                    auth=(self.neo4j_user, self.neo4j_password))
+        try:
+            with traced_session(driver) as session:
+                details = self._fetch_chunks(session, snapshot.chunk_ids[ranked].tolist())
+        finally:
+            driver.close()
+        
+        results = []
+        for chunk, score in zip(ranked, scores):
+            record = details.get(snapshot.chunk_ids[chunk])
+            if record is None:
+                continue  # Deleted since the snapshot was loaded
+            results.append(SearchResult(
+                chunk_id=record['chunk_id'],
+                text=record['text'],
+                score=float(score),
+                document_id=record['document_id'],
+                page_num=record['page_num'],
+                entities=snapshot.chunk_entity_dicts(chunk),
+                search_type='ppr',
+                metadata={'filename': record['filename'], 'seed': bool(chunk_seeds[chunk] > 0)}
+            ))
+        return results
+    
+    def _snapshot(self):
+        """Current in-memory graph snapshot, or None to use Cypher traversals"""
+        return self.graph_snapshot.get() if self.graph_snapshot is not None else None
+    
+    def _fetch_chunks(self, session, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Text and document of the given chunks in one round trip"""
+        with stage('hydration'):
+            result = session.run("""
+                UNWIND $chunk_ids AS chunk_id
+                MATCH (c:Chunk {id: chunk_id})<-[:HAS_CHUNK]-(d:Document)
+                RETURN c.id as chunk_id,
+                       c.text as text,
+                       c.page_num as page_num,
+                       d.id as document_id,
+                       d.filename as filename
+            """, chunk_ids=list(chunk_ids))
+            return {record['chunk_id']: dict(record) for record in result}
+    
+    def _related_chunks(self, session, chunk_ids: List[str], limit: int = 3) -> Dict[str, List[Dict[str, Any]]]:
+        """Top materialised RELATED_CHUNK neighbours of each chunk (empty for chunks without a list)"""
+        with stage('retrieval'):
+            result = session.run("""
+                UNWIND $chunk_ids AS chunk_id
+                MATCH (c:Chunk {id: chunk_id})-[r:RELATED_CHUNK]->(other:Chunk)<-[:HAS_CHUNK]-(d:Document)
+                WITH chunk_id, other, d, r
+                ORDER BY r.score DESC
+                WITH chunk_id, collect({chunk_id: other.id, text: other.text, page_num: other.page_num,
+                                        document_id: d.id, filename: d.filename,
+                                        related_score: r.score})[..$limit] as related
+                RETURN chunk_id, related
+            """, chunk_ids=list(chunk_ids), limit=limit)
+            return {record['chunk_id']: record['related'] for record in result}
+    
     def _get_chunk_entities(self, session, chunk_id: str) -> List[Dict[str, str]]:
         """Get entities for a chunk"""
-        result = session.run("""
-            MATCH (c:Chunk {id: $chunk_id})-[:CONTAINS_ENTITY]->(e:Entity)
-            RETURN e.text as text, e.type as type
-        """, chunk_id=chunk_id)
-        
-        return [{'text': record['text'], 'type': record['type']} 
-                for record in result]
\ No newline at end of file
+        with stage('hydration'):
+            snapshot = self._snapshot()
+            if snapshot is not None:
+                hit = chunk_id in snapshot.chunk_index
+                cache_lookup('graph_snapshot', hit)
+                if hit:
+                    return snapshot.chunk_entity_dicts(snapshot.chunk_index[chunk_id])
+            
+            result = session.run("""
+                MATCH (c:Chunk {id: $chunk_id})-[:CONTAINS_ENTITY]->(e:Entity)
+                RETURN e.text as text, e.type as type
+            """, chunk_id=chunk_id)
+            
+            return [{'text': record['text'], 'type': record['type']} 
+                    for record in result]
\ No newline at end of file
@@ -8,6 +8,11 @@ from dataclasses import dataclass
 import re
 from neo4j import GraphDatabase
 
+try:
+    from .numeric_facts import canonical_product
+except ImportError:
+    from numeric_facts import canonical_product
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -18,6 +23,7 @@ class CypherQuery:
     description: str
     parameters: Dict[str, Any]
     query_type: str  # simple, aggregation, path, relationship
+    fallback: Optional['CypherQuery'] = None  # run when the primary query returns nothing
 
 class Text2CypherRetriever:
     """Convert natural language queries to Cypher queries"""
@@ -81,7 +87,23 @@ class Text2CypherRetriever:
                 'patterns': [
                     r'(?:what\s+is\s+the\s+)?minimum\s+(?:amount|balance|requirement)\s+(?:for|to|of)\s+(.+)',
                 ],
+                # Index seek on numeric Fact nodes (kind, qualifier), then filter the few candidates by product
                 'template': """
+                    MATCH (f:Fact)
+                    WHERE f.kind IN ['amount', 'balance'] AND f.qualifier = 'minimum'
+                    MATCH (d:Document)-[:HAS_CHUNK]->(c:Chunk)-[:HAS_FACT]->(f)
+                    WHERE f.product = $product
+                       OR toLower(c.text) CONTAINS toLower($product)
+                    RETURN d.filename as document, 
+                           c.text as text,
+                           c.page_num as page,
+                           f.value as value,
+                           f.currency as currency
+                    ORDER BY f.product = $product DESC, c.page_num
+                    LIMIT 5
+                """,
+                # Text scan for graphs ingested before facts were extracted
+                'fallback_template': """
                     MATCH (c:Chunk)<-[:HAS_CHUNK]-(d:Document)
                     WHERE toLower(c.text) CONTAINS 'minimum'
                     AND toLower(c.text) CONTAINS toLower($product)
@@ -173,13 +195,23 @@ class Text2CypherRetriever:
                         for abbrev, full in self.product_mappings.items():
                             if abbrev in product:
                                 product = product.replace(abbrev, full)
-                        params['product'] = product
+                        params['product'] = canonical_product(product.strip(' ?.'))
+                    
+                    fallback = None
+                    if 'fallback_template' in template_info:
+                        fallback = CypherQuery(
+                            query=template_info['fallback_template'].strip(),
+                            description=f"Query type: {template_name} (text scan)",
+                            parameters=params,
+                            query_type=template_info['type']
+                        )
                     
                     return CypherQuery(
                         query=template_info['template'].strip(),
                         description=f"Query type: {template_name}",
                         parameters=params,
-                        query_type=template_info['type']
+                        query_type=template_info['type'],
+                        fallback=fallback
                     )
         
         # If no template matches, try a generic search
@@ -246,6 +278,12 @@ class Text2CypherRetriever:
                 
                 for record in result:
                     results.append(dict(record))
+                
+                if not results and cypher_query.fallback:
+                    cypher_query = cypher_query.fallback
+                    logger.info(f"No results, falling back to: {cypher_query.description}")
+                    result = session.run(cypher_query.query, **cypher_query.parameters)
+                    results = [dict(record) for record in result]
             
             return {
                 'success': True,
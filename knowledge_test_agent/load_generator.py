@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Open-loop Load Generator
+Drives /search and the MCP search tools at a target arrival rate, independent
+of how fast responses come back, and reports latency percentiles and achieved
+throughput against the query throughput targets in PERFORMANCE_REQUIREMENTS.md
+(sustained 1,000, peak 5,000 and burst 10,000 queries/minute).
+
+Requests are scheduled in advance (uniform or Poisson arrivals, following a
+constant, ramp or step rate profile) and their latency is measured from the
+time they were scheduled to start. When the system, or the concurrency cap,
+falls behind, the queueing delay is part of the measured latency instead of
+silently lowering the offered load (coordinated omission). Failures and
+timeouts are recorded at the time they surfaced, so a timing-out system cannot
+look fast. Service time (send to response) is reported separately.
+
+Latencies go into an HDR-style histogram: fixed memory, three significant
+digits at any magnitude, mergeable across phases.
+"""
+
+import os
+import sys
+import csv
+import json
+import math
+import random
+import asyncio
+import logging
+import argparse
+import shlex
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Query throughput targets (queries/minute) from PERFORMANCE_REQUIREMENTS.md
+TARGETS_QPM = {"sustained": 1000, "peak": 5000, "burst": 10000}
+
+# Complex query latency targets (ms) from PERFORMANCE_REQUIREMENTS.md
+LATENCY_TARGETS_MS = {"p50": 200, "p95": 500, "p99": 1000, "max": 2000}
+
+# A phase meets its throughput target within this fraction, with at most this error rate
+THROUGHPUT_TOLERANCE = 0.98
+MAX_ERROR_RATE = 0.01
+
+DEFAULT_MCP_COMMAND = f"{sys.executable} {Path(__file__).resolve().parent.parent / 'mcp_server' / 'neo4j_enhanced_search.py'}"
+
+
+class LatencyHistogram:
+    """HDR-style histogram of microsecond values with 2048 linear sub-buckets per power of two"""
+
+    SUB_BUCKET_BITS = 11
+
+    def __init__(self):
+        self.counts: Dict[Tuple[int, int], int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def _key(self, value: int) -> Tuple[int, int]:
+        shift = max(0, value.bit_length() - self.SUB_BUCKET_BITS)
+        return shift, value >> shift
+
+    def record(self, seconds: float):
+        value = max(0, int(seconds * 1_000_000))
+        key = self._key(value)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'LatencyHistogram'):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent: float) -> float:
+        """Value (ms) at or below which `percent` of recordings fall (highest equivalent value)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for (shift, sub_bucket), count in sorted(self.counts.items()):
+            seen += count
+            if seen >= rank:
+                return min(((sub_bucket + 1) << shift) - 1, self.max) / 1000
+        return self.max / 1000
+
+    def fraction_below(self, ms: float) -> float:
+        limit = ms * 1000
+        below = sum(count for (shift, sub_bucket), count in self.counts.items() if (sub_bucket << shift) <= limit)
+        return below / self.count if self.count else 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count / 1000 if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean, 2),
+            "min_ms": round((self.min or 0) / 1000, 2),
+            **{f"p{p:g}_ms": round(self.percentile(p), 2) for p in (50, 90, 95, 99, 99.9)},
+            "max_ms": round(self.max / 1000, 2)
+        }
+
+
+@dataclass
+class Phase:
+    """Arrival rate over time: constant, a linear ramp up to `rate_qpm`, or equal steps up to it"""
+    name: str
+    rate_qpm: float
+    duration_s: float
+    profile: str = "constant"
+    start_qpm: Optional[float] = None   # ramp/step starting rate (default: a tenth of the target)
+    ramp_s: Optional[float] = None      # ramp length (default: the whole phase)
+    steps: int = 5
+
+    def rate_at(self, t: float) -> float:
+        start = self.start_qpm if self.start_qpm is not None else self.rate_qpm / 10
+        if self.profile == "ramp":
+            ramp = self.ramp_s or self.duration_s
+            return start + (self.rate_qpm - start) * min(t / ramp, 1.0)
+        if self.profile == "step":
+            step = min(int(t / self.duration_s * self.steps), self.steps - 1)
+            return start + (self.rate_qpm - start) * step / max(self.steps - 1, 1)
+        return self.rate_qpm
+
+    @property
+    def mean_rate_qpm(self) -> float:
+        """Average offered rate over the whole phase"""
+        start = self.start_qpm if self.start_qpm is not None else self.rate_qpm / 10
+        if self.profile == "ramp":
+            ramp = self.ramp_s or self.duration_s
+            if ramp >= self.duration_s:
+                return start + (self.rate_qpm - start) * self.duration_s / ramp / 2
+            return ((start + self.rate_qpm) / 2 * ramp + self.rate_qpm * (self.duration_s - ramp)) / self.duration_s
+        if self.profile == "step":
+            steps = max(self.steps, 1)
+            return start + (self.rate_qpm - start) * sum(range(steps)) / steps / max(steps - 1, 1)
+        return self.rate_qpm
+
+    def arrivals(self, rng: random.Random, poisson: bool = False) -> Iterator[float]:
+        """Scheduled start offsets (seconds) of every request in the phase"""
+        t = 0.0
+        while t < self.duration_s:
+            yield t
+            per_second = max(self.rate_at(t), 1e-3) / 60
+            t += rng.expovariate(per_second) if poisson else 1 / per_second
+
+
+@dataclass
+class Operation:
+    """One entry of the query mix: an API search type or an MCP tool"""
+    name: str
+    weight: float = 1.0
+    target: str = "api"                 # api or mcp
+    search_type: Optional[str] = None
+    tool: Optional[str] = None
+    top_k: int = 5
+    use_reranking: bool = True
+
+    @classmethod
+    def parse(cls, spec: str, top_k: int = 5, use_reranking: bool = True) -> 'Operation':
+        """`vector=3`, `mcp.search_documents=1` or `mcp.knowledge_search.hybrid=1` (weight optional)"""
+        name, _, weight = spec.partition("=")
+        parts = name.split(".")
+        if parts[0] == "mcp":
+            if len(parts) < 2:
+                raise ValueError(f"MCP mix entries need a tool name: {spec}")
+            return cls(name, float(weight or 1), "mcp", parts[2] if len(parts) > 2 else None, parts[1],
+                       top_k, use_reranking)
+        return cls(name, float(weight or 1), "api", name, None, top_k, use_reranking)
+
+
+@dataclass
+class PhaseResult:
+    phase: Phase
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    ok_latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    service: LatencyHistogram = field(default_factory=LatencyHistogram)
+    by_operation: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    scheduled: int = 0
+    ok: int = 0
+    non_empty: int = 0
+    queued: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+
+    @property
+    def achieved_qpm(self) -> float:
+        return self.ok * 60 / self.elapsed_s if self.elapsed_s else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.errors.values()) / self.scheduled if self.scheduled else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        latency = self.latency.summary()
+        offered_qpm = self.phase.mean_rate_qpm
+        return {
+            "phase": self.phase.name,
+            "profile": self.phase.profile,
+            "target_qpm": self.phase.rate_qpm,
+            "offered_qpm": round(offered_qpm, 1),
+            "duration_s": self.phase.duration_s,
+            "scheduled": self.scheduled,
+            "ok": self.ok,
+            "non_empty": self.non_empty,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 4),
+            "queued_for_slot": self.queued,
+            "elapsed_s": round(self.elapsed_s, 2),
+            "achieved_qpm": round(self.achieved_qpm, 1),
+            "throughput_met": (self.achieved_qpm >= offered_qpm * THROUGHPUT_TOLERANCE
+                               and self.error_rate <= MAX_ERROR_RATE),
+            "latency_met": (all(latency[f"{k}_ms"] <= v for k, v in LATENCY_TARGETS_MS.items())
+                            and self.error_rate <= MAX_ERROR_RATE),
+            "latency": latency,
+            "service_time": self.service.summary(),
+            "by_operation": {name: hist.summary() for name, hist in self.by_operation.items()}
+        }
+
+
+def load_questions(test_file: str) -> List[str]:
+    """Questions of a test CSV (test.csv format)"""
+    with open(test_file, newline='', encoding='utf-8') as f:
+        return [row["Question"].strip() for row in csv.DictReader(f) if (row.get("Question") or "").strip()]
+
+
+class McpClient:
+    """One stdio MCP server process; concurrent tool calls share its session"""
+
+    def __init__(self, command: str):
+        self.command = command
+        self._stack = None
+        self.session = None
+
+    async def __aenter__(self) -> 'McpClient':
+        from contextlib import AsyncExitStack
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+
+        args = shlex.split(self.command)
+        self._stack = AsyncExitStack()
+        read, write = await self._stack.enter_async_context(
+            stdio_client(StdioServerParameters(command=args[0], args=args[1:], env=dict(os.environ))))
+        self.session = await self._stack.enter_async_context(ClientSession(read, write))
+        await self.session.initialize()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._stack.aclose()
+
+    async def call(self, operation: Operation, query: str) -> int:
+        """Call the tool and return its result count"""
+        arguments = {"query": query, "top_k": operation.top_k}
+        if operation.tool == "knowledge_search":
+            arguments["use_reranking"] = operation.use_reranking
+            if operation.search_type:
+                arguments["search_type"] = operation.search_type
+        result = await self.session.call_tool(operation.tool, arguments)
+        if getattr(result, "isError", False):
+            raise RuntimeError(result.content[0].text if result.content else "tool error")
+        payload = json.loads(result.content[0].text)
+        if "error" in payload:
+            raise RuntimeError(payload["error"])
+        return payload.get("count", len(payload.get("results", [])))
+
+
+class LoadGenerator:
+    """Open-loop request scheduling over a query mix, with at most `concurrency` requests in flight"""
+
+    def __init__(self, questions: List[str], mix: List[Operation], api_url: str = "http://localhost:8000",
+                 concurrency: int = 256, timeout: float = 30.0, poisson: bool = False, seed: int = 42,
+                 mcp_command: str = DEFAULT_MCP_COMMAND):
+        if not questions:
+            raise ValueError("No questions to send")
+        self.questions = questions
+        self.mix = mix
+        self.api_url = api_url.rstrip("/")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.poisson = poisson
+        self.rng = random.Random(seed)
+        self.mcp_command = mcp_command
+        self.http = None
+        self.mcp = None
+
+    async def __aenter__(self) -> 'LoadGenerator':
+        if any(op.target == "api" for op in self.mix):
+            import aiohttp
+
+            self.http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        if any(op.target == "mcp" for op in self.mix):
+            self.mcp = await McpClient(self.mcp_command).__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.http is not None:
+            await self.http.close()
+        if self.mcp is not None:
+            await self.mcp.__aexit__(*exc)
+
+    async def _search(self, operation: Operation, query: str) -> int:
+        """Send one request and return its result count"""
+        if operation.target == "mcp":
+            return await asyncio.wait_for(self.mcp.call(operation, query), self.timeout)
+        async with self.http.post(f"{self.api_url}/search", json={
+            "query": query,
+            "search_type": operation.search_type,
+            "top_k": operation.top_k,
+            "use_reranking": operation.use_reranking
+        }) as response:
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+            return len((await response.json()).get("results", []))
+
+    async def _request(self, result: PhaseResult, slots: asyncio.Semaphore, operation: Operation,
+                       query: str, intended: float):
+        loop = asyncio.get_running_loop()
+        if slots.locked():
+            result.queued += 1
+        async with slots:
+            sent = loop.time()
+            try:
+                count = await self._search(operation, query)
+            except Exception as e:
+                count = None
+                error = "timeout" if isinstance(e, asyncio.TimeoutError) else (
+                    str(e) if isinstance(e, RuntimeError) else type(e).__name__)
+                result.errors[error] = result.errors.get(error, 0) + 1
+            done = loop.time()
+        result.latency.record(done - intended)
+        result.service.record(done - sent)
+        result.by_operation.setdefault(operation.name, LatencyHistogram()).record(done - intended)
+        if count is not None:
+            result.ok += 1
+            result.non_empty += count > 0
+            result.ok_latency.record(done - intended)
+
+    async def run_phase(self, phase: Phase) -> PhaseResult:
+        """Send the phase's requests on schedule and wait for all of them"""
+        logger.info(f"Phase {phase.name}: {phase.profile} to {phase.rate_qpm:g} qpm for {phase.duration_s:g}s")
+        loop = asyncio.get_running_loop()
+        result = PhaseResult(phase)
+        slots = asyncio.Semaphore(self.concurrency)
+        weights = [op.weight for op in self.mix]
+        pending = set()
+
+        start = loop.time()
+        for offset in phase.arrivals(self.rng, self.poisson):
+            delay = start + offset - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            operation = self.rng.choices(self.mix, weights)[0]
+            task = asyncio.create_task(self._request(result, slots, operation, self.rng.choice(self.questions),
+                                                     start + offset))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            result.scheduled += 1
+        if pending:
+            await asyncio.wait(pending)
+        result.elapsed_s = loop.time() - start
+        return result
+
+    async def run(self, phases: List[Phase], pause_s: float = 5.0) -> List[PhaseResult]:
+        results = []
+        async with self:
+            for i, phase in enumerate(phases):
+                if i:
+                    await asyncio.sleep(pause_s)
+                results.append(await self.run_phase(phase))
+                print_phase(results[-1].to_dict())
+        return results
+
+
+def preset_phases(preset: str, duration_s: Optional[float] = None) -> List[Phase]:
+    """The PERFORMANCE_REQUIREMENTS.md throughput targets; burst lasts one minute"""
+    durations = {"sustained": 300, "peak": 120, "burst": 60}
+    names = list(TARGETS_QPM) if preset == "all" else [preset]
+    return [Phase(name, TARGETS_QPM[name], duration_s if duration_s and name != "burst" else durations[name])
+            for name in names]
+
+
+def print_phase(phase: Dict[str, Any]):
+    latency = phase["latency"]
+    logger.info(f"  {phase['phase']}: {phase['achieved_qpm']:.0f} of {phase['offered_qpm']:g} qpm offered "
+                f"({'met' if phase['throughput_met'] else 'NOT met'}), "
+                f"{phase['ok']}/{phase['scheduled']} ok, error rate {phase['error_rate']:.2%}, "
+                f"{phase['queued_for_slot']} waited for a slot")
+    logger.info(f"  latency p50 {latency['p50_ms']:.0f}ms  p95 {latency['p95_ms']:.0f}ms  "
+                f"p99 {latency['p99_ms']:.0f}ms  p99.9 {latency['p99.9_ms']:.0f}ms  max {latency['max_ms']:.0f}ms "
+                f"({'within' if phase['latency_met'] else 'over'} complex query targets); "
+                f"service p99 {phase['service_time']['p99_ms']:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load generator for /search and the MCP search tools")
+    parser.add_argument("--api-url", default=os.getenv("API_BASE_URL", "http://localhost:8000"), help="API URL")
+    parser.add_argument("--test-file", default="test.csv", help="CSV whose Question column supplies the queries")
+    parser.add_argument("--mix", nargs="+", default=["hybrid=1"],
+                        help="Weighted operations: API search types (vector=3), MCP tools (mcp.search_documents=1) "
+                             "or MCP knowledge_search with a type (mcp.knowledge_search.hybrid=1)")
+    parser.add_argument("--preset", choices=list(TARGETS_QPM) + ["all"],
+                        help="Run the PERFORMANCE_REQUIREMENTS.md throughput target(s) instead of --rate")
+    parser.add_argument("--rate", type=float, default=1000, help="Target arrival rate, queries/minute")
+    parser.add_argument("--duration", type=float, help="Phase length in seconds (default 60; presets have their own)")
+    parser.add_argument("--profile", choices=["constant", "ramp", "step"], default="constant", help="Rate profile")
+    parser.add_argument("--start-rate", type=float, help="Ramp/step starting rate, queries/minute")
+    parser.add_argument("--ramp-seconds", type=float, help="Ramp length (default: the whole phase)")
+    parser.add_argument("--steps", type=int, default=5, help="Number of steps for --profile step")
+    parser.add_argument("--arrivals", choices=["uniform", "poisson"], default="poisson", help="Inter-arrival times")
+    parser.add_argument("--concurrency", type=int, default=256, help="Maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=30, help="Request timeout (seconds)")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per query")
+    parser.add_argument("--no-reranking", action="store_true", help="Disable reranking")
+    parser.add_argument("--mcp-command", default=DEFAULT_MCP_COMMAND, help="Command starting the MCP server (stdio)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for arrivals and query choice")
+    parser.add_argument("--output", help="JSON report path")
+    args = parser.parse_args()
+
+    mix = [Operation.parse(spec, args.top_k, not args.no_reranking) for spec in args.mix]
+    if args.preset:
+        phases = preset_phases(args.preset, args.duration)
+    else:
+        phases = [Phase(f"{args.rate:g}qpm", args.rate, args.duration or 60, args.profile,
+                        args.start_rate, args.ramp_seconds, args.steps)]
+
+    generator = LoadGenerator(load_questions(args.test_file), mix, args.api_url, args.concurrency,
+                              args.timeout, args.arrivals == "poisson", args.seed, args.mcp_command)
+    results = asyncio.run(generator.run(phases))
+
+    overall = LatencyHistogram()
+    for result in results:
+        overall.merge(result.latency)
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "api_url": args.api_url,
+        "mix": [op.__dict__ for op in mix],
+        "arrivals": args.arrivals,
+        "concurrency": args.concurrency,
+        "targets_qpm": TARGETS_QPM,
+        "latency_targets_ms": LATENCY_TARGETS_MS,
+        "phases": [result.to_dict() for result in results],
+        "overall_latency": overall.summary()
+    }
+
+    output = args.output or f"../data/test_results/load_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"📄 Load test report saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
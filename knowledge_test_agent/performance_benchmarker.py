@@ -5,7 +5,7 @@ Tracks performance trends and provides optimization recommendations
 """
 
 import requests
-import time
+import asyncio
 import json
 import pandas as pd
 import numpy as np
@@ -16,13 +16,15 @@ from typing import Dict, List, Any, Optional, Tuple
 import logging
 import statistics
 from pathlib import Path
+from load_generator import LatencyHistogram, LoadGenerator, Operation, Phase
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class PerformanceBenchmarker:
-    def __init__(self, api_url: str = "http://localhost:8000"):
+    def __init__(self, api_url: str = "http://localhost:8000", rate_qpm: float = 60):
         self.api_url = api_url
+        self.rate_qpm = rate_qpm
         self.benchmark_data = []
         
         # Performance thresholds based on current system requirements
@@ -79,84 +81,67 @@ class PerformanceBenchmarker:
     
     def measure_performance_profile(self, search_type: str, use_reranking: bool = True,
                                   iterations: int = 5) -> Dict[str, Any]:
-        """Measure detailed performance profile for a search method"""
-        logger.info(f"📊 Measuring performance profile: {search_type} (reranking={use_reranking})")
+        """
+        Measure detailed performance profile for a search method
+        
+        Queries arrive open-loop at `self.rate_qpm` (load_generator.py), so
+        latency includes any queueing behind slow responses. Failed queries
+        count against accuracy and the error rate, and their latency is the
+        time until they failed; only successes count as fast queries.
+        """
+        logger.info(f"📊 Measuring performance profile: {search_type} (reranking={use_reranking}, "
+                    f"{self.rate_qpm:g} qpm)")
         
         profile_data = {
             "search_type": search_type,
             "use_reranking": use_reranking,
+            "rate_qpm": self.rate_qpm,
             "complexity_results": {},
             "overall_metrics": {}
         }
         
-        all_response_times = []
-        all_accuracies = []
+        all_response_times = LatencyHistogram()
+        ok_response_times = LatencyHistogram()
+        scheduled = non_empty = errors = 0
         
         # Test across different query complexities
         for complexity, queries in self.query_complexity_sets.items():
             logger.info(f"  Testing {complexity} queries...")
             
-            complexity_times = []
-            complexity_accuracies = []
+            generator = LoadGenerator(queries, [Operation(search_type, top_k=5, use_reranking=use_reranking)],
+                                      api_url=self.api_url, timeout=15)
+            phase = Phase(complexity, self.rate_qpm, len(queries) * iterations * 60 / self.rate_qpm)
+            result = asyncio.run(generator.run([phase]))[0]
             
-            for iteration in range(iterations):
-                for query in queries:
-                    try:
-                        start_time = time.time()
-                        
-                        response = requests.post(
-                            f"{self.api_url}/search",
-                            json={
-                                "query": query,
-                                "search_type": search_type,
-                                "top_k": 5,
-                                "use_reranking": use_reranking
-                            },
-                            timeout=15
-                        )
-                        
-                        response_time = (time.time() - start_time) * 1000  # ms
-                        complexity_times.append(response_time)
-                        all_response_times.append(response_time)
-                        
-                        # Simple accuracy check (has results)
-                        if response.status_code == 200:
-                            data = response.json()
-                            has_results = len(data.get('results', [])) > 0
-                            accuracy = 1.0 if has_results else 0.0
-                        else:
-                            accuracy = 0.0
-                        
-                        complexity_accuracies.append(accuracy)
-                        all_accuracies.append(accuracy)
-                        
-                    except Exception as e:
-                        logger.warning(f"Query failed: {e}")
-                        complexity_times.append(5000)  # Penalty
-                        complexity_accuracies.append(0.0)
-                        all_response_times.append(5000)
-                        all_accuracies.append(0.0)
+            all_response_times.merge(result.latency)
+            ok_response_times.merge(result.ok_latency)
+            scheduled += result.scheduled
+            non_empty += result.non_empty
+            errors += result.scheduled - result.ok
             
             # Calculate complexity-specific metrics
             profile_data["complexity_results"][complexity] = {
-                "avg_response_time": statistics.mean(complexity_times),
-                "p95_response_time": statistics.quantiles(complexity_times, n=20)[18] if len(complexity_times) >= 20 else max(complexity_times),
-                "accuracy": statistics.mean(complexity_accuracies),
-                "queries_tested": len(queries) * iterations
+                "avg_response_time": result.latency.mean,
+                "p95_response_time": result.latency.percentile(95),
+                "accuracy": result.non_empty / result.scheduled if result.scheduled else 0.0,
+                "error_rate": result.error_rate,
+                "queries_tested": result.scheduled
             }
         
         # Calculate overall metrics
         profile_data["overall_metrics"] = {
-            "avg_response_time": statistics.mean(all_response_times),
-            "p50_response_time": statistics.median(all_response_times),
-            "p95_response_time": statistics.quantiles(all_response_times, n=20)[18] if len(all_response_times) >= 20 else max(all_response_times),
-            "p99_response_time": statistics.quantiles(all_response_times, n=100)[98] if len(all_response_times) >= 100 else max(all_response_times),
-            "min_response_time": min(all_response_times),
-            "max_response_time": max(all_response_times),
-            "accuracy": statistics.mean(all_accuracies),
-            "total_queries": len(all_response_times),
-            "fast_queries_pct": len([t for t in all_response_times if t <= 500]) / len(all_response_times) * 100,
-            "slow_queries_pct": len([t for t in all_response_times if t > 2000]) / len(all_response_times) * 100
+            "avg_response_time": all_response_times.mean,
+            "p50_response_time": all_response_times.percentile(50),
+            "p95_response_time": all_response_times.percentile(95),
+            "p99_response_time": all_response_times.percentile(99),
+            "min_response_time": (all_response_times.min or 0) / 1000,
+            "max_response_time": all_response_times.max / 1000,
+            "accuracy": non_empty / scheduled if scheduled else 0.0,
+            "error_rate": errors / scheduled if scheduled else 0.0,
+            "total_queries": scheduled,
+            "fast_queries_pct": (ok_response_times.fraction_below(500) * ok_response_times.count / scheduled * 100
+                                 if scheduled else 0.0),
+            "slow_queries_pct": (1 - all_response_times.fraction_below(2000)) * 100 if all_response_times.count else 0.0
         }
         
         # Determine performance tier
@@ -169,7 +154,7 @@ class PerformanceBenchmarker:
     def run_speed_accuracy_analysis(self, search_methods: Optional[List[str]] = None) -> Dict[str, Any]:
         """Run comprehensive speed vs accuracy analysis"""
         if search_methods is None:
-            search_methods = ["optimized_keyword", "vector", "hybrid", "graph", "graphrag"]
+            search_methods = ["optimized_keyword", "vector", "hybrid", "graph", "graphrag", "ppr"]
         
         logger.info("🚀 Starting Speed vs Accuracy Analysis")
         logger.info("=" * 60)
@@ -491,17 +476,19 @@ def main():
     parser.add_argument("--api-url", default="http://localhost:8000",
                         help="API URL (default: http://localhost:8000)")
     parser.add_argument("--methods", nargs="+",
-                        choices=["optimized_keyword", "vector", "hybrid", "graph", "graphrag", "full_text"],
+                        choices=["optimized_keyword", "vector", "hybrid", "graph", "graphrag", "ppr", "full_text"],
                         help="Search methods to analyze (default: all)")
     parser.add_argument("--output", type=str,
                         help="Output file path for results")
     parser.add_argument("--report", type=str,
                         help="Output file path for markdown report")
+    parser.add_argument("--rate", type=float, default=60,
+                        help="Open-loop arrival rate per method, queries/minute (default: 60)")
     
     args = parser.parse_args()
     
     # Create benchmarker
-    benchmarker = PerformanceBenchmarker(args.api_url)
+    benchmarker = PerformanceBenchmarker(args.api_url, rate_qpm=args.rate)
     
     # Check API availability
     try:
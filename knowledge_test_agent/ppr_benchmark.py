@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+PPR vs GraphRAG Benchmark
+Runs the test-set questions in-process through vector, graphrag with each
+neighbour source (materialised RELATED_CHUNK lists, the in-memory graph
+snapshot, live Cypher traversal) and ppr search, and compares latency and document hit rate at k. Vector search is the shared first
+stage of every graph method, so (method - vector) is the cost of the graph
+expansion itself.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+import statistics
+from datetime import datetime
+from typing import Dict, List, Any
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'knowledge_ingestion_agent'))
+
+from neo4j import GraphDatabase
+from search_engine import KnowledgeSearchEngine
+from graph_snapshot import GraphSnapshotManager
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+METHODS = ["vector", "graphrag_related", "graphrag_snapshot", "graphrag_cypher", "ppr"]
+
+
+def _clean(name: str) -> str:
+    name = (name or '').lower().strip()
+    return name[:-4] if name.endswith('.pdf') else name
+
+
+def document_match(expected_doc: str, filenames: List[str]) -> bool:
+    """Same rule as accuracy_test_runner: either name contains the other"""
+    expected = _clean(expected_doc)
+    if not expected:
+        return False
+    return any(expected in _clean(f) or _clean(f) in expected for f in filenames if f)
+
+
+def load_questions(test_file: str, limit: int = None) -> List[Dict[str, str]]:
+    with open(test_file, encoding='utf-8', errors='replace') as f:
+        rows = [{'question': row['Question'], 'expected_doc': row.get('Document Name', '')}
+                for row in csv.DictReader(f) if row.get('Question')]
+    return rows[:limit] if limit else rows
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run_benchmark(questions: List[Dict[str, str]], top_k: int = 5, repeat: int = 3,
+                  methods: List[str] = METHODS) -> Dict[str, Any]:
+    uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+    user = os.getenv("NEO4J_USER", "neo4j")
+    password = os.getenv("NEO4J_PASSWORD", "knowledge123")
+
+    driver = GraphDatabase.driver(uri, auth=(user, password))
+    snapshot = GraphSnapshotManager(driver, refresh_interval=0)
+    load_start = time.perf_counter()
+    snapshot.start()
+    snapshot_load_s = time.perf_counter() - load_start
+    if snapshot.get() is None:
+        raise RuntimeError("Graph snapshot could not be loaded")
+
+    engine = KnowledgeSearchEngine(uri, user, password, graph_snapshot=snapshot)
+
+    runners = {
+        "vector": lambda q: engine.vector_search(q, top_k),
+        "graphrag_related": lambda q: engine.graphrag_search(q, top_k, expansion='related'),
+        "graphrag_snapshot": lambda q: engine.graphrag_search(q, top_k, expansion='snapshot'),
+        "graphrag_cypher": lambda q: engine.graphrag_search(q, top_k, expansion='cypher'),
+        "ppr": lambda q: engine.ppr_search(q, top_k),
+    }
+
+    # Warm up models and connections
+    for method in methods:
+        runners[method](questions[0]['question'])
+
+    per_method = {method: {'latencies_ms': [], 'hits': 0} for method in methods}
+    per_question = []
+    for i, row in enumerate(questions):
+        entry = {'question': row['question'], 'expected_doc': row['expected_doc']}
+        for method in methods:
+            latencies = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                results = runners[method](row['question'])
+                latencies.append((time.perf_counter() - start) * 1000)
+            filenames = [r.metadata.get('filename') for r in results]
+            hit = document_match(row['expected_doc'], filenames)
+            per_method[method]['latencies_ms'].extend(latencies)
+            per_method[method]['hits'] += hit
+            entry[method] = {'median_ms': statistics.median(latencies), 'hit': hit,
+                             'documents': filenames}
+        per_question.append(entry)
+        logger.info(f"{i + 1}/{len(questions)}: " +
+                    ", ".join(f"{m} {entry[m]['median_ms']:.0f}ms{' ✓' if entry[m]['hit'] else ''}"
+                              for m in methods))
+
+    driver.close()
+
+    summary = {}
+    vector_p50 = (statistics.median(per_method['vector']['latencies_ms'])
+                  if 'vector' in per_method else 0.0)
+    for method, data in per_method.items():
+        latencies = data['latencies_ms']
+        p50 = statistics.median(latencies)
+        summary[method] = {
+            'p50_ms': p50,
+            'p95_ms': percentile(latencies, 0.95),
+            'mean_ms': statistics.mean(latencies),
+            'expansion_p50_ms': max(p50 - vector_p50, 0.0) if method != 'vector' else 0.0,
+            'hit_rate_at_k': data['hits'] / len(questions)
+        }
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'top_k': top_k,
+        'repeat': repeat,
+        'questions': len(questions),
+        'snapshot': {**snapshot.info(), 'load_seconds': snapshot_load_s},
+        'summary': summary,
+        'per_question': per_question
+    }
+
+
+def print_summary(results: Dict[str, Any]):
+    print(f"\nPPR vs GraphRAG ({results['questions']} questions, top_k={results['top_k']}, "
+          f"snapshot {results['snapshot']['chunks']} chunks / {results['snapshot']['entities']} entities, "
+          f"loaded in {results['snapshot']['load_seconds']:.1f}s)")
+    print(f"{'Method':<20} {'p50 ms':>9} {'p95 ms':>9} {'expand ms':>10} {'hit@k':>7}")
+    for method, s in results['summary'].items():
+        print(f"{method:<20} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} "
+              f"{s['expansion_p50_ms']:>10.1f} {s['hit_rate_at_k']:>7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PPR search against GraphRAG search')
+    parser.add_argument('--test-file', default=os.path.join(os.path.dirname(__file__), 'test.csv'),
+                        help='Test CSV file (Question, Document Name)')
+    parser.add_argument('--limit', type=int, help='Only the first N questions')
+    parser.add_argument('--top-k', type=int, default=5, help='Results per query')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per question and method')
+    parser.add_argument('--methods', nargs='+', choices=METHODS, default=METHODS, help='Methods to run')
+    parser.add_argument('--output', help='Write full results as JSON')
+    args = parser.parse_args()
+
+    questions = load_questions(args.test_file, args.limit)
+    results = run_benchmark(questions, top_k=args.top_k, repeat=args.repeat, methods=args.methods)
+    print_summary(results)
+
+    output = args.output or f"../data/test_results/ppr_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, default=str)
+    logger.info(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Parameterised Cypher templates for keyword search
+Keyword disjunctions and match-count scores are written once as list
+comprehensions over a $keywords parameter, so every question reuses the same
+query text and Neo4j's plan cache, and quotes in user input cannot break the
+query. Executions are tracked per template to report plan cache reuse
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, List, Iterable, Optional, Callable
+
+STOP_WORDS = {'the', 'for', 'and', 'are', 'what', 'how', 'can', 'do'}
+
+
+def keywords_from_query(query: str, min_length: int = 3, stop_words: Iterable[str] = STOP_WORDS) -> List[str]:
+    """Lowercase, de-duplicate and filter query words into a keyword list parameter"""
+    stop_words = set(stop_words)
+    keywords = []
+    for word in query.lower().split():
+        word = word.strip('?!.,;:()"\'')
+        if len(word) >= min_length and word not in stop_words and word not in keywords:
+            keywords.append(word)
+    return keywords
+
+
+def any_contains(expr: str, param: str = 'keywords') -> str:
+    """Predicate true when expr contains any keyword in $param"""
+    return f"any(kw IN ${param} WHERE toLower({expr}) CONTAINS kw)"
+
+
+def all_contains(expr: str, param: str = 'keywords') -> str:
+    """Predicate true when expr contains every keyword in $param"""
+    return f"all(kw IN ${param} WHERE toLower({expr}) CONTAINS kw)"
+
+
+def match_count(expr: str, param: str = 'keywords') -> str:
+    """Number of keywords in $param contained in expr"""
+    return f"size([kw IN ${param} WHERE toLower({expr}) CONTAINS kw])"
+
+
+@dataclass(frozen=True)
+class CypherTemplate:
+    """A named, fixed query text whose only variation is its parameters"""
+    name: str
+    query: str
+
+
+# Chunks scored by how many keywords they contain
+KEYWORD_CHUNKS = CypherTemplate('keyword_chunks', f"""
+    MATCH (c:Chunk)<-[:HAS_CHUNK]-(d:Document)
+    WHERE {any_contains('c.text')}
+    WITH d, c, {match_count('c.text')} as match_count
+    RETURN c.id as chunk_id,
+           c.text as text,
+           c.page_num as page_num,
+           d.filename as document,
+           match_count as score,
+           toFloat(match_count) / size($keywords) as match_ratio,
+           c.semantic_density as semantic_density,
+           c.chunk_type as chunk_type
+    ORDER BY match_count DESC, c.semantic_density DESC
+    LIMIT $limit
+""")
+
+# Chunks linked to entities whose text contains any keyword
+KEYWORD_ENTITY_CHUNKS = CypherTemplate('keyword_entity_chunks', f"""
+    MATCH (e:Entity)<-[:CONTAINS_ENTITY]-(c:Chunk)<-[:HAS_CHUNK]-(d:Document)
+    WHERE {any_contains('e.text')}
+    WITH d, c, COUNT(DISTINCT e) as entity_count
+    RETURN c.id as chunk_id,
+           c.text as text,
+           c.page_num as page_num,
+           d.filename as document,
+           entity_count as score,
+           c.semantic_density as semantic_density,
+           c.chunk_type as chunk_type
+    ORDER BY entity_count DESC
+    LIMIT $limit
+""")
+
+# Chunks containing every $required term and, when given, at least one $any_of term
+FILTERED_CHUNKS = CypherTemplate('filtered_chunks', f"""
+    MATCH (c:Chunk)
+    WHERE {all_contains('c.text', 'required')}
+      AND (size($any_of) = 0 OR {any_contains('c.text', 'any_of')})
+    MATCH (c)<-[:HAS_CHUNK]-(d:Document)
+    RETURN c.id as chunk_id, c.text as text, c.page_num as page_num,
+           d.filename as document, 1.0 as score
+    LIMIT $limit
+""")
+
+
+class PlanCacheStats:
+    """Count executions per query text; a repeat of a known text is a plan cache hit"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.executions: Dict[str, int] = {}
+        self.names: Dict[str, str] = {}
+        # Called with True on a hit and False on a miss (e.g. to feed a metrics counter)
+        self.on_record: Optional[Callable[[bool], None]] = None
+
+    def record(self, query: str, name: Optional[str] = None):
+        with self._lock:
+            hit = query in self.executions
+            self.executions[query] = self.executions.get(query, 0) + 1
+            if name:
+                self.names[query] = name
+        if self.on_record is not None:
+            self.on_record(hit)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self.executions.values())
+            distinct = len(self.executions)
+            per_template = {
+                self.names.get(query, 'adhoc'): count
+                for query, count in self.executions.items()
+            }
+        hits = total - distinct
+        return {
+            'executions': total,
+            'distinct_queries': distinct,
+            'plan_cache_hits': hits,
+            'plan_cache_hit_rate': hits / total if total else 0.0,
+            'executions_per_template': per_template
+        }
+
+
+plan_cache_stats = PlanCacheStats()
+
+
+def run_template(session, template: CypherTemplate, **params):
+    """Run a template with its parameters and record the execution"""
+    plan_cache_stats.record(template.query, template.name)
+    return session.run(template.query, **params)
+
+
+def server_plan_cache_stats(session) -> Dict[str, Any]:
+    """Read Neo4j's own query cache counters when JMX metrics are exposed"""
+    try:
+        result = session.run("""
+            CALL dbms.queryJmx('org.neo4j:*')
+            YIELD name, attributes
+            WHERE toLower(name) CONTAINS 'cache'
+            RETURN name, attributes
+        """)
+        counters = {}
+        for record in result:
+            for key, attribute in record['attributes'].items():
+                lowered = key.lower()
+                if 'hit' in lowered or 'miss' in lowered:
+                    counters[f"{record['name']}.{key}"] = attribute.get('value')
+        return counters
+    except Exception as e:
+        return {'error': str(e)}
@@ -12,6 +12,21 @@ import numpy as np
 from typing import Dict, Any, Optional, List
 from sentence_transformers import SentenceTransformer, CrossEncoder
 
+try:
+    from .cypher_templates import (KEYWORD_CHUNKS, FILTERED_CHUNKS, keywords_from_query,
+                                   run_template, plan_cache_stats, server_plan_cache_stats)
+except ImportError:
+    from cypher_templates import (KEYWORD_CHUNKS, FILTERED_CHUNKS, keywords_from_query,
+                                  run_template, plan_cache_stats, server_plan_cache_stats)
+
+# Metrics registry shared with the API
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'knowledge_ingestion_agent'))
+from metrics import (REGISTRY, search_request, stage, cache_lookup, neo4j_session,
+                     serve as serve_metrics)
+from request_trace import RequestTrace, SLOW_REQUESTS
+
+plan_cache_stats.on_record = lambda hit: cache_lookup('cypher_plan', hit)
+
 sys.stderr.write("Starting Enhanced Neo4j Search MCP Server...\n")
 
 from mcp.server import FastMCP
@@ -24,6 +39,7 @@ NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "knowledge123")
 NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
+SEARCH_TYPES = {"vector", "hybrid", "community", "text2cypher"}
 
 # Import Neo4j driver
 neo4j_driver = None
@@ -218,7 +234,9 @@ async def knowledge_search(
     search_type: str = "hybrid",
     top_k: int = 10,
     use_reranking: bool = True,
-    community_weight: float = 0.3
+    community_weight: float = 0.3,
+    debug: bool = False,
+    profile: bool = False
 ) -> str:
     """
     Perform advanced search on the knowledge graph with multiple strategies.
@@ -229,6 +247,8 @@ async def knowledge_search(
         top_k: Number of results to return
         use_reranking: Whether to use cross-encoder reranking
         community_weight: Weight for community influence (0-1)
+        debug: Include a trace: stage timings and the Cypher sent, with PROFILE db hits
+        profile: As debug, plus a sampled Python profile of the search
     
     Returns:
         Search results with documents, pages, and relevance scores
@@ -240,11 +260,37 @@ async def knowledge_search(
         return json.dumps({"error": "Embedding model not available"})
     
     try:
-        # Generate query embedding
-        query_embedding = embedding_model.encode(query).tolist()
+        trace = RequestTrace("knowledge_search", debug=debug, profile=profile)
+        try:
+            with trace, search_request(search_type if search_type in SEARCH_TYPES else "invalid"):
+                response = await _knowledge_search(query, search_type, top_k, use_reranking, community_weight)
+                with stage('serialisation'):
+                    text = json.dumps(response, indent=2)
+        finally:
+            SLOW_REQUESTS.add(trace, query=query, search_type=search_type)
         
-        results = []
+        if trace.debug:
+            response["debug"] = trace.to_dict()
+            text = json.dumps(response, indent=2, default=str)
+        return text
         
+    except Exception as e:
+        sys.stderr.write(f"Search error: {e}\n")
+        return json.dumps({
+            "success": False,
+            "error": str(e)
+        }, indent=2)
+
+async def _knowledge_search(query: str, search_type: str, top_k: int, use_reranking: bool,
+                            community_weight: float) -> Dict[str, Any]:
+    """knowledge_search itself, with each stage timed into the metrics registry"""
+    # Generate query embedding
+    with stage('embedding'):
+        query_embedding = embedding_model.encode(query).tolist()
+    
+    results = []
+    
+    with stage('retrieval'):
         if search_type == "vector":
             results = await _vector_search(query, query_embedding, top_k)
         elif search_type == "hybrid":
@@ -254,47 +300,41 @@ async def knowledge_search(
         elif search_type == "text2cypher":
             results = await _text2cypher_search(query, top_k)
         else:
-            return json.dumps({"error": f"Unknown search type: {search_type}"})
-        
-        # Apply reranking if requested and available
-        if use_reranking and reranker_model and results:
+            return {"error": f"Unknown search type: {search_type}"}
+    
+    # Apply reranking if requested and available
+    if use_reranking and reranker_model and results:
+        with stage('rerank'):
             results = _rerank_results(query, results)
-        
-        # Format results
-        formatted_results = []
-        for i, result in enumerate(results[:top_k]):
-            formatted_results.append({
-                "rank": i + 1,
-                "document": result.get("document", ""),
-                "page_num": result.get("page_num", 0),
-                "chunk_id": result.get("chunk_id", ""),
-                "text": result.get("text", ""),
-                "score": float(result.get("final_score", result.get("score", 0))),
-                "metadata": {
-                    "chunk_type": result.get("chunk_type", ""),
-                    "semantic_density": result.get("semantic_density", 0),
-                    "community_metrics": result.get("community_metrics", {})
-                }
-            })
-        
-        return json.dumps({
-            "success": True,
-            "query": query,
-            "search_type": search_type,
-            "results": formatted_results,
-            "count": len(formatted_results)
-        }, indent=2)
-        
-    except Exception as e:
-        sys.stderr.write(f"Search error: {e}\n")
-        return json.dumps({
-            "success": False,
-            "error": str(e)
-        }, indent=2)
+    
+    # Format results
+    formatted_results = []
+    for i, result in enumerate(results[:top_k]):
+        formatted_results.append({
+            "rank": i + 1,
+            "document": result.get("document", ""),
+            "page_num": result.get("page_num", 0),
+            "chunk_id": result.get("chunk_id", ""),
+            "text": result.get("text", ""),
+            "score": float(result.get("final_score", result.get("score", 0))),
+            "metadata": {
+                "chunk_type": result.get("chunk_type", ""),
+                "semantic_density": result.get("semantic_density", 0),
+                "community_metrics": result.get("community_metrics", {})
+            }
+        })
+    
+    return {
+        "success": True,
+        "query": query,
+        "search_type": search_type,
+        "results": formatted_results,
+        "count": len(formatted_results)
+    }
 
 async def _vector_search(query: str, query_embedding: List[float], top_k: int) -> List[Dict]:
     """Perform vector similarity search"""
-    with neo4j_driver.session(database=NEO4J_DATABASE) as session:
+    with neo4j_session(neo4j_driver, database=NEO4J_DATABASE) as session:
         result = session.run("""
             MATCH (c:Chunk)
             WITH c, reduce(similarity = 0.0, i IN range(0, size(c.embedding)-1) |
@@ -318,7 +358,7 @@ async def _hybrid_search(query: str, query_embedding: List[float], top_k: int) -
     """Perform hybrid search combining vector and keyword matching"""
     keywords = [w.lower() for w in query.split() if len(w) > 2]
     
-    with neo4j_driver.session(database=NEO4J_DATABASE) as session:
+    with neo4j_session(neo4j_driver, database=NEO4J_DATABASE) as session:
         result = session.run("""
             MATCH (c:Chunk)
             WITH c, 
@@ -351,7 +391,7 @@ async def _community_search(query: str, query_embedding: List[float], top_k: int
     """Perform community-aware search"""
     keywords = [w.lower() for w in query.split() if len(w) > 3]
     
-    with neo4j_driver.session(database=NEO4J_DATABASE) as session:
+    with neo4j_session(neo4j_driver, database=NEO4J_DATABASE) as session:
         # Find relevant communities
         entity_result = session.run("""
             MATCH (e:Entity)
@@ -413,65 +453,36 @@ async def _community_search(query: str, query_embedding: List[float], top_k: int
 
 async def _text2cypher_search(query: str, top_k: int) -> List[Dict]:
     """Convert natural language to Cypher query patterns"""
-    # Simple pattern matching for common query types
+    # Simple pattern matching for common query types; each maps onto a fixed
+    # template so only the keyword parameters change between questions
     query_lower = query.lower()
     
-    cypher_query = None
-    
     # Pattern: questions about specific products or documents
     if "minimum" in query_lower and ("balance" in query_lower or "amount" in query_lower):
-        cypher_query = """
-            MATCH (c:Chunk)-[:CONTAINS_ENTITY]->(e:Entity)
-            WHERE toLower(c.text) CONTAINS 'minimum'
-              AND (toLower(c.text) CONTAINS 'balance' OR toLower(c.text) CONTAINS 'amount')
-            MATCH (c)<-[:HAS_CHUNK]-(d:Document)
-            RETURN DISTINCT c.id as chunk_id, c.text as text, c.page_num as page_num,
-                   d.filename as document, 1.0 as score
-            LIMIT $limit
-        """
+        template = FILTERED_CHUNKS
+        params = {"required": ["minimum"], "any_of": ["balance", "amount"]}
     elif "interest rate" in query_lower:
-        cypher_query = """
-            MATCH (c:Chunk)-[:CONTAINS_ENTITY]->(e:Entity)
-            WHERE toLower(c.text) CONTAINS 'interest rate'
-               OR (toLower(c.text) CONTAINS 'interest' AND toLower(c.text) CONTAINS 'rate')
-            MATCH (c)<-[:HAS_CHUNK]-(d:Document)
-            RETURN DISTINCT c.id as chunk_id, c.text as text, c.page_num as page_num,
-                   d.filename as document, 1.0 as score
-            LIMIT $limit
-        """
+        template = FILTERED_CHUNKS
+        params = {"required": ["interest", "rate"], "any_of": []}
     elif "complaint" in query_lower or "dispute" in query_lower:
-        cypher_query = """
-            MATCH (c:Chunk)
-            WHERE toLower(c.text) CONTAINS 'complaint'
-               OR toLower(c.text) CONTAINS 'dispute'
-               OR toLower(c.text) CONTAINS 'grievance'
-               OR toLower(c.text) CONTAINS 'australian financial complaints'
-            MATCH (c)<-[:HAS_CHUNK]-(d:Document)
-            RETURN DISTINCT c.id as chunk_id, c.text as text, c.page_num as page_num,
-                   d.filename as document, 1.0 as score
-            LIMIT $limit
-        """
+        template = FILTERED_CHUNKS
+        params = {"required": [], "any_of": ["complaint", "dispute", "grievance",
+                                             "australian financial complaints"]}
     else:
         # Generic keyword search
-        keywords = [w for w in query.split() if len(w) > 3]
-        cypher_query = """
-            MATCH (c:Chunk)
-            WHERE """ + " OR ".join([f"toLower(c.text) CONTAINS '{kw.lower()}'" for kw in keywords]) + """
-            MATCH (c)<-[:HAS_CHUNK]-(d:Document)
-            WITH c, d, SIZE([kw IN $keywords WHERE toLower(c.text) CONTAINS kw]) as matches
-            RETURN c.id as chunk_id, c.text as text, c.page_num as page_num,
-                   d.filename as document, toFloat(matches) / SIZE($keywords) as score
-            ORDER BY score DESC
-            LIMIT $limit
-        """
+        template = KEYWORD_CHUNKS
+        params = {"keywords": keywords_from_query(query, min_length=4, stop_words=())}
     
-    with neo4j_driver.session(database=NEO4J_DATABASE) as session:
-        if "keywords" in cypher_query:
-            result = session.run(cypher_query, keywords=keywords, limit=top_k)
-        else:
-            result = session.run(cypher_query, limit=top_k)
-        
-        return [dict(record) for record in result]
+    with neo4j_session(neo4j_driver, database=NEO4J_DATABASE) as session:
+        result = run_template(session, template, limit=top_k, **params)
+        records = [dict(record) for record in result]
+    
+    if template is KEYWORD_CHUNKS:
+        # Score generic matches by the fraction of keywords found
+        for record in records:
+            record['score'] = record.pop('match_ratio')
+    
+    return records
 
 def _rerank_results(query: str, results: List[Dict]) -> List[Dict]:
     """Rerank results using cross-encoder"""
@@ -559,6 +570,46 @@ async def search_documents(
         community_weight=0.3
     )
 
+@mcp.tool()
+async def get_query_plan_stats() -> str:
+    """
+    Report how often search queries reused a cached Cypher plan.
+    
+    Returns:
+        Client-side template execution counts and hit rate, plus Neo4j's
+        own query cache counters when the server exposes them
+    """
+    stats = plan_cache_stats.summary()
+    if neo4j_driver:
+        with neo4j_driver.session(database=NEO4J_DATABASE) as session:
+            stats["server"] = server_plan_cache_stats(session)
+    
+    return json.dumps(stats, indent=2)
+
+@mcp.tool()
+async def get_metrics() -> str:
+    """
+    Search latency per stage, cache lookups, Neo4j pool waits and errors.
+    
+    Returns:
+        Metrics in the Prometheus text format (also served on METRICS_PORT when set)
+    """
+    return REGISTRY.render()
+
+@mcp.tool()
+async def get_slow_requests(limit: int = 10) -> str:
+    """
+    The slowest knowledge searches since the server started.
+    
+    Args:
+        limit: Number of requests to return, slowest first
+    
+    Returns:
+        Duration, query and span tree of each (SLOW_REQUEST_BUFFER are kept)
+    """
+    return json.dumps({"capacity": SLOW_REQUESTS.capacity, "requests": SLOW_REQUESTS.slowest(limit)},
+                      indent=2, default=str)
+
 # Cleanup
 import atexit
 
@@ -571,4 +622,6 @@ atexit.register(cleanup)
 
 # Run the server
 if __name__ == "__main__":
+    if os.getenv("METRICS_PORT"):
+        serve_metrics(int(os.getenv("METRICS_PORT")))
     mcp.run()
\ No newline at end of file
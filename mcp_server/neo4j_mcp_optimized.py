@@ -19,6 +19,27 @@ except ImportError as e:
     sys.stderr.flush()
     sys.exit(1)
 
+try:
+    from .cypher_templates import (KEYWORD_CHUNKS, KEYWORD_ENTITY_CHUNKS, keywords_from_query,
+                                   run_template, plan_cache_stats, server_plan_cache_stats)
+except ImportError:
+    from cypher_templates import (KEYWORD_CHUNKS, KEYWORD_ENTITY_CHUNKS, keywords_from_query,
+                                  run_template, plan_cache_stats, server_plan_cache_stats)
+
+# In-memory graph snapshot shared with the API (optional: needs numpy and scipy)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'knowledge_ingestion_agent'))
+try:
+    from graph_snapshot import GraphSnapshotManager, DEFAULT_REFRESH_INTERVAL
+except ImportError as e:
+    sys.stderr.write(f"Graph snapshot unavailable, entity search will use Cypher: {e}\n")
+    sys.stderr.flush()
+    GraphSnapshotManager = None
+
+from metrics import (REGISTRY, search_request, stage, cache_lookup, record_error, neo4j_session,
+                     serve as serve_metrics)
+
+plan_cache_stats.on_record = lambda hit: cache_lookup('cypher_plan', hit)
+
 # Create the MCP server
 mcp = FastMCP("knowledge-graph-search")
 
@@ -32,6 +53,7 @@ NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
 neo4j_driver = None
 embedding_model = None
 reranker_model = None
+graph_snapshot = None
 
 def get_neo4j_driver():
     """Get or create Neo4j driver"""
@@ -86,6 +108,23 @@ def get_reranker_model():
             raise
     return reranker_model
 
+def get_graph_snapshot():
+    """Current in-memory graph snapshot, loaded on first use; None when disabled or unavailable"""
+    global graph_snapshot
+    if GraphSnapshotManager is None or os.getenv("GRAPH_SNAPSHOT", "1") == "0":
+        return None
+    if graph_snapshot is None:
+        graph_snapshot = GraphSnapshotManager(
+            get_neo4j_driver(),
+            refresh_interval=float(os.getenv("GRAPH_SNAPSHOT_REFRESH_SECONDS", DEFAULT_REFRESH_INTERVAL))
+        )
+        graph_snapshot.start()
+        info = graph_snapshot.info()
+        if info["loaded"]:
+            sys.stderr.write(f"✓ Graph snapshot loaded: {info['chunks']} chunks, {info['entities']} entities\n")
+            sys.stderr.flush()
+    return graph_snapshot.get()
+
 @mcp.tool()
 async def read_neo4j_cypher(query: str, params: Optional[Dict[str, Any]] = None) -> str:
     """
@@ -239,109 +278,100 @@ async def search_documents(
         Search results with documents and relevance information
     """
     try:
-        driver = get_neo4j_driver()
-        
-        # Extract keywords - include more words for better matching
-        all_words = [w.lower() for w in query.split() if len(w) > 2 and w.lower() not in ['the', 'for', 'and', 'are', 'what', 'how', 'can', 'do']]
-        key_words = [w.lower() for w in query.split() if len(w) > 4]
-        
-        # If not using vector search, do fast keyword search
-        if not use_vector_search:
-            with driver.session(database=NEO4J_DATABASE) as session:
-                # Strategy 1: Find chunks with ANY keyword match
-                result = session.run("""
-                    MATCH (c:Chunk)<-[:HAS_CHUNK]-(d:Document)
-                    WHERE """ + " OR ".join([f"toLower(c.text) CONTAINS '{word}'" for word in all_words]) + """
-                    WITH d, c, """ + " + ".join([f"CASE WHEN toLower(c.text) CONTAINS '{word}' THEN 1 ELSE 0 END" for word in all_words]) + """ as match_count
-                    WHERE match_count > 0
-                    RETURN c.id as chunk_id,
-                           c.text as text,
-                           c.page_num as page_num,
-                           d.filename as document,
-                           match_count as score,
-                           c.semantic_density as semantic_density,
-                           c.chunk_type as chunk_type
-                    ORDER BY match_count DESC, c.semantic_density DESC
-                    LIMIT $limit
-                """, limit=top_k)
-                
-                results = [dict(record) for record in result]
-                
-                # Also try entity-based search if few results
-                if len(results) < top_k // 2 and key_words:
-                    entity_result = session.run("""
-                        MATCH (e:Entity)<-[:CONTAINS_ENTITY]-(c:Chunk)<-[:HAS_CHUNK]-(d:Document)
-                        WHERE """ + " OR ".join([f"toLower(e.text) CONTAINS '{word}'" for word in key_words]) + """
-                        WITH d, c, COUNT(DISTINCT e) as entity_count
-                        RETURN c.id as chunk_id,
-                               c.text as text,
-                               c.page_num as page_num,
-                               d.filename as document,
-                               entity_count as score,
-                               c.semantic_density as semantic_density,
-                               c.chunk_type as chunk_type
-                        ORDER BY entity_count DESC
-                        LIMIT $limit
-                    """, limit=top_k - len(results))
-                    
-                    # Add entity results if not duplicates
-                    existing_chunks = {r['chunk_id'] for r in results}
-                    for record in entity_result:
-                        if record['chunk_id'] not in existing_chunks:
-                            results.append(dict(record))
+        with search_request("vector_hybrid" if use_vector_search else "keyword"):
+            return _search_documents(query, top_k, use_vector_search, use_reranking)
         
-        else:
-            # Use hybrid search with vector embeddings
-            model = get_embedding_model()
-            query_embedding = model.encode(query).tolist()
+    except Exception as e:
+        sys.stderr.write(f"Search error: {e}\n")
+        sys.stderr.flush()
+        return json.dumps({
+            "success": False,
+            "error": str(e)
+        }, indent=2)
+
+def _search_documents(query: str, top_k: int, use_vector_search: bool, use_reranking: bool) -> str:
+    """search_documents itself, with each stage timed into the metrics registry"""
+    driver = get_neo4j_driver()
+    
+    # Extract keywords - include more words for better matching
+    all_words = keywords_from_query(query, min_length=3)
+    key_words = keywords_from_query(query, min_length=5, stop_words=())
+    
+    # If not using vector search, do fast keyword search
+    if not use_vector_search:
+        with neo4j_session(driver, database=NEO4J_DATABASE) as session, stage('retrieval'):
+            # Strategy 1: Find chunks with ANY keyword match
+            result = run_template(session, KEYWORD_CHUNKS, keywords=all_words, limit=top_k)
             
-            with driver.session(database=NEO4J_DATABASE) as session:
-                # Lower similarity threshold and adjust weights for better recall
-                result = session.run("""
-                    MATCH (c:Chunk)
-                    WITH c, 
-                         reduce(similarity = 0.0, i IN range(0, size(c.embedding)-1) |
-                            similarity + c.embedding[i] * $query_embedding[i]
-                         ) as cosine_similarity,
-                         SIZE([keyword IN $keywords WHERE toLower(c.text) CONTAINS keyword]) as keyword_matches
-                    WHERE cosine_similarity > 0.3 OR keyword_matches > 0
-                    WITH c, cosine_similarity, keyword_matches,
-                         (cosine_similarity * 0.4 + (toFloat(keyword_matches) / SIZE($keywords)) * 0.6) as hybrid_score
-                    ORDER BY hybrid_score DESC
-                    LIMIT $limit
-                    MATCH (c)<-[:HAS_CHUNK]-(d:Document)
-                    RETURN c.id as chunk_id,
-                           c.text as text,
-                           c.page_num as page_num,
-                           d.filename as document,
-                           hybrid_score as score,
-                           cosine_similarity,
-                           keyword_matches,
-                           c.semantic_density as semantic_density,
-                           c.chunk_type as chunk_type
-                """, query_embedding=query_embedding, keywords=all_words, limit=top_k * 2 if use_reranking else top_k)
+            results = [dict(record) for record in result]
+            
+            # Also try entity-based search if few results
+            if len(results) < top_k // 2 and key_words:
+                entity_result = run_template(session, KEYWORD_ENTITY_CHUNKS,
+                                             keywords=key_words, limit=top_k - len(results))
                 
-                results = [dict(record) for record in result]
+                # Add entity results if not duplicates
+                existing_chunks = {r['chunk_id'] for r in results}
+                for record in entity_result:
+                    if record['chunk_id'] not in existing_chunks:
+                        results.append(dict(record))
+    
+    else:
+        # Use hybrid search with vector embeddings
+        model = get_embedding_model()
+        with stage('embedding'):
+            query_embedding = model.encode(query).tolist()
+        
+        with neo4j_session(driver, database=NEO4J_DATABASE) as session, stage('retrieval'):
+            # Lower similarity threshold and adjust weights for better recall
+            result = session.run("""
+                MATCH (c:Chunk)
+                WITH c, 
+                     reduce(similarity = 0.0, i IN range(0, size(c.embedding)-1) |
+                        similarity + c.embedding[i] * $query_embedding[i]
+                     ) as cosine_similarity,
+                     SIZE([keyword IN $keywords WHERE toLower(c.text) CONTAINS keyword]) as keyword_matches
+                WHERE cosine_similarity > 0.3 OR keyword_matches > 0
+                WITH c, cosine_similarity, keyword_matches,
+                     (cosine_similarity * 0.4 + (toFloat(keyword_matches) / SIZE($keywords)) * 0.6) as hybrid_score
+                ORDER BY hybrid_score DESC
+                LIMIT $limit
+                MATCH (c)<-[:HAS_CHUNK]-(d:Document)
+                RETURN c.id as chunk_id,
+                       c.text as text,
+                       c.page_num as page_num,
+                       d.filename as document,
+                       hybrid_score as score,
+                       cosine_similarity,
+                       keyword_matches,
+                       c.semantic_density as semantic_density,
+                       c.chunk_type as chunk_type
+            """, query_embedding=query_embedding, keywords=all_words, limit=top_k * 2 if use_reranking else top_k)
             
-            # Apply reranking if requested
-            if use_reranking and results:
-                try:
-                    reranker = get_reranker_model()
-                    texts = [r['text'] for r in results]
-                    query_text_pairs = [[query, text] for text in texts]
-                    cross_encoder_scores = reranker.predict(query_text_pairs)
-                    
-                    for i, result in enumerate(results):
-                        # Balanced scoring with more weight on reranker
-                        result['final_score'] = float(cross_encoder_scores[i]) * 0.7 + result['score'] * 0.3
-                    
-                    results.sort(key=lambda x: x['final_score'], reverse=True)
-                    results = results[:top_k]
-                except Exception as e:
-                    sys.stderr.write(f"Reranking failed, using original scores: {e}\n")
-                    sys.stderr.flush()
+            results = [dict(record) for record in result]
         
-        # Format results
+        # Apply reranking if requested
+        if use_reranking and results:
+            try:
+                reranker = get_reranker_model()
+                texts = [r['text'] for r in results]
+                query_text_pairs = [[query, text] for text in texts]
+                with stage('rerank'):
+                    cross_encoder_scores = reranker.predict(query_text_pairs)
+                
+                for i, result in enumerate(results):
+                    # Balanced scoring with more weight on reranker
+                    result['final_score'] = float(cross_encoder_scores[i]) * 0.7 + result['score'] * 0.3
+                
+                results.sort(key=lambda x: x['final_score'], reverse=True)
+                results = results[:top_k]
+            except Exception as e:
+                record_error('rerank', e)
+                sys.stderr.write(f"Reranking failed, using original scores: {e}\n")
+                sys.stderr.flush()
+    
+    # Format results
+    with stage('serialisation'):
         formatted_results = []
         for i, result in enumerate(results[:top_k]):
             formatted_results.append({
@@ -369,14 +399,6 @@ async def search_documents(
                 "keywords_used": all_words
             }
         }, indent=2)
-        
-    except Exception as e:
-        sys.stderr.write(f"Search error: {e}\n")
-        sys.stderr.flush()
-        return json.dumps({
-            "success": False,
-            "error": str(e)
-        }, indent=2)
 
 @mcp.tool()
 async def search_entities(
@@ -397,6 +419,27 @@ async def search_entities(
         Entities and their associated documents
     """
     try:
+        snapshot = get_graph_snapshot()
+        if snapshot is not None:
+            matched = snapshot.match_entities(entity_text, community_id)
+            results = [{
+                "entity": snapshot.entity_texts[row["entity"]],
+                "entity_type": snapshot.entity_types[row["entity"]],
+                "community": int(snapshot.entity_communities[row["entity"]])
+                             if snapshot.entity_communities[row["entity"]] >= 0 else None,
+                "document": row["filename"],
+                "chunk_count": row["chunk_count"],
+                "pages": row["pages"]
+            } for row in snapshot.entity_document_counts(matched, limit)]
+            
+            return json.dumps({
+                "success": True,
+                "query": entity_text,
+                "results": results,
+                "count": len(results),
+                "source": "graph_snapshot"
+            }, indent=2)
+        
         driver = get_neo4j_driver()
         
         with driver.session(database=NEO4J_DATABASE) as session:
@@ -447,11 +490,42 @@ async def search_entities(
             "error": str(e)
         }, indent=2)
 
+@mcp.tool()
+async def get_query_plan_stats() -> str:
+    """
+    Report how often search queries reused a cached Cypher plan.
+    
+    Returns:
+        Client-side template execution counts and hit rate, plus Neo4j's
+        own query cache counters when the server exposes them
+    """
+    stats = plan_cache_stats.summary()
+    try:
+        driver = get_neo4j_driver()
+        with driver.session(database=NEO4J_DATABASE) as session:
+            stats["server"] = server_plan_cache_stats(session)
+    except Exception as e:
+        stats["server"] = {"error": str(e)}
+    
+    return json.dumps(stats, indent=2)
+
+@mcp.tool()
+async def get_metrics() -> str:
+    """
+    Search latency per stage, cache lookups, Neo4j pool waits and errors.
+    
+    Returns:
+        Metrics in the Prometheus text format (also served on METRICS_PORT when set)
+    """
+    return REGISTRY.render()
+
 # Cleanup
 import atexit
 
 def cleanup():
     global neo4j_driver
+    if graph_snapshot is not None:
+        graph_snapshot.stop()
     if neo4j_driver:
         neo4j_driver.close()
         sys.stderr.write("Closed Neo4j connection\n")
@@ -461,6 +535,13 @@ atexit.register(cleanup)
 
 # Run the server
 if __name__ == "__main__":
+    if os.getenv("METRICS_PORT"):
+        serve_metrics(int(os.getenv("METRICS_PORT")))
+    try:
+        get_graph_snapshot()
+    except Exception as e:
+        sys.stderr.write(f"Graph snapshot not loaded at startup: {e}\n")
+        sys.stderr.flush()
     sys.stderr.write("Optimized MCP server ready\n")
     sys.stderr.flush()
     mcp.run()
\ No newline at end of file
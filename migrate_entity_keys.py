@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+One-off migration to canonical entity keys
+
+Entities used to be merged on (text, type), so case, plural and abbreviation
+variants ("Term Deposit", "term deposits", "TD") became separate nodes. This
+computes the canonical key of every entity (knowledge_ingestion_agent/
+entity_keys.py), merges each group of duplicates into its most frequent node,
+moving every relationship of the duplicates onto it and summing occurrences,
+then sets `key` and creates its uniqueness constraint.
+
+Moved relationships keep their properties and are stamped with `updated_at`.
+CONTAINS_ENTITY edges (one per mention) are moved as they are; other types are
+merged, so a neighbour linked to several variants keeps one edge, with the
+properties of the edge the survivor already had (or the first one moved). Edges between variants of the same entity
+are dropped. RELATED_TO weights and community ids are therefore stale until
+co-occurrence and communities are rebuilt; take a new full backup afterwards
+(deltas now key entities on `key`).
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+from collections import defaultdict
+from typing import Dict, List, Any
+from neo4j import GraphDatabase
+
+# Add the knowledge_ingestion_agent directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'knowledge_ingestion_agent'))
+
+from entity_keys import entity_key
+from schema_manager import SchemaManager
+from change_tracking import RELATIONSHIP_KEYS
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def load_entities(driver, page_size: int = 50000) -> List[Dict[str, Any]]:
+    """Every entity's internal id, text, type, occurrences and first_seen, paged by id window"""
+    entities = []
+    with driver.session() as session:
+        max_id = session.run("MATCH (e:Entity) RETURN max(id(e)) as max_id").single()["max_id"]
+        if max_id is None:
+            return entities
+        for lo in range(0, max_id + 1, page_size):
+            result = session.run("""
+                MATCH (e:Entity)
+                WHERE id(e) IN range($lo, $hi - 1)
+                RETURN id(e) as id, e.text as text, e.type as type, e.key as key,
+                       coalesce(e.occurrences, 0) as occurrences, e.first_seen as first_seen
+            """, lo=lo, hi=lo + page_size)
+            entities.extend(record.data() for record in result)
+    return entities
+
+
+def plan_merges(entities: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Group entities by canonical key
+
+    Returns 'merges' (survivor, duplicates, summed occurrences, earliest
+    first_seen per duplicated key) and 'keys' (id and key of every entity
+    whose key is missing or out of date).
+    """
+    groups = defaultdict(list)
+    for entity in entities:
+        if entity['text'] is None or entity['type'] is None:
+            continue
+        groups[entity_key(entity['text'], entity['type'])].append(entity)
+
+    merges, keys = [], []
+    for key, members in groups.items():
+        members.sort(key=lambda e: (-e['occurrences'], e['id']))
+        survivor = members[0]
+        if len(members) > 1:
+            first_seen = [e['first_seen'] for e in members if e['first_seen']]
+            merges.append({
+                'key': key,
+                'survivor': survivor['id'],
+                'duplicates': [e['id'] for e in members[1:]],
+                'occurrences': sum(e['occurrences'] for e in members),
+                'first_seen': min(first_seen) if first_seen else None
+            })
+        if survivor['key'] != key:
+            keys.append({'id': survivor['id'], 'key': key})
+    return {'merges': merges, 'keys': keys}
+
+
+def _relationship_types(session, rows: List[Dict[str, Any]]) -> List[str]:
+    """Relationship types attached to the duplicates of a batch"""
+    ids = [duplicate_id for row in rows for duplicate_id in row['duplicates']]
+    return session.run("""
+        MATCH (d:Entity)-[r]-()
+        WHERE id(d) IN $ids
+        RETURN DISTINCT type(r) as type
+    """, ids=ids).value()
+
+
+def _move_relationships(session, rel_type: str, rows: List[Dict[str, Any]]):
+    """Re-create one type's relationships of the duplicates on their survivor, both directions"""
+    # Mentions are distinct edges; other types hold one edge per pair
+    attach = "CREATE" if rel_type in RELATIONSHIP_KEYS else "MERGE"
+    copy = "SET" if attach == "CREATE" else "ON CREATE SET"
+    for pattern, new_pattern in (("(d)-[r:`{t}`]->(o)", "(s)-[moved:`{t}`]->(o)"),
+                                 ("(o)-[r:`{t}`]->(d)", "(o)-[moved:`{t}`]->(s)")):
+        session.execute_write(lambda tx: tx.run(f"""
+            UNWIND $rows AS row
+            MATCH (s:Entity) WHERE id(s) = row.survivor
+            UNWIND row.duplicates AS duplicate_id
+            MATCH (d:Entity) WHERE id(d) = duplicate_id
+            MATCH {pattern.format(t=rel_type)}
+            WHERE NOT id(o) IN row.duplicates AND id(o) <> row.survivor
+            {attach} {new_pattern.format(t=rel_type)}
+            {copy} moved = properties(r)
+            SET moved.updated_at = timestamp()
+            DELETE r
+        """, rows=rows).consume())
+
+
+def apply_merges(driver, merges: List[Dict[str, Any]], batch_size: int = 500) -> int:
+    """Move every relationship of the duplicates to the survivor and delete the duplicates"""
+    deleted = 0
+    with driver.session() as session:
+        for i in range(0, len(merges), batch_size):
+            batch = merges[i:i + batch_size]
+            for rel_type in _relationship_types(session, batch):
+                _move_relationships(session, rel_type, batch)
+            deleted += session.execute_write(lambda tx: tx.run("""
+                UNWIND $rows AS row
+                MATCH (s:Entity) WHERE id(s) = row.survivor
+                SET s.occurrences = row.occurrences,
+                    s.first_seen = row.first_seen,
+                    s.updated_at = timestamp()
+                WITH row
+                UNWIND row.duplicates AS duplicate_id
+                MATCH (d:Entity) WHERE id(d) = duplicate_id
+                DETACH DELETE d
+                RETURN count(*) as deleted
+            """, rows=batch).single()["deleted"])
+            logger.info(f"Merged {i + len(batch)}/{len(merges)} duplicate groups")
+    return deleted
+
+
+def write_keys(driver, keys: List[Dict[str, Any]], batch_size: int = 5000):
+    """Set the canonical key on every surviving entity"""
+    with driver.session() as session:
+        for i in range(0, len(keys), batch_size):
+            batch = keys[i:i + batch_size]
+            session.execute_write(lambda tx: tx.run("""
+                UNWIND $rows AS row
+                MATCH (e:Entity) WHERE id(e) = row.id
+                SET e.key = row.key
+            """, rows=batch).consume())
+
+
+def migrate_entity_keys(uri: str, user: str, password: str, dry_run: bool = False,
+                        batch_size: int = 500):
+    """Merge duplicate entities and key every entity on its canonical key"""
+    driver = GraphDatabase.driver(uri, auth=(user, password))
+
+    try:
+        entities = load_entities(driver)
+        plan = plan_merges(entities)
+        duplicates = sum(len(m['duplicates']) for m in plan['merges'])
+        logger.info(f"{len(entities)} entities, {len(plan['merges'])} keys with duplicates, "
+                    f"{duplicates} entities to merge, {len(plan['keys'])} keys to write")
+
+        largest = sorted(plan['merges'], key=lambda m: -len(m['duplicates']))[:10]
+        for merge in largest:
+            logger.info(f"  {merge['key']}: {len(merge['duplicates']) + 1} nodes")
+
+        if dry_run:
+            logger.info("Dry run, nothing written")
+            return
+
+        deleted = apply_merges(driver, plan['merges'], batch_size=batch_size)
+        logger.info(f"Deleted {deleted} duplicate entities")
+        write_keys(driver, plan['keys'])
+        SchemaManager(driver).apply(groups=['core'])
+        logger.info("Entity key constraint in place")
+        logger.info("Next: build_entity_relationships.py, run_community_detection.py (full) "
+                    "and a full backup")
+
+    finally:
+        driver.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge duplicate entities onto canonical keys')
+    parser.add_argument('--dry-run', action='store_true', help='Report the duplicate groups without writing')
+    parser.add_argument('--batch-size', type=int, default=500, help='Duplicate groups per write transaction')
+    args = parser.parse_args()
+
+    # Neo4j connection details
+    neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+    neo4j_user = os.getenv("NEO4J_USER", "neo4j")
+    neo4j_password = os.getenv("NEO4J_PASSWORD", "knowledge123")
+
+    logger.info("Starting entity key migration...")
+    start_time = time.time()
+
+    migrate_entity_keys(neo4j_uri, neo4j_user, neo4j_password,
+                        dry_run=args.dry_run, batch_size=args.batch_size)
+
+    duration = time.time() - start_time
+    logger.info(f"Entity key migration completed in {duration:.2f} seconds")
+
+
+if __name__ == "__main__":
+    main()
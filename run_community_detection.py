@@ -1,17 +1,28 @@
 #!/usr/bin/env python3
 """
 Run community detection on the knowledge graph
+
+The entity graph is read from Neo4j once; every resolution is detected in
+parallel worker processes and only the chosen partition is written back.
+With --incremental, entities written since the last run are assigned to
+existing communities instead, and a full detection runs only once the
+drift since the last full run crosses --drift-threshold.
 """
 
 import os
 import sys
+import time
 import logging
-from datetime import datetime
+import argparse
+from neo4j import GraphDatabase
 
 # Add the knowledge_ingestion_agent directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'knowledge_ingestion_agent'))
 
-from community_detection import CommunityDetector, create_community_search_index
+from community_detection import create_community_search_index
+from community_engine import CommunityEngine, ALGORITHMS
+from community_maintenance import (CommunityMaintainer, COMMUNITY_STATE_FILE, DEFAULT_DRIFT_THRESHOLD,
+                                   full_detection_state, save_community_state)
 
 # Configure logging
 logging.basicConfig(
@@ -22,100 +33,97 @@ logger = logging.getLogger(__name__)
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Multi-resolution community detection')
+    parser.add_argument('--resolutions', type=float, nargs='+', default=[0.5, 1.0, 1.5],
+                        help='Resolutions to compare (higher = more, smaller communities)')
+    parser.add_argument('--resolution', type=float, default=1.0, help='Resolution written to the graph')
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default='louvain',
+                        help='Louvain (python-louvain) or Leiden (needs leidenalg)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help='Worker processes')
+    parser.add_argument('--min-strength', type=float, default=2, help='Minimum RELATED_TO strength')
+    parser.add_argument('--exact-betweenness-max', type=int, default=1000,
+                        help='Communities larger than this use sampled betweenness')
+    parser.add_argument('--betweenness-samples', type=int, default=256, help='Pivots for sampled betweenness')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Assign entities written since the last run; full detection only when drift is high')
+    parser.add_argument('--drift-threshold', type=float, default=DEFAULT_DRIFT_THRESHOLD,
+                        help='Drift at which an incremental run falls back to full detection')
+    parser.add_argument('--state-file', default=COMMUNITY_STATE_FILE, help='Community maintenance state')
+    args = parser.parse_args()
+
     # Neo4j connection details
     neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
     neo4j_user = os.getenv("NEO4J_USER", "neo4j")
     neo4j_password = os.getenv("NEO4J_PASSWORD", "knowledge123")
-    
+
     logger.info("Starting community detection process...")
-    start_time = datetime.now()
-    
-    # Create detector
-    detector = CommunityDetector(neo4j_uri, neo4j_user, neo4j_password)
-    
+    start_time = time.time()
+
+    resolutions = sorted(set(args.resolutions) | {args.resolution})
+    driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+    engine = CommunityEngine(driver, workers=args.workers,
+                             exact_betweenness_max=args.exact_betweenness_max,
+                             betweenness_samples=args.betweenness_samples)
+
     try:
-        # Step 1: Run Louvain detection with different resolutions
-        logger.info("Testing different resolution parameters...")
-        
-        # Try resolution 1.0 (default - balanced communities)
-        communities_10 = detector.run_louvain_detection(resolution=1.0)
-        num_communities_10 = len(set(communities_10.values()))
-        logger.info(f"Resolution 1.0: {num_communities_10} communities detected")
-        
-        # Try resolution 0.5 (fewer, larger communities)
-        communities_05 = detector.run_louvain_detection(resolution=0.5)
-        num_communities_05 = len(set(communities_05.values()))
-        logger.info(f"Resolution 0.5: {num_communities_05} communities detected")
-        
-        # Try resolution 1.5 (more, smaller communities)
-        communities_15 = detector.run_louvain_detection(resolution=1.5)
-        num_communities_15 = len(set(communities_15.values()))
-        logger.info(f"Resolution 1.5: {num_communities_15} communities detected")
-        
-        # Use resolution 1.0 as the default
-        logger.info("Using resolution 1.0 for final community assignment")
-        communities = communities_10
-        
-        # Step 2: Enrich graph with community metadata
-        logger.info("Enriching graph with community metadata...")
-        detector.enrich_graph_with_communities(communities)
-        
-        # Step 3: Calculate community coherence
-        logger.info("Calculating community coherence scores...")
-        coherence_scores = detector.calculate_community_coherence()
-        
+        with driver.session() as session:
+            started_at = session.run("RETURN timestamp() as now").single()["now"]
+
+        if args.incremental:
+            maintainer = CommunityMaintainer(engine, state_file=args.state_file,
+                                             drift_threshold=args.drift_threshold)
+            summary = maintainer.update(started_at=started_at, min_strength=args.min_strength)
+            if not summary['full_detection_due']:
+                logger.info(f"Incremental community update completed in {time.time() - start_time:.2f} seconds")
+                return
+            logger.info("Running full community detection")
+
+        # Step 1: Load the entity graph once and detect every resolution in parallel
+        graph = engine.load_graph(min_strength=args.min_strength)
+        partitions = engine.detect(graph, resolutions, algorithm=args.algorithm)
+
+        logger.info("Resolution comparison:")
+        for resolution, partition in sorted(partitions.items()):
+            logger.info(f"  Resolution {resolution}: {partition.num_communities} communities, "
+                        f"modularity {partition.modularity:.4f}")
+
+        logger.info(f"Using resolution {args.resolution} for final community assignment")
+        partition = partitions[args.resolution]
+
+        # Step 2: Centrality, bridges and coherence from the edge arrays
+        logger.info("Calculating community metrics...")
+        metrics = engine.community_metrics(graph, partition.membership)
+
+        # Step 3: Write everything back in UNWIND batches
+        engine.write_communities(graph, partition, metrics)
+        save_community_state(full_detection_state(graph, partition, started_at), args.state_file)
+
         # Print summary statistics
         logger.info("\n=== Community Detection Summary ===")
-        logger.info(f"Total communities: {len(set(communities.values()))}")
-        logger.info(f"Total entities processed: {len(communities)}")
-        
+        logger.info(f"Total communities: {partition.num_communities}")
+        logger.info(f"Total entities processed: {graph.num_nodes}")
+        logger.info(f"Bridge nodes identified: {int(metrics['is_bridge_node'].sum())}")
+
         # Show top 10 most coherent communities
-        if coherence_scores:
-            sorted_communities = sorted(
-                coherence_scores.items(), 
-                key=lambda x: x[1]['coherence'] if x[1]['coherence'] else 0, 
-                reverse=True
-            )[:10]
-            
-            logger.info("\nTop 10 most coherent communities:")
-            for comm_id, scores in sorted_communities:
-                logger.info(f"  Community {comm_id}: coherence={scores['coherence']:.3f}, density={scores['density']:.3f}")
-        
+        coherence = metrics['community_coherence_by_id']
+        density = metrics['community_density_by_id']
+        logger.info("\nTop 10 most coherent communities:")
+        for comm_id in coherence.argsort()[::-1][:10]:
+            logger.info(f"  Community {comm_id}: coherence={coherence[comm_id]:.3f}, density={density[comm_id]:.3f}")
+
         # Step 4: Create indexes for efficient search
         logger.info("\nCreating community search indexes...")
         create_community_search_index(neo4j_uri, neo4j_user, neo4j_password)
-        
-        # Calculate processing time
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
+
+        duration = time.time() - start_time
         logger.info(f"\nCommunity detection completed in {duration:.2f} seconds")
-        
-        # Verify the enrichment
-        with detector.driver.session() as session:
-            result = session.run("""
-                MATCH (e:Entity)
-                WHERE e.community_id IS NOT NULL
-                RETURN COUNT(e) as enriched_count
-            """)
-            enriched_count = result.single()['enriched_count']
-            
-            result = session.run("""
-                MATCH (e:Entity)
-                WHERE e.is_bridge_node = true
-                RETURN COUNT(e) as bridge_count
-            """)
-            bridge_count = result.single()['bridge_count']
-            
-            logger.info(f"\nEnrichment verification:")
-            logger.info(f"  Entities with community assignment: {enriched_count}")
-            logger.info(f"  Bridge nodes identified: {bridge_count}")
-        
+
     except Exception as e:
         logger.error(f"Error during community detection: {str(e)}")
         raise
     finally:
-        detector.close()
+        driver.close()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,26 +2,43 @@
 """
 Neo4j Knowledge Graph Bootstrap Script
 
-This script imports a previously exported Neo4j database from JSON format.
+This script imports a previously exported Neo4j database, either a compressed
+NDJSON record stream written by export_neo4j.py or a legacy JSON export.
 It can be used to quickly bootstrap a new instance with existing data.
 
 Features:
-- Imports nodes with all properties and labels
-- Imports relationships with all properties
+- Bulk imports nodes grouped by label set and relationships grouped by type
+  with UNWIND batches, in parallel across groups
+- Relationships are matched on a temporary, indexed _import_id that is
+  removed once the import completes
 - Preserves vector embeddings
 - Validates data integrity
 - Optional mode to skip if database already contains data
+- Offline seeding of an empty database from a neo4j-admin import bundle
+  (export_neo4j.py --format admin-csv) before Neo4j starts
+- Replays delta exports (export_neo4j.py --delta) on top of their base:
+  tombstones are deleted, changed nodes are merged on their business key and
+  relationships are merged on their type and keyed endpoints
 """
 
 import json
 import os
+import re
+import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
 import logging
 from neo4j import GraphDatabase
 import numpy as np
 
+from export_neo4j import (open_export_stream, read_export_records, is_stream_export, unpack_vector,
+                          read_backup_chain)
+from change_tracking import KEY_PROPERTIES, RELATIONSHIP_KEYS
+from schema_manager import SchemaManager
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -29,16 +46,57 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Temporary label and key that let relationships find their imported endpoints
+IMPORT_LABEL = "_Import"
+IMPORT_KEY = "_import_id"
+
+
+def _quote(name: str) -> str:
+    """Backtick-quote a label or relationship type for use in Cypher text"""
+    return "`" + name.replace("`", "``") + "`"
+
+
+class _BatchPool:
+    """Thread pool that blocks submitters once too many batches are in flight"""
+
+    def __init__(self, workers: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(workers * 2)
+        self.futures = []
+
+    def submit(self, fn, *args):
+        self.slots.acquire()
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(lambda _: self.slots.release())
+        self.futures.append(future)
+
+    def drain(self) -> List[Any]:
+        """Wait for every submitted batch and return their results"""
+        results = [future.result() for future in self.futures]
+        self.futures = []
+        return results
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
 class Neo4jBootstrapper:
-    def __init__(self, uri: str, user: str, password: str):
+    def __init__(self, uri: str, user: str, password: str,
+                 workers: int = 4, batch_size: int = 5000):
         """Initialize the Neo4j bootstrapper with connection details."""
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
-        self.node_id_mapping = {}  # Maps old IDs to new IDs
+        self.driver = GraphDatabase.driver(uri, auth=(user, password),
+                                           max_connection_pool_size=max(workers + 2, 10))
+        self.workers = workers
+        self.batch_size = batch_size
         self.import_stats = {
             "nodes_imported": 0,
             "relationships_imported": 0,
+            "relationships_skipped": 0,
+            "nodes_expected": 0,
+            "relationships_expected": 0,
             "errors": []
         }
+        self._stats_lock = threading.Lock()
     
     def close(self):
         """Close the Neo4j driver connection."""
@@ -51,7 +109,7 @@ class Neo4jBootstrapper:
             
             if value_type == "vector":
                 # Restore vector embeddings
-                return value["values"]
+                return unpack_vector(value)
             elif value_type == "datetime":
                 # Restore datetime objects
                 return datetime.fromisoformat(value["value"])
@@ -88,134 +146,142 @@ class Neo4jBootstrapper:
         logger.info("Database cleared")
     
     def create_indexes(self):
-        """Create necessary indexes for performance."""
+        """Apply the declared schema (constraints, range, fulltext and vector indexes)."""
         logger.info("Creating indexes...")
+        result = SchemaManager(self.driver).apply()
+        logger.info(f"Applied {len(result['applied'])} schema statements, skipped {len(result['failed'])}")
+    
+    def create_import_index(self):
+        """Index the temporary import key so relationship endpoints are index seeks."""
+        with self.driver.session() as session:
+            session.run(f"CREATE INDEX import_id IF NOT EXISTS FOR (n:{IMPORT_LABEL}) ON (n.{IMPORT_KEY})")
+            session.run("CALL db.awaitIndexes(300)")
+    
+    def _record_error(self, message: str):
+        logger.error(message)
+        with self._stats_lock:
+            self.import_stats["errors"].append(message)
+    
+    def _write_node_batch(self, labels: tuple, rows: List[Dict]) -> int:
+        """Create one batch of nodes sharing a label set."""
+        label_clause = "".join(":" + _quote(label) for label in labels)
+        query = f"""
+            UNWIND $rows AS row
+            CREATE (n{label_clause}:{IMPORT_LABEL})
+            SET n = row.properties, n.{IMPORT_KEY} = row.id
+        """
+        params = [{
+            "id": row["id"],
+            "properties": {k: self._deserialize_value(v) for k, v in row["properties"].items()}
+        } for row in rows]
         
-        indexes = [
-            # Document indexes
-            "CREATE INDEX IF NOT EXISTS FOR (d:Document) ON (d.file_path)",
-            "CREATE INDEX IF NOT EXISTS FOR (d:Document) ON (d.title)",
-            
-            # Chunk indexes
-            "CREATE INDEX IF NOT EXISTS FOR (c:Chunk) ON (c.chunk_id)",
-            
-            # Entity indexes
-            "CREATE INDEX IF NOT EXISTS FOR (e:Entity) ON (e.name)",
-            "CREATE INDEX IF NOT EXISTS FOR (e:Entity) ON (e.type)",
-            
-            # Topic indexes
-            "CREATE INDEX IF NOT EXISTS FOR (t:Topic) ON (t.name)",
-            
-            # Concept indexes
-            "CREATE INDEX IF NOT EXISTS FOR (c:Concept) ON (c.name)"
-        ]
+        try:
+            with self.driver.session() as session:
+                created = session.execute_write(
+                    lambda tx: tx.run(query, rows=params).consume().counters.nodes_created)
+        except Exception as e:
+            self._record_error(f"Failed to import {len(rows)} {labels} nodes: {e}")
+            return 0
         
-        with self.driver.session() as session:
-            for index_query in indexes:
-                try:
-                    session.run(index_query)
-                    logger.debug(f"Created index: {index_query}")
-                except Exception as e:
-                    logger.warning(f"Failed to create index: {e}")
-    
-    def import_nodes(self, nodes: List[Dict]) -> int:
-        """Import nodes from the export data."""
-        logger.info(f"Importing {len(nodes)} nodes...")
+        with self._stats_lock:
+            self.import_stats["nodes_imported"] += created
+        return created
+    
+    def _write_relationship_batch(self, rel_type: str, rows: List[Dict]) -> int:
+        """Create one batch of relationships of a single type."""
+        query = f"""
+            UNWIND $rows AS row
+            MATCH (a:{IMPORT_LABEL} {{{IMPORT_KEY}: row.start}})
+            MATCH (b:{IMPORT_LABEL} {{{IMPORT_KEY}: row.end}})
+            CREATE (a)-[r:{_quote(rel_type)}]->(b)
+            SET r = row.properties
+        """
+        params = [{
+            "start": row["start_node_id"],
+            "end": row["end_node_id"],
+            "properties": {k: self._deserialize_value(v) for k, v in row["properties"].items()}
+        } for row in rows]
+        
+        try:
+            with self.driver.session() as session:
+                # execute_write retries deadlocks between batches touching the same nodes
+                created = session.execute_write(
+                    lambda tx: tx.run(query, rows=params).consume().counters.relationships_created)
+        except Exception as e:
+            self._record_error(f"Failed to import {len(rows)} {rel_type} relationships: {e}")
+            return 0
         
-        batch_size = 100
-        imported = 0
+        with self._stats_lock:
+            self.import_stats["relationships_imported"] += created
+            self.import_stats["relationships_skipped"] += len(rows) - created
+        return created
+    
+    def _import_grouped(self, records: Iterator[Dict], key, write_batch, name: str) -> int:
+        """Group records by key, flushing full batches to the pool as they fill."""
+        pool = _BatchPool(self.workers)
+        groups: Dict[Any, List[Dict]] = {}
+        count = 0
         
-        with self.driver.session() as session:
-            for i in range(0, len(nodes), batch_size):
-                batch = nodes[i:i + batch_size]
+        try:
+            for record in records:
+                group_key = key(record)
+                batch = groups.setdefault(group_key, [])
+                batch.append(record)
+                count += 1
                 
-                try:
-                    # Build batch import query
-                    for node_data in batch:
-                        labels = ":".join(node_data["labels"])
-                        properties = {}
-                        
-                        # Deserialize properties
-                        for key, value in node_data["properties"].items():
-                            properties[key] = self._deserialize_value(value)
-                        
-                        # Create node
-                        query = f"""
-                        CREATE (n:{labels})
-                        SET n = $properties
-                        RETURN id(n) as new_id
-                        """
-                        
-                        result = session.run(query, properties=properties)
-                        new_id = result.single()["new_id"]
-                        
-                        # Store ID mapping
-                        self.node_id_mapping[node_data["id"]] = new_id
-                        imported += 1
-                        
-                except Exception as e:
-                    logger.error(f"Failed to import node batch: {e}")
-                    self.import_stats["errors"].append(str(e))
+                if len(batch) >= self.batch_size:
+                    pool.submit(write_batch, group_key, batch)
+                    groups[group_key] = []
                 
-                if imported % 1000 == 0:
-                    logger.info(f"Imported {imported} nodes...")
+                if count % 100000 == 0:
+                    logger.info(f"Queued {count} {name}...")
+            
+            for group_key, batch in groups.items():
+                if batch:
+                    pool.submit(write_batch, group_key, batch)
+            pool.drain()
+        finally:
+            pool.shutdown()
         
-        self.import_stats["nodes_imported"] = imported
-        logger.info(f"Total nodes imported: {imported}")
-        return imported
+        return count
     
-    def import_relationships(self, relationships: List[Dict]) -> int:
-        """Import relationships from the export data."""
-        logger.info(f"Importing {len(relationships)} relationships...")
+    def import_nodes(self, nodes: Iterator[Dict]) -> int:
+        """Import nodes from the export data, batched per label set."""
+        logger.info("Importing nodes...")
+        count = self._import_grouped(
+            nodes, lambda node: tuple(sorted(node["labels"])), self._write_node_batch, "nodes")
         
-        batch_size = 100
-        imported = 0
-        skipped = 0
+        self.import_stats["nodes_expected"] += count
+        logger.info(f"Total nodes imported: {self.import_stats['nodes_imported']} of {count}")
+        return self.import_stats["nodes_imported"]
+    
+    def import_relationships(self, relationships: Iterator[Dict]) -> int:
+        """Import relationships from the export data, batched per type."""
+        logger.info("Importing relationships...")
+        count = self._import_grouped(
+            relationships, lambda rel: rel["type"], self._write_relationship_batch, "relationships")
         
+        self.import_stats["relationships_expected"] += count
+        logger.info(f"Total relationships imported: {self.import_stats['relationships_imported']} "
+                    f"(skipped: {self.import_stats['relationships_skipped']})")
+        return self.import_stats["relationships_imported"]
+    
+    def remove_import_keys(self):
+        """Strip the temporary label and key in batches, then drop their index."""
+        logger.info("Removing temporary import keys...")
         with self.driver.session() as session:
-            for i in range(0, len(relationships), batch_size):
-                batch = relationships[i:i + batch_size]
-                
-                for rel_data in batch:
-                    try:
-                        # Get mapped node IDs
-                        start_id = self.node_id_mapping.get(rel_data["start_node_id"])
-                        end_id = self.node_id_mapping.get(rel_data["end_node_id"])
-                        
-                        if start_id is None or end_id is None:
-                            logger.warning(f"Skipping relationship - missing node mapping")
-                            skipped += 1
-                            continue
-                        
-                        # Deserialize properties
-                        properties = {}
-                        for key, value in rel_data["properties"].items():
-                            properties[key] = self._deserialize_value(value)
-                        
-                        # Create relationship
-                        query = f"""
-                        MATCH (a), (b)
-                        WHERE id(a) = $start_id AND id(b) = $end_id
-                        CREATE (a)-[r:{rel_data["type"]}]->(b)
-                        SET r = $properties
-                        """
-                        
-                        session.run(query, start_id=start_id, end_id=end_id, properties=properties)
-                        imported += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to import relationship: {e}")
-                        self.import_stats["errors"].append(str(e))
-                
-                if imported % 1000 == 0:
-                    logger.info(f"Imported {imported} relationships...")
-        
-        self.import_stats["relationships_imported"] = imported
-        logger.info(f"Total relationships imported: {imported} (skipped: {skipped})")
-        return imported
+            removed = 1
+            while removed:
+                removed = session.execute_write(lambda tx: tx.run(f"""
+                    MATCH (n:{IMPORT_LABEL})
+                    WITH n LIMIT $limit
+                    REMOVE n:{IMPORT_LABEL}, n.{IMPORT_KEY}
+                    RETURN count(n) as removed
+                """, limit=self.batch_size * 4).single()["removed"])
+            session.run("DROP INDEX import_id IF EXISTS")
     
-    def verify_import(self, export_data: Dict):
-        """Verify the import by comparing statistics."""
+    def verify_import(self) -> bool:
+        """Verify the import by comparing counts with the records read."""
         logger.info("Verifying import...")
         
         with self.driver.session() as session:
@@ -227,8 +293,8 @@ class Neo4jBootstrapper:
             result = session.run("MATCH ()-[r]->() RETURN count(r) as count")
             actual_rels = result.single()["count"]
             
-            expected_nodes = len(export_data["nodes"])
-            expected_rels = len(export_data["relationships"])
+            expected_nodes = self.import_stats["nodes_expected"]
+            expected_rels = self.import_stats["relationships_expected"]
             
             logger.info(f"Nodes - Expected: {expected_nodes}, Actual: {actual_nodes}")
             logger.info(f"Relationships - Expected: {expected_rels}, Actual: {actual_rels}")
@@ -308,6 +374,226 @@ class Neo4jBootstrapper:
             
             logger.info(f"Fixed {total_fixed} chunk relationships total")
     
+    def create_key_indexes(self):
+        """Index the business keys deltas are merged on."""
+        SchemaManager(self.driver).apply(groups=["core", "facts"])
+    
+    def _run_write(self, query: str, rows: List[Dict], counter: str) -> int:
+        with self.driver.session() as session:
+            return session.execute_write(
+                lambda tx: getattr(tx.run(query, rows=rows).consume().counters, counter))
+    
+    def _delete_relationships(self, rel_type: str, label: Optional[str], direction: Optional[str],
+                              rows: List[Dict]) -> int:
+        """Delete the relationships of a type on tombstoned nodes, or all of them without a label."""
+        if label is None:
+            query = f"""
+                MATCH ()-[r:{_quote(rel_type)}]->()
+                WITH r LIMIT 10000
+                DELETE r
+            """
+            deleted = total = self._run_write(query, [], "relationships_deleted")
+            while deleted:
+                deleted = self._run_write(query, [], "relationships_deleted")
+                total += deleted
+            return total
+        
+        arrow = "->" if direction == "out" else "-"
+        query = f"""
+            UNWIND $rows AS row
+            MATCH (n:{_quote(label)} {{{_quote(KEY_PROPERTIES[label][0])}: row.id}})-[r:{_quote(rel_type)}]{arrow}()
+            DELETE r
+        """
+        return self._run_write(query, [{"id": id} for id in dict.fromkeys(row["id"] for row in rows)],
+                               "relationships_deleted")
+    
+    def _delete_tombstone_batch(self, group: tuple, rows: List[Dict]) -> int:
+        """Delete one batch of tombstoned nodes of a label, or of relationships of a type."""
+        rel_type, label, direction = group
+        if rel_type is not None:
+            try:
+                deleted = self._delete_relationships(rel_type, label, direction, rows)
+            except Exception as e:
+                self._record_error(f"Failed to apply {len(rows)} {rel_type} relationship tombstones: {e}")
+                return 0
+            with self._stats_lock:
+                self.import_stats["relationships_deleted"] = \
+                    self.import_stats.get("relationships_deleted", 0) + deleted
+            return deleted
+        
+        query = f"""
+            UNWIND $rows AS row
+            MATCH (n:{_quote(label)} {{id: row.id}})
+            DETACH DELETE n
+        """
+        try:
+            deleted = self._run_write(query, [{"id": row["id"]} for row in rows], "nodes_deleted")
+        except Exception as e:
+            self._record_error(f"Failed to apply {len(rows)} {label} tombstones: {e}")
+            return 0
+        
+        with self._stats_lock:
+            self.import_stats["nodes_deleted"] = self.import_stats.get("nodes_deleted", 0) + deleted
+        return deleted
+    
+    def _merge_node_batch(self, group: tuple, rows: List[Dict]) -> int:
+        """Upsert one batch of changed nodes sharing a key label and label set."""
+        key_label, labels = group
+        key_clause = ", ".join(f"{_quote(k)}: row.key.{_quote(k)}" for k in KEY_PROPERTIES[key_label])
+        extra_labels = "".join(":" + _quote(label) for label in labels if label != key_label)
+        query = f"""
+            UNWIND $rows AS row
+            MERGE (n:{_quote(key_label)} {{{key_clause}}})
+            SET n = row.properties
+            {f"SET n{extra_labels}" if extra_labels else ""}
+        """
+        params = [{
+            "key": row["key"]["key"],
+            "properties": {k: self._deserialize_value(v) for k, v in row["properties"].items()}
+        } for row in rows]
+        
+        try:
+            self._run_write(query, params, "nodes_created")
+        except Exception as e:
+            self._record_error(f"Failed to merge {len(rows)} {key_label} nodes: {e}")
+            return 0
+        
+        with self._stats_lock:
+            self.import_stats["nodes_imported"] += len(rows)
+        return len(rows)
+    
+    def _merge_relationship_batch(self, group: tuple, rows: List[Dict]) -> int:
+        """Merge one batch of relationships between keyed endpoints.
+        
+        Relationships are matched on their endpoints and type (plus the
+        type's identity properties in RELATIONSHIP_KEYS, which tell apart
+        parallel relationships) and their properties replaced, so a changed
+        relationship updates the existing one instead of adding another.
+        """
+        rel_type, start_label, end_label, identity_keys = group
+        start_clause = ", ".join(f"{_quote(k)}: row.start.{_quote(k)}" for k in KEY_PROPERTIES[start_label])
+        end_clause = ", ".join(f"{_quote(k)}: row.end.{_quote(k)}" for k in KEY_PROPERTIES[end_label])
+        rel_clause = ", ".join(f"{_quote(k)}: row.properties.{_quote(k)}" for k in identity_keys)
+        query = f"""
+            UNWIND $rows AS row
+            MATCH (a:{_quote(start_label)} {{{start_clause}}})
+            MATCH (b:{_quote(end_label)} {{{end_clause}}})
+            MERGE (a)-[r:{_quote(rel_type)}{f" {{{rel_clause}}}" if rel_clause else ""}]->(b)
+            SET r = row.properties
+        """
+        params = [{
+            "start": row["start"]["key"],
+            "end": row["end"]["key"],
+            "properties": {k: self._deserialize_value(v) for k, v in row["properties"].items()}
+        } for row in rows]
+        
+        try:
+            self._run_write(query, params, "properties_set")
+        except Exception as e:
+            self._record_error(f"Failed to merge {len(rows)} {rel_type} relationships: {e}")
+            return 0
+        
+        with self._stats_lock:
+            self.import_stats["relationships_imported"] += len(rows)
+        return len(rows)
+    
+    def apply_delta(self, delta_file: str) -> bool:
+        """Apply one delta export: tombstones, then changed nodes, then their relationships."""
+        records = iter(self.iter_export(delta_file))
+        metadata = next(records, {})
+        if metadata.get("export_type") != "delta":
+            logger.error(f"{delta_file} is not a delta export")
+            return False
+        logger.info(f"Applying delta {os.path.basename(delta_file)} "
+                    f"({datetime.fromtimestamp(metadata['since'] / 1000).isoformat()} -> "
+                    f"{datetime.fromtimestamp(metadata['until'] / 1000).isoformat()})")
+        
+        pending: List[Dict] = []
+        
+        def records_of(kind: str):
+            # The stream is ordered by kind; stop at (and keep) the first record of the next kind
+            if pending:
+                if pending[0]["record"] != kind:
+                    return
+                yield pending.pop(0)
+            for record in records:
+                if record.get("record") == kind:
+                    yield record
+                elif record.get("record") != "statistics":
+                    pending.append(record)
+                    return
+        
+        self._import_grouped(records_of("tombstone"),
+                             lambda t: (t.get("relationship"), t.get("label"), t.get("direction")),
+                             self._delete_tombstone_batch, "tombstones")
+        self._import_grouped(records_of("node"),
+                             lambda n: (n["key"]["label"], tuple(sorted(n["labels"]))),
+                             self._merge_node_batch, "nodes")
+        self._import_grouped(records_of("relationship"),
+                             lambda r: (r["type"], r["start"]["label"], r["end"]["label"],
+                                        tuple(k for k in RELATIONSHIP_KEYS.get(r["type"], [])
+                                              if r["properties"].get(k) is not None)),
+                             self._merge_relationship_batch, "relationships")
+        return True
+    
+    def apply_deltas(self, delta_files: List[str]) -> bool:
+        """Apply a chain of deltas in order."""
+        if not delta_files:
+            return True
+        self.create_key_indexes()
+        for delta_file in delta_files:
+            if not self.apply_delta(delta_file):
+                return False
+        
+        logger.info(f"Applied {len(delta_files)} deltas: "
+                    f"{self.import_stats.get('nodes_deleted', 0)} nodes deleted, "
+                    f"{self.import_stats['nodes_imported']} nodes and "
+                    f"{self.import_stats['relationships_imported']} relationships merged in total")
+        if self.import_stats['errors']:
+            logger.warning(f"First 5 errors: {self.import_stats['errors'][:5]}")
+        return not self.import_stats['errors']
+    
+    def iter_export(self, import_file: str) -> Iterator[Dict[str, Any]]:
+        """Yield export records from an NDJSON stream or a legacy JSON export."""
+        if is_stream_export(import_file):
+            yield from read_export_records(import_file)
+            return
+        
+        with open_export_stream(import_file, 'rt') as f:
+            export_data = json.load(f)
+        yield {"record": "metadata", **export_data.get("metadata", {})}
+        for node in export_data["nodes"]:
+            yield {"record": "node", **node}
+        for rel in export_data["relationships"]:
+            yield {"record": "relationship", **rel}
+        yield {"record": "statistics", **export_data.get("statistics", {})}
+    
+    def import_records(self, records: Iterator[Dict[str, Any]]):
+        """Import a record stream: nodes first, then relationships once all nodes exist."""
+        records = iter(records)
+        first_relationship = []
+        
+        def nodes():
+            for record in records:
+                kind = record.get("record")
+                if kind == "node":
+                    yield record
+                elif kind == "relationship":
+                    first_relationship.append(record)
+                    return
+                elif kind == "metadata":
+                    logger.info(f"Export metadata: {record}")
+        
+        def relationships():
+            yield from first_relationship
+            for record in records:
+                if record.get("record") == "relationship":
+                    yield record
+        
+        self.import_nodes(nodes())
+        if first_relationship:
+            self.import_relationships(relationships())
+    
     def bootstrap_from_file(self, import_file: str, force: bool = False) -> bool:
         """Main bootstrap method that orchestrates the import process."""
         try:
@@ -331,24 +617,18 @@ class Neo4jBootstrapper:
                     logger.warning("Database already contains data. Use --force to overwrite.")
                     return False
             
-            # Load export data
-            logger.info("Loading export data...")
-            with open(import_file, 'r') as f:
-                export_data = json.load(f)
-            
-            logger.info(f"Export metadata: {export_data['metadata']}")
-            
             # Create indexes first
             self.create_indexes()
+            self.create_import_index()
             
-            # Import nodes
-            self.import_nodes(export_data["nodes"])
-            
-            # Import relationships
-            self.import_relationships(export_data["relationships"])
+            # Stream nodes then relationships from the export
+            try:
+                self.import_records(self.iter_export(import_file))
+            finally:
+                self.remove_import_keys()
             
             # Verify import
-            if self.verify_import(export_data):
+            if self.verify_import():
                 logger.info("Import verification passed!")
             else:
                 logger.warning("Import verification failed!")
@@ -373,30 +653,136 @@ class Neo4jBootstrapper:
             raise
 
 
+LATEST_EXPORT_LINKS = ["latest_export.ndjson.zst", "latest_export.ndjson.gz", "latest_export.json"]
+
+
+EXPORT_TIMESTAMP = re.compile(r"(\d{8}_\d{6})")
+
+
+def _export_age(path: str) -> tuple:
+    """Sort key of an export link: its target's name timestamp, then modification time."""
+    target = os.path.realpath(path)
+    match = EXPORT_TIMESTAMP.search(os.path.basename(target))
+    return (match.group(1) if match else "", os.path.getmtime(target))
+
+
+def find_latest_export(backup_dir: str) -> Optional[str]:
+    """Return the latest_export link pointing at the newest export (zst before gz on a tie)."""
+    links = [os.path.join(backup_dir, name) for name in LATEST_EXPORT_LINKS]
+    links = [path for path in links if os.path.exists(path)]
+    return max(links, key=_export_age) if links else None
+
+
+def chain_deltas(backup_dir: str, base_file: str) -> List[str]:
+    """Delta files recorded in backup_chain.json on top of base_file, oldest first."""
+    chain = read_backup_chain(backup_dir)
+    if chain is None or os.path.basename(os.path.realpath(base_file)) != chain["base"]:
+        return []
+    return [os.path.join(backup_dir, delta["file"]) for delta in chain["deltas"]]
+
+
+def admin_import_command(bundle_dir: str, database: str = "neo4j", force: bool = False,
+                         neo4j_admin: str = "neo4j-admin") -> List[str]:
+    """Build the `neo4j-admin database import full` command for an export bundle."""
+    with open(os.path.join(bundle_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    
+    command = [
+        neo4j_admin, "database", "import", "full", database,
+        f"--id-type={manifest.get('id_type', 'integer')}",
+        f"--array-delimiter={manifest.get('array_delimiter', ';')}",
+        "--multiline-fields=true",
+        "--skip-bad-relationships=true",
+    ]
+    if force:
+        command.append("--overwrite-destination=true")
+    
+    for group in manifest["nodes"]:
+        files = ",".join(os.path.join(bundle_dir, name) for name in group["files"])
+        labels = ":".join(group["labels"])
+        command.append(f"--nodes={labels}={files}" if labels else f"--nodes={files}")
+    
+    for group in manifest["relationships"]:
+        files = ",".join(os.path.join(bundle_dir, name) for name in group["files"])
+        command.append(f"--relationships={group['type']}={files}")
+    
+    return command
+
+
+def admin_import(bundle_dir: str, database: str = "neo4j", force: bool = False) -> bool:
+    """Seed a stopped, empty database from a bundle with the offline importer."""
+    command = admin_import_command(bundle_dir, database, force,
+                                   neo4j_admin=os.getenv("NEO4J_ADMIN", "neo4j-admin"))
+    logger.info(f"Running offline import: {' '.join(command[:5])} ({len(command) - 5} options)")
+    
+    result = subprocess.run(command)
+    if result.returncode != 0:
+        logger.error(f"neo4j-admin import failed with exit code {result.returncode}")
+        return False
+    
+    logger.info("Offline import completed")
+    return True
+
+
 def main():
     """Main function to run the bootstrap."""
     import argparse
     
     parser = argparse.ArgumentParser(description="Bootstrap Neo4j from export file")
     parser.add_argument("--file", type=str, help="Path to export file (default: latest)")
+    parser.add_argument("--backup-dir", type=str, default="/data/backups", help="Directory searched for the latest export")
     parser.add_argument("--force", action="store_true", help="Force bootstrap even if database has data")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel import sessions")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per UNWIND batch")
+    parser.add_argument("--admin-import", type=str, metavar="BUNDLE_DIR",
+                        help="Seed the (stopped) database offline from a neo4j-admin import bundle")
+    parser.add_argument("--database", type=str, default=os.getenv("NEO4J_DATABASE", "neo4j"),
+                        help="Database name for --admin-import")
+    parser.add_argument("--indexes-only", action="store_true",
+                        help="Only create indexes (after an offline import, once Neo4j is running)")
+    parser.add_argument("--delta", action="append", default=[], metavar="DELTA_FILE",
+                        help="Delta export to apply after the base, in order (repeatable)")
+    parser.add_argument("--deltas-only", action="store_true",
+                        help="Apply --delta files (or the backup chain) to the running database without a base import")
+    parser.add_argument("--no-chain", action="store_true",
+                        help="Do not replay the deltas recorded in backup_chain.json for the base export")
     args = parser.parse_args()
     
+    if args.admin_import:
+        sys.exit(0 if admin_import(args.admin_import, args.database, args.force) else 1)
+    
     # Get configuration from environment or use defaults
     neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
     neo4j_user = os.getenv("NEO4J_USER", "neo4j")
     neo4j_password = os.getenv("NEO4J_PASSWORD", "knowledge123")
     
+    if args.indexes_only:
+        bootstrapper = Neo4jBootstrapper(neo4j_uri, neo4j_user, neo4j_password)
+        try:
+            bootstrapper.create_indexes()
+        finally:
+            bootstrapper.close()
+        sys.exit(0)
+    
+    backup_dir = args.backup_dir
+    
+    if args.deltas_only:
+        base = read_backup_chain(backup_dir)
+        delta_files = args.delta or (chain_deltas(backup_dir, base["base"]) if base else [])
+        bootstrapper = Neo4jBootstrapper(neo4j_uri, neo4j_user, neo4j_password,
+                                         workers=args.workers, batch_size=args.batch_size)
+        try:
+            sys.exit(0 if bootstrapper.apply_deltas(delta_files) else 1)
+        finally:
+            bootstrapper.close()
+    
     # Determine import file
-    backup_dir = "/data/backups"
     if args.file:
         import_file = args.file
     else:
-        # Use latest export
-        latest_link = os.path.join(backup_dir, "latest_export.json")
-        if os.path.exists(latest_link):
-            import_file = latest_link
-        else:
+        # Use latest export, preferring the streamed formats
+        import_file = find_latest_export(backup_dir)
+        if import_file is None:
             logger.error("No export file found. Please run export first or specify --file")
             sys.exit(1)
     
@@ -405,10 +791,15 @@ def main():
         sys.exit(1)
     
     # Create bootstrapper and run import
-    bootstrapper = Neo4jBootstrapper(neo4j_uri, neo4j_user, neo4j_password)
+    bootstrapper = Neo4jBootstrapper(neo4j_uri, neo4j_user, neo4j_password,
+                                     workers=args.workers, batch_size=args.batch_size)
+    
+    delta_files = args.delta or ([] if args.no_chain else chain_deltas(backup_dir, import_file))
     
     try:
         success = bootstrapper.bootstrap_from_file(import_file, force=args.force)
+        if success and delta_files:
+            success = bootstrapper.apply_deltas(delta_files)
         sys.exit(0 if success else 1)
     finally:
         bootstrapper.close()
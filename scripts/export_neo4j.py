@@ -8,18 +8,71 @@ This script exports the entire Neo4j database including:
 - Vector embeddings
 - Metadata and timestamps
 
-The export is saved in a JSON format that can be easily reimported.
+The export is streamed as newline-delimited JSON records through zstd
+compression (gzip when zstandard is not installed). Nodes and relationships
+are paged by id range in parallel sessions and written as each page arrives,
+so memory stays flat regardless of graph size. Embeddings are stored as
+base64-encoded packed float32 arrays.
+
+Record stream:
+    {"record": "metadata", ...}
+    {"record": "node", "id", "labels", "properties"}
+    {"record": "relationship", "id", "type", "start_node_id", "end_node_id", "properties"}
+    {"record": "statistics", ...}
+
+With --format admin-csv the export is instead an offline import bundle for
+`neo4j-admin database import full`: one header and one gzipped data file per
+node label set and per relationship type, plus a manifest.json that
+bootstrap_neo4j.py --admin-import turns into the importer command line.
+
+Every export also refreshes the columnar chunk snapshot (chunk_snapshot.py)
+next to the backup directory, unless --no-snapshot is given.
+
+With --delta only what changed since the previous backup in the chain is
+written: nodes and relationships whose updated_at moved (relationship
+endpoints identified by business key, since internal ids do not survive a
+restore) and tombstones for deleted nodes and relationships. A full export
+starts a new chain in backup_chain.json; bootstrap_neo4j.py replays base +
+deltas. Changed nodes or relationship endpoints without a key cannot be
+replayed; they are counted in the statistics record and logged.
+
+Delta record stream:
+    {"record": "metadata", "export_type": "delta", "since", "until", ...}
+    {"record": "tombstone", "label", "id", "deleted_at"}
+    {"record": "tombstone", "relationship", "label", "id", "direction", "deleted_at"}
+    {"record": "node", "labels", "key": {"label", "key"}, "properties"}
+    {"record": "relationship", "type", "start": {"label", "key"}, "end": {...}, "properties"}
+    {"record": "statistics", ...}
 """
 
+import base64
+import csv
+import gzip
 import json
+import re
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Callable, Optional
 import logging
 from neo4j import GraphDatabase
 import numpy as np
 
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+try:
+    from chunk_snapshot import build_snapshot
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    "knowledge_ingestion_agent"))
+    from chunk_snapshot import build_snapshot
+from change_tracking import KEY_PROPERTIES, CHANGE_PROPERTIES, TOMBSTONE_LABEL, node_key, prune_tombstones
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,29 +80,281 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+EXPORT_VERSION = "2.0"
+
+# Properties holding embeddings; their float lists are packed as float32
+EMBEDDING_PROPERTIES = frozenset({"embedding", "question_embedding", "answer_embedding"})
+
+
+def export_extension() -> str:
+    """File extension for the best available compression"""
+    return ".ndjson.zst" if zstd else ".ndjson.gz"
+
+
+def pack_vector(values: List[float]) -> Dict[str, Any]:
+    """Pack a float list into a base64 float32 record"""
+    array = np.asarray(values, dtype='<f4')
+    return {
+        "_type": "vector",
+        "dtype": "float32",
+        "dimension": len(array),
+        "data": base64.b64encode(array.tobytes()).decode('ascii')
+    }
+
+
+def unpack_vector(value: Dict[str, Any]) -> List[float]:
+    """Restore a vector record written by pack_vector, or a legacy value list"""
+    if "data" in value:
+        return np.frombuffer(base64.b64decode(value["data"]), dtype='<f4').tolist()
+    return value["values"]
+
+
+def open_export_stream(path: str, mode: str = 'rb'):
+    """Open an export file, choosing the codec from its extension (ignoring a trailing .partial)"""
+    name = path[:-len('.partial')] if path.endswith('.partial') else path
+    if name.endswith('.zst'):
+        if zstd is None:
+            raise ImportError("zstandard is required to read/write .zst exports (pip install zstandard)")
+        if 'w' in mode:
+            return zstd.open(path, 'wb', cctx=zstd.ZstdCompressor(level=3, threads=-1))
+        return zstd.open(path, mode, encoding='utf-8' if 't' in mode else None)
+    if name.endswith('.gz'):
+        return gzip.open(path, mode, compresslevel=6) if 'w' in mode else gzip.open(path, mode, encoding='utf-8' if 't' in mode else None)
+    return open(path, mode, encoding='utf-8' if 't' in mode else None)
+
+
+def read_export_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream records from an NDJSON export one line at a time"""
+    with open_export_stream(path, 'rt') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def is_stream_export(path: str) -> bool:
+    """True for record-stream exports, False for legacy single-document JSON"""
+    name = os.path.basename(os.path.realpath(path))
+    return '.ndjson' in name
+
+
+BACKUP_CHAIN = "backup_chain.json"
+
+
+def read_backup_chain(backup_dir: str) -> Dict[str, Any]:
+    """The current base export and its deltas, or None before the first full export"""
+    try:
+        with open(os.path.join(backup_dir, BACKUP_CHAIN)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_backup_chain(backup_dir: str, chain: Dict[str, Any]):
+    """Replace backup_chain.json atomically"""
+    path = os.path.join(backup_dir, BACKUP_CHAIN)
+    with open(path + ".tmp", 'w') as f:
+        json.dump(chain, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+class ExportWriter:
+    """Thread-safe NDJSON writer; workers hand over whole pages of records"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open_export_stream(path, 'wb')
+        self._lock = threading.Lock()
+
+    def write_records(self, records: List[Dict[str, Any]]):
+        payload = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records).encode('utf-8')
+        with self._lock:
+            self._file.write(payload)
+
+    def close(self):
+        self._file.close()
+
+
+# db.schema property types -> neo4j-admin import header types
+ADMIN_IMPORT_TYPES = {
+    "String": "string", "Long": "long", "Double": "double", "Boolean": "boolean",
+    "StringArray": "string[]", "LongArray": "long[]", "DoubleArray": "double[]",
+    "BooleanArray": "boolean[]", "Date": "date", "DateTime": "datetime",
+    "LocalDateTime": "localdatetime", "Time": "time", "LocalTime": "localtime",
+    "Duration": "duration",
+}
+ARRAY_DELIMITER = ";"
+
+
+def _admin_type(property_types: List[str]) -> str:
+    """Importer type for a property; mixed or unknown types fall back to string"""
+    if len(property_types) != 1:
+        return "string"
+    return ADMIN_IMPORT_TYPES.get(property_types[0], "string")
+
+
+def _infer_admin_type(value: Any) -> str:
+    """Importer type for a property not reported by db.schema"""
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "long"
+    if isinstance(value, float):
+        return "double"
+    if isinstance(value, (list, tuple)) and value:
+        element = _infer_admin_type(value[0])
+        return element + "[]" if element != "string" or isinstance(value[0], str) else "string"
+    return "string"
+
+
+def _admin_value(value: Any, admin_type: str) -> Any:
+    """Format a property value in neo4j-admin CSV syntax"""
+    if value is None:
+        return None
+    if admin_type.endswith("[]"):
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+        return ARRAY_DELIMITER.join(_admin_value(v, admin_type[:-2]) for v in value)
+    if admin_type == "boolean":
+        return "true" if value else "false"
+    if hasattr(value, "iso_format"):
+        return value.iso_format()
+    if admin_type == "string" and not isinstance(value, str):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+class _BundleFile:
+    """One header file plus one gzipped data file for a label set or relationship type"""
+
+    def __init__(self, directory: str, stem: str, id_columns: List[str], properties: Dict[str, str]):
+        self.columns = sorted(properties)
+        self.types = properties
+        self.header = f"{stem}.header.csv"
+        self.data = f"{stem}.csv.gz"
+        self.count = 0
+        self.lock = threading.Lock()
+
+        with open(os.path.join(directory, self.header), 'w', newline='') as f:
+            csv.writer(f).writerow(id_columns + [f"{name}:{properties[name]}" for name in self.columns])
+        self._file = gzip.open(os.path.join(directory, self.data), 'wt', newline='', encoding='utf-8', compresslevel=3)
+        self._writer = csv.writer(self._file)
+
+    def write_rows(self, rows: List[List[Any]]):
+        with self.lock:
+            self._writer.writerows(rows)
+            self.count += len(rows)
+
+    def row(self, ids: List[Any], properties: Dict[str, Any]) -> List[Any]:
+        return ids + [_admin_value(properties.get(name), self.types[name]) for name in self.columns]
+
+    def close(self):
+        self._file.close()
+
+
+class AdminBundleWriter:
+    """Write pages of raw node/relationship rows as a neo4j-admin import bundle"""
+
+    def __init__(self, directory: str, node_schema: Dict[tuple, Dict[str, str]],
+                 relationship_schema: Dict[str, Dict[str, str]]):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.node_schema = node_schema
+        self.relationship_schema = relationship_schema
+        self.node_files: Dict[tuple, _BundleFile] = {}
+        self.relationship_files: Dict[str, _BundleFile] = {}
+        self._lock = threading.Lock()
+
+    def _stem(self, prefix: str, name: str, index: int) -> str:
+        return f"{prefix}_{index:03d}_{re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_') or 'none'}"
+
+    def _file_for(self, files: Dict, schema: Dict, key, prefix: str, id_columns: List[str],
+                  sample: Dict[str, Any]) -> _BundleFile:
+        with self._lock:
+            if key not in files:
+                properties = dict(schema.get(key, {}))
+                # Properties that appeared after the schema was read
+                for name, value in sample.items():
+                    properties.setdefault(name, _infer_admin_type(value))
+                name = "_".join(key) if isinstance(key, tuple) else key
+                files[key] = _BundleFile(self.directory, self._stem(prefix, name, len(files)),
+                                         id_columns, properties)
+            return files[key]
+
+    def write_nodes(self, rows: List[Dict[str, Any]]):
+        groups: Dict[tuple, List[Dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row["labels"])), []).append(row)
+
+        for labels, group in groups.items():
+            bundle_file = self._file_for(self.node_files, self.node_schema, labels, "nodes",
+                                         [":ID"], group[0]["properties"])
+            bundle_file.write_rows([bundle_file.row([row["id"]], row["properties"]) for row in group])
+
+    def write_relationships(self, rows: List[Dict[str, Any]]):
+        groups: Dict[str, List[Dict]] = {}
+        for row in rows:
+            groups.setdefault(row["type"], []).append(row)
+
+        for rel_type, group in groups.items():
+            bundle_file = self._file_for(self.relationship_files, self.relationship_schema, rel_type,
+                                         "relationships", [":START_ID", ":END_ID"], group[0]["properties"])
+            bundle_file.write_rows([bundle_file.row([row["start_node_id"], row["end_node_id"]], row["properties"])
+                                    for row in group])
+
+    def close(self, metadata: Dict[str, Any]):
+        """Close data files and write the manifest read by bootstrap_neo4j.py"""
+        for bundle_file in list(self.node_files.values()) + list(self.relationship_files.values()):
+            bundle_file.close()
+
+        manifest = {
+            **metadata,
+            "format": "neo4j-admin-csv",
+            "id_type": "integer",
+            "array_delimiter": ARRAY_DELIMITER,
+            "nodes": [{"labels": list(labels), "files": [f.header, f.data], "count": f.count}
+                      for labels, f in self.node_files.items()],
+            "relationships": [{"type": rel_type, "files": [f.header, f.data], "count": f.count}
+                              for rel_type, f in self.relationship_files.items()],
+        }
+        with open(os.path.join(self.directory, "manifest.json"), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+
 class Neo4jExporter:
-    def __init__(self, uri: str, user: str, password: str):
+    def __init__(self, uri: str, user: str, password: str,
+                 workers: int = 4, page_size: int = 5000):
         """Initialize the Neo4j exporter with connection details."""
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
-        self.export_data = {
-            "metadata": {
-                "export_timestamp": datetime.now().isoformat(),
-                "version": "1.0",
-                "neo4j_uri": uri
-            },
-            "nodes": [],
-            "relationships": [],
-            "statistics": {}
+        self.driver = GraphDatabase.driver(uri, auth=(user, password),
+                                           max_connection_pool_size=max(workers + 2, 10))
+        self.workers = workers
+        self.page_size = page_size
+        self.metadata = {
+            "export_timestamp": datetime.now().isoformat(),
+            "version": EXPORT_VERSION,
+            "format": "ndjson",
+            "neo4j_uri": uri
         }
+        self.statistics = {}
     
     def close(self):
         """Close the Neo4j driver connection."""
         self.driver.close()
     
-    def _serialize_value(self, value: Any) -> Any:
-        """Serialize values for JSON export, handling special types."""
+    def server_time(self) -> int:
+        """Database clock in epoch milliseconds, the same clock writers stamp updated_at with"""
+        with self.driver.session() as session:
+            return session.run("RETURN timestamp() as now").single()["now"]
+    
+    def _serialize_value(self, value: Any, key: Optional[str] = None) -> Any:
+        """Serialize values for JSON export, handling special types; `key` is the property name"""
+        if hasattr(value, 'to_native'):
+            # Neo4j temporal types
+            value = value.to_native()
+        
         if isinstance(value, (list, tuple)) and len(value) > 0 and isinstance(value[0], (int, float)):
             # Handle vector embeddings
+            if key in EMBEDDING_PROPERTIES and isinstance(value[0], float):
+                return pack_vector(value)
             return {
                 "_type": "vector",
                 "values": list(value),
@@ -74,76 +379,88 @@ class Neo4jExporter:
         else:
             return value
     
-    def export_nodes(self) -> int:
-        """Export all nodes from the database."""
-        logger.info("Exporting nodes...")
-        
-        query = """
-        MATCH (n)
-        RETURN n, labels(n) as labels, id(n) as node_id
-        ORDER BY id(n)
-        """
+    def _id_windows(self, max_id_query: str) -> List[tuple]:
+        """Split [0, max id] into page-sized windows"""
+        with self.driver.session() as session:
+            max_id = session.run(max_id_query).single()["max_id"]
+        if max_id is None:
+            return []
+        return [(lo, min(lo + self.page_size, max_id + 1))
+                for lo in range(0, max_id + 1, self.page_size)]
+    
+    def _node_record(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """NDJSON record for a raw node row"""
+        return {
+            "record": "node",
+            "id": row["id"],
+            "labels": row["labels"],
+            "properties": {k: self._serialize_value(v, k) for k, v in row["properties"].items()}
+        }
+    
+    def _relationship_record(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """NDJSON record for a raw relationship row"""
+        return {
+            "record": "relationship",
+            "id": row["id"],
+            "type": row["type"],
+            "start_node_id": row["start_node_id"],
+            "end_node_id": row["end_node_id"],
+            "properties": {k: self._serialize_value(v, k) for k, v in row["properties"].items()}
+        }
+    
+    def _export_node_window(self, write_page: Callable[[List[Dict]], None], lo: int, hi: int) -> int:
+        """Export the nodes whose ids fall in [lo, hi) using an id seek"""
+        with self.driver.session() as session:
+            result = session.run("""
+                MATCH (n)
+                WHERE id(n) IN range($lo, $hi - 1)
+                RETURN id(n) as id, labels(n) as labels, properties(n) as properties
+            """, lo=lo, hi=hi)
+            rows = [record.data() for record in result]
         
-        count = 0
+        write_page(rows)
+        return len(rows)
+    
+    def _export_relationship_window(self, write_page: Callable[[List[Dict]], None], lo: int, hi: int) -> int:
+        """Export the relationships whose ids fall in [lo, hi) using an id seek"""
         with self.driver.session() as session:
-            result = session.run(query)
-            
-            for record in result:
-                node = record["n"]
-                node_data = {
-                    "id": record["node_id"],
-                    "labels": record["labels"],
-                    "properties": {}
-                }
-                
-                # Serialize all properties
-                for key, value in node.items():
-                    node_data["properties"][key] = self._serialize_value(value)
-                
-                self.export_data["nodes"].append(node_data)
-                count += 1
-                
-                if count % 1000 == 0:
-                    logger.info(f"Exported {count} nodes...")
+            result = session.run("""
+                MATCH (a)-[r]->(b)
+                WHERE id(r) IN range($lo, $hi - 1)
+                RETURN id(r) as id, type(r) as type,
+                       id(a) as start_node_id, id(b) as end_node_id, properties(r) as properties
+            """, lo=lo, hi=hi)
+            rows = [record.data() for record in result]
         
+        write_page(rows)
+        return len(rows)
+    
+    def _export_windows(self, name: str, windows: List[tuple], export_window) -> int:
+        """Run window exports across parallel sessions, logging progress"""
+        count = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(export_window, lo, hi) for lo, hi in windows]
+            for i, future in enumerate(futures, 1):
+                count += future.result()
+                if i % 20 == 0:
+                    logger.info(f"Exported {count} {name} ({i}/{len(windows)} pages)...")
+        return count
+    
+    def export_nodes(self, write_page: Callable[[List[Dict]], None]) -> int:
+        """Export all nodes from the database, handing each page of rows to write_page."""
+        logger.info("Exporting nodes...")
+        windows = self._id_windows("MATCH (n) RETURN max(id(n)) as max_id")
+        count = self._export_windows(
+            "nodes", windows, lambda lo, hi: self._export_node_window(write_page, lo, hi))
         logger.info(f"Total nodes exported: {count}")
         return count
     
-    def export_relationships(self) -> int:
-        """Export all relationships from the database."""
+    def export_relationships(self, write_page: Callable[[List[Dict]], None]) -> int:
+        """Export all relationships from the database, handing each page of rows to write_page."""
         logger.info("Exporting relationships...")
-        
-        query = """
-        MATCH (a)-[r]->(b)
-        RETURN id(r) as rel_id, type(r) as rel_type, 
-               id(a) as start_id, id(b) as end_id, r
-        ORDER BY id(r)
-        """
-        
-        count = 0
-        with self.driver.session() as session:
-            result = session.run(query)
-            
-            for record in result:
-                rel = record["r"]
-                rel_data = {
-                    "id": record["rel_id"],
-                    "type": record["rel_type"],
-                    "start_node_id": record["start_id"],
-                    "end_node_id": record["end_id"],
-                    "properties": {}
-                }
-                
-                # Serialize all properties
-                for key, value in rel.items():
-                    rel_data["properties"][key] = self._serialize_value(value)
-                
-                self.export_data["relationships"].append(rel_data)
-                count += 1
-                
-                if count % 1000 == 0:
-                    logger.info(f"Exported {count} relationships...")
-        
+        windows = self._id_windows("MATCH ()-[r]->() RETURN max(id(r)) as max_id")
+        count = self._export_windows(
+            "relationships", windows, lambda lo, hi: self._export_relationship_window(write_page, lo, hi))
         logger.info(f"Total relationships exported: {count}")
         return count
     
@@ -181,57 +498,253 @@ class Neo4jExporter:
                 try:
                     result = session.run(query)
                     if stat_name.endswith("_by_label") or stat_name.endswith("_by_type"):
-                        self.export_data["statistics"][stat_name] = [
+                        self.statistics[stat_name] = [
                             dict(record) for record in result
                         ]
                     else:
-                        self.export_data["statistics"][stat_name] = result.single()["count"]
+                        self.statistics[stat_name] = result.single()["count"]
                 except Exception as e:
                     logger.warning(f"Failed to collect statistic {stat_name}: {e}")
     
-    def save_export(self, output_path: str):
-        """Save the export data to a JSON file."""
-        logger.info(f"Saving export to {output_path}")
+    def export_to_file(self, output_path: str):
+        """Main export method that orchestrates the entire export process."""
+        logger.info("Starting Neo4j export...")
         
-        # Add final statistics
-        self.export_data["statistics"]["exported_nodes"] = len(self.export_data["nodes"])
-        self.export_data["statistics"]["exported_relationships"] = len(self.export_data["relationships"])
+        # Anything stamped after this instant is picked up by the next delta
+        self.metadata["export_type"] = "full"
+        self.metadata["started_at"] = self.server_time()
         
-        # Save to file
-        with open(output_path, 'w') as f:
-            json.dump(self.export_data, f, indent=2)
+        # Write to a temporary name so a partial export is never picked up as latest
+        temp_path = output_path + ".partial"
+        writer = ExportWriter(temp_path)
         
-        # Get file size
-        file_size = os.path.getsize(output_path)
-        logger.info(f"Export saved successfully. File size: {file_size / 1024 / 1024:.2f} MB")
-    
-    def export_to_file(self, output_path: str):
-        """Main export method that orchestrates the entire export process."""
         try:
-            logger.info("Starting Neo4j export...")
+            writer.write_records([{"record": "metadata", **self.metadata}])
             
             # Export nodes
-            node_count = self.export_nodes()
+            node_count = self.export_nodes(
+                lambda rows: writer.write_records([self._node_record(row) for row in rows]))
             
             # Export relationships
-            rel_count = self.export_relationships()
+            rel_count = self.export_relationships(
+                lambda rows: writer.write_records([self._relationship_record(row) for row in rows]))
             
             # Collect statistics
             self.collect_statistics()
+            self.statistics["exported_nodes"] = node_count
+            self.statistics["exported_relationships"] = rel_count
+            writer.write_records([{"record": "statistics", **self.statistics}])
             
-            # Save to file
-            self.save_export(output_path)
+        except Exception as e:
+            logger.error(f"Export failed: {e}")
+            writer.close()
+            os.remove(temp_path)
+            raise
+        
+        writer.close()
+        os.replace(temp_path, output_path)
+        
+        file_size = os.path.getsize(output_path)
+        logger.info(f"Export completed successfully! File size: {file_size / 1024 / 1024:.2f} MB")
+        logger.info(f"Exported {node_count} nodes and {rel_count} relationships")
+        return self.metadata["started_at"]
+    
+    def prune_tombstones(self, before: int) -> int:
+        """Drop tombstones already reflected in a full export started at `before`"""
+        with self.driver.session() as session:
+            pruned = prune_tombstones(session, before)
+        logger.info(f"Pruned {pruned} tombstones")
+        return pruned
+    
+    def _export_changed_nodes(self, write_page: Callable[[List[Dict]], None], since: int) -> tuple:
+        """Export keyed nodes stamped at or after `since`, label by label; returns (exported, skipped)"""
+        count = skipped = 0
+        with self.driver.session() as session:
+            for label in KEY_PROPERTIES:
+                changed = " OR ".join(f"n.{stamp} >= $since" for stamp in CHANGE_PROPERTIES[label])
+                result = session.run(f"""
+                    MATCH (n:`{label}`)
+                    WHERE {changed}
+                    RETURN labels(n) as labels, properties(n) as properties
+                """, since=since)
+                
+                page = []
+                for record in result:
+                    labels, properties = record["labels"], record["properties"]
+                    key = node_key(labels, properties)
+                    if key is None:
+                        skipped += 1
+                        continue
+                    # Nodes with several keyed labels are written once, under their first
+                    if key["label"] != label:
+                        continue
+                    page.append({
+                        "record": "node",
+                        "labels": labels,
+                        "key": key,
+                        "properties": {k: self._serialize_value(v, k) for k, v in properties.items()}
+                    })
+                    if len(page) >= self.page_size:
+                        write_page(page)
+                        count += len(page)
+                        page = []
+                write_page(page)
+                count += len(page)
+        if skipped:
+            logger.warning(f"Skipped {skipped} changed nodes without a key; a restore will not include them")
+        return count, skipped
+    
+    def _export_changed_relationships(self, write_page: Callable[[List[Dict]], None], since: int) -> tuple:
+        """Export relationships stamped at or after `since`, endpoints identified by key"""
+        count = skipped = 0
+        projection = "{" + ", ".join(sorted({f".{k}" for keys in KEY_PROPERTIES.values() for k in keys})) + "}"
+        
+        with self.driver.session() as session:
+            rel_types = session.run(
+                "CALL db.relationshipTypes() YIELD relationshipType RETURN relationshipType").value()
+            for rel_type in rel_types:
+                # Seeks the relationship's updated_at index for the tracked types
+                result = session.run(f"""
+                    MATCH (a)-[r:`{rel_type}`]->(b)
+                    WHERE r.updated_at >= $since
+                    RETURN properties(r) as properties,
+                           labels(a) as start_labels, a{projection} as start_key,
+                           labels(b) as end_labels, b{projection} as end_key
+                """, since=since)
+                
+                page = []
+                for record in result:
+                    start = node_key(record["start_labels"], record["start_key"])
+                    end = node_key(record["end_labels"], record["end_key"])
+                    if start is None or end is None:
+                        skipped += 1
+                        continue
+                    page.append({
+                        "record": "relationship",
+                        "type": rel_type,
+                        "start": start,
+                        "end": end,
+                        "properties": {k: self._serialize_value(v, k) for k, v in record["properties"].items()}
+                    })
+                    if len(page) >= self.page_size:
+                        write_page(page)
+                        count += len(page)
+                        page = []
+                write_page(page)
+                count += len(page)
+        if skipped:
+            logger.warning(f"Skipped {skipped} changed relationships with an endpoint that has no key")
+        return count, skipped
+    
+    def export_delta(self, output_path: str, since: int) -> int:
+        """Export nodes, relationships and tombstones changed since `since` (epoch ms)."""
+        logger.info(f"Starting delta export since {datetime.fromtimestamp(since / 1000).isoformat()}...")
+        until = self.server_time()
+        self.metadata.update({"export_type": "delta", "since": since, "until": until})
+        
+        temp_path = output_path + ".partial"
+        writer = ExportWriter(temp_path)
+        
+        try:
+            writer.write_records([{"record": "metadata", **self.metadata}])
             
-            logger.info(f"Export completed successfully!")
-            logger.info(f"Exported {node_count} nodes and {rel_count} relationships")
+            # Tombstones first so a restore deletes before re-creating recycled keys
+            with self.driver.session() as session:
+                tombstones = [{"record": "tombstone", **record.data()} for record in session.run(f"""
+                    MATCH (t:{TOMBSTONE_LABEL})
+                    WHERE t.deleted_at >= $since
+                    RETURN t.relationship as relationship, t.label as label, t.id as id,
+                           t.direction as direction, t.deleted_at as deleted_at
+                    ORDER BY t.deleted_at
+                """, since=since)]
+            writer.write_records(tombstones)
+            
+            node_count, node_skipped = self._export_changed_nodes(writer.write_records, since)
+            rel_count, rel_skipped = self._export_changed_relationships(writer.write_records, since)
+            
+            self.statistics.update({
+                "exported_tombstones": len(tombstones),
+                "exported_nodes": node_count,
+                "skipped_nodes": node_skipped,
+                "exported_relationships": rel_count,
+                "skipped_relationships": rel_skipped
+            })
+            writer.write_records([{"record": "statistics", **self.statistics}])
             
         except Exception as e:
-            logger.error(f"Export failed: {e}")
+            logger.error(f"Delta export failed: {e}")
+            writer.close()
+            os.remove(temp_path)
             raise
+        
+        writer.close()
+        os.replace(temp_path, output_path)
+        
+        logger.info(f"Delta export completed: {len(tombstones)} tombstones, {node_count} nodes "
+                    f"({node_skipped} without a key skipped), "
+                    f"{rel_count} relationships ({rel_skipped} without keyed endpoints skipped), "
+                    f"{os.path.getsize(output_path) / 1024:.1f} KB")
+        return until
+    
+    def read_schema(self) -> tuple:
+        """Property names and importer types per node label set and relationship type"""
+        node_schema: Dict[tuple, Dict[str, str]] = {}
+        relationship_schema: Dict[str, Dict[str, str]] = {}
+        
+        with self.driver.session() as session:
+            for record in session.run("CALL db.schema.nodeTypeProperties()"):
+                labels = tuple(sorted(record["nodeLabels"]))
+                properties = node_schema.setdefault(labels, {})
+                if record["propertyName"]:
+                    properties[record["propertyName"]] = _admin_type(record["propertyTypes"] or [])
+            
+            for record in session.run("CALL db.schema.relTypeProperties()"):
+                rel_type = record["relType"].lstrip(":").strip("`")
+                properties = relationship_schema.setdefault(rel_type, {})
+                if record["propertyName"]:
+                    properties[record["propertyName"]] = _admin_type(record["propertyTypes"] or [])
+        
+        return node_schema, relationship_schema
+    
+    def export_admin_bundle(self, output_dir: str):
+        """Export CSV files for `neo4j-admin database import full`."""
+        logger.info(f"Starting neo4j-admin bundle export to {output_dir}")
+        
+        temp_dir = output_dir + ".partial"
+        node_schema, relationship_schema = self.read_schema()
+        writer = AdminBundleWriter(temp_dir, node_schema, relationship_schema)
+        
+        node_count = self.export_nodes(writer.write_nodes)
+        rel_count = self.export_relationships(writer.write_relationships)
+        writer.close({**self.metadata, "exported_nodes": node_count, "exported_relationships": rel_count})
+        
+        os.replace(temp_dir, output_dir)
+        logger.info(f"Bundle export completed: {node_count} nodes in {len(writer.node_files)} files, "
+                    f"{rel_count} relationships in {len(writer.relationship_files)} files")
+    
+    def export_chunk_snapshot(self, snapshot_dir: str) -> int:
+        """Rewrite the columnar chunk snapshot as a single segment"""
+        logger.info(f"Writing chunk snapshot to {snapshot_dir}")
+        return build_snapshot(self.driver, snapshot_dir, page_size=self.page_size)
 
 
 def main():
     """Main function to run the export."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Export Neo4j to a compressed NDJSON stream")
+    parser.add_argument("--format", choices=["ndjson", "admin-csv"], default="ndjson",
+                        help="ndjson backup stream, or a neo4j-admin import bundle for offline restores")
+    parser.add_argument("--output-dir", type=str, help="Backup directory (default: /data/backups or ./data/backups)")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel export sessions")
+    parser.add_argument("--page-size", type=int, default=5000, help="Ids per export page")
+    parser.add_argument("--snapshot-dir", type=str,
+                        help="Chunk snapshot directory (default: $CHUNK_SNAPSHOT_DIR or snapshots/chunks beside the backups)")
+    parser.add_argument("--no-snapshot", action="store_true", help="Skip the columnar chunk snapshot")
+    parser.add_argument("--delta", action="store_true",
+                        help="Export only changes since the last backup in backup_chain.json")
+    args = parser.parse_args()
+    
     # Get configuration from environment or use defaults
     neo4j_uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
     neo4j_user = os.getenv("NEO4J_USER", "neo4j")
@@ -239,7 +752,9 @@ def main():
     
     # Create backup directory if it doesn't exist
     # Use local path if not in Docker, otherwise use /data/backups
-    if os.path.exists("/data/backups"):
+    if args.output_dir:
+        backup_dir = args.output_dir
+    elif os.path.exists("/data/backups"):
         backup_dir = "/data/backups"
     else:
         backup_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "backups")
@@ -247,23 +762,56 @@ def main():
     
     # Generate output filename with timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = os.path.join(backup_dir, f"neo4j_export_{timestamp}.json")
+    chain = read_backup_chain(backup_dir)
+    if args.delta:
+        if args.format != "ndjson" or chain is None:
+            parser.error("--delta needs an ndjson full export first (no backup_chain.json in the backup directory)")
+        output_file = os.path.join(backup_dir, f"neo4j_delta_{timestamp}{export_extension()}")
+        since = chain["deltas"][-1]["until"] if chain["deltas"] else chain["base_started_at"]
+    elif args.format == "admin-csv":
+        output_file = os.path.join(backup_dir, f"neo4j_import_bundle_{timestamp}")
+        latest_name = "latest_import_bundle"
+    else:
+        extension = export_extension()
+        output_file = os.path.join(backup_dir, f"neo4j_export_{timestamp}{extension}")
+        latest_name = f"latest_export{extension}"
     
     # Create exporter and run export
-    exporter = Neo4jExporter(neo4j_uri, neo4j_user, neo4j_password)
+    exporter = Neo4jExporter(neo4j_uri, neo4j_user, neo4j_password,
+                             workers=args.workers, page_size=args.page_size)
     
     try:
-        exporter.export_to_file(output_file)
+        if args.delta:
+            until = exporter.export_delta(output_file, since)
+            chain["deltas"].append({"file": os.path.basename(output_file), "since": since, "until": until})
+            write_backup_chain(backup_dir, chain)
+            print(f"Delta export completed: {output_file} ({len(chain['deltas'])} deltas on {chain['base']})")
+            return
+        
+        if args.format == "admin-csv":
+            exporter.export_admin_bundle(output_file)
+        else:
+            started_at = exporter.export_to_file(output_file)
+            # A full export starts a new chain; older tombstones are reflected in it
+            write_backup_chain(backup_dir, {"base": os.path.basename(output_file),
+                                            "base_started_at": started_at, "deltas": []})
+            exporter.prune_tombstones(started_at)
         
         # Create a symlink to the latest export
-        latest_link = os.path.join(backup_dir, "latest_export.json")
-        if os.path.exists(latest_link):
+        latest_link = os.path.join(backup_dir, latest_name)
+        if os.path.lexists(latest_link):
             os.remove(latest_link)
         os.symlink(output_file, latest_link)
         
         print(f"Export completed: {output_file}")
         print(f"Latest export link: {latest_link}")
         
+        if not args.no_snapshot:
+            snapshot_dir = (args.snapshot_dir or os.getenv("CHUNK_SNAPSHOT_DIR")
+                            or os.path.join(os.path.dirname(os.path.abspath(backup_dir)), "snapshots", "chunks"))
+            exporter.export_chunk_snapshot(snapshot_dir)
+            print(f"Chunk snapshot: {snapshot_dir}")
+        
     finally:
         exporter.close()
 
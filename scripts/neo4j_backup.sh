@@ -18,10 +18,11 @@ function print_usage() {
     echo "Usage: $0 [command] [options]"
     echo ""
     echo "Commands:"
-    echo "  export    - Export the Neo4j database to JSON"
-    echo "  import    - Import from a JSON backup file"
+    echo "  export    - Export the Neo4j database to a compressed NDJSON stream"
+    echo "  delta     - Export only changes since the last backup (needs a full export first)"
+    echo "  import    - Import from a backup file (NDJSON stream or legacy JSON)"
     echo "  list      - List available backups"
-    echo "  clean     - Remove old backups (keep last 5)"
+    echo "  clean     - Remove old backups (keep last 5 full exports and their deltas)"
     echo ""
     echo "Options:"
     echo "  --file <path>    - Specify backup file for import"
@@ -50,10 +51,14 @@ function export_database() {
     
     # Find the latest backup
     cd "$HOST_BACKUP_DIR"
-    LATEST_BACKUP=$(ls -t neo4j_export_*.json 2>/dev/null | head -1)
+    LATEST_BACKUP=$(ls -t neo4j_export_*.ndjson.* neo4j_export_*.json 2>/dev/null | grep -v '\.partial$' | head -1)
     
     if [ -n "$LATEST_BACKUP" ]; then
-        ln -sf "$LATEST_BACKUP" latest_export.json
+        case "$LATEST_BACKUP" in
+            *.ndjson.zst) ln -sf "$LATEST_BACKUP" latest_export.ndjson.zst ;;
+            *.ndjson.gz) ln -sf "$LATEST_BACKUP" latest_export.ndjson.gz ;;
+            *) ln -sf "$LATEST_BACKUP" latest_export.json ;;
+        esac
         echo -e "${GREEN}Export completed: $HOST_BACKUP_DIR/$LATEST_BACKUP${NC}"
         echo -e "${GREEN}Latest symlink updated${NC}"
     else
@@ -62,6 +67,20 @@ function export_database() {
     fi
 }
 
+function export_delta() {
+    echo -e "${GREEN}Starting Neo4j delta export...${NC}"
+    
+    cd "${SCRIPT_DIR}/.."
+    
+    if ! docker-compose ps neo4j 2>/dev/null | grep -q "running"; then
+        echo -e "${RED}Error: Neo4j is not running${NC}"
+        exit 1
+    fi
+    
+    # Appends to backup_chain.json; the base and earlier deltas stay untouched
+    docker-compose exec -T neo4j python3 /scripts/export_neo4j.py --delta
+}
+
 function import_database() {
     echo -e "${GREEN}Starting Neo4j import...${NC}"
     
@@ -98,10 +117,14 @@ function import_database() {
     
     # Determine import file
     if [ -z "$IMPORT_FILE" ]; then
-        # Use latest
-        if [ -f "$HOST_BACKUP_DIR/latest_export.json" ]; then
-            IMPORT_FILE="latest_export.json"
-        else
+        # Use latest, preferring the streamed formats
+        for LATEST in latest_export.ndjson.zst latest_export.ndjson.gz latest_export.json; do
+            if [ -f "$HOST_BACKUP_DIR/$LATEST" ]; then
+                IMPORT_FILE="$LATEST"
+                break
+            fi
+        done
+        if [ -z "$IMPORT_FILE" ]; then
             echo -e "${RED}Error: No backup file found. Please run export first or specify --file${NC}"
             exit 1
         fi
@@ -130,7 +153,12 @@ function list_backups() {
     echo ""
     
     if [ -d "$HOST_BACKUP_DIR" ]; then
-        ls -lah "$HOST_BACKUP_DIR"/*.json 2>/dev/null || echo "No backups found"
+        ls -lah "$HOST_BACKUP_DIR"/neo4j_export_* 2>/dev/null || echo "No backups found"
+        if [ -f "$HOST_BACKUP_DIR/backup_chain.json" ]; then
+            echo ""
+            echo -e "${GREEN}Delta chain:${NC}"
+            cat "$HOST_BACKUP_DIR/backup_chain.json"
+        fi
     else
         echo "No backup directory found"
     fi
@@ -144,7 +172,13 @@ function clean_backups() {
     if [ -d "$HOST_BACKUP_DIR" ]; then
         # Keep only the 5 most recent backups
         cd "$HOST_BACKUP_DIR"
-        ls -t neo4j_export_*.json 2>/dev/null | tail -n +6 | xargs rm -f
+        ls -t neo4j_export_*.ndjson.* neo4j_export_*.json 2>/dev/null | tail -n +6 | xargs rm -f
+        
+        # Deltas older than the oldest remaining full export can no longer be replayed
+        OLDEST_BASE=$(ls -t neo4j_export_*.ndjson.* neo4j_export_*.json 2>/dev/null | tail -1)
+        if [ -n "$OLDEST_BASE" ]; then
+            find . -maxdepth 1 -name 'neo4j_delta_*' ! -newer "$OLDEST_BASE" -exec rm -f {} +
+        fi
         echo -e "${GREEN}Cleanup completed${NC}"
     fi
 }
@@ -154,6 +188,9 @@ case "$1" in
     export)
         export_database
         ;;
+    delta)
+        export_delta
+        ;;
     import)
         shift
         import_database "$@"
@@ -3,6 +3,8 @@
 Design for synthetic Q&A pair generation and graph integration
 """
 
+import os
+import sys
 import logging
 from typing import Dict, List, Optional, Tuple, Set
 import json
@@ -10,6 +12,11 @@ from dataclasses import dataclass
 from neo4j import GraphDatabase
 from sentence_transformers import SentenceTransformer
 import numpy as np
+
+# Add the knowledge_ingestion_agent directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'knowledge_ingestion_agent'))
+
+from schema_manager import SchemaManager
 import re
 
 logger = logging.getLogger(__name__)
@@ -450,24 +457,7 @@ class SyntheticQAGenerator:
     
     def _create_qa_indexes(self):
         """Create indexes for Q&A search"""
-        with self.driver.session() as session:
-            # Full-text index on questions
-            session.run("""
-                CREATE FULLTEXT INDEX qa_questions_fulltext IF NOT EXISTS
-                FOR (qa:QAPair) ON EACH [qa.question, qa.answer]
-            """)
-            
-            # Index on question types
-            session.run("""
-                CREATE INDEX qa_question_type IF NOT EXISTS
-                FOR (qa:QAPair) ON (qa.question_type)
-            """)
-            
-            # Index on confidence scores
-            session.run("""
-                CREATE INDEX qa_confidence IF NOT EXISTS
-                FOR (qa:QAPair) ON (qa.confidence_score)
-            """)
+        SchemaManager(self.driver).apply(groups=['qa'])
 
 
 class QAEnhancedSearch:
@@ -0,0 +1,9 @@
+"""Unit tests for the ingestion, search and test agents; they need no Neo4j, spaCy or network"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in ('knowledge_ingestion_agent', 'knowledge_test_agent', 'scripts', ''):
+    sys.path.insert(0, os.path.join(ROOT, path))
@@ -0,0 +1,76 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from chunk_snapshot import ChunkSnapshot, ChunkSnapshotStore
+
+DIMENSION = 4
+
+
+def _rows(document_id, count, value):
+    return [{'chunk_id': f'{document_id}_{i}', 'page_num': i + 1, 'chunk_type': 'text',
+             'semantic_density': 0.5, 'embedding': [value] * DIMENSION} for i in range(count)]
+
+
+def _live(path):
+    snapshot = ChunkSnapshot(path)
+    return dict(zip(snapshot.chunk_ids, snapshot.embeddings[:, 0].tolist()))
+
+
+def test_compact_keeps_latest_rows(tmp_path):
+    store = ChunkSnapshotStore(str(tmp_path), DIMENSION)
+    store.append_document('a', _rows('a', 2, 1.0))
+    store.append_document('b', _rows('b', 2, 1.0))
+    store.append_document('a', _rows('a', 1, 2.0))
+    store.remove_documents(['b'])
+
+    assert store.compact()
+    snapshot = ChunkSnapshot(str(tmp_path))
+    assert len(snapshot.segments) == 1
+    assert _live(str(tmp_path)) == {'a_0': 2.0}
+
+
+def test_compact_keeps_segments_appended_while_it_runs(tmp_path):
+    path = str(tmp_path)
+    store = ChunkSnapshotStore(path, DIMENSION)
+    store.append_document('a', _rows('a', 2, 1.0))
+
+    class Racing(ChunkSnapshotStore):
+        def new_segment(self):
+            writer = super().new_segment()
+            # Another worker publishes after compaction has read the manifest
+            ChunkSnapshotStore(path, DIMENSION).append_document('a', _rows('a', 1, 3.0))
+            ChunkSnapshotStore(path, DIMENSION).append_document('c', _rows('c', 1, 1.0))
+            return writer
+
+    Racing(path, DIMENSION).compact()
+
+    snapshot = ChunkSnapshot(path)
+    assert [entry['documents'] for entry in snapshot.manifest['segments']] == [None, ['a'], ['c']]
+    assert _live(path) == {'a_0': 3.0, 'c_0': 1.0}
+
+
+def test_compact_skips_when_another_is_running(tmp_path):
+    store = ChunkSnapshotStore(str(tmp_path), DIMENSION)
+    store.append_document('a', _rows('a', 1, 1.0))
+    with ChunkSnapshotStore(str(tmp_path), DIMENSION).compacting():
+        assert not store.compact(wait=False)
+
+
+def _ingest(path, worker):
+    store = ChunkSnapshotStore(path, DIMENSION, max_segments=4)
+    for i in range(10):
+        store.append_document(f'w{worker}_d{i}', _rows(f'w{worker}_d{i}', 2, float(worker)))
+        if i % 3 == 0:
+            store.compact()
+
+
+def test_concurrent_appends_and_compactions_lose_nothing(tmp_path):
+    path = str(tmp_path)
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(_ingest, [path] * 4, range(4)))
+    ChunkSnapshotStore(path, DIMENSION).compact()
+
+    live = _live(path)
+    assert len(live) == 4 * 10 * 2
+    assert all(np.isclose(value, float(chunk_id[1])) for chunk_id, value in live.items())
@@ -0,0 +1,135 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from community_engine import CommunityEngine, EntityGraph, modularity
+from community_maintenance import (CommunityMaintainer, assign_by_modularity_gain, modularity_after_placement,
+                                   save_community_state)
+
+# Three cliques of 6 (communities 0-2), weakly chained, plus four new entities: three
+# joining clique 0, one hanging off clique 2
+CLIQUES = [range(0, 6), range(6, 12), range(12, 18)]
+NEW = [18, 19, 20, 21]
+
+
+def _full_graph():
+    edges = []
+    for clique in CLIQUES:
+        edges += [(a, b, 5.0) for a, b in itertools.combinations(clique, 2)]
+    edges += [(5, 6, 2.0), (11, 12, 2.0)]
+    edges += [(18, 0, 4.0), (18, 1, 4.0), (19, 18, 3.0), (19, 2, 3.0), (20, 3, 2.0), (21, 17, 2.0)]
+    src, dst, weight = (np.array(values) for values in zip(*edges))
+    # Neo4j ids differ from node indices
+    return EntityGraph(node_ids=np.arange(22, dtype=np.int64) * 10, src=src.astype(np.int32),
+                       dst=dst.astype(np.int32), weight=weight.astype(np.float64))
+
+
+def _stored_membership():
+    membership = np.full(22, -1, dtype=np.int64)
+    for community, clique in enumerate(CLIQUES):
+        membership[list(clique)] = community
+    return membership
+
+
+class FakeEngine(CommunityEngine):
+    """Serves RELATED_TO subgraphs of an in-memory graph and records the community writes"""
+
+    def __init__(self, graph, membership):
+        super().__init__(driver=None, workers=1)
+        self.full, self.stored = graph, membership
+        self.written, self.loaded = {}, []
+
+    def load_subgraph(self, entity_ids, min_strength=2):
+        wanted = np.isin(self.full.node_ids, entity_ids)
+        mask = wanted[self.full.src] | wanted[self.full.dst]
+        nodes = np.unique(np.concatenate([self.full.src[mask], self.full.dst[mask]]))
+        index = np.full(self.full.num_nodes, -1)
+        index[nodes] = np.arange(len(nodes))
+        self.loaded.append(len(nodes))
+        graph = EntityGraph(self.full.node_ids[nodes], index[self.full.src[mask]].astype(np.int32),
+                            index[self.full.dst[mask]].astype(np.int32), self.full.weight[mask])
+        return graph, self.stored[nodes].copy()
+
+    def write_communities(self, graph, partition, metrics, nodes=None):
+        for i in nodes:
+            self.written[int(graph.node_ids[i])] = {name: metrics[name][i] for name in
+                                                    ('community_id', 'community_size', 'degree_centrality',
+                                                     'betweenness_centrality', 'coherence', 'density',
+                                                     'connected_communities')}
+        return len(nodes)
+
+
+class FakeMaintainer(CommunityMaintainer):
+    def __init__(self, engine, state_file):
+        super().__init__(engine, state_file=state_file)
+        self.bridges = {}
+
+    def changed_entities(self, since, min_strength=2):
+        return self.engine.full.node_ids[self.engine.stored < 0].tolist()
+
+    def community_members(self, communities):
+        return self.engine.full.node_ids[np.isin(self.engine.stored, communities)].tolist()
+
+    def graph_totals(self, min_strength=2):
+        graph, membership = self.engine.full, self.engine.stored
+        strength = np.bincount(graph.src, weights=graph.weight, minlength=graph.num_nodes) + \
+            np.bincount(graph.dst, weights=graph.weight, minlength=graph.num_nodes)
+        assigned = membership >= 0
+        same = membership[graph.src] == membership[graph.dst]
+        return {'total_weight': graph.weight.sum(),
+                'internal_weight': graph.weight[same & assigned[graph.src]].sum(),
+                'community_strength': np.bincount(membership[assigned], weights=strength[assigned]),
+                'num_nodes': graph.num_nodes}
+
+    def _write_bridge_status(self, graph, metrics, nodes):
+        for i in nodes:
+            self.bridges[int(graph.node_ids[i])] = int(metrics['connected_communities'][i])
+
+
+def test_placement_on_a_subgraph_matches_the_full_graph():
+    full, stored = _full_graph(), _stored_membership()
+    engine = FakeEngine(full, stored)
+    maintainer = FakeMaintainer(engine, None)
+    totals = maintainer.graph_totals()
+
+    graph, membership = engine.load_subgraph(maintainer.changed_entities(0))
+    new_nodes = np.flatnonzero(membership < 0)
+    placed = assign_by_modularity_gain(graph, membership, new_nodes, total_weight=totals['total_weight'],
+                                       community_strength=totals['community_strength'])
+    expected = assign_by_modularity_gain(full, stored, np.array(NEW))
+
+    assert dict(zip(graph.node_ids[new_nodes].tolist(), placed[new_nodes].tolist())) == \
+        dict(zip(full.node_ids[NEW].tolist(), expected[NEW].tolist()))
+    assert modularity_after_placement(graph, placed, new_nodes, totals) == pytest.approx(modularity(full, expected))
+
+
+def test_update_loads_only_affected_communities_and_matches_full_metrics(tmp_path):
+    full, stored = _full_graph(), _stored_membership()
+    state_file = str(tmp_path / 'community_state.json')
+    save_community_state({'last_run': 0, 'resolution': 1.0, 'algorithm': 'louvain',
+                          'baseline_modularity': modularity(full, np.where(stored < 0, 3, stored)),
+                          'incremental_nodes': 0}, state_file)
+    engine = FakeEngine(full, stored)
+    maintainer = FakeMaintainer(engine, state_file)
+
+    summary = maintainer.update(started_at=1)
+
+    membership = assign_by_modularity_gain(full, stored, np.array(NEW))
+    metrics = engine.community_metrics(full, membership)
+    affected = set(membership[NEW].tolist())
+    assert summary['new_entities'] == 4
+    assert summary['affected_communities'] == len(affected)
+    assert summary['modularity'] == pytest.approx(modularity(full, membership))
+    # Clique 1 is not affected: only its two members bordering cliques 0 and 2 are loaded
+    assert affected == {0, 2}
+    assert max(engine.loaded) == full.num_nodes - 4
+
+    expected = {int(full.node_ids[i]) for i in np.flatnonzero(np.isin(membership, list(affected)))}
+    assert set(engine.written) == expected
+    for node_id, written in engine.written.items():
+        i = node_id // 10
+        for name, value in written.items():
+            assert value == pytest.approx(metrics[name][i]), (node_id, name)
+    # Every neighbour of a new entity joined an affected community, so no bridge-only writes
+    assert maintainer.bridges == {}
@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+import build_entity_relationships
+from build_entity_relationships import build_entity_relationships as build, save_state
+from cooccurrence import cooccurrence_edges
+
+
+class FakeSession:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        return self
+
+    def single(self):
+        return {"now": 2000}
+
+
+class FakeDriver:
+    def session(self, **kwargs):
+        return FakeSession()
+
+    def close(self):
+        pass
+
+
+class FakeBuilder:
+    """Computes the edges an update would write from a fixed incidence matrix"""
+    calls = []
+    X = sparse.csr_matrix(np.array([[1, 1, 1, 0], [1, 1, 0, 1], [1, 1, 1, 1], [0, 1, 1, 1]], dtype=np.float32))
+
+    def __init__(self, driver, batch_size=5000):
+        pass
+
+    def update(self, since, **parameters):
+        FakeBuilder.calls.append(('update', parameters))
+        FakeBuilder.edges = cooccurrence_edges(self.X, **parameters)
+        return len(FakeBuilder.edges['a'])
+
+    def build(self, **parameters):
+        FakeBuilder.calls.append(('build', parameters))
+        return 0
+
+    def statistics(self):
+        return {'total_relationships': 0, 'min_strength': 0, 'max_strength': 0, 'avg_strength': 0}
+
+
+@pytest.fixture
+def state_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_entity_relationships.GraphDatabase, 'driver', lambda *args, **kwargs: FakeDriver())
+    monkeypatch.setattr(build_entity_relationships, 'CooccurrenceBuilder', FakeBuilder)
+    FakeBuilder.calls = []
+    path = str(tmp_path / 'cooccurrence_state.json')
+    save_state(path, {'last_run': 1000, 'min_count': 1, 'weighting': 'pmi', 'top_k': 1})
+    return path
+
+
+def test_incremental_run_uses_the_recorded_parameters(state_file):
+    build('bolt://unused', 'neo4j', 'unused', incremental=True, state_file=state_file)
+
+    assert FakeBuilder.calls == [('update', {'min_count': 1, 'weighting': 'pmi', 'top_k': 1})]
+    pmi = cooccurrence_edges(FakeBuilder.X, min_count=1, weighting='pmi', top_k=1)
+    counts = cooccurrence_edges(FakeBuilder.X)
+    for key in ('a', 'b', 'weight'):
+        np.testing.assert_array_equal(FakeBuilder.edges[key], pmi[key])
+    assert len(pmi['a']) != len(counts['a']) or not np.array_equal(pmi['weight'], counts['weight'])
+    with open(state_file) as f:
+        assert json.load(f) == {'last_run': 2000, 'min_count': 1, 'weighting': 'pmi', 'top_k': 1}
+
+
+def test_incremental_run_refuses_different_parameters(state_file):
+    with pytest.raises(ValueError, match="weighting='count'"):
+        build('bolt://unused', 'neo4j', 'unused', weighting='count', incremental=True, state_file=state_file)
+    assert FakeBuilder.calls == []
+
+    # Repeating the recorded value is fine
+    build('bolt://unused', 'neo4j', 'unused', weighting='pmi', incremental=True, state_file=state_file)
+    assert FakeBuilder.calls[0][0] == 'update'
+
+
+def test_full_build_takes_given_parameters_and_defaults(state_file):
+    build('bolt://unused', 'neo4j', 'unused', top_k=50, state_file=state_file)
+
+    assert FakeBuilder.calls == [('build', {'min_count': 2, 'weighting': 'count', 'top_k': 50})]
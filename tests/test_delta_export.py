@@ -0,0 +1,254 @@
+"""Delta export -> bootstrap replay against a small in-memory stand-in for Neo4j"""
+
+import re
+
+import pytest
+
+from bootstrap_neo4j import Neo4jBootstrapper
+from export_neo4j import Neo4jExporter, read_export_records
+
+
+class Graph:
+    def __init__(self):
+        self.nodes = []          # {'labels': [...], 'props': {...}}
+        self.rels = []           # {'type', 'start', 'end', 'props'} with node dicts as endpoints
+        self.tombstones = []
+
+    def node(self, *labels, **props):
+        node = {'labels': list(labels), 'props': props}
+        self.nodes.append(node)
+        return node
+
+    def rel(self, start, rel_type, end, **props):
+        rel = {'type': rel_type, 'start': start, 'end': end, 'props': props}
+        self.rels.append(rel)
+        return rel
+
+    def find(self, label, key, value):
+        return [n for n in self.nodes if label in n['labels'] and n['props'].get(key) == value]
+
+
+class Result:
+    def __init__(self, rows=(), counters=None):
+        self.rows = list(rows)
+        self.counters = type('Counters', (), counters or {})()
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def single(self):
+        return self.rows[0] if self.rows else None
+
+    def value(self):
+        return [next(iter(row.values())) for row in self.rows]
+
+    def data(self):
+        return self.rows
+
+    def consume(self):
+        return self
+
+
+class Record(dict):
+    def data(self):
+        return dict(self)
+
+
+def _projection(node):
+    return {'id': node['props'].get('id'), 'key': node['props'].get('key')}
+
+
+class Session:
+    """Answers the statements the exporter and bootstrapper issue"""
+
+    def __init__(self, graph, now):
+        self.graph = graph
+        self.now = now
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, work):
+        return work(self)
+
+    def run(self, query, parameters=None, **params):
+        params = {**(parameters or {}), **params}
+        graph = self.graph
+        if 'RETURN timestamp() as now' in query:
+            return Result([Record(now=self.now)])
+        if 'MATCH (t:Tombstone)' in query:
+            return Result([Record(relationship=t.get('relationship'), label=t.get('label'), id=t.get('id'),
+                                  direction=t.get('direction'), deleted_at=t['deleted_at'])
+                           for t in graph.tombstones if t['deleted_at'] >= params['since']])
+        if 'db.relationshipTypes' in query:
+            return Result([Record(relationshipType=t) for t in sorted({r['type'] for r in graph.rels})])
+        match = re.search(r'MATCH \(n:`(\w+)`\)\s+WHERE (.*)\n', query)
+        if match:
+            label, stamps = match.group(1), re.findall(r'n\.(\w+) >= \$since', match.group(2))
+            return Result([Record(labels=n['labels'], properties=n['props']) for n in graph.nodes
+                           if label in n['labels'] and any(n['props'].get(s, -1) >= params['since'] for s in stamps)])
+        match = re.search(r'MATCH \(a\)-\[r:`(\w+)`\]->\(b\)', query)
+        if match:
+            return Result([Record(properties=r['props'], start_labels=r['start']['labels'],
+                                  start_key=_projection(r['start']), end_labels=r['end']['labels'],
+                                  end_key=_projection(r['end']))
+                           for r in graph.rels
+                           if r['type'] == match.group(1) and r['props'].get('updated_at', -1) >= params['since']])
+        return self._write(query, params)
+
+    def _write(self, query, params):
+        graph, rows = self.graph, params.get('rows', [])
+        match = re.search(r'MATCH \(n:`(\w+)` \{`?(\w+)`?: row\.id\}\)-\[r:`(\w+)`\](->|-)\(\)\s+DELETE r', query)
+        if match:
+            label, key, rel_type, arrow = match.groups()
+            nodes = [n for row in rows for n in graph.find(label, key, row['id'])]
+            doomed = [r for r in graph.rels if r['type'] == rel_type and
+                      any(r['start'] is n or (arrow == '-' and r['end'] is n) for n in nodes)]
+            graph.rels = [r for r in graph.rels if all(r is not d for d in doomed)]
+            return Result(counters={'relationships_deleted': len(doomed)})
+        match = re.search(r'MATCH \(\)-\[r:`(\w+)`\]->\(\)', query)
+        if match:
+            doomed = [r for r in graph.rels if r['type'] == match.group(1)]
+            graph.rels = [r for r in graph.rels if r['type'] != match.group(1)]
+            return Result(counters={'relationships_deleted': len(doomed)})
+        match = re.search(r'MATCH \(n:`(\w+)` \{id: row\.id\}\)\s+DETACH DELETE n', query)
+        if match:
+            doomed = [n for row in rows for n in graph.find(match.group(1), 'id', row['id'])]
+            graph.nodes = [n for n in graph.nodes if all(n is not d for d in doomed)]
+            graph.rels = [r for r in graph.rels if all(r['start'] is not d and r['end'] is not d for d in doomed)]
+            return Result(counters={'nodes_deleted': len(doomed)})
+        match = re.search(r'MERGE \(n:`(\w+)` \{`(\w+)`: row\.key\.`\w+`\}\)', query)
+        if match:
+            label, key = match.groups()
+            extra = re.findall(r':`(\w+)`', query.split('SET n = row.properties')[1])
+            for row in rows:
+                found = graph.find(label, key, row['key'][key])
+                node = found[0] if found else graph.node(label)
+                node['props'] = dict(row['properties'])
+                node['labels'] = list(dict.fromkeys(node['labels'] + extra))
+            return Result(counters={'nodes_created': 0})
+        match = re.search(r'MATCH \(a:`(\w+)` \{`(\w+)`: row\.start\.`\w+`\}\)\s+MATCH \(b:`(\w+)` \{`(\w+)`: '
+                          r'row\.end\.`\w+`\}\)\s+MERGE \(a\)-\[r:`(\w+)`(?: \{(.*?)\})?\]->\(b\)\s+SET r = row\.properties',
+                          query)
+        if match:
+            start_label, start_key, end_label, end_key, rel_type, identity = match.groups()
+            identity_keys = re.findall(r'`(\w+)`: row\.properties', identity or '')
+            for row in rows:
+                a = graph.find(start_label, start_key, row['start'][start_key])[0]
+                b = graph.find(end_label, end_key, row['end'][end_key])[0]
+                found = [r for r in graph.rels if r['type'] == rel_type and r['start'] is a and r['end'] is b
+                         and all(r['props'].get(k) == row['properties'][k] for k in identity_keys)]
+                rel = found[0] if found else graph.rel(a, rel_type, b)
+                rel['props'] = dict(row['properties'])
+            return Result(counters={'properties_set': len(rows)})
+        raise AssertionError(f"Unexpected statement: {query}")
+
+
+class Driver:
+    def __init__(self, graph, now=2000):
+        self.graph = graph
+        self.now = now
+
+    def session(self, **kwargs):
+        return Session(self.graph, self.now)
+
+    def close(self):
+        pass
+
+
+def _base_graph():
+    graph = Graph()
+    doc = graph.node('Document', id='doc', updated_at=100)
+    chunk = graph.node('Chunk', id='doc_c1', updated_at=100)
+    other = graph.node('Chunk', id='doc_c2', updated_at=100)
+    hub = graph.node('Entity', key='organization:westpac', text='Westpac', updated_at=100)
+    rate = graph.node('Entity', key='concept:rate', text='rate', updated_at=100)
+    graph.rel(doc, 'HAS_CHUNK', chunk, updated_at=100)
+    graph.rel(doc, 'HAS_CHUNK', other, updated_at=100)
+    graph.rel(chunk, 'CONTAINS_ENTITY', hub, start_char=0, updated_at=100)
+    graph.rel(chunk, 'CONTAINS_ENTITY', hub, start_char=40, updated_at=100)
+    graph.rel(hub, 'RELATED_TO', rate, strength=2, updated_at=100)
+    graph.rel(chunk, 'SIMILAR_TO', other, score=0.2, updated_at=100)
+    return graph
+
+
+def _copy(graph):
+    copy = Graph()
+    mapping = {}
+    for node in graph.nodes:
+        mapping[id(node)] = copy.node(*node['labels'], **node['props'])
+    for rel in graph.rels:
+        copy.rel(mapping[id(rel['start'])], rel['type'], mapping[id(rel['end'])], **rel['props'])
+    return copy
+
+
+def _edges(graph):
+    def key(node):
+        return node['props'].get('id') or node['props'].get('key')
+    return sorted((key(r['start']), r['type'], key(r['end']),
+                   tuple(sorted((k, v) for k, v in r['props'].items() if k != 'updated_at')))
+                  for r in graph.rels)
+
+
+@pytest.fixture
+def delta(tmp_path):
+    """A live graph changed after `since` = 1000, its delta file and a restored copy of the base"""
+    live = _base_graph()
+    restored = _copy(live)
+
+    hub = live.find('Entity', 'key', 'organization:westpac')[0]
+    rate = live.find('Entity', 'key', 'concept:rate')[0]
+    chunk, other = live.find('Chunk', 'id', 'doc_c1')[0], live.find('Chunk', 'id', 'doc_c2')[0]
+    # A hub entity mentioned again (updated_at moves) must not drag all its edges along
+    hub['props']['updated_at'] = 1500
+    # Relationship-only changes: re-weighted co-occurrence edge, replaced SIMILAR_TO edges
+    next(r for r in live.rels if r['type'] == 'RELATED_TO')['props'].update(strength=5, updated_at=1500)
+    live.tombstones.append({'relationship': 'SIMILAR_TO', 'label': 'Chunk', 'id': 'doc_c1',
+                            'direction': 'both', 'deleted_at': 1200})
+    live.rels = [r for r in live.rels if r['type'] != 'SIMILAR_TO']
+    live.rel(other, 'SIMILAR_TO', chunk, score=0.4, updated_at=1300)
+    # Community writes stamp community_updated_at only
+    rate['props'].update(community_id=7, community_updated_at=1600)
+    # A node that cannot be keyed
+    live.node('Entity', text='keyless', updated_at=1700)
+
+    exporter = Neo4jExporter('bolt://localhost:7687', 'neo4j', 'unused', workers=1, page_size=100)
+    exporter.close()
+    exporter.driver = Driver(live)
+    path = str(tmp_path / 'neo4j_delta.ndjson.gz')
+    exporter.export_delta(path, since=1000)
+    return live, restored, list(read_export_records(path)), path
+
+
+def test_delta_contains_only_changed_records(delta):
+    _, _, records, _ = delta
+    kinds = [record['record'] for record in records]
+    assert kinds[0] == 'metadata' and kinds[-1] == 'statistics'
+
+    nodes = sorted(record['key']['key'].get('key') for record in records if record['record'] == 'node')
+    assert nodes == ['concept:rate', 'organization:westpac']
+    relationships = sorted((r['type'], r['start']['key'].get('id') or r['start']['key'].get('key'))
+                           for r in records if r['record'] == 'relationship')
+    assert relationships == [('RELATED_TO', 'organization:westpac'), ('SIMILAR_TO', 'doc_c2')]
+    assert [r['relationship'] for r in records if r['record'] == 'tombstone'] == ['SIMILAR_TO']
+    assert records[-1]['skipped_nodes'] == 1
+
+
+def test_delta_replay_matches_live_graph(delta):
+    live, restored, _, path = delta
+    bootstrapper = Neo4jBootstrapper('bolt://localhost:7687', 'neo4j', 'unused', workers=1, batch_size=100)
+    bootstrapper.close()
+    bootstrapper.driver = Driver(restored)
+
+    assert bootstrapper.apply_delta(path)
+    assert not bootstrapper.import_stats['errors']
+    assert _edges(restored) == _edges(live)
+
+    # Replaying the same delta again changes nothing (no duplicated relationships)
+    assert bootstrapper.apply_delta(path)
+    assert _edges(restored) == _edges(live)
+    rate = restored.find('Entity', 'key', 'concept:rate')[0]
+    assert rate['props']['community_id'] == 7
@@ -0,0 +1,33 @@
+import pytest
+
+from entity_keys import entity_key
+from numeric_facts import canonical_product
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('bonus', 'bonus'),
+    ('Bonus Saver', 'bonus saver'),
+    ('iSaver Plus', 'isaver plus'),
+    ('plus', 'plus'),
+    ('Status', 'status'),
+    ('Westpac Business', 'westpac business'),
+    ('Term Deposits', 'term deposit'),
+    ('term  deposit', 'term deposit'),
+    ('FX Swaps', 'fx swap'),
+    ('Foreign Exchange Options', 'foreign exchange option'),
+    ('Bank Guarantees', 'bank guarantee'),
+    ('Facilities', 'facility'),
+    ('Business Access', 'business access'),
+])
+def test_canonical_product(text, expected):
+    assert canonical_product(text) == expected
+
+
+def test_product_aliases_and_plurals_share_a_key():
+    assert entity_key('TD', 'PRODUCT') == entity_key('Term Deposits', 'PRODUCT') == 'PRODUCT|term deposit'
+    assert entity_key('FXO', 'PRODUCT') == entity_key('foreign exchange options', 'PRODUCT')
+
+
+def test_only_products_are_singularised():
+    assert entity_key('Westpac Banking Corporation', 'ORG') == 'ORG|westpac banking corporation'
+    assert entity_key('Fees', 'CONCEPT') == 'CONCEPT|fees'
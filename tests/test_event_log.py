@@ -0,0 +1,57 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from event_log import IngestionEventLog
+
+
+def _legacy_errors(path, count):
+    entries = [{'document_id': f'doc-{i}', 'error_type': 'ValueError', 'timestamp': '2025-01-01T00:00:00',
+                'resolved': i == 0, 'resolution': 'reingested', 'resolved_timestamp': '2025-01-02T00:00:00'}
+               for i in range(count)]
+    with open(path, 'w') as f:
+        json.dump(entries, f)
+
+
+def _import(db_path, json_path):
+    return IngestionEventLog(db_path).import_json(json_path, 'error')
+
+
+def test_import_json_once(tmp_path):
+    db_path, json_path = str(tmp_path / 'events.db'), str(tmp_path / 'errors.json')
+    _legacy_errors(json_path, 3)
+    log = IngestionEventLog(db_path)
+
+    assert log.import_json(json_path, 'error') == 3
+    assert log.import_json(json_path, 'error') == 0
+    assert not os.path.exists(json_path)
+    assert os.path.exists(json_path + '.imported')
+    assert len(log.events(kind='error')) == 3
+    assert len(log.unresolved_errors()) == 2
+
+
+def test_import_json_missing_file(tmp_path):
+    log = IngestionEventLog(str(tmp_path / 'events.db'))
+    assert log.import_json(str(tmp_path / 'absent.json'), 'error') == 0
+
+
+def test_concurrent_import_json_imports_once(tmp_path):
+    db_path, json_path = str(tmp_path / 'events.db'), str(tmp_path / 'errors.json')
+    _legacy_errors(json_path, 50)
+    IngestionEventLog(db_path)
+
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        imported = list(executor.map(_import, [db_path] * 8, [json_path] * 8))
+
+    assert sorted(imported) == [0] * 7 + [50]
+    assert len(IngestionEventLog(db_path).events(kind='error')) == 50
+
+
+def test_invalid_json_is_left_in_place(tmp_path):
+    json_path = str(tmp_path / 'errors.json')
+    with open(json_path, 'w') as f:
+        f.write('[{')
+    log = IngestionEventLog(str(tmp_path / 'events.db'))
+
+    assert log.import_json(json_path, 'error') == 0
+    assert os.path.exists(json_path)
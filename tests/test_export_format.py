@@ -0,0 +1,40 @@
+import os
+
+from bootstrap_neo4j import find_latest_export
+from export_neo4j import Neo4jExporter
+
+
+def _exporter():
+    return Neo4jExporter('bolt://localhost:7687', 'neo4j', 'unused', workers=1, page_size=100)
+
+
+def test_only_embedding_properties_are_packed():
+    exporter = _exporter()
+    floats = [0.1 * i for i in range(64)]
+
+    assert exporter._serialize_value(floats, 'embedding')['dtype'] == 'float32'
+    assert exporter._serialize_value(floats, 'scores') == {
+        '_type': 'vector', 'values': floats, 'dimension': 64}
+    exporter.close()
+
+
+def _export(backup_dir, name, link, mtime):
+    path = os.path.join(backup_dir, name)
+    open(path, 'wb').close()
+    os.utime(path, (mtime, mtime))
+    os.symlink(name, os.path.join(backup_dir, link))
+
+
+def test_latest_export_prefers_newer_gz_over_older_zst(tmp_path):
+    _export(tmp_path, 'neo4j_export_20250701_120000.ndjson.zst', 'latest_export.ndjson.zst', 2_000_000_000)
+    _export(tmp_path, 'neo4j_export_20250702_120000.ndjson.gz', 'latest_export.ndjson.gz', 1_000_000_000)
+
+    assert find_latest_export(str(tmp_path)) == os.path.join(tmp_path, 'latest_export.ndjson.gz')
+
+
+def test_latest_export_prefers_zst_on_a_tie(tmp_path):
+    _export(tmp_path, 'neo4j_export_20250701_120000.ndjson.zst', 'latest_export.ndjson.zst', 1_000_000_000)
+    _export(tmp_path, 'neo4j_export_20250701_120000.ndjson.gz', 'latest_export.ndjson.gz', 1_000_000_000)
+
+    assert find_latest_export(str(tmp_path)) == os.path.join(tmp_path, 'latest_export.ndjson.zst')
+    assert find_latest_export(str(tmp_path / 'missing')) is None
@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ingestion_profiler import DocumentProfile, IngestionReport, profile_stage
+
+
+def _spin(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def test_stage_cpu_includes_pool_children():
+    with DocumentProfile('doc') as profile:
+        with profile_stage('ocr', items=2):
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                list(executor.map(_spin, [0.3, 0.3]))
+
+    stats = profile.to_dict()['stages']['ocr']
+    assert stats['items'] == 2
+    assert stats['cpu_s'] >= 0.5
+    assert profile.cpu >= 0.5
+
+
+def _result(document_id, status, fail_in=None):
+    """Shaped like process_single_pdf: failures are caught and returned with the profile attached"""
+    with DocumentProfile(document_id) as profile:
+        try:
+            with profile_stage('pdf_parse', items=1):
+                _spin(0.01)
+            if fail_in:
+                with profile_stage(fail_in):
+                    raise RuntimeError('boom')
+            result = {'status': status, 'document_id': document_id}
+        except RuntimeError as e:
+            result = {'status': 'error', 'document_id': document_id, 'error': str(e)}
+    result['profile'] = profile.to_dict()
+    return result
+
+
+def test_report_includes_failed_documents():
+    report = IngestionReport()
+    report.add(_result('ok', 'success'))
+    report.add(_result('broken', 'success', fail_in='neo4j_write'))
+    report.add(_result('excluded', 'skipped'))
+
+    summary = report.summary()
+    assert summary['documents'] == 2
+    assert {d['document_id']: d['status'] for d in summary['most_expensive']} == {'ok': 'success', 'broken': 'error'}
+    assert summary['stages']['neo4j_write']['documents'] == 1
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from load_generator import MAX_ERROR_RATE, LoadGenerator, Operation, Phase, PhaseResult
+
+
+class FlakyGenerator(LoadGenerator):
+    """Answers after `delay`; every `fail_every`th request times out after `delay`"""
+
+    def __init__(self, delay: float, fail_every: int):
+        super().__init__(["question"], [Operation("hybrid")], concurrency=8)
+        self.delay = delay
+        self.fail_every = fail_every
+        self.sent = 0
+
+    async def _search(self, operation, query):
+        self.sent += 1
+        failing = self.sent % self.fail_every == 0
+        await asyncio.sleep(self.delay)
+        if failing:
+            raise asyncio.TimeoutError()
+        return 1
+
+
+def test_failures_are_recorded_in_latency():
+    generator = FlakyGenerator(delay=0.05, fail_every=2)
+    result = asyncio.run(generator.run_phase(Phase("flaky", 1200, 0.5, profile="constant")))
+
+    assert result.errors == {"timeout": result.scheduled // 2}
+    assert result.latency.count == result.scheduled
+    assert result.ok_latency.count == result.ok == result.scheduled - result.scheduled // 2
+    assert result.latency.min >= 50_000
+
+    summary = result.to_dict()
+    assert summary["error_rate"] > MAX_ERROR_RATE
+    assert not summary["latency_met"]
+    assert not summary["throughput_met"]
+
+
+@pytest.mark.parametrize("phase, mean", [
+    (Phase("constant", 1000, 60), 1000),
+    (Phase("ramp", 1000, 60, "ramp", start_qpm=100), 550),
+    (Phase("ramp and hold", 1000, 120, "ramp", start_qpm=100, ramp_s=60), 775),
+    (Phase("long ramp", 1000, 60, "ramp", start_qpm=0, ramp_s=120), 250),
+    (Phase("step", 1000, 60, "step", start_qpm=200, steps=5), 600),
+])
+def test_mean_offered_rate(phase, mean):
+    assert phase.mean_rate_qpm == pytest.approx(mean)
+
+
+def test_ramp_throughput_is_judged_against_mean_offered_rate():
+    phase = Phase("ramp", 1000, 60, "ramp", start_qpm=100)
+    result = PhaseResult(phase, scheduled=550, ok=550, elapsed_s=60)
+
+    summary = result.to_dict()
+    assert summary["offered_qpm"] == 550
+    assert summary["throughput_met"]
@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+
+import pytest
+from neo4j.exceptions import ServiceUnavailable
+
+import metrics
+from metrics import ERRORS, neo4j_session, search_request
+
+
+class FailingDriver:
+    @contextmanager
+    def session(self, **kwargs):
+        yield self
+
+    def run(self, *args, **kwargs):
+        raise ServiceUnavailable("connection refused")
+
+
+@pytest.fixture(autouse=True)
+def reset_errors():
+    ERRORS.values.clear()
+    yield
+    ERRORS.values.clear()
+
+
+def _count(component, error):
+    return ERRORS.values.get((component, error), 0.0)
+
+
+def test_neo4j_error_in_search_is_counted_once():
+    with pytest.raises(ServiceUnavailable):
+        with search_request('hybrid'):
+            with neo4j_session(FailingDriver()) as session:
+                session.run("RETURN 1")
+
+    assert _count('neo4j', 'ServiceUnavailable') == 1.0
+    assert sum(ERRORS.values.values()) == 1.0
+
+
+def test_wrapped_neo4j_error_is_counted_once():
+    with pytest.raises(RuntimeError):
+        with search_request('vector'):
+            try:
+                with neo4j_session(FailingDriver()) as session:
+                    session.run("RETURN 1")
+            except ServiceUnavailable as e:
+                raise RuntimeError("search failed") from e
+
+    assert sum(ERRORS.values.values()) == 1.0
+    assert _count('neo4j', 'ServiceUnavailable') == 1.0
+
+
+def test_search_error_is_counted_by_root_cause():
+    with pytest.raises(ValueError):
+        with search_request('text'):
+            raise ValueError("bad query")
+
+    assert _count('search', 'ValueError') == 1.0
+    assert 'errors_total{component="search",error="ValueError"} 1.0' in metrics.REGISTRY.render()
+
+
+def test_neo4j_session_alone_counts_error():
+    with pytest.raises(ServiceUnavailable):
+        with neo4j_session(FailingDriver()) as session:
+            session.run("RETURN 1")
+
+    assert _count('neo4j', 'ServiceUnavailable') == 1.0
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+import build_related_chunks
+from build_related_chunks import build_related_chunks as build, save_state
+
+
+class FakeSession:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        return self
+
+    def single(self):
+        return {"now": 2000}
+
+
+class FakeDriver:
+    def session(self, **kwargs):
+        return FakeSession()
+
+    def close(self):
+        pass
+
+
+class FakeBuilder:
+    calls = []
+
+    def __init__(self, driver, snapshot_dir=None, batch_size=5000):
+        pass
+
+    def update(self, since, **parameters):
+        FakeBuilder.calls.append(('update', parameters))
+        return 0
+
+    def build(self, **parameters):
+        FakeBuilder.calls.append(('build', parameters))
+        return 0
+
+    def statistics(self):
+        return {'total_relationships': 0, 'min_score': 0, 'max_score': 0, 'avg_score': 0}
+
+
+@pytest.fixture
+def state_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(build_related_chunks.GraphDatabase, 'driver', lambda *args, **kwargs: FakeDriver())
+    monkeypatch.setattr(build_related_chunks, 'RelatedChunkBuilder', FakeBuilder)
+    FakeBuilder.calls = []
+    path = str(tmp_path / 'related_chunks_state.json')
+    save_state(path, {'last_run': 1000, 'top_k': 20, 'entity_weight': 0.8})
+    return path
+
+
+def test_incremental_run_uses_the_recorded_parameters(state_file):
+    build('bolt://unused', 'neo4j', 'unused', incremental=True, state_file=state_file)
+
+    assert FakeBuilder.calls == [('update', {'top_k': 20, 'entity_weight': 0.8})]
+    with open(state_file) as f:
+        assert json.load(f) == {'last_run': 2000, 'top_k': 20, 'entity_weight': 0.8}
+
+
+def test_incremental_run_refuses_different_parameters(state_file):
+    with pytest.raises(ValueError, match="top_k=10"):
+        build('bolt://unused', 'neo4j', 'unused', top_k=10, incremental=True, state_file=state_file)
+    assert FakeBuilder.calls == []
@@ -0,0 +1,72 @@
+import time
+
+import fitz
+import pytest
+
+from utils import robust_pdf_extractor
+from utils.robust_pdf_extractor import RobustPDFExtractor, process_pdf_parallel
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    """Four pages; page 2 is blank"""
+    doc = fitz.open()
+    for page_num in range(4):
+        page = doc.new_page()
+        if page_num != 2:
+            page.insert_text((72, 72), f"Page {page_num} text")
+    path = tmp_path / "sample.pdf"
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_blank_page_is_a_valid_empty_page(pdf_path):
+    result = RobustPDFExtractor().extract_from_pdf(pdf_path)
+
+    assert result.pages_processed == 4
+    assert result.empty_pages == [2]
+    assert set(result.page_methods.values()) == {"PyMuPDF"}
+    assert result.errors == []
+    assert "Page 3 text" in result.text
+
+
+def test_parallel_blank_page_skips_fallbacks(pdf_path):
+    result = process_pdf_parallel(pdf_path, max_workers=2)
+
+    assert result.pages_processed == 4
+    assert result.empty_pages == [2]
+    assert result.page_methods == {page_num: "PyMuPDF" for page_num in range(4)}
+    assert result.errors == []
+
+
+def test_empty_document_starts_no_workers(monkeypatch):
+    monkeypatch.setattr(fitz, "open", lambda *args: type("Doc", (), {
+        "__len__": lambda self: 0, "metadata": {}, "close": lambda self: None})())
+    monkeypatch.setattr(robust_pdf_extractor, "_start_shard", lambda *args: pytest.fail("worker started"))
+
+    result = process_pdf_parallel("empty.pdf", max_workers=4)
+
+    assert result.pages_processed == 0
+    assert not result.success
+
+
+def _hang_on_page_one(pdf_path, start_page, end_page, conn):
+    for page_num in range(start_page, end_page):
+        if page_num == 1:
+            time.sleep(60)
+        conn.send((page_num, f"Page {page_num} text", None, 0.0))
+    conn.close()
+
+
+def test_parallel_page_timeout_resumes_range(pdf_path, monkeypatch):
+    monkeypatch.setattr(robust_pdf_extractor, "_extract_page_range", _hang_on_page_one)
+
+    started = time.perf_counter()
+    result = process_pdf_parallel(pdf_path, max_workers=1, timeout_per_page=1)
+
+    assert time.perf_counter() - started < 10
+    assert "Page 1 timed out" in result.errors
+    assert result.page_methods[0] == result.page_methods[3] == "PyMuPDF"
+    assert result.page_methods[1] == "PDFPlumber"
+    assert "Page 1 text" in result.text
@@ -13,6 +13,7 @@ from pathlib import Path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from knowledge_ingestion_agent.enhanced_ingestion import EnhancedKnowledgeIngestion
+from knowledge_ingestion_agent.schema_manager import SchemaManager
 from neo4j import GraphDatabase
 
 def clear_existing_data(neo4j_uri, neo4j_user, neo4j_password):
@@ -34,36 +35,10 @@ def create_enhanced_indices(neo4j_uri, neo4j_user, neo4j_password):
     driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
     
     try:
-        with driver.session() as session:
-            # Create vector index with proper dimensions
-            session.run("""
-                CREATE VECTOR INDEX `chunk-embeddings` IF NOT EXISTS
-                FOR (c:Chunk) ON (c.embedding)
-                OPTIONS {indexConfig: {
-                    `vector.dimensions`: 384,
-                    `vector.similarity_function`: 'cosine'
-                }}
-            """)
-            
-            # Create additional indices for enhanced search
-            indices = [
-                "CREATE INDEX chunk_keywords IF NOT EXISTS FOR (c:Chunk) ON (c.keywords)",
-                "CREATE INDEX chunk_type IF NOT EXISTS FOR (c:Chunk) ON (c.chunk_type)",
-                "CREATE INDEX chunk_density IF NOT EXISTS FOR (c:Chunk) ON (c.semantic_density)",
-                "CREATE INDEX doc_title IF NOT EXISTS FOR (d:Document) ON (d.title)",
-                "CREATE INDEX doc_keywords IF NOT EXISTS FOR (d:Document) ON (d.keywords)",
-                "CREATE INDEX entity_text IF NOT EXISTS FOR (e:Entity) ON (e.text)",
-                "CREATE INDEX entity_type IF NOT EXISTS FOR (e:Entity) ON (e.type)"
-            ]
-            
-            for index_query in indices:
-                try:
-                    session.run(index_query)
-                    print(f"Created index: {index_query.split()[2]}")
-                except Exception as e:
-                    print(f"Index might already exist: {e}")
-            
-            print("All indices created successfully")
+        result = SchemaManager(driver).apply()
+        print(f"Applied {len(result['applied'])} indexes and constraints")
+        for name, error in result['failed'].items():
+            print(f"Index {name} skipped: {error}")
     
     finally:
         driver.close()
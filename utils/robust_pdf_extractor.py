@@ -7,11 +7,12 @@ import warnings
 import time
 import logging
 import re
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 import multiprocessing
-from dataclasses import dataclass
+from multiprocessing.connection import wait
+from dataclasses import dataclass, field
 
 # Suppress PyMuPDF warnings
 warnings.filterwarnings("ignore", message="Could get FontBBox")
@@ -35,6 +36,22 @@ class PDFExtractionResult:
     sections: Dict[str, str]
     tables: List[Any]
     success: bool
+    page_timings: Dict[int, float] = field(default_factory=dict)  # seconds spent per page
+    page_methods: Dict[int, str] = field(default_factory=dict)  # extractor that produced each page
+    empty_pages: List[int] = field(default_factory=list)  # parsed without a text layer (candidates for OCR)
+
+
+def _new_result() -> PDFExtractionResult:
+    """Create an empty extraction result."""
+    return PDFExtractionResult(
+        text="",
+        metadata={},
+        errors=[],
+        pages_processed=0,
+        sections={},
+        tables=[],
+        success=False
+    )
 
 
 class RobustPDFExtractor:
@@ -54,94 +71,118 @@ class RobustPDFExtractor:
         """
         Extract content from PDF with multiple fallback methods.
         Especially designed for problematic PDFs like annual reports.
+        PyMuPDF handles every page; the fallbacks only see pages it failed on.
         """
-        result = PDFExtractionResult(
-            text="",
-            metadata={},
-            errors=[],
-            pages_processed=0,
-            sections={},
-            tables=[],
-            success=False
-        )
+        result = _new_result()
         
         pdf_path = Path(pdf_path)
         if not pdf_path.exists():
             result.errors.append(f"File not found: {pdf_path}")
             return result
         
-        # Try multiple extraction methods in order of preference
+        texts: Dict[int, str] = {}
+        total_pages = self._extract_with_pymupdf(str(pdf_path), max_pages, texts, result)
+        if total_pages is None:
+            total_pages = self._count_pages(str(pdf_path), max_pages, result)
+        
+        failed_pages = [page_num for page_num in range(total_pages) if page_num not in texts]
+        if failed_pages:
+            self.extract_failed_pages(str(pdf_path), failed_pages, texts, result)
+        
+        self._finalise(result, texts, total_pages)
+        return result
+    
+    def extract_failed_pages(self, pdf_path: str, page_nums: List[int], 
+                             texts: Dict[int, str], result: PDFExtractionResult):
+        """Run the fallback extractors over only the given pages, in order of preference."""
         methods = [
-            ("PyMuPDF", self._extract_with_pymupdf),
             ("PDFPlumber", self._extract_with_pdfplumber),
             ("PyPDF2", self._extract_with_pypdf2),
             ("Chunked PyMuPDF", self._extract_with_pymupdf_chunks)
         ]
         
+        remaining = sorted(page_nums)
         for method_name, method in methods:
+            if not remaining:
+                break
+            
             try:
-                logger.info(f"Attempting extraction with {method_name}")
-                extracted = method(str(pdf_path), max_pages)
-                
-                if extracted and extracted.text.strip():
-                    result = extracted
-                    result.success = True
-                    logger.info(f"Successfully extracted with {method_name}")
-                    break
-                    
+                logger.info(f"Attempting extraction of {len(remaining)} page(s) with {method_name}")
+                method(pdf_path, remaining, texts, result)
             except Exception as e:
                 error_msg = f"{method_name} failed: {str(e)}"
                 result.errors.append(error_msg)
                 logger.warning(error_msg)
-                continue
+            
+            recovered = [page_num for page_num in remaining if page_num in texts]
+            if recovered:
+                logger.info(f"Recovered {len(recovered)} page(s) with {method_name}")
+            remaining = [page_num for page_num in remaining if page_num not in texts]
+        
+        if remaining:
+            result.errors.append(f"No text extracted from pages: {remaining}")
+    
+    def _finalise(self, result: PDFExtractionResult, texts: Dict[int, str], total_pages: int):
+        """Assemble page texts in order and post-process."""
+        result.text = "\n\n".join(texts[page_num] for page_num in range(total_pages)
+                                  if texts.get(page_num, "").strip())
+        result.pages_processed = len(texts)
+        result.empty_pages = [page_num for page_num in range(total_pages)
+                              if page_num in texts and not texts[page_num].strip()]
+        result.success = bool(result.text.strip())
         
         # Post-process text
         if result.text:
             result.text = self._clean_text(result.text)
             result.sections = self._extract_sections(result.text)
-        
-        return result
     
-    def _extract_with_pymupdf(self, pdf_path: str, max_pages: Optional[int] = None) -> PDFExtractionResult:
-        """Extract using PyMuPDF with timeout handling."""
-        result = PDFExtractionResult(
-            text="",
-            metadata={},
-            errors=[],
-            pages_processed=0,
-            sections={},
-            tables=[],
-            success=False
-        )
-        
+    def _record_page(self, page_num: int, page_text: Optional[str], method_name: str,
+                     started: float, texts: Dict[int, str], result: PDFExtractionResult):
+        """Store a page's text if it parsed (an empty page is valid) and accumulate the time spent on it."""
+        result.page_timings[page_num] = result.page_timings.get(page_num, 0.0) + time.perf_counter() - started
+        if page_text is not None:
+            texts[page_num] = page_text
+            result.page_methods[page_num] = method_name
+    
+    def _count_pages(self, pdf_path: str, max_pages: Optional[int], result: PDFExtractionResult) -> int:
+        """Get the page count when PyMuPDF can't open the document."""
+        try:
+            num_pages = len(PdfReader(pdf_path).pages)
+        except Exception as e:
+            result.errors.append(f"Page count error: {str(e)}")
+            return 0
+        return min(num_pages, max_pages) if max_pages else num_pages
+    
+    def _extract_with_pymupdf(self, pdf_path: str, max_pages: Optional[int], 
+                              texts: Dict[int, str], result: PDFExtractionResult) -> Optional[int]:
+        """Extract using PyMuPDF with timeout handling. Returns the page count, or None if the document won't open."""
         try:
             doc = fitz.open(pdf_path)
-            result.metadata = doc.metadata or {}
-            
-            total_pages = min(len(doc), max_pages) if max_pages else len(doc)
-            
-            for page_num in range(total_pages):
-                try:
-                    # Use ThreadPoolExecutor for timeout per page
-                    with ThreadPoolExecutor(max_workers=1) as executor:
-                        future = executor.submit(self._extract_page_pymupdf, doc, page_num)
-                        page_text = future.result(timeout=self.timeout_per_page)
-                        
-                        if page_text:
-                            result.text += page_text + "\n\n"
-                            result.pages_processed += 1
-                            
-                except TimeoutError:
-                    result.errors.append(f"Page {page_num} timed out")
-                except Exception as e:
-                    result.errors.append(f"Page {page_num}: {str(e)}")
-            
-            doc.close()
-            
         except Exception as e:
             result.errors.append(f"Document error: {str(e)}")
+            return None
         
-        return result
+        result.metadata = doc.metadata or {}
+        total_pages = min(len(doc), max_pages) if max_pages else len(doc)
+        
+        for page_num in range(total_pages):
+            started = time.perf_counter()
+            page_text = None
+            try:
+                # Use ThreadPoolExecutor for timeout per page
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    future = executor.submit(self._extract_page_pymupdf, doc, page_num)
+                    page_text = future.result(timeout=self.timeout_per_page)
+                    
+            except TimeoutError:
+                result.errors.append(f"Page {page_num} timed out")
+            except Exception as e:
+                result.errors.append(f"Page {page_num}: {str(e)}")
+            finally:
+                self._record_page(page_num, page_text, "PyMuPDF", started, texts, result)
+        
+        doc.close()
+        return total_pages
     
     def _extract_page_pymupdf(self, doc, page_num: int) -> str:
         """Extract text from a single page using PyMuPDF."""
@@ -174,131 +215,86 @@ class RobustPDFExtractor:
                 text += "\n"
         return text
     
-    def _extract_with_pymupdf_chunks(self, pdf_path: str, max_pages: Optional[int] = None) -> PDFExtractionResult:
-        """Extract PDF in chunks to handle large files."""
-        result = PDFExtractionResult(
-            text="",
-            metadata={},
-            errors=[],
-            pages_processed=0,
-            sections={},
-            tables=[],
-            success=False
-        )
+    def _extract_with_pymupdf_chunks(self, pdf_path: str, page_nums: List[int],
+                                     texts: Dict[int, str], result: PDFExtractionResult):
+        """Copy failed pages into small standalone documents and extract those."""
+        doc = fitz.open(pdf_path)
         
         try:
-            doc = fitz.open(pdf_path)
-            result.metadata = doc.metadata or {}
-            total_pages = min(len(doc), max_pages) if max_pages else len(doc)
-            
-            for start_page in range(0, total_pages, self.chunk_size):
-                end_page = min(start_page + self.chunk_size, total_pages)
+            for start in range(0, len(page_nums), self.chunk_size):
+                chunk_pages = page_nums[start:start + self.chunk_size]
                 
                 try:
                     # Create a new document with subset of pages
                     chunk_doc = fitz.open()
-                    chunk_doc.insert_pdf(doc, from_page=start_page, to_page=end_page-1)
+                    for page_num in chunk_pages:
+                        chunk_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
                     
-                    # Process chunk
-                    chunk_text = ""
-                    for page in chunk_doc:
+                    for offset, page_num in enumerate(chunk_pages):
+                        started = time.perf_counter()
+                        page_text = None
                         try:
-                            chunk_text += page.get_text() + "\n\n"
-                            result.pages_processed += 1
-                        except:
-                            continue
+                            page_text = chunk_doc[offset].get_text()
+                        except Exception as e:
+                            result.errors.append(f"Page {page_num}: {str(e)}")
+                        finally:
+                            self._record_page(page_num, page_text, "Chunked PyMuPDF", started, texts, result)
                     
-                    result.text += chunk_text
                     chunk_doc.close()
                     
-                    # Small delay between chunks
-                    time.sleep(0.1)
-                    
                 except Exception as e:
-                    result.errors.append(f"Chunk {start_page}-{end_page}: {str(e)}")
-            
+                    result.errors.append(f"Chunk {chunk_pages[0]}-{chunk_pages[-1]}: {str(e)}")
+        finally:
             doc.close()
-            
-        except Exception as e:
-            result.errors.append(f"Chunked extraction error: {str(e)}")
-        
-        return result
     
-    def _extract_with_pdfplumber(self, pdf_path: str, max_pages: Optional[int] = None) -> PDFExtractionResult:
-        """Extract using pdfplumber (good for tables)."""
-        result = PDFExtractionResult(
-            text="",
-            metadata={},
-            errors=[],
-            pages_processed=0,
-            sections={},
-            tables=[],
-            success=False
-        )
-        
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
+    def _extract_with_pdfplumber(self, pdf_path: str, page_nums: List[int],
+                                 texts: Dict[int, str], result: PDFExtractionResult):
+        """Extract the given pages using pdfplumber (good for tables)."""
+        with pdfplumber.open(pdf_path) as pdf:
+            if not result.metadata:
                 result.metadata = pdf.metadata or {}
-                total_pages = min(len(pdf.pages), max_pages) if max_pages else len(pdf.pages)
-                
-                for i in range(total_pages):
-                    try:
-                        page = pdf.pages[i]
-                        
-                        # Extract text
-                        page_text = page.extract_text()
-                        if page_text:
-                            result.text += page_text + "\n\n"
-                        
-                        # Extract tables
-                        tables = page.extract_tables()
-                        if tables:
-                            result.tables.extend(tables)
-                        
-                        result.pages_processed += 1
-                        
-                    except Exception as e:
-                        result.errors.append(f"Page {i}: {str(e)}")
-                        
-        except Exception as e:
-            result.errors.append(f"PDFPlumber error: {str(e)}")
-        
-        return result
-    
-    def _extract_with_pypdf2(self, pdf_path: str, max_pages: Optional[int] = None) -> PDFExtractionResult:
-        """Extract using PyPDF2 as fallback."""
-        result = PDFExtractionResult(
-            text="",
-            metadata={},
-            errors=[],
-            pages_processed=0,
-            sections={},
-            tables=[],
-            success=False
-        )
-        
-        try:
-            reader = PdfReader(pdf_path)
-            result.metadata = reader.metadata or {}
-            
-            total_pages = min(len(reader.pages), max_pages) if max_pages else len(reader.pages)
             
-            for i in range(total_pages):
+            for i in page_nums:
+                if i >= len(pdf.pages):
+                    continue
+                
+                started = time.perf_counter()
+                page_text = None
                 try:
-                    page = reader.pages[i]
+                    page = pdf.pages[i]
+                    
+                    # Extract text
                     page_text = page.extract_text()
                     
-                    if page_text:
-                        result.text += page_text + "\n\n"
-                        result.pages_processed += 1
-                        
+                    # Extract tables
+                    tables = page.extract_tables()
+                    if tables:
+                        result.tables.extend(tables)
+                    
                 except Exception as e:
                     result.errors.append(f"Page {i}: {str(e)}")
-                    
-        except Exception as e:
-            result.errors.append(f"PyPDF2 error: {str(e)}")
+                finally:
+                    self._record_page(i, page_text, "PDFPlumber", started, texts, result)
+    
+    def _extract_with_pypdf2(self, pdf_path: str, page_nums: List[int],
+                             texts: Dict[int, str], result: PDFExtractionResult):
+        """Extract the given pages using PyPDF2 as fallback."""
+        reader = PdfReader(pdf_path)
+        if not result.metadata:
+            result.metadata = reader.metadata or {}
         
-        return result
+        for i in page_nums:
+            if i >= len(reader.pages):
+                continue
+            
+            started = time.perf_counter()
+            page_text = None
+            try:
+                page_text = reader.pages[i].extract_text()
+            except Exception as e:
+                result.errors.append(f"Page {i}: {str(e)}")
+            finally:
+                self._record_page(i, page_text, "PyPDF2", started, texts, result)
     
     def _clean_text(self, text: str) -> str:
         """Clean extracted text."""
@@ -354,13 +350,88 @@ class RobustPDFExtractor:
         return sections
 
 
+def _shard_pages(num_pages: int, num_shards: int) -> List[Tuple[int, int]]:
+    """Split pages into contiguous [start, end) ranges of near-equal size."""
+    if num_pages <= 0:
+        return []
+    num_shards = max(1, min(num_shards, num_pages))
+    base, extra = divmod(num_pages, num_shards)
+    
+    shards = []
+    start = 0
+    for i in range(num_shards):
+        end = start + base + (1 if i < extra else 0)
+        shards.append((start, end))
+        start = end
+    return shards
+
+
+def _extract_page_range(pdf_path: str, start_page: int, end_page: int, conn):
+    """
+    Extract a contiguous page range in a worker process.
+    The document is opened once for the whole range. Each page's
+    (page_num, text, error, seconds) is sent as soon as it is done,
+    so the parent can time out a page that hangs.
+    """
+    try:
+        fitz.TOOLS.mupdf_display_errors(False)
+    except:
+        pass
+    
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        for page_num in range(start_page, end_page):
+            conn.send((page_num, None, f"Document error: {str(e)}", 0.0))
+        conn.close()
+        return
+    
+    try:
+        for page_num in range(start_page, end_page):
+            started = time.perf_counter()
+            try:
+                text = doc[page_num].get_text("text", flags=fitz.TEXT_PRESERVE_LIGATURES)
+                error = None
+            except Exception as e:
+                text, error = None, str(e)
+            conn.send((page_num, text, error, time.perf_counter() - started))
+    finally:
+        doc.close()
+        conn.close()
+
+
+def _start_shard(context, pdf_path: str, start_page: int, end_page: int) -> Dict[str, Any]:
+    """Start a worker process on [start_page, end_page) and return its progress record."""
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_extract_page_range, args=(pdf_path, start_page, end_page, sender),
+                              daemon=True)
+    process.start()
+    sender.close()
+    return {'process': process, 'conn': receiver, 'next': start_page, 'end': end_page,
+            'progress': time.perf_counter()}
+
+
+def _stop_shard(shard: Dict[str, Any]):
+    """Kill a shard's worker if it is still running and release its pipe."""
+    if shard['process'].is_alive():
+        shard['process'].terminate()
+    shard['process'].join()
+    shard['conn'].close()
+
+
 # Parallel processing helper for extremely large documents
-def process_pdf_parallel(pdf_path: str, max_workers: int = None) -> PDFExtractionResult:
-    """Process PDF using parallel page extraction."""
+def process_pdf_parallel(pdf_path: str, max_workers: int = None, timeout_per_page: int = 30) -> PDFExtractionResult:
+    """
+    Process PDF using page-range sharded parallel extraction.
+    Each worker opens the document once and extracts a contiguous range.
+    A page that takes longer than `timeout_per_page`, or crashes its worker,
+    is marked failed and the rest of its range goes to a new worker;
+    pages that fail are retried with the fallback extractors only.
+    """
     if max_workers is None:
         max_workers = multiprocessing.cpu_count()
     
-    extractor = RobustPDFExtractor()
+    extractor = RobustPDFExtractor(timeout_per_page=timeout_per_page)
     
     # First, get page count
     try:
@@ -371,42 +442,58 @@ def process_pdf_parallel(pdf_path: str, max_workers: int = None) -> PDFExtractio
     except:
         return extractor.extract_from_pdf(pdf_path)  # Fallback to sequential
     
-    # Prepare page extraction tasks
-    def extract_page(args):
-        pdf_path, page_num = args
-        try:
-            doc = fitz.open(pdf_path)
-            page = doc[page_num]
-            text = page.get_text()
-            doc.close()
-            return page_num, text, None
-        except Exception as e:
-            return page_num, "", str(e)
+    result = _new_result()
+    result.metadata = metadata
+    texts: Dict[int, str] = {}
     
-    # Process pages in parallel
-    texts = {}
-    errors = []
+    context = multiprocessing.get_context()
+    running = [_start_shard(context, pdf_path, start, end) for start, end in _shard_pages(num_pages, max_workers)]
     
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        args = [(pdf_path, i) for i in range(num_pages)]
-        
-        for page_num, text, error in executor.map(extract_page, args):
-            if error:
-                errors.append(f"Page {page_num}: {error}")
-            else:
-                texts[page_num] = text
+    def abandon(shard: Dict[str, Any], error: str):
+        """Give up on the shard's current page and hand the rest of its range to a new worker."""
+        _stop_shard(shard)
+        running.remove(shard)
+        page_num = shard['next']
+        result.page_timings[page_num] = time.perf_counter() - shard['progress']
+        result.errors.append(f"Page {page_num} {error}")
+        if page_num + 1 < shard['end']:
+            running.append(_start_shard(context, pdf_path, page_num + 1, shard['end']))
     
-    # Combine results
-    combined_text = "\n\n".join([texts.get(i, "") for i in range(num_pages)])
+    try:
+        while running:
+            deadline = min(shard['progress'] for shard in running) + timeout_per_page
+            ready = wait([shard['conn'] for shard in running], timeout=max(0.0, deadline - time.perf_counter()))
+            
+            for shard in list(running):
+                if shard['conn'] in ready:
+                    try:
+                        page_num, text, error, elapsed = shard['conn'].recv()
+                    except EOFError:
+                        abandon(shard, "crashed its worker")
+                        continue
+                    
+                    result.page_timings[page_num] = elapsed
+                    if error:
+                        result.errors.append(f"Page {page_num}: {error}")
+                    else:
+                        texts[page_num] = text
+                        result.page_methods[page_num] = "PyMuPDF"
+                    
+                    shard['next'] = page_num + 1
+                    shard['progress'] = time.perf_counter()
+                    if shard['next'] >= shard['end']:
+                        _stop_shard(shard)
+                        running.remove(shard)
+                elif time.perf_counter() - shard['progress'] >= timeout_per_page:
+                    abandon(shard, "timed out")
+    finally:
+        for shard in running:
+            _stop_shard(shard)
     
-    result = PDFExtractionResult(
-        text=combined_text,
-        metadata=metadata,
-        errors=errors,
-        pages_processed=len(texts),
-        sections={},
-        tables=[],
-        success=bool(combined_text.strip())
-    )
+    # Fallback extractors only see the pages that failed
+    failed_pages = [page_num for page_num in range(num_pages) if page_num not in texts]
+    if failed_pages:
+        extractor.extract_failed_pages(pdf_path, failed_pages, texts, result)
     
-    return result
\ No newline at end of file
+    extractor._finalise(result, texts, num_pages)
+    return result